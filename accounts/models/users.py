@@ -2,7 +2,6 @@ from typing import Iterable, Type
 
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, Permission
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinLengthValidator, RegexValidator
@@ -309,13 +308,13 @@ class AccountUser(UUIDPrimaryKey, ObjectHistoryTracker, AbstractUser):
     def prepare_for_import(self):
         """
         This method prepares the user instance for save, since import uses bulk_create, the
-        prerequisites for creating users are evaluated first before the bulk_create is called
+        prerequisites for creating users are evaluated first before the bulk_create is called.
+        Imported users set their password when verifying their account, so they are given an
+        unusable one rather than hashing a random password for each imported user.
         """
-        from accounts.utils import generate_strong_password
-
         self.is_owner = True
         self.email_address = AccountUser.objects.normalize_email(self.email_address)
-        self.password = make_password(generate_strong_password())
+        self.set_unusable_password()
 
 
 class PreviousPasswords(UUIDPrimaryKey):
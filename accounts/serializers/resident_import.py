@@ -1,26 +1,23 @@
-from typing import Any, Collection
+from functools import cached_property
+from typing import Any, Callable, Collection
 
+import pandas as pd
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import RegexValidator
-from django.db import transaction
 from django.template import Context
 from rest_framework import serializers
 
 from accounts.models import AccountUser, UserVerification
 from accounts.serializers.users import AccountSerializer
-from core.notifications.events import NotificationEvents
-from core.common.includes import notifications
+from core.common.includes import resident_imports
 from core.data_exchange.exceptions import RowError
-from core.data_exchange.includes.imported_attribute_validators import (
-    validate_email_address,
-    validate_generic_name,
-    validate_phone_number,
-)
-from core.data_exchange.includes.types import (
-    AttributeResolver,
-    BackwardReturnType,
-    ImportResult,
+from core.data_exchange.includes.column_validators import (
+    ColumnReturnType,
+    validate_email_address_column,
+    validate_generic_name_column,
+    validate_phone_number_column,
 )
+from core.data_exchange.includes.types import BackwardReturnType, ImportResult
 from core.data_exchange.serializers import (
     BaseImportedDataSerializer,
     DynamicFieldsSerializer,
@@ -30,6 +27,9 @@ IMPORT_ROW_NUMBER = int
 
 CORE_ATTRIBUTES = ["name", "email_address", "phone_number"]
 
+# Attributes of existing residents updated by an import
+UPSERTED_ATTRIBUTES = ["name", "phone_number"]
+
 
 class ResidentImportedDataSerializer(BaseImportedDataSerializer):
     IMPORTABLE_ATTRIBUTES = CORE_ATTRIBUTES
@@ -56,21 +56,54 @@ class ResidentImportExportSerializer(DynamicFieldsSerializer):
         self._global_errors: list[RowError] = []
         self._validated_row_data: dict[IMPORT_ROW_NUMBER, dict] = {}
         self._new_resident_accounts: dict[str, AccountUser] = {}
+        self._updated_resident_accounts: dict[str, AccountUser] = {}
         self._existing_residents: dict[str, AccountUser] = {}
         self._seen_email_addresses = set()
-        self._error_offset = 2 if self.import_data.get("has_headers") else 1
+        self._error_offset = (2 if self.import_data.get("has_headers") else 1) + self.context.get(
+            "row_offset", 0
+        )
 
     @classmethod
     def get_content_type(cls) -> ContentType:
         return ContentType.objects.get_for_model(AccountUser)
 
+    def get_row_errors(self) -> list[RowError]:
+        return self._global_errors
+
+    def get_validated_rows(self) -> dict[IMPORT_ROW_NUMBER, dict]:
+        return self._validated_row_data
+
     def to_internal_value(self, data: dict[str, list[dict]]) -> Collection[AccountUser]:
         data: list[dict[str, Any]] = super().to_internal_value(data)["data"]
-        for row_number, row_data in enumerate(data, self._error_offset):
-            validation_errors, _ = self._validate_row_data(row_data, row_number)
-            if validation_errors:
-                self._global_errors.extend(validation_errors)
+        if self.validated_rows is not None:
+            # Validated by a dry run of the same file. Only the existing residents are looked up again
+            self._validated_row_data = self.validated_rows
+        else:
+            self._validate_rows(data)
+
+        self.load_existing_residents()
+
+        for row_number in self._validated_row_data:
+            email_address = self._validated_row_data[row_number]["email_address"]
+            existing_resident = self._existing_residents.get(email_address)
+            if existing_resident is None:
+                self._initialize_new_resident(row_number)
+            elif existing_resident.owner_id != self._owner_id:
+                self._global_errors.append(
+                    RowError(
+                        row_number=row_number,
+                        description="email_address: A user with this email address already exists",
+                        title=email_address,
+                    )
+                )
+            elif self.import_data["should_upsert"]:
+                self._update_old_resident(row_number)
+
+        return list(self._new_resident_accounts.values())
 
+    def _validate_rows(self, data: list[dict[str, Any]]):
+        self._global_errors.extend(self._validate_columns(data))
+        for row_number, row_data in enumerate(data, self._error_offset):
             duplicate_errors, _ = self._check_for_duplicates(row_data, row_number)
             if duplicate_errors:
                 self._global_errors.extend(duplicate_errors)
@@ -81,40 +114,27 @@ class ResidentImportExportSerializer(DynamicFieldsSerializer):
                 {"errors": [error.to_dict() for error in self._global_errors]}
             )
 
-        self.load_existing_residents(data)
-
-        for row_number, row_data in enumerate(data, self._error_offset):
-            if row_data["email_address"] in self._existing_residents:
-                # self._existing_residents should be linked to the Cluster
-                if self.import_data["should_upsert"]:
-                    self._update_old_resident(row_data, row_number)
-            else:
-                self._initialize_new_resident(row_data, row_number)
-
-        return list(self._new_resident_accounts.values())
-
-    def _validate_row_data(self, row_data: dict, row_number: int) -> BackwardReturnType:
+    def _validate_columns(self, data: list[dict[str, Any]]) -> list[RowError]:
         """
-        For each of the imported rows, runs the backward resolver to resolve and validate the imported value for
-        each attribute.
+        Validates the imported values of each attribute a column at a time and keeps the validated data of the
+        rows without errors
         """
-        valid_data = {}
+        dataframe = pd.DataFrame(
+            data, index=pd.RangeIndex(self._error_offset, self._error_offset + len(data))
+        )
         validation_errors: list[RowError] = []
-        for attribute, resolver in self._attribute_resolvers.items():
-            errors = []
-            result = None
-            backward_resolver = resolver["backward_resolver"]
-            if backward_resolver is not None:
-                errors, result = backward_resolver(row_data, row_number)
-            if errors:
-                validation_errors.extend(errors)
-            else:
-                valid_data[attribute] = result
-
-        if validation_errors:
-            return validation_errors, None
-        self._validated_row_data[row_number] = valid_data
-        return [], None
+        validated_columns = {}
+        for attribute, column_validator in self._column_validators.items():
+            errors, validated_columns[attribute] = column_validator(dataframe)
+            validation_errors.extend(errors)
+
+        invalid_rows = {error.row_number for error in validation_errors}
+        self._validated_row_data = (
+            pd.DataFrame(validated_columns, index=dataframe.index)
+            .drop(index=list(invalid_rows))
+            .to_dict(orient="index")
+        )
+        return validation_errors
 
     def _check_for_duplicates(
         self, row_data: dict, row_number: int
@@ -131,78 +151,65 @@ class ResidentImportExportSerializer(DynamicFieldsSerializer):
         self._seen_email_addresses.add(name)
         return [], None
 
-    def load_existing_residents(self, data: list[dict[str, Any]]):
-        email_addresses = {row_data["email_address"] for row_data in data}
+    def load_existing_residents(self):
+        for valid_data in self._validated_row_data.values():
+            valid_data["email_address"] = AccountUser.objects.normalize_email(
+                valid_data["email_address"]
+            )
+        self._existing_residents = resident_imports.get_existing_residents(
+            valid_data["email_address"] for valid_data in self._validated_row_data.values()
+        )
 
-        self._existing_residents = AccountUser.objects.filter(
-            owner_id=self._owner_id, email_address__in=email_addresses
-        ).in_bulk(field_name="email_address")
+    def _update_old_resident(self, row_number: int):
+        resident = self._build_resident(self._validated_row_data[row_number])
+        self._updated_resident_accounts[resident.email_address] = resident
 
-    def _update_old_resident(self, row_data: dict, row_number: int):
-        resident = self._existing_residents[row_data["email_address"]]
-        valid_data = self._validated_row_data[row_number]
-        resident.phone_number = valid_data["phone_number"]
-        resident.name = valid_data["name"]
+    def _initialize_new_resident(self, row_number: int):
+        resident = self._build_resident(self._validated_row_data[row_number])
+        resident.primary_cluster_id = self._cluster_id
+        resident.prepare_for_import()
+        self._new_resident_accounts[resident.email_address] = resident
 
-    def _initialize_new_resident(self, row_data: dict, row_number: int):
-        valid_data = self._validated_row_data[row_number]
-        resident = AccountUser(
+    def _build_resident(self, valid_data: dict) -> AccountUser:
+        return AccountUser(
             owner_id=self._owner_id,
-            cluster_id=self._cluster_id,
             name=valid_data["name"],
             phone_number=valid_data["phone_number"],
             email_address=valid_data["email_address"],
         )
-        resident.prepare_for_import()
-        self._new_resident_accounts[resident.email_address] = resident
 
-    @property
-    def _attribute_resolvers(self) -> dict[str, AttributeResolver]:
+    @cached_property
+    def _column_validators(self) -> dict[str, Callable[[pd.DataFrame], ColumnReturnType]]:
         """
-        Mapping of attributes to export or import and their respective serialization and deserialization functions
+        Mapping of attributes to import and the validators of their columns
         """
         return {
-            "name": {
-                "name": "name",
-                "forward_resolver": None,
-                "backward_resolver": self._name_backward_resolver,
-            },
-            "email_address": {
-                "name": "email_address",
-                "forward_resolver": None,
-                "backward_resolver": self._email_address_backward_resolver,
-            },
-            "phone_number": {
-                "name": "phone_number",
-                "forward_resolver": None,
-                "backward_resolver": self._phone_number_backward_resolver,
-            },
+            "name": self._validate_name_column,
+            "email_address": self._validate_email_address_column,
+            "phone_number": self._validate_phone_number_column,
         }
 
-    def _name_backward_resolver(self, row_data: dict, row_number: int):
-        return validate_generic_name(
+    def _validate_name_column(self, dataframe: pd.DataFrame) -> ColumnReturnType:
+        return validate_generic_name_column(
             field_name="name",
-            value=row_data["name"],
-            row_number=row_number,
-            error_title=row_data["name"],
+            values=dataframe["name"],
+            error_titles=dataframe["name"],
             max_length=150,
             min_length=1,
         )
 
-    def _email_address_backward_resolver(self, row_data: dict, row_number: int):
-        return validate_email_address(
+    def _validate_email_address_column(self, dataframe: pd.DataFrame) -> ColumnReturnType:
+        return validate_email_address_column(
             field_name="email_address",
-            value=row_data["email_address"],
-            row_number=row_number,
-            error_title=row_data["email_address"],
+            values=dataframe["email_address"],
+            error_titles=dataframe["email_address"],
         )
 
-    def _phone_number_backward_resolver(self, row_data: dict, row_number: int):
-        return validate_phone_number(
+    def _validate_phone_number_column(self, dataframe: pd.DataFrame) -> ColumnReturnType:
+        return validate_phone_number_column(
             field_name="phone_number",
-            value=row_data["phone_number"],
-            row_number=row_number,
-            error_title=row_data["phone_number"],
+            values=dataframe["phone_number"],
+            error_titles=dataframe["phone_number"],
             default_dialing_code=self.import_data["default_dialing_code"],
         )
 
@@ -216,47 +223,26 @@ class ResidentImportExportSerializer(DynamicFieldsSerializer):
             errors=self._global_errors,
             data=serializer.data,
             object_ids=object_ids,
-            total_skipped=0,
+            total_skipped=len(self._global_errors),
         )
         return summary
 
-    @transaction.atomic()
     def _persist_residents(self) -> list[AccountUser]:
-        def _on_commit():
-            # Add other post import actions
-            self._send_verification_tokens()
-
-        transaction.on_commit(_on_commit)
-
-        residents_to_update = list(self._existing_residents.values())
-        AccountUser.objects.bulk_update(residents_to_update, fields=CORE_ATTRIBUTES)
-        new_resident_accounts = AccountUser.objects.bulk_create(
-            self._new_resident_accounts.values(), ignore_conflicts=True
-        )
-        self._send_verification_tokens()
-
+        residents = list(self._new_resident_accounts.values())
+        update_fields = []
         if self.import_data["should_upsert"]:
-            return new_resident_accounts + residents_to_update
-        return new_resident_accounts
-
-    def _send_verification_tokens(self):
-        for new_residents in self._get_residents():
-            recipient_data = {}
-            for resident in new_residents:
-                # Assuming UserVerification.generate_otp or generate_token is used elsewhere
-                # and handles the notification_event setting.
-                # For now, we'll directly send the notification.
-                notifications.send(
-                    event=NotificationEvents.SYSTEM_UPDATE, # Placeholder for a more specific onboarding event
-                    recipients=[resident],
-                    cluster=resident.cluster, # Assuming resident has a cluster attribute
-                    context={
-                        "name": resident.name,
-                        # "token": token.otp # If OTP/token is needed in email, it should be generated and passed here
-                    }
-                )
+            residents += self._updated_resident_accounts.values()
+            update_fields = UPSERTED_ATTRIBUTES
 
-    def _get_residents(self):
-        yield AccountUser.objects.filter(
-            email_address__in=self._new_resident_accounts.keys(),
-        ).iterator(chunk_size=1_000)
+        imported_residents = resident_imports.persist_residents(
+            self._cluster_id, residents, update_fields=update_fields
+        )
+        resident_imports.queue_welcome_notifications(
+            self._cluster_id,
+            [
+                resident
+                for resident in imported_residents
+                if resident.email_address in self._new_resident_accounts
+            ],
+        )
+        return imported_residents
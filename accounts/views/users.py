@@ -301,6 +301,8 @@ class UserViewSet(
             import_data_serializer_class=ResidentImportedDataSerializer,
             import_serializer_class=ResidentImportExportSerializer,
             is_async=False,
+            chunked=True,
+            max_sync_file_size=settings.DATA_IMPORT_MAX_SYNC_FILE_SIZE,
         )
         return importer.get_response()
 
@@ -157,7 +157,6 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG
@@ -212,8 +211,18 @@ REFRESH_TOKEN_LIFETIME_WITH_REMEMBER_ME = timedelta(days=7)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# Default file storage (local for development)
-DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
+# Scratch directory for files written by background workers, such as exports saved to disk
+TEMP_DIR = BASE_DIR / "tmp"
+
+# File storages. The default storage is local for development
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 # Logging configuration
 os.makedirs(os.path.join(BASE_DIR, "logs"), exist_ok=True)
@@ -293,6 +302,77 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 
+# Number of concurrent workers spawned to drain due recurring payments
+RECURRING_PAYMENT_WORKERS = int(os.getenv("RECURRING_PAYMENT_WORKERS", "4"))
+
+# Number of concurrent workers retrying failed utility payments
+UTILITY_RETRY_WORKERS = int(os.getenv("UTILITY_RETRY_WORKERS", "4"))
+
+# Number of clusters grouped into one task by the work-aware spawn_* fan-out
+FAN_OUT_CLUSTERS_PER_TASK = {
+    "default": int(os.getenv("FAN_OUT_CLUSTERS_PER_TASK", "50")),
+}
+
+# Seconds idempotency keys and their stored responses are kept
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+
+# Pooled HTTP client used for payment provider APIs (timeouts in seconds)
+PROVIDER_HTTP = {
+    "connect_timeout": float(os.getenv("PROVIDER_HTTP_CONNECT_TIMEOUT", "3.05")),
+    "read_timeout": float(os.getenv("PROVIDER_HTTP_READ_TIMEOUT", "20")),
+    "max_retries": int(os.getenv("PROVIDER_HTTP_MAX_RETRIES", "2")),
+    "pool_maxsize": int(os.getenv("PROVIDER_HTTP_POOL_MAXSIZE", "10")),
+    "breaker_failure_threshold": int(os.getenv("PROVIDER_BREAKER_FAILURE_THRESHOLD", "5")),
+    "breaker_reset_timeout": int(os.getenv("PROVIDER_BREAKER_RESET_TIMEOUT", "30")),
+}
+
+# Cache lifetimes (seconds) for the utility provider catalogue and customer lookups
+UTILITY_CACHE = {
+    "catalogue_ttl": int(os.getenv("UTILITY_CATALOGUE_TTL", str(24 * 60 * 60))),
+    "customer_ttl": int(os.getenv("UTILITY_CUSTOMER_TTL", "300")),
+    "invalid_customer_ttl": int(os.getenv("UTILITY_INVALID_CUSTOMER_TTL", "60")),
+}
+
+# Reconciliation of pending provider transactions that never received a webhook
+PAYMENT_RECONCILIATION = {
+    "stale_after": timedelta(
+        minutes=int(os.getenv("PAYMENT_RECONCILIATION_STALE_AFTER_MINUTES", "15"))
+    ),
+    "expire_after": timedelta(
+        hours=int(os.getenv("PAYMENT_RECONCILIATION_EXPIRE_AFTER_HOURS", "48"))
+    ),
+    "batch_size": int(os.getenv("PAYMENT_RECONCILIATION_BATCH_SIZE", "500")),
+    "max_workers": int(os.getenv("PAYMENT_RECONCILIATION_MAX_WORKERS", "8")),
+}
+
+# Cached payment dashboards older than this are rebuilt in the background
+PAYMENT_DASHBOARD_FRESH_SECONDS = int(os.getenv("PAYMENT_DASHBOARD_FRESH_SECONDS", "300"))
+
+# Push wallet balance changes to residents connected to ws/wallet/
+WALLET_BALANCE_PUSH = bool(int(os.getenv("WALLET_BALANCE_PUSH", "0")))
+
+# Rows validated and saved per transaction by chunked data imports
+DATA_IMPORT_CHUNK_SIZE = int(os.getenv("DATA_IMPORT_CHUNK_SIZE", "5000"))
+
+# Imported files larger than this many bytes are imported in chunks by an import task rather than in the request
+DATA_IMPORT_MAX_SYNC_FILE_SIZE = int(os.getenv("DATA_IMPORT_MAX_SYNC_FILE_SIZE", str(1024 * 1024)))
+
+# Seconds the rows validated by an import dry run stay cached for the import of the same file
+DATA_IMPORT_DRY_RUN_TTL = int(os.getenv("DATA_IMPORT_DRY_RUN_TTL", "3600"))
+
+# Rows read from the database and serialized per batch by data exports
+DATA_EXPORT_CHUNK_SIZE = int(os.getenv("DATA_EXPORT_CHUNK_SIZE", "2000"))
+
+# Exported files are downloaded through presigned URLs valid for this many seconds, if the file storage can sign
+# them. Otherwise, they are streamed from the storage
+DATA_EXPORT_PRESIGNED_URLS = bool(int(os.getenv("DATA_EXPORT_PRESIGNED_URLS", "0")))
+DATA_EXPORT_URL_EXPIRY = int(os.getenv("DATA_EXPORT_URL_EXPIRY", "300"))
+
+# Delta exports leave out records modified in the last this many seconds. Modification times are set when a record is
+# saved, not when its transaction commits, so a record saved just before an export may become visible after it with an
+# earlier modification time than the export's watermark
+DATA_EXPORT_WATERMARK_LAG = int(os.getenv("DATA_EXPORT_WATERMARK_LAG", "60"))
+
 # Celery Beat schedule
 CELERY_BEAT_SCHEDULE = {
     "detect-visitor-overstays-every-hour": {
@@ -347,8 +427,24 @@ CELERY_BEAT_SCHEDULE = {
         "task": "spawn_send_bill_reminders",
         "schedule": 86400.0,  # Every day
     },
-    "retry-failed-utility-payments-daily": {
-        "task": "retry_failed_utility_payments",
+    "spawn-retry-failed-utility-payments-every-2-minutes": {
+        "task": "spawn_retry_failed_utility_payments",
+        "schedule": 120.0,  # Every 2 minutes, errors carry their own backoff
+    },
+    "refresh-utility-provider-catalogue-every-6-hours": {
+        "task": "refresh_utility_provider_catalogue",
+        "schedule": 21600.0,  # Every 6 hours
+    },
+    "purge-expired-idempotency-keys-daily": {
+        "task": "purge_expired_idempotency_keys",
         "schedule": 86400.0,  # Every day
     },
+    "process-webhook-events-every-minute": {
+        "task": "process_webhook_events",
+        "schedule": 60.0,  # Every minute, picks up retries and missed deliveries
+    },
+    "reconcile-pending-transactions-every-10-minutes": {
+        "task": "reconcile_pending_transactions",
+        "schedule": 600.0,  # Every 10 minutes
+    },
 }
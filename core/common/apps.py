@@ -19,4 +19,6 @@ class CommonConfig(AppConfig):
         This method is called when the app is ready. It's a good place to
         perform initialization tasks like configuring logging.
         """
-        ...
\ No newline at end of file
+        import core.common.signals
+
+        core.common.signals
@@ -12,6 +12,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
 
 from accounts.models import AccountUser
+from core.common.includes import wallet_balances
 from core.common.models import Chat, Message, ChatParticipant, MessageType
 
 logger = logging.getLogger(__name__)
@@ -227,4 +228,47 @@ class ChatConsumer(AsyncWebsocketConsumer):
             participant = ChatParticipant.objects.get(chat=chat, user=self.user)
             participant.mark_as_read()
         except (Chat.DoesNotExist, ChatParticipant.DoesNotExist):
-            pass
\ No newline at end of file
+            pass
+
+class WalletConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer pushing wallet balance changes to their owner.
+    Receives updates for all of the user's wallets; each names its cluster.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection"""
+        self.user = self.scope.get('user')
+
+        if self.user is None or isinstance(self.user, AnonymousUser):
+            await self.close(code=4001)  # Unauthorized
+            return
+
+        self.wallet_group_name = wallet_balances.get_group_name(self.user.id)
+        await self.channel_layer.group_add(
+            self.wallet_group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection"""
+        if hasattr(self, 'wallet_group_name'):
+            await self.channel_layer.group_discard(
+                self.wallet_group_name,
+                self.channel_name
+            )
+
+    async def wallet_balance_broadcast(self, event):
+        """Send wallet balance update to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'wallet_balance',
+            'cluster_id': event['cluster_id'],
+            'balance': event['balance'],
+            'available_balance': event['available_balance'],
+            'currency': event['currency'],
+            'status': event['status'],
+            'last_transaction_at': event['last_transaction_at'],
+            'version': event['version'],
+        }))
@@ -15,6 +15,15 @@ from core.common.includes import maintenance
 from core.common.includes import payments
 from core.common.includes import helpdesk
 from core.common.includes import cluster_wallet
+from core.common.includes import revenue_rollups
+from core.common.includes import idempotency
+from core.common.includes import webhooks
+from core.common.includes import reconciliation
+from core.common.includes import utility_retries
+from core.common.includes import payment_exports
+from core.common.includes import payment_dashboard
+from core.common.includes import wallet_balances
+from core.common.includes import resident_imports
 from core.common.includes import utilities
 
 
@@ -59,4 +68,11 @@ __all__ = [
     "helpdesk",
     "cluster_wallet",
     "utilities",
+    "webhooks",
+    "reconciliation",
+    "utility_retries",
+    "payment_exports",
+    "payment_dashboard",
+    "wallet_balances",
+    "resident_imports",
 ]
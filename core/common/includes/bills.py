@@ -4,10 +4,24 @@ Refactored from BillManager static methods to pure functions.
 """
 
 import logging
+from collections import defaultdict
 from decimal import Decimal
-from typing import Optional, Any
+from typing import Iterable, Optional, Any
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import (
+    Case,
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.db import transaction
 import itertools
 
@@ -22,10 +36,19 @@ from core.common.models import (
     Wallet,
 )
 from core.notifications.events import NotificationEvents
-from core.common.includes import notifications
+from core.common.includes import (
+    cluster_wallet,
+    notifications,
+    payment_dashboard,
+    revenue_rollups,
+    wallet_balances,
+)
 
 logger = logging.getLogger("clustr")
 
+# Number of overdue bill IDs handed to one notification job
+OVERDUE_NOTIFICATION_BATCH_SIZE = 1000
+
 
 def create_cluster_wide(
     cluster,
@@ -236,21 +259,35 @@ def process_payment(bill: Bill, wallet: Wallet, amount: Decimal, user, idempoten
     Process payment for a bill using wallet balance.
     This handles wallet-to-wallet payments where user pays from their wallet.
 
+    The payer's wallet is locked and read in one query together with everything
+    the payment depends on: the user's acknowledgment, their earlier payments of
+    a cluster bill, a transaction already made with the idempotency key and the
+    cluster wallet. The debit and the cluster credit are inserted in one
+    statement and the payment confirmation is sent once the payment commits.
+
     Args:
         bill: Bill to pay
         wallet: Wallet to debit
-        amount: Amount to pay
+        amount: Amount to pay, the remaining amount if None
         user: User making the payment
+        idempotency_key: Key returning the earlier transaction when a payment is retried
 
     Returns:
         Payment transaction object.
     """
-    if not bill.can_be_paid_by(user):
+    locked_wallet = _lock_payment_wallet(bill, wallet, user, idempotency_key)
+
+    if getattr(locked_wallet, "replayed_transaction_id", None):
+        logger.info(f"Duplicate payment attempt detected with idempotency key: {idempotency_key}")
+        return Transaction.objects.get(pk=locked_wallet.replayed_transaction_id)
+
+    if not bill.can_be_paid_by(user, acknowledged=locked_wallet.bill_acknowledged):
         raise ValueError("User is not authorized to pay this bill at this time.")
 
     if bill.category == BillCategory.CLUSTER_MANAGED:
-        paid_amount = bill.get_user_payment_amount(user)
-        remaining_share = bill.amount - paid_amount
+        if not locked_wallet.bill_acknowledged:
+            raise ValueError("User must acknowledge a cluster bill before paying.")
+        remaining_share = bill.amount - locked_wallet.bill_paid_amount
         payment_amount = amount or remaining_share
         if payment_amount > remaining_share:
             raise ValueError(
@@ -267,50 +304,161 @@ def process_payment(bill: Bill, wallet: Wallet, amount: Decimal, user, idempoten
     if payment_amount <= 0:
         raise ValueError("Payment amount must be greater than 0.")
 
-    if not wallet.has_sufficient_balance(payment_amount):
+    if not locked_wallet.has_sufficient_balance(payment_amount):
         raise ValueError("Insufficient wallet balance.")
 
-    # Check for duplicate payment using idempotency key
+    now = timezone.now()
+    cluster_wallet_id = (
+        locked_wallet.cluster_wallet_id
+        or cluster_wallet.get_or_create_cluster_wallet(bill.cluster, bill.currency).id
+    )
+    payment, credit = _build_payment_transactions(
+        bill, wallet, cluster_wallet_id, payment_amount, user, idempotency_key, now
+    )
+    Transaction.objects.bulk_create([payment, credit])
+
+    if bill.category == BillCategory.USER_MANAGED:
+        _record_user_bill_payment(bill, payment, now)
+
+    # Debit from the locked balances, so a stale wallet instance cannot overwrite them
+    wallet.balance = locked_wallet.balance - payment_amount
+    wallet.available_balance = locked_wallet.available_balance - payment_amount
+    wallet.last_transaction_at = now
+    wallet.save(update_fields=["balance", "available_balance", "last_transaction_at"])
+
+    Wallet.objects.filter(pk=cluster_wallet_id).update(
+        balance=F("balance") + payment_amount,
+        available_balance=F("available_balance") + payment_amount,
+        last_transaction_at=now,
+    )
+
+    # bulk_create and update() send no post_save signals
+    revenue_rollups.queue_refresh(payment)
+    cluster_id = bill.cluster_id
+    transaction.on_commit(lambda: wallet_balances.invalidate(cluster_id, cluster_id))
+    transaction.on_commit(lambda: send_payment_confirmation(bill, payment))
+
+    logger.info(
+        f"Bill payment processed: {payment.transaction_id} for bill {bill.bill_number}"
+    )
+    return payment
+
+
+def _lock_payment_wallet(bill: Bill, wallet: Wallet, user, idempotency_key: Optional[str]) -> Wallet:
+    """Lock the payer's wallet, annotated with the state a bill payment depends on."""
+    annotations = {
+        "bill_acknowledged": Exists(
+            Bill.acknowledged_by.through.objects.filter(bill_id=bill.id, accountuser_id=user.id)
+        ),
+        "bill_paid_amount": Coalesce(
+            Subquery(
+                Transaction.objects.filter(
+                    wallet=OuterRef("pk"),
+                    bill_id=bill.id,
+                    type=TransactionType.BILL_PAYMENT,
+                    status=TransactionStatus.COMPLETED,
+                )
+                .values("wallet")
+                .annotate(total=Sum("amount"))
+                .values("total")
+            ),
+            Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        ),
+        "cluster_wallet_id": Subquery(
+            Wallet.objects.filter(
+                cluster_id=OuterRef("cluster_id"), user_id=OuterRef("cluster_id")
+            ).values("id")[:1]
+        ),
+    }
     if idempotency_key:
-        existing_transaction = Transaction.objects.filter(
-            idempotency_key=idempotency_key,
-            wallet=wallet
-        ).first()
-        if existing_transaction:
-            logger.info(f"Duplicate payment attempt detected with idempotency key: {idempotency_key}")
-            return existing_transaction
-
-    # Create transaction (pending initially)
-    transaction = Transaction.objects.create(
-        cluster=wallet.cluster,
+        annotations["replayed_transaction_id"] = Subquery(
+            Transaction.objects.filter(
+                wallet=OuterRef("pk"), idempotency_key=idempotency_key
+            ).values("id")[:1]
+        )
+
+    return (
+        Wallet.objects.select_for_update(of=("self",))
+        .annotate(**annotations)
+        .get(pk=wallet.pk)
+    )
+
+
+def _build_payment_transactions(
+    bill: Bill, wallet: Wallet, cluster_wallet_id, amount: Decimal, user, idempotency_key, now
+) -> tuple[Transaction, Transaction]:
+    """Build the payer's debit and the cluster wallet's credit for a bill payment."""
+    payment = Transaction(
+        cluster_id=wallet.cluster_id,
         wallet=wallet,
+        bill=bill,
+        transaction_id=Transaction.generate_transaction_id(),
         type=TransactionType.BILL_PAYMENT,
-        amount=payment_amount,
+        amount=amount,
         currency=wallet.currency,
         description=f"Bill payment: {bill.title}",
-        status=TransactionStatus.PENDING,
+        status=TransactionStatus.COMPLETED,
+        processed_at=now,
         created_by=user.id,
         last_modified_by=user.id,
-        metadata={"bill_id": str(bill.id), "payment_method": "wallet"},
         idempotency_key=idempotency_key,
     )
+    credit = Transaction(
+        cluster_id=bill.cluster_id,
+        wallet_id=cluster_wallet_id,
+        transaction_id=Transaction.generate_transaction_id(),
+        type=TransactionType.DEPOSIT,
+        amount=amount,
+        currency=bill.currency,
+        description=f"Bill payment: {bill.title} (Bill #{bill.bill_number})",
+        status=TransactionStatus.COMPLETED,
+        processed_at=now,
+        created_by=bill.cluster_id,
+        metadata={
+            "source": "bill_payment",
+            "bill_id": str(bill.id),
+            "bill_number": bill.bill_number,
+            "bill_title": bill.title,
+            "original_transaction_id": str(payment.id),
+        },
+    )
+    payment.metadata = {
+        "bill_id": str(bill.id),
+        "payment_method": "wallet",
+        "cluster_credited": True,
+        "cluster_credit_amount": str(amount),
+        "cluster_credit_transaction_id": credit.transaction_id,
+    }
+    return payment, credit
 
-    # Process the payment - this will debit wallet and credit cluster
-    bill.add_payment(payment_amount, transaction)
-    
-    # Mark transaction as completed (no wallet update needed - already done in add_payment)
-    transaction.status = TransactionStatus.COMPLETED
-    transaction.processed_at = timezone.now()
-    transaction.save(update_fields=['status', 'processed_at'])
 
-    logger.info(
-        f"Bill payment processed: {transaction.transaction_id} for bill {bill.bill_number}"
-    )
+def _record_user_bill_payment(bill: Bill, payment: Transaction, now) -> None:
+    """
+    Add a payment to a user-managed bill in one conditional UPDATE.
 
-    # Send payment confirmation
-    send_payment_confirmation(bill, transaction)
+    The condition rejects the payment when a concurrent payment already covered
+    the remaining amount.
+    """
+    fully_paid_at = bill.amount - payment.amount
+    updated = Bill.objects.filter(
+        pk=bill.pk, paid_amount__lte=fully_paid_at
+    ).update(
+        paid_amount=F("paid_amount") + payment.amount,
+        paid_at=Case(
+            When(paid_amount__gte=fully_paid_at, then=Value(now)),
+            default=F("paid_at"),
+        ),
+        payment_transaction=payment,
+        last_modified_at=now,
+    )
+    if not updated:
+        raise ValueError("Payment amount exceeds remaining amount.")
 
-    return transaction
+    bill.paid_amount += payment.amount
+    if bill.paid_amount >= bill.amount:
+        bill.paid_at = now
+    bill.payment_transaction = payment
 
 
 def update_status(bill: Bill, new_status: BillStatus, updated_by: str = None) -> bool:
@@ -493,35 +641,138 @@ def send_bill_status_notification(bill: Bill, old_status: str, new_status: str)
         return False
 
 
-def check_and_update_overdue(cluster) -> int:
+def get_newly_overdue(now=None, cluster=None) -> QuerySet:
     """
-    Check and update overdue bills for a cluster.
-    
+    Get unpaid bills past their due date that have not been marked overdue yet.
+
+    Like Bill.get_total_paid, cluster-managed bills count as paid by the sum of
+    their completed transactions and user-managed bills by their paid amount.
+
     Args:
-        cluster: Cluster to check bills for
-        
+        now: Reference time (defaults to the current time)
+        cluster: Restrict to one cluster (all clusters if None)
+
+    Returns:
+        QuerySet of bills the next overdue sweep will mark
+    """
+    cluster_bill_paid = Coalesce(
+        Subquery(
+            Transaction.objects.filter(
+                bill=OuterRef("pk"), status=TransactionStatus.COMPLETED
+            )
+            .values("bill")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        ),
+        Value(Decimal("0.00")),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    queryset = Bill.objects.filter(
+        Q(category=BillCategory.USER_MANAGED, paid_amount__lt=F("amount"))
+        | Q(category=BillCategory.CLUSTER_MANAGED, amount__gt=cluster_bill_paid),
+        due_date__lt=now or timezone.now(),
+        overdue_at__isnull=True,
+    )
+    if cluster is not None:
+        queryset = queryset.filter(cluster=cluster)
+    return queryset
+
+
+def check_and_update_overdue(cluster=None) -> int:
+    """
+    Mark unpaid past-due bills as overdue with one bulk UPDATE and queue notifications.
+
+    The affected bills are found again by their overdue_at timestamp and handed to
+    batched notification jobs, so no bill is loaded or saved individually.
+
+    Args:
+        cluster: Cluster to check bills for (all clusters if None)
+
     Returns:
         Number of bills marked as overdue
     """
-    from django.utils import timezone
-    
     now = timezone.now()
-    overdue_bills = Bill.objects.filter(
-        cluster=cluster,
-        due_date__lt=now,
-        status=BillStatus.PENDING
+
+    with transaction.atomic():
+        count = get_newly_overdue(now, cluster).update(
+            overdue_at=now, last_modified_at=now
+        )
+        if count:
+            swept = Bill.objects.filter(overdue_at=now)
+            if cluster is not None:
+                swept = swept.filter(cluster=cluster)
+            swept_bills = list(swept.values_list("id", "cluster_id"))
+            bill_ids = [str(bill_id) for bill_id, _ in swept_bills]
+            transaction.on_commit(lambda: _queue_overdue_notifications(bill_ids))
+            for cluster_id in {cluster_id for _, cluster_id in swept_bills}:
+                payment_dashboard.queue_invalidation(cluster_id)
+
+    cluster_name = cluster.name if cluster is not None else "all clusters"
+    logger.info(f"Marked {count} bills as overdue for {cluster_name}")
+    return count
+
+
+def _queue_overdue_notifications(bill_ids: list[str]) -> None:
+    from core.common.tasks.bill import send_overdue_bill_notifications
+
+    for start in range(0, len(bill_ids), OVERDUE_NOTIFICATION_BATCH_SIZE):
+        send_overdue_bill_notifications.delay(
+            bill_ids[start : start + OVERDUE_NOTIFICATION_BATCH_SIZE]
+        )
+
+
+def send_overdue_notifications(bill_ids: Iterable[str]) -> int:
+    """
+    Send overdue notifications for a batch of bills.
+
+    Bill owners are loaded with one query and cluster members once per cluster,
+    rather than once per bill.
+
+    Args:
+        bill_ids: IDs of bills marked overdue
+
+    Returns:
+        Number of notifications sent
+    """
+    from accounts.models import AccountUser
+
+    overdue_bills = list(Bill.objects.filter(id__in=bill_ids).select_related("cluster"))
+    owners = AccountUser.objects.in_bulk(
+        {bill.user_id for bill in overdue_bills if bill.user_id}
     )
-    
-    count = 0
+
+    bills_by_cluster = defaultdict(list)
     for bill in overdue_bills:
-        bill.status = BillStatus.OVERDUE
-        bill.save()
-        count += 1
-        
-        # Send overdue notification
-        send_overdue_notification(bill)
-    
-    logger.info(f"Marked {count} bills as overdue for cluster {cluster.name}")
+        bills_by_cluster[bill.cluster_id].append(bill)
+
+    count = 0
+    for cluster_bills in bills_by_cluster.values():
+        cluster = cluster_bills[0].cluster
+        cluster_members = None
+
+        for bill in cluster_bills:
+            if bill.user_id:
+                owner = owners.get(bill.user_id)
+                recipients = [owner] if owner else []
+            else:
+                if cluster_members is None:
+                    cluster_members = list(AccountUser.objects.filter(clusters=cluster))
+                recipients = cluster_members
+
+            if not recipients:
+                continue
+
+            try:
+                notifications.send(
+                    event_name=NotificationEvents.BILL_OVERDUE,
+                    recipients=recipients,
+                    cluster=cluster,
+                    context=_get_overdue_context(bill),
+                )
+                count += 1
+            except Exception as e:
+                logger.error(f"Failed to send overdue notification for bill {bill.id}: {e}")
+
     return count
 
 
@@ -558,6 +809,16 @@ def send_reminders(cluster, days_before_due: int = 3) -> int:
     return count
 
 
+def _get_overdue_context(bill: Bill) -> dict[str, Any]:
+    return {
+        "bill_number": bill.bill_number,
+        "bill_title": bill.title,
+        "amount": str(bill.amount),
+        "due_date": bill.due_date.strftime("%Y-%m-%d") if bill.due_date else "Not set",
+        "days_overdue": (timezone.now() - bill.due_date).days if bill.due_date else 0,
+    }
+
+
 def send_overdue_notification(bill: Bill) -> bool:
     """Send overdue bill notification."""
     try:
@@ -570,20 +831,14 @@ def send_overdue_notification(bill: Bill) -> bool:
             recipients.append(user)
         else:
             # Cluster-wide bill
-            cluster_members = AccountUser.objects.filter(cluster=bill.cluster)
+            cluster_members = AccountUser.objects.filter(clusters=bill.cluster)
             recipients.extend(cluster_members)
 
         notifications.send(
             event_name=NotificationEvents.BILL_OVERDUE,
             recipients=recipients,
             cluster=bill.cluster,
-            context={
-                "bill_number": bill.bill_number,
-                "bill_title": bill.title,
-                "amount": str(bill.amount),
-                "due_date": bill.due_date.strftime("%Y-%m-%d") if bill.due_date else "Not set",
-                "days_overdue": (timezone.now() - bill.due_date).days if bill.due_date else 0,
-            },
+            context=_get_overdue_context(bill),
         )
         return True
 
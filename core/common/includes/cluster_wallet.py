@@ -10,6 +10,7 @@ from django.utils import timezone
 from django.db import transaction
 
 from core.common.models import Wallet, Transaction, TransactionType
+from core.common.includes import revenue_rollups
 
 logger = logging.getLogger('clustr')
 
@@ -55,25 +56,16 @@ def get_revenue_summary(cluster, days=30):
             'transactions_count': 0
         }
     
-    end_date = timezone.now()
-    start_date = end_date - timezone.timedelta(days=days)
-    
-    transactions = Transaction.objects.filter(
-        cluster=cluster,
-        type=TransactionType.BILL_PAYMENT,
-        created_at__gte=start_date,
-        created_at__lte=end_date
-    )
-    
-    total_revenue = sum(t.amount for t in transactions)
+    start_date = timezone.now() - timezone.timedelta(days=days)
+    totals = revenue_rollups.get_totals(cluster, start=start_date)
     wallet_info = get_wallet_balance(cluster)
     
     return {
         'period_days': days,
-        'total_revenue': total_revenue,
-        'bill_payment_count': transactions.count(),
+        'total_revenue': totals['bill_payment_amount'],
+        'bill_payment_count': totals['bill_payment_count'],
         'current_balance': wallet_info['balance'],
-        'transactions_count': transactions.count()
+        'transactions_count': totals['bill_payment_count']
     }
 
 
@@ -84,46 +76,18 @@ def get_wallet_analytics(cluster):
     
     try:
         wallet = Wallet.objects.get(cluster=cluster, user_id=cluster.id)
-        
-        deposits = Transaction.objects.filter(
-            wallet=wallet,
-            type=TransactionType.DEPOSIT,
-            status='completed'
-        )
-        total_deposits = sum(t.amount for t in deposits) if deposits.exists() else Decimal('0.00')
-        
-        withdrawals = Transaction.objects.filter(
-            wallet=wallet,
-            type=TransactionType.TRANSFER,
-            status='completed'
-        )
-        total_withdrawals = sum(t.amount for t in withdrawals) if withdrawals.exists() else Decimal('0.00')
-        
-        bill_payments = Transaction.objects.filter(
-            wallet=wallet,
-            type=TransactionType.DEPOSIT,
-            status='completed',
-            metadata__source='bill_payment'
-        )
-        bill_payment_revenue = sum(t.amount for t in bill_payments) if bill_payments.exists() else Decimal('0.00')
-        bill_payment_count = bill_payments.count()
-        
-        all_transactions = Transaction.objects.filter(wallet=wallet)
-        total_transactions = all_transactions.count()
-        
-        last_transaction = all_transactions.order_by('-created_at').first()
-        last_transaction_at = last_transaction.created_at if last_transaction else None
+        totals = revenue_rollups.get_totals(cluster)
         
         return {
             'current_balance': wallet.balance,
             'available_balance': wallet.available_balance,
-            'total_deposits': total_deposits,
-            'total_withdrawals': total_withdrawals,
-            'net_balance': total_deposits - total_withdrawals,
-            'bill_payment_revenue': bill_payment_revenue,
-            'bill_payment_count': bill_payment_count,
-            'total_transactions': total_transactions,
-            'last_transaction_at': last_transaction_at,
+            'total_deposits': totals['deposit_amount'],
+            'total_withdrawals': totals['transfer_amount'],
+            'net_balance': totals['deposit_amount'] - totals['transfer_amount'],
+            'bill_payment_revenue': totals['bill_payment_revenue'],
+            'bill_payment_count': totals['bill_payment_revenue_count'],
+            'total_transactions': totals['wallet_transaction_count'],
+            'last_transaction_at': wallet.last_transaction_at,
             'wallet_created_at': wallet.created_at
         }
     except Wallet.DoesNotExist:
@@ -250,6 +214,25 @@ def add_manual_credit(cluster, amount, description, created_by):
         raise
 
 
+def get_or_create_cluster_wallet(cluster, currency='NGN'):
+    """Get the cluster's main wallet, creating it on first use."""
+    from core.common.models import WalletStatus
+
+    wallet, created = Wallet.objects.get_or_create(
+        cluster=cluster,
+        user_id=cluster.id,
+        defaults={
+            'balance': Decimal('0.00'),
+            'available_balance': Decimal('0.00'),
+            'currency': currency,
+            'status': WalletStatus.ACTIVE,
+            'created_by': str(cluster.id),
+            'last_modified_by': str(cluster.id)
+        }
+    )
+    return wallet
+
+
 @transaction.atomic
 def credit_cluster_from_bill_payment(cluster, amount, bill, txn=None):
     """Credit cluster wallet from bill payment."""
@@ -257,21 +240,8 @@ def credit_cluster_from_bill_payment(cluster, amount, bill, txn=None):
         raise ValueError("Cluster context is required")
     
     try:
-        from core.common.models import WalletStatus
-        
-        wallet, created = Wallet.objects.get_or_create(
-            cluster=cluster,
-            user_id=cluster.id,
-            defaults={
-                'balance': Decimal('0.00'),
-                'available_balance': Decimal('0.00'),
-                'currency': bill.currency,
-                'status': WalletStatus.ACTIVE,
-                'created_by': str(cluster.id),
-                'last_modified_by': str(cluster.id)
-            }
-        )
-        
+        wallet = get_or_create_cluster_wallet(cluster, bill.currency)
+
         description = f"Bill payment: {bill.title} (Bill #{bill.bill_number})"
         
         credit_txn = Transaction.objects.create(
@@ -0,0 +1,172 @@
+"""
+Idempotency key utilities for ClustR application.
+
+A request carrying an idempotency key is recorded in the IdempotencyKey table before
+it is processed and its response is stored afterwards. Retries with the same key
+are answered from the cache, or from the table on a cache miss, without running the
+request again.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.common.exceptions import ResourceConflictException, UnprocessedEntityException
+from core.common.models import IdempotencyKey
+
+logger = logging.getLogger("clustr")
+
+DEFAULT_TTL = 24 * 60 * 60
+
+CACHE_KEY = "idempotency:{scope}:{key}"
+
+
+def get_ttl() -> int:
+    """Get how long idempotency keys are kept, in seconds."""
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", DEFAULT_TTL)
+
+
+def get_fingerprint(*parts: Any) -> str:
+    """Hash the parts identifying a request, e.g. method, path and body."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_key(scope: str, key: str) -> str:
+    return CACHE_KEY.format(scope=scope, key=hashlib.sha256(key.encode()).hexdigest())
+
+
+def _check_fingerprint(record: IdempotencyKey, fingerprint: str) -> None:
+    if record.fingerprint != fingerprint:
+        raise UnprocessedEntityException(
+            "This idempotency key was already used with a different request."
+        )
+
+
+def _cache_record(record: IdempotencyKey) -> None:
+    cache.set(
+        _cache_key(record.scope, record.key),
+        {
+            "fingerprint": record.fingerprint,
+            "response_status": record.response_status,
+            "response_body": json.loads(
+                json.dumps(record.response_body, cls=DjangoJSONEncoder)
+            ),
+        },
+        timeout=max(int((record.expires_at - timezone.now()).total_seconds()), 1),
+    )
+
+
+def begin(scope: str, key: str, fingerprint: str) -> IdempotencyKey:
+    """
+    Claim an idempotency key before processing a request.
+
+    Args:
+        scope: Endpoint or webhook the key belongs to
+        key: Client idempotency key or provider event identifier
+        fingerprint: Hash of the request, see get_fingerprint
+
+    Returns:
+        The key record. If it is completed, its stored response should be
+        returned instead of processing the request.
+
+    Raises:
+        UnprocessedEntityException: The key was used with a different request
+        ResourceConflictException: A request with the key is still being processed
+    """
+    cached = cache.get(_cache_key(scope, key))
+    if cached is not None:
+        record = IdempotencyKey(scope=scope, key=key, **cached)
+        _check_fingerprint(record, fingerprint)
+        return record
+
+    expires_at = timezone.now() + timedelta(seconds=get_ttl())
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                scope=scope, key=key, fingerprint=fingerprint, expires_at=expires_at
+            )
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(scope=scope, key=key)
+
+    if record.expires_at <= timezone.now():
+        # Expired keys that have not been purged yet are reused
+        IdempotencyKey.objects.filter(id=record.id).delete()
+        return begin(scope, key, fingerprint)
+
+    _check_fingerprint(record, fingerprint)
+    if not record.is_completed:
+        raise ResourceConflictException(
+            "A request with this idempotency key is still being processed."
+        )
+
+    _cache_record(record)
+    return record
+
+
+def complete(record: IdempotencyKey, response_status: int, response_body: Any) -> None:
+    """
+    Store the response of a processed request for later retries.
+
+    Args:
+        record: Key record returned by begin
+        response_status: HTTP status of the response
+        response_body: JSON-serialisable response body
+    """
+    record.response_status = response_status
+    record.response_body = response_body
+    record.completed_at = timezone.now()
+    record.save(update_fields=["response_status", "response_body", "completed_at"])
+    _cache_record(record)
+
+
+def release(record: IdempotencyKey) -> None:
+    """Forget a key whose request failed, so it can be retried."""
+    IdempotencyKey.objects.filter(id=record.id).delete()
+    cache.delete(_cache_key(record.scope, record.key))
+
+
+def purge_expired() -> int:
+    """
+    Delete expired idempotency keys.
+
+    Returns:
+        Number of keys deleted
+    """
+    count, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    logger.info(f"Purged {count} expired idempotency keys")
+    return count
+
+
+def get_webhook_event_key(payload: str) -> Optional[str]:
+    """
+    Get an identifier for a payment provider webhook event.
+
+    Paystack and Flutterwave both send the event name and the charge under "data",
+    identified by "id" and by "reference" or "tx_ref".
+    """
+    try:
+        event = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(event, dict):
+        return None
+
+    data = event.get("data") or {}
+    identifier = data.get("id") or data.get("reference") or data.get("tx_ref")
+    if identifier is None:
+        return None
+    return f"{event.get('event', '')}:{identifier}"
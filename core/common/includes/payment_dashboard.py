@@ -0,0 +1,203 @@
+"""
+Payment dashboard snapshot cache for ClustR application.
+
+The admin payment dashboard is built once per cluster and cached with the
+cluster's dashboard version. Transaction, bill, wallet and recurring payment
+changes bump the version; a snapshot from an older version (or older than
+the freshness window) is still served while a background task rebuilds it.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum
+
+from core.common.includes import cluster_wallet
+from core.common.models import Bill, RecurringPayment, Transaction, TransactionStatus, Wallet
+
+logger = logging.getLogger("clustr")
+
+# Snapshots younger than this are served without a refresh
+DEFAULT_FRESH_SECONDS = 300
+
+# Snapshots are kept this long to serve while a refresh runs
+SNAPSHOT_TTL = 24 * 60 * 60
+
+REFRESH_LOCK_TIMEOUT = 60
+
+
+def _get_snapshot_key(cluster_id) -> str:
+    return f"payments:dashboard:{cluster_id}:snapshot"
+
+
+def _get_version_key(cluster_id) -> str:
+    return f"payments:dashboard:{cluster_id}:version"
+
+
+def _get_refresh_lock_key(cluster_id) -> str:
+    return f"payments:dashboard:{cluster_id}:refreshing"
+
+
+def bump_version(cluster_id) -> None:
+    """Mark the cached dashboard of a cluster as out of date."""
+    cache.set(_get_version_key(cluster_id), uuid.uuid4().hex, None)
+
+
+def queue_invalidation(cluster_id) -> None:
+    """Bump the dashboard version once the current database transaction commits."""
+    if cluster_id:
+        transaction.on_commit(lambda: bump_version(cluster_id))
+
+
+def build_snapshot(cluster) -> dict[str, Any]:
+    """
+    Compute the payment dashboard of a cluster.
+
+    Returns:
+        Validated dashboard data as returned by the dashboard endpoint
+    """
+    from core.common.serializers.payment_serializers import (
+        BillSerializer,
+        PaymentDashboardSerializer,
+        TransactionSerializer,
+    )
+
+    # Get payment statistics
+    total_wallets = Wallet.objects.filter(cluster=cluster).count()
+    total_transactions = Transaction.objects.filter(cluster=cluster).count()
+    total_bills = Bill.objects.filter(cluster=cluster).count()
+    total_recurring_payments = RecurringPayment.objects.filter(cluster=cluster).count()
+
+    # Get financial summary
+    total_transaction_volume = Transaction.objects.filter(
+        cluster=cluster, status=TransactionStatus.COMPLETED
+    ).aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+
+    total_pending_bills_amount = Bill.objects.filter(
+        cluster=cluster,
+        paid_at__isnull=True,
+    ).aggregate(total=Sum("amount") - Sum("paid_amount"))["total"] or Decimal("0.00")
+
+    # Get recent activity
+    recent_transactions = Transaction.objects.filter(cluster=cluster).order_by(
+        "-created_at"
+    )[:10]
+    recent_bills = Bill.objects.filter(cluster=cluster).order_by("-created_at")[:10]
+
+    # Get cluster wallet information
+    cluster_wallet_info = cluster_wallet.get_wallet_balance(cluster)
+    cluster_revenue = cluster_wallet.get_revenue_summary(cluster, days=30)
+
+    dashboard_data = {
+        "statistics": {
+            "total_wallets": total_wallets,
+            "total_transactions": total_transactions,
+            "total_bills": total_bills,
+            "total_recurring_payments": total_recurring_payments,
+            "total_transaction_volume": total_transaction_volume,
+            "total_pending_bills_amount": total_pending_bills_amount,
+        },
+        "cluster_wallet": {
+            "balance": cluster_wallet_info["balance"],
+            "available_balance": cluster_wallet_info["available_balance"],
+            "currency": cluster_wallet_info["currency"],
+            "status": cluster_wallet_info["status"],
+            "last_transaction_at": cluster_wallet_info["last_transaction_at"],
+        },
+        "cluster_revenue": {
+            "period_days": cluster_revenue["period_days"],
+            "total_revenue": cluster_revenue["total_revenue"],
+            "bill_payment_count": cluster_revenue["bill_payment_count"],
+            "current_balance": cluster_revenue["current_balance"],
+            "transactions_count": cluster_revenue["transactions_count"],
+        },
+        "recent_transactions": TransactionSerializer(recent_transactions, many=True).data,
+        "recent_bills": BillSerializer(recent_bills, many=True).data,
+    }
+
+    serializer = PaymentDashboardSerializer(data=dashboard_data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def refresh_snapshot(cluster) -> dict[str, Any]:
+    """
+    Rebuild and cache the dashboard snapshot of a cluster.
+
+    The version is read before building, so a change committed during the build
+    leaves the new snapshot already out of date rather than hiding the change.
+    """
+    version = _get_current_version(cluster.id)
+    data = json.loads(json.dumps(build_snapshot(cluster), cls=DjangoJSONEncoder))
+    snapshot = {
+        "version": version,
+        "built_at": time.time(),
+        "etag": hashlib.md5(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest(),
+        "data": data,
+    }
+    cache.set(_get_snapshot_key(cluster.id), snapshot, SNAPSHOT_TTL)
+    return snapshot
+
+
+def _get_current_version(cluster_id) -> str:
+    version = cache.get(_get_version_key(cluster_id))
+    if version is None:
+        cache.add(_get_version_key(cluster_id), uuid.uuid4().hex, None)
+        version = cache.get(_get_version_key(cluster_id))
+    return version
+
+
+def _queue_refresh(cluster_id) -> None:
+    if not cache.add(_get_refresh_lock_key(cluster_id), True, REFRESH_LOCK_TIMEOUT):
+        return
+
+    from core.common.tasks.payment import refresh_payment_dashboard
+
+    try:
+        refresh_payment_dashboard.delay(str(cluster_id))
+    except Exception as e:
+        cache.delete(_get_refresh_lock_key(cluster_id))
+        logger.error(f"Could not queue payment dashboard refresh for cluster {cluster_id}: {e}")
+
+
+def release_refresh_lock(cluster_id) -> None:
+    cache.delete(_get_refresh_lock_key(cluster_id))
+
+
+def get_dashboard(cluster) -> Tuple[dict[str, Any], str]:
+    """
+    Get the payment dashboard of a cluster with its ETag.
+
+    A fresh snapshot costs one cache read. An out-of-date snapshot is served as
+    is while a background refresh is queued; without any snapshot the dashboard
+    is built in the request.
+
+    Returns:
+        Dashboard data and its ETag
+    """
+    snapshot_key = _get_snapshot_key(cluster.id)
+    version_key = _get_version_key(cluster.id)
+    cached = cache.get_many([snapshot_key, version_key])
+    snapshot: Optional[dict] = cached.get(snapshot_key)
+
+    if snapshot is None:
+        snapshot = refresh_snapshot(cluster)
+        return snapshot["data"], snapshot["etag"]
+
+    fresh_seconds = getattr(settings, "PAYMENT_DASHBOARD_FRESH_SECONDS", DEFAULT_FRESH_SECONDS)
+    is_current = snapshot["version"] == cached.get(version_key)
+    if not is_current or time.time() - snapshot["built_at"] > fresh_seconds:
+        _queue_refresh(cluster.id)
+
+    return snapshot["data"], snapshot["etag"]
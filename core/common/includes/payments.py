@@ -6,11 +6,14 @@ Refactored from PaymentManager static methods to pure functions.
 import logging
 import hashlib
 import hmac
+import json
 from decimal import Decimal
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Iterable, Optional, Tuple
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
 
 from core.common.models import (
     Transaction,
@@ -31,23 +34,19 @@ class PaymentError(Exception):
 def initialize(transaction: Transaction, user_email: str, callback_url: str = None) -> Dict:
     """Initialize a payment transaction."""
     try:
-        provider = PaymentProviderFactory.get_provider(transaction.payment_provider)
+        provider = PaymentProviderFactory.get_provider(transaction.provider)
         
-        payment_data = {
-            'amount': float(transaction.amount),
-            'currency': transaction.currency,
-            'email': user_email,
-            'reference': transaction.transaction_id,
-            'callback_url': callback_url or settings.PAYMENT_CALLBACK_URL,
-            'metadata': transaction.metadata or {}
-        }
-        
-        response = provider.initialize_payment(payment_data)
+        response = provider.initialize_payment(
+            amount=transaction.amount,
+            currency=transaction.currency,
+            email=user_email,
+            callback_url=callback_url or settings.PAYMENT_CALLBACK_URL,
+            metadata=transaction.metadata or {},
+        )
         
-        if response.get('status'):
-            transaction.provider_reference = response.get('reference')
-            transaction.payment_url = response.get('authorization_url')
-            transaction.save()
+        if response.get('success'):
+            transaction.reference = response.get('reference')
+            transaction.save(update_fields=['reference'])
             
             logger.info(f"Payment initialized: {transaction.transaction_id}")
             return response
@@ -61,7 +60,6 @@ def initialize(transaction: Transaction, user_email: str, callback_url: str = No
         transaction.save()
         raise PaymentError(str(e))
 
-@transaction.atomic
 def process_webhook(provider: PaymentProvider, payload: str, signature: str) -> Optional[Transaction]:
     """
     Process webhook from payment provider.
@@ -75,8 +73,6 @@ def process_webhook(provider: PaymentProvider, payload: str, signature: str) ->
         Transaction object if processed successfully, None otherwise
     """
     try:
-        import json
-        
         # Parse payload
         try:
             webhook_data = json.loads(payload)
@@ -89,27 +85,15 @@ def process_webhook(provider: PaymentProvider, payload: str, signature: str) ->
             logger.error(f"Invalid webhook signature from {provider}")
             return None
         
-        # Extract transaction reference based on provider
-        reference = None
-        event_type = None
-        
-        if provider == PaymentProvider.PAYSTACK:
-            event_type = webhook_data.get('event')
-            if event_type == 'charge.success':
-                reference = webhook_data.get('data', {}).get('reference')
-        elif provider == PaymentProvider.FLUTTERWAVE:
-            event_type = webhook_data.get('event')
-            if event_type == 'charge.completed':
-                reference = webhook_data.get('data', {}).get('tx_ref')
+        event_type, reference = get_webhook_reference(provider, webhook_data)
         
         if not reference:
             logger.warning(f"No transaction reference found in {provider} webhook")
             return None
         
         # Find transaction
-        try:
-            transaction = Transaction.objects.get(transaction_id=reference)
-        except Transaction.DoesNotExist:
+        transaction = get_transactions_by_reference([reference]).get(reference)
+        if transaction is None:
             logger.error(f"Transaction not found: {reference}")
             return None
         
@@ -131,10 +115,12 @@ def process_webhook(provider: PaymentProvider, payload: str, signature: str) ->
         return None
 
 
-@transaction.atomic
 def verify_payment(transaction: Transaction, payment_provider: PaymentProvider) -> bool:
     """
     Verify payment with the payment provider.
+
+    The provider is called before any database transaction is opened, so a slow
+    provider does not hold a connection or row locks.
     
     Args:
         transaction: Transaction to verify
@@ -143,35 +129,7 @@ def verify_payment(transaction: Transaction, payment_provider: PaymentProvider)
         True if payment is verified and successful, False otherwise
     """
     try:
-        provider_service = PaymentProviderFactory.get_provider(payment_provider)
-        
-        # Verify with provider
-        verification_result = provider_service.verify_payment(
-            transaction.provider_reference or transaction.transaction_id,
-            float(transaction.amount)
-        )
-        
-        if verification_result.get('status') == 'success':
-            # Update transaction status
-            transaction.status = TransactionStatus.COMPLETED
-            transaction.processed_at = timezone.now()
-            transaction.provider_response = verification_result
-            transaction.save()
-            
-            # Process post-payment actions (notifications, wallet updates, etc.)
-            _handle_successful_payment(transaction)
-            
-            logger.info(f"Payment verified successfully: {transaction.transaction_id}")
-            return True
-        else:
-            # Mark as failed
-            transaction.status = TransactionStatus.FAILED
-            transaction.failure_reason = verification_result.get('message', 'Payment verification failed')
-            transaction.save()
-            
-            logger.error(f"Payment verification failed: {transaction.transaction_id}")
-            return False
-            
+        verification_result = verify_with_provider(transaction, payment_provider)
     except Exception as e:
         logger.error(f"Error verifying payment: {e}")
         transaction.status = TransactionStatus.FAILED
@@ -179,6 +137,59 @@ def verify_payment(transaction: Transaction, payment_provider: PaymentProvider)
         transaction.save()
         return False
 
+    return apply_verification(transaction, verification_result)
+
+
+def verify_with_provider(transaction: Transaction, payment_provider: PaymentProvider) -> dict[str, Any]:
+    """
+    Ask the payment provider for the outcome of a transaction.
+
+    Makes an HTTP call and must not be run inside a database transaction.
+
+    Returns:
+        Provider verification result with a boolean "success" key
+    """
+    provider_service = PaymentProviderFactory.get_provider(payment_provider)
+    return provider_service.verify_payment(transaction.reference or transaction.transaction_id)
+
+
+@transaction.atomic
+def apply_verification(txn: Transaction, verification_result: dict[str, Any]) -> bool:
+    """
+    Record a provider verification result on a transaction.
+
+    The transaction row is locked first, so a result applied twice (e.g. from a
+    webhook and a manual verification) only completes the payment once.
+
+    Returns:
+        True if the payment is successful, False otherwise
+    """
+    locked = Transaction.objects.select_for_update().get(pk=txn.pk)
+    if locked.status == TransactionStatus.COMPLETED:
+        logger.info(f"Payment already verified: {locked.transaction_id}")
+        return True
+
+    provider_response = json.loads(json.dumps(verification_result, cls=DjangoJSONEncoder))
+    if verification_result.get('success'):
+        locked.status = TransactionStatus.COMPLETED
+        locked.processed_at = timezone.now()
+        locked.provider_response = provider_response
+        locked.save()
+
+        # Process post-payment actions (notifications, wallet updates, etc.)
+        _handle_successful_payment(locked)
+
+        logger.info(f"Payment verified successfully: {locked.transaction_id}")
+        return True
+
+    locked.status = TransactionStatus.FAILED
+    locked.failure_reason = verification_result.get('message', 'Payment verification failed')
+    locked.provider_response = provider_response
+    locked.save()
+
+    logger.error(f"Payment verification failed: {locked.transaction_id}")
+    return False
+
 
 # process_utility_payment function removed - use utilities.process_utility_payment instead
 # The utilities module has a more comprehensive implementation with proper validation,
@@ -233,6 +244,59 @@ def process_recurring_payment(recurring_payment) -> Optional[Transaction]:
         return None
 
 
+def get_transactions_by_reference(references: Iterable[str]) -> Dict[str, Transaction]:
+    """
+    Get the transactions of provider references with one query.
+
+    Webhooks carry the reference the provider returned when the payment was
+    initialized, which is stored in Transaction.reference. Transactions without
+    a stored provider reference are matched on their transaction_id.
+
+    Returns:
+        Transactions keyed by the references they matched
+    """
+    references = {reference for reference in references if reference}
+    if not references:
+        return {}
+
+    by_reference, by_transaction_id = {}, {}
+    for txn in Transaction.objects.filter(
+        Q(reference__in=references) | Q(transaction_id__in=references)
+    ):
+        if txn.reference in references:
+            by_reference[txn.reference] = txn
+        if txn.transaction_id in references:
+            by_transaction_id[txn.transaction_id] = txn
+
+    return {
+        reference: by_reference.get(reference) or by_transaction_id[reference]
+        for reference in references
+        if reference in by_reference or reference in by_transaction_id
+    }
+
+
+def get_webhook_reference(provider: PaymentProvider, webhook_data: dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the event type and, for successful charges, the transaction reference
+    from a provider webhook payload.
+    """
+    event_type = webhook_data.get('event')
+    data = webhook_data.get('data') or {}
+    reference = None
+
+    if provider == PaymentProvider.PAYSTACK and event_type == 'charge.success':
+        reference = data.get('reference')
+    elif provider == PaymentProvider.FLUTTERWAVE and event_type == 'charge.completed':
+        reference = data.get('tx_ref')
+
+    return event_type, reference
+
+
+def verify_signature(provider: PaymentProvider, payload: str, signature: str) -> bool:
+    """Verify a webhook signature from a payment provider."""
+    return _verify_provider_signature(provider, payload, signature)
+
+
 def _verify_provider_signature(provider: PaymentProvider, payload: str, signature: str) -> bool:
     """Verify webhook signature from specific payment provider."""
     try:
@@ -0,0 +1,255 @@
+"""
+Payment reconciliation utilities for ClustR application.
+
+Pending provider transactions that never received a webhook are periodically
+verified against their provider, so settlement does not depend on users polling
+the verification endpoint.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.common.includes import payment_dashboard, payments
+from core.common.includes.third_party_services import http
+from core.common.models import (
+    PaymentProvider,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+    Wallet,
+)
+
+logger = logging.getLogger("clustr")
+
+RECONCILABLE_PROVIDERS = [PaymentProvider.PAYSTACK, PaymentProvider.FLUTTERWAVE]
+
+# Provider statuses for payments the customer may still complete
+PROVIDER_PENDING_STATUSES = {"pending", "ongoing", "processing", "queued", "abandoned"}
+
+# Transaction types whose amount is frozen while pending and must be released on failure
+FROZEN_AMOUNT_TYPES = {
+    TransactionType.WITHDRAWAL,
+    TransactionType.PAYMENT,
+    TransactionType.BILL_PAYMENT,
+}
+
+DEFAULT_RECONCILIATION_SETTINGS = {
+    # Transactions younger than this are left for their webhook
+    "stale_after": timedelta(minutes=15),
+    # Transactions still pending at the provider after this are failed as expired
+    "expire_after": timedelta(hours=48),
+    "batch_size": 500,
+    "max_workers": 8,
+}
+
+METRICS_CACHE_KEY = "payments:reconciliation:last_run"
+LOCK_CACHE_KEY = "payments:reconciliation:lock"
+LOCK_TIMEOUT = 600
+
+
+def _get_settings() -> dict[str, Any]:
+    return {
+        **DEFAULT_RECONCILIATION_SETTINGS,
+        **getattr(settings, "PAYMENT_RECONCILIATION", {}),
+    }
+
+
+def get_stale_pending(now=None, limit: Optional[int] = None) -> list[Transaction]:
+    """
+    Get pending provider transactions old enough to need reconciliation.
+
+    Oldest transactions come first, so a backlog is worked through across runs.
+    """
+    config = _get_settings()
+    now = now or timezone.now()
+    queryset = Transaction.objects.filter(
+        status__in=[TransactionStatus.PENDING, TransactionStatus.PROCESSING],
+        provider__in=RECONCILABLE_PROVIDERS,
+        created_at__lt=now - config["stale_after"],
+    ).order_by("created_at")
+    return list(queryset[: limit or config["batch_size"]])
+
+
+def _verify(txn: Transaction) -> tuple[Transaction, Optional[dict], Optional[Exception]]:
+    try:
+        return txn, payments.verify_with_provider(txn, txn.provider), None
+    except Exception as e:
+        return txn, None, e
+
+
+def verify_transactions(
+    transactions: list[Transaction], max_workers: int
+) -> list[tuple[Transaction, Optional[dict], Optional[Exception]]]:
+    """
+    Verify transactions with their providers concurrently.
+
+    Transactions are grouped by provider and a provider whose circuit breaker is
+    open is skipped entirely. The worker threads only make HTTP calls through the
+    pooled provider clients and never touch the database.
+
+    Returns:
+        (transaction, verification result, error) tuples for the verified transactions
+    """
+    by_provider = defaultdict(list)
+    for txn in transactions:
+        by_provider[txn.provider].append(txn)
+
+    verifiable = []
+    for provider, provider_transactions in by_provider.items():
+        breaker = http.get_breaker(provider)
+        if breaker is not None and breaker.is_open:
+            logger.warning(
+                f"Skipping reconciliation of {len(provider_transactions)} {provider} "
+                f"transactions, circuit breaker is open"
+            )
+            continue
+        verifiable.extend(provider_transactions)
+
+    if not verifiable:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(verifiable))) as executor:
+        return list(executor.map(_verify, verifiable))
+
+
+def _fail_frozen_amount_transaction(txn: Transaction, reason: str) -> bool:
+    """
+    Fail a transaction and release its frozen amount.
+
+    The transaction was read before the provider round-trip, so it is locked and
+    read again, and only failed if it is still pending: a webhook may have
+    completed it in the meantime. The wallet is locked too, so the released
+    amount is added to its current balance.
+
+    Returns:
+        True if the transaction was failed
+    """
+    with transaction.atomic():
+        locked = Transaction.objects.select_for_update().get(pk=txn.pk)
+        if locked.status not in [TransactionStatus.PENDING, TransactionStatus.PROCESSING]:
+            logger.info(f"Transaction {locked.transaction_id} settled during reconciliation")
+            return False
+        locked.wallet = Wallet.objects.select_for_update().get(pk=locked.wallet_id)
+        locked.mark_as_failed(reason)
+        return True
+
+
+def _fail_transactions(failures: dict[Transaction, str], now) -> int:
+    """Mark transactions failed, one bulk update per failure reason."""
+    by_reason = defaultdict(list)
+    for txn, reason in failures.items():
+        if txn.type in FROZEN_AMOUNT_TYPES:
+            # Releasing the frozen amount needs the wallet, so go row by row
+            _fail_frozen_amount_transaction(txn, reason)
+        else:
+            by_reason[reason].append(txn.pk)
+
+    for reason, pks in by_reason.items():
+        Transaction.objects.filter(
+            pk__in=pks,
+            status__in=[TransactionStatus.PENDING, TransactionStatus.PROCESSING],
+        ).update(
+            status=TransactionStatus.FAILED,
+            failed_at=now,
+            failure_reason=reason,
+            last_modified_at=now,
+        )
+
+    # Bulk updates send no post_save signals
+    for cluster_id in {txn.cluster_id for txn in failures}:
+        payment_dashboard.queue_invalidation(cluster_id)
+    return len(failures)
+
+
+def reconcile(now=None, limit: Optional[int] = None) -> dict[str, Any]:
+    """
+    Verify stale pending transactions with their providers and apply the results.
+
+    Successful payments are completed through payments.apply_verification, which
+    locks each row and runs the post-payment actions. Payments the provider
+    reports as failed, and payments still pending past the expiry window, are
+    failed in bulk. Transactions whose verification errored stay pending for the
+    next run until they expire.
+
+    Returns:
+        Reconciliation metrics, also cached under METRICS_CACHE_KEY
+    """
+    if not cache.add(LOCK_CACHE_KEY, True, LOCK_TIMEOUT):
+        logger.info("Payment reconciliation already running, skipping")
+        return {"skipped": True}
+
+    try:
+        config = _get_settings()
+        started = time.monotonic()
+        now = now or timezone.now()
+        transactions = get_stale_pending(now, limit)
+        results = verify_transactions(transactions, config["max_workers"])
+
+        metrics = {
+            "selected": len(transactions),
+            "verified": 0,
+            "completed": 0,
+            "failed": 0,
+            "expired": 0,
+            "still_pending": 0,
+            "errors": 0,
+            "skipped": len(transactions) - len(results),
+        }
+        failures = {}
+        for txn, result, error in results:
+            if error is not None:
+                logger.warning(f"Could not reconcile transaction {txn.transaction_id}: {error}")
+                metrics["errors"] += 1
+                # Unverifiable past expiry, e.g. the provider does not know the reference;
+                # otherwise these would be selected first on every run
+                if txn.created_at < now - config["expire_after"] and not isinstance(
+                    error, http.ProviderUnavailableError
+                ):
+                    failures[txn] = f"Payment could not be verified before expiry: {error}"
+                    metrics["expired"] += 1
+                continue
+
+            metrics["verified"] += 1
+            provider_status = str(result.get("status", "")).lower()
+            if result.get("success"):
+                payments.apply_verification(txn, result)
+                metrics["completed"] += 1
+            elif provider_status in PROVIDER_PENDING_STATUSES:
+                if txn.created_at < now - config["expire_after"]:
+                    failures[txn] = "Payment expired before completion"
+                    metrics["expired"] += 1
+                else:
+                    metrics["still_pending"] += 1
+            else:
+                failures[txn] = result.get("gateway_response") or (
+                    f"Payment {provider_status or 'verification'} failed"
+                )
+                metrics["failed"] += 1
+
+        _fail_transactions(failures, now)
+        metrics["duration_seconds"] = round(time.monotonic() - started, 3)
+        metrics["finished_at"] = timezone.now().isoformat()
+        cache.set(METRICS_CACHE_KEY, metrics, None)
+
+        logger.info(
+            f"Payment reconciliation: {metrics['selected']} selected, "
+            f"{metrics['completed']} completed, {metrics['failed'] + metrics['expired']} failed, "
+            f"{metrics['still_pending']} still pending, {metrics['errors']} errors, "
+            f"{metrics['skipped']} skipped in {metrics['duration_seconds']}s"
+        )
+        return metrics
+    finally:
+        cache.delete(LOCK_CACHE_KEY)
+
+
+def get_last_run_metrics() -> Optional[dict[str, Any]]:
+    """Get the metrics of the last reconciliation run, if any."""
+    return cache.get(METRICS_CACHE_KEY)
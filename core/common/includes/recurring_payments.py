@@ -4,9 +4,16 @@ Refactored from RecurringPaymentManager static methods to pure functions.
 """
 
 import logging
+import time
+import uuid
+from datetime import datetime
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from core.common.models import (
     RecurringPayment,
@@ -17,6 +24,12 @@ from core.common.models import (
 
 logger = logging.getLogger("clustr")
 
+# Number of due payments claimed (and row-locked) per database transaction
+DUE_PAYMENTS_BATCH_SIZE = 100
+# How long a run checkpoint is kept so a restarted worker can resume from it
+RUN_CHECKPOINT_TIMEOUT = 60 * 60 * 24
+RUN_CHECKPOINT_CACHE_KEY = "recurring_payments:run:{run_id}"
+
 
 def create(
     wallet: Wallet,
@@ -126,6 +139,210 @@ def get_summary(cluster, user_id: str) -> dict[str, Any]:
         ).count(),
     }
 
+
+def _empty_run_stats() -> dict[str, Any]:
+    return {
+        "processed": 0,
+        "failed": 0,
+        "paused": 0,
+        "batches": 0,
+        "total_latency_ms": 0.0,
+        "max_latency_ms": 0.0,
+    }
+
+
+def get_run_checkpoint(run_id: str) -> Optional[dict[str, Any]]:
+    """
+    Get the last committed checkpoint of a recurring payment run.
+
+    The checkpoint holds the run start time, the keyset cursor of the last committed
+    batch and the processed/failed/latency counters accumulated so far.
+    """
+    return cache.get(RUN_CHECKPOINT_CACHE_KEY.format(run_id=run_id))
+
+
+def _save_run_checkpoint(run_id: str, checkpoint: dict[str, Any]) -> None:
+    cache.set(
+        RUN_CHECKPOINT_CACHE_KEY.format(run_id=run_id),
+        checkpoint,
+        timeout=RUN_CHECKPOINT_TIMEOUT,
+    )
+
+
+def claim_due_payments(
+    run_started_at: datetime,
+    cursor: Optional[tuple[datetime, uuid.UUID]] = None,
+    cluster_ids: Optional[Iterable] = None,
+    batch_size: int = DUE_PAYMENTS_BATCH_SIZE,
+) -> list[RecurringPayment]:
+    """
+    Claim the next batch of due recurring payments across clusters.
+
+    Rows are locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` together with their
+    wallets, so concurrent workers never claim the same payment and balances are
+    checked under lock. Must be called inside a transaction.
+
+    Args:
+        run_started_at: Payments due after this instant, or that failed after it, are
+            left for the next run
+        cursor: (next_payment_date, id) of the last payment seen by this worker
+        cluster_ids: Restrict the claim to these clusters (all clusters if None)
+        batch_size: Maximum number of payments to claim
+
+    Returns:
+        List of locked payments with wallet, bill and utility provider loaded
+    """
+    queryset = (
+        RecurringPayment.objects.select_related(
+            "wallet", "cluster", "bill", "utility_provider"
+        )
+        .select_for_update(skip_locked=True, of=("self", "wallet"))
+        .filter(
+            Q(last_payment_date__isnull=True) | Q(last_payment_date__lt=run_started_at),
+            # A payment that failed in this run is not retried by another worker
+            Q(last_failed_at__isnull=True) | Q(last_failed_at__lt=run_started_at),
+            status=RecurringPaymentStatus.ACTIVE,
+            next_payment_date__lte=run_started_at,
+        )
+        .order_by("next_payment_date", "id")
+    )
+
+    if cluster_ids is not None:
+        queryset = queryset.filter(cluster_id__in=list(cluster_ids))
+
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        queryset = queryset.filter(
+            Q(next_payment_date__gt=cursor_date)
+            | Q(next_payment_date=cursor_date, id__gt=cursor_id)
+        )
+
+    due_payments = list(queryset[:batch_size])
+
+    # Payments drawing from the same wallet must share one instance so each
+    # debit sees the balance left by the previous one.
+    wallets = {}
+    for payment in due_payments:
+        payment.wallet = wallets.setdefault(payment.wallet_id, payment.wallet)
+
+    return due_payments
+
+
+def _process_claimed_payment(payment: RecurringPayment) -> bool:
+    try:
+        with transaction.atomic():
+            succeeded = payment.process_payment()
+    except Exception as e:
+        logger.error(f"Failed to process recurring payment {payment.id}: {e}")
+        # The savepoint rolled back the debit, discard the in-memory balance change
+        payment.wallet.refresh_from_db(
+            fields=["balance", "available_balance", "last_transaction_at"]
+        )
+        succeeded = False
+
+    if not succeeded:
+        payment.last_failed_at = timezone.now()
+        RecurringPayment.objects.filter(pk=payment.pk).update(
+            last_failed_at=payment.last_failed_at
+        )
+    return succeeded
+
+
+def drain_due_payments(
+    run_id: Optional[str] = None,
+    run_started_at: Optional[datetime] = None,
+    cluster_ids: Optional[Iterable] = None,
+    batch_size: int = DUE_PAYMENTS_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Process due recurring payments in locked batches until none are left.
+
+    Each batch is claimed and processed in its own transaction; once it commits, the
+    run checkpoint (cursor and counters) is saved, so re-running with the same
+    ``run_id`` after a worker restart resumes after the last committed batch.
+    Several workers can drain concurrently, each with its own ``run_id`` and the
+    same ``run_started_at``, so a payment that failed in one worker is not
+    retried by another.
+
+    Args:
+        run_id: Identifier of this worker's run, generated if not given
+        run_started_at: Start time shared by the workers of a run, now if not given
+        cluster_ids: Restrict processing to these clusters (all clusters if None)
+        batch_size: Number of payments claimed per transaction
+        max_batches: Stop after this many batches (no limit if None)
+
+    Returns:
+        Dictionary with the run id, processed/failed/paused counts, number of
+        batches and per-payment latency figures in milliseconds
+    """
+    run_id = run_id or uuid.uuid4().hex
+    checkpoint = get_run_checkpoint(run_id) or {
+        "run_started_at": run_started_at or timezone.now(),
+        "cursor": None,
+        "stats": _empty_run_stats(),
+    }
+    run_started_at = checkpoint["run_started_at"]
+    cursor = checkpoint["cursor"]
+    stats = checkpoint["stats"]
+    batches_this_call = 0
+
+    while max_batches is None or batches_this_call < max_batches:
+        batch_stats = _empty_run_stats()
+
+        with transaction.atomic():
+            due_payments = claim_due_payments(
+                run_started_at, cursor, cluster_ids, batch_size
+            )
+            if not due_payments:
+                break
+
+            # Taken before processing, which moves next_payment_date forward
+            last_claimed = due_payments[-1]
+            cursor = (last_claimed.next_payment_date, last_claimed.id)
+
+            for payment in due_payments:
+                started = time.monotonic()
+                succeeded = _process_claimed_payment(payment)
+                latency_ms = (time.monotonic() - started) * 1000
+
+                if succeeded:
+                    batch_stats["processed"] += 1
+                else:
+                    batch_stats["failed"] += 1
+                    if payment.status == RecurringPaymentStatus.PAUSED:
+                        batch_stats["paused"] += 1
+                batch_stats["total_latency_ms"] += latency_ms
+                batch_stats["max_latency_ms"] = max(
+                    batch_stats["max_latency_ms"], latency_ms
+                )
+
+        for key in ("processed", "failed", "paused", "total_latency_ms"):
+            stats[key] += batch_stats[key]
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], batch_stats["max_latency_ms"])
+        stats["batches"] += 1
+        batches_this_call += 1
+        _save_run_checkpoint(
+            run_id,
+            {"run_started_at": run_started_at, "cursor": cursor, "stats": stats},
+        )
+
+    attempted = stats["processed"] + stats["failed"]
+    results = {
+        "run_id": run_id,
+        **stats,
+        "avg_latency_ms": stats["total_latency_ms"] / attempted if attempted else 0.0,
+    }
+
+    if attempted:
+        logger.info(
+            f"Recurring payment run {run_id}: processed {stats['processed']}, "
+            f"failed {stats['failed']}, paused {stats['paused']} "
+            f"in {stats['batches']} batches (avg {results['avg_latency_ms']:.1f}ms)"
+        )
+    return results
+
+
 def process_due_payments(cluster) -> dict[str, int]:
     """
     Process due recurring payments for a cluster.
@@ -136,40 +353,12 @@ def process_due_payments(cluster) -> dict[str, int]:
     Returns:
         Dictionary with counts of processed, failed, and paused payments
     """
-    from django.utils import timezone
-    from core.common.includes import payments
-    
-    now = timezone.now()
-    due_payments = RecurringPayment.objects.filter(
-        cluster=cluster,
-        status=RecurringPaymentStatus.ACTIVE,
-        next_payment_date__lte=now
-    )
-    
-    results = {"processed": 0, "failed": 0, "paused": 0}
-    
-    for payment in due_payments:
-        try:
-            # Check if wallet has sufficient balance
-            if not payment.wallet.has_sufficient_balance(payment.amount):
-                logger.warning(f"Insufficient balance for recurring payment {payment.id}")
-                results["failed"] += 1
-                continue
-            
-            # Process the payment
-            transaction = payments.process_recurring_payment(payment)
-            if transaction:
-                payment.update_next_payment_date()
-                results["processed"] += 1
-                logger.info(f"Processed recurring payment {payment.id}")
-            else:
-                results["failed"] += 1
-                
-        except Exception as e:
-            logger.error(f"Failed to process recurring payment {payment.id}: {e}")
-            results["failed"] += 1
-    
-    return results
+    results = drain_due_payments(cluster_ids=[cluster.id])
+    return {
+        "processed": results["processed"],
+        "failed": results["failed"],
+        "paused": results["paused"],
+    }
 
 
 def send_payment_reminders(cluster, days_before: int = 1) -> int:
@@ -0,0 +1,127 @@
+"""
+Bulk persistence of imported residents for ClustR application.
+
+Residents are written with a handful of statements however many are
+imported: an upsert per batch of residents, one query reading back their
+IDs, one insert linking them to the cluster and one creating their password
+history. Welcome notifications are
+queued in batches once the import commits.
+"""
+
+import logging
+import typing
+from typing import Iterable, Sequence
+
+from django.db import transaction
+
+from core.common.includes import notifications
+from core.common.models import Cluster
+from core.notifications.events import NotificationEvents
+
+if typing.TYPE_CHECKING:
+    from accounts.models import AccountUser
+
+logger = logging.getLogger("clustr")
+
+RESIDENT_BATCH_SIZE = 1000
+NOTIFICATION_BATCH_SIZE = 500
+
+
+def get_existing_residents(email_addresses: Iterable[str]) -> dict[str, "AccountUser"]:
+    """Get the users with any of the email addresses, by email address."""
+    from accounts.models import AccountUser
+
+    return AccountUser.objects.filter(
+        email_address__in=set(email_addresses)
+    ).only("id", "email_address", "owner_id").in_bulk(field_name="email_address")
+
+
+@transaction.atomic
+def persist_residents(
+    cluster_id,
+    residents: Sequence["AccountUser"],
+    update_fields: Sequence[str] = (),
+) -> list["AccountUser"]:
+    """
+    Insert imported residents and link them to the cluster.
+
+    Residents whose email address is already taken update the existing user's
+    update_fields, or are left out if there are none.
+
+    Args:
+        cluster_id: ID of the cluster the residents are imported into
+        residents: Unsaved residents, prepared for import
+        update_fields: Fields of existing users to update from the import
+
+    Returns:
+        The inserted and updated residents, with the IDs they are stored under.
+    """
+    from accounts.models import AccountUser, PreviousPasswords
+
+    if not residents:
+        return []
+
+    if update_fields:
+        AccountUser.objects.bulk_create(
+            residents,
+            batch_size=RESIDENT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["email_address"],
+            update_fields=list(update_fields),
+        )
+    else:
+        AccountUser.objects.bulk_create(
+            residents, batch_size=RESIDENT_BATCH_SIZE, ignore_conflicts=True
+        )
+
+    # Residents carry the IDs generated for them, which are not the stored IDs of
+    # updated or skipped users
+    stored_ids = dict(
+        AccountUser.objects.filter(
+            email_address__in=[resident.email_address for resident in residents]
+        ).values_list("email_address", "pk")
+    )
+    if update_fields:
+        for resident in residents:
+            resident.pk = stored_ids[resident.email_address]
+        persisted = list(residents)
+    else:
+        persisted = [
+            resident
+            for resident in residents
+            if stored_ids.get(resident.email_address) == resident.pk
+        ]
+
+    Membership = AccountUser.clusters.through
+    Membership.objects.bulk_create(
+        [Membership(accountuser_id=resident.pk, cluster_id=cluster_id) for resident in persisted],
+        batch_size=RESIDENT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # bulk_create skips the post_save signal that starts a new user's password history
+    PreviousPasswords.objects.bulk_create(
+        [PreviousPasswords(user_id=resident.pk) for resident in persisted],
+        batch_size=RESIDENT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return persisted
+
+
+def queue_welcome_notifications(cluster_id, residents: Sequence["AccountUser"]) -> None:
+    """Send new residents their welcome notification, in batches, once the import commits."""
+    if not residents:
+        return
+
+    residents = list(residents)
+
+    def send():
+        cluster = Cluster.objects.get(pk=cluster_id)
+        for start in range(0, len(residents), NOTIFICATION_BATCH_SIZE):
+            notifications.send(
+                event_name=NotificationEvents.SYSTEM_UPDATE,  # Placeholder for a more specific onboarding event
+                recipients=residents[start : start + NOTIFICATION_BATCH_SIZE],
+                cluster=cluster,
+                context={"cluster_name": cluster.name},
+            )
+
+    transaction.on_commit(send)
@@ -0,0 +1,270 @@
+"""
+Cluster revenue rollup utilities for ClustR application.
+
+Completed transactions are summed into hourly rollups per cluster, and hourly rollups
+into daily ones, so revenue and wallet analytics read O(days) rows instead of every
+transaction.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from core.common.models import (
+    ClusterRevenueRollup,
+    RollupGranularity,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+
+logger = logging.getLogger("clustr")
+
+AMOUNT_FIELDS = [
+    "deposit_amount",
+    "transfer_amount",
+    "bill_payment_revenue",
+    "bill_payment_amount",
+]
+
+COUNT_FIELDS = [
+    "deposit_count",
+    "transfer_count",
+    "bill_payment_revenue_count",
+    "bill_payment_count",
+    "wallet_transaction_count",
+]
+
+ROLLUP_FIELDS = AMOUNT_FIELDS + COUNT_FIELDS
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _zero_amount():
+    return Value(Decimal("0.00"), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def _sum_amount(condition: Q):
+    return Coalesce(Sum("amount", filter=condition), _zero_amount())
+
+
+def _transaction_aggregates() -> dict[str, Any]:
+    """Aggregate expressions turning completed transactions into rollup fields."""
+    cluster_wallet = Q(wallet__user_id=F("cluster_id"))
+    deposit = cluster_wallet & Q(type=TransactionType.DEPOSIT)
+    transfer = cluster_wallet & Q(type=TransactionType.TRANSFER)
+    bill_credit = deposit & Q(metadata__source="bill_payment")
+    bill_payment = Q(type=TransactionType.BILL_PAYMENT)
+
+    return {
+        "deposit_amount": _sum_amount(deposit),
+        "deposit_count": Count("id", filter=deposit),
+        "transfer_amount": _sum_amount(transfer),
+        "transfer_count": Count("id", filter=transfer),
+        "bill_payment_revenue": _sum_amount(bill_credit),
+        "bill_payment_revenue_count": Count("id", filter=bill_credit),
+        "bill_payment_amount": _sum_amount(bill_payment),
+        "bill_payment_count": Count("id", filter=bill_payment),
+        "wallet_transaction_count": Count("id", filter=cluster_wallet),
+    }
+
+
+def _rollup_aggregates() -> dict[str, Any]:
+    """Aggregate expressions summing rollup rows into one total."""
+    aggregates = {field: Coalesce(Sum(field), _zero_amount()) for field in AMOUNT_FIELDS}
+    aggregates.update({field: Coalesce(Sum(field), 0) for field in COUNT_FIELDS})
+    return aggregates
+
+
+def _hour_start(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _day_start(moment):
+    return _hour_start(moment).replace(hour=0)
+
+
+def _store(cluster_id, granularity: str, period_start, totals: dict[str, Any]) -> None:
+    ClusterRevenueRollup.objects.update_or_create(
+        cluster_id=cluster_id,
+        granularity=granularity,
+        period_start=period_start,
+        defaults=totals,
+    )
+
+
+def refresh_rollup(cluster_id, occurred_at) -> None:
+    """
+    Recompute the hourly and daily rollups containing a point in time.
+
+    Each bucket is recomputed from its source rows rather than incremented, so
+    refreshing the same bucket more than once is harmless. The daily rollup row is
+    locked first, so concurrent refreshes of the same day run one after the other
+    and each sums the hourly rollups committed by the previous one.
+
+    Args:
+        cluster_id: ID of the cluster to refresh
+        occurred_at: Creation time of the transaction that changed
+    """
+    hour_start = _hour_start(occurred_at)
+    day_start = _day_start(occurred_at)
+
+    with transaction.atomic():
+        day_rollup, _ = ClusterRevenueRollup.objects.select_for_update().get_or_create(
+            cluster_id=cluster_id,
+            granularity=RollupGranularity.DAY,
+            period_start=day_start,
+        )
+
+        hour_totals = Transaction.objects.filter(
+            cluster_id=cluster_id,
+            status=TransactionStatus.COMPLETED,
+            created_at__gte=hour_start,
+            created_at__lt=hour_start + timedelta(hours=1),
+        ).aggregate(**_transaction_aggregates())
+        _store(cluster_id, RollupGranularity.HOUR, hour_start, hour_totals)
+
+        day_totals = ClusterRevenueRollup.objects.filter(
+            cluster_id=cluster_id,
+            granularity=RollupGranularity.HOUR,
+            period_start__gte=day_start,
+            period_start__lt=day_start + timedelta(days=1),
+        ).aggregate(**_rollup_aggregates())
+        for field, value in day_totals.items():
+            setattr(day_rollup, field, value)
+        day_rollup.save(update_fields=[*ROLLUP_FIELDS, "last_modified_at"])
+
+
+def get_totals(cluster, start=None) -> dict[str, Any]:
+    """
+    Get rollup totals for a cluster since a point in time.
+
+    Whole days are read from daily rollups and whole hours of the first day from
+    hourly ones, so at most days + 24 rows are summed. Minutes before the first full
+    hour are summed from their transactions so nothing before ``start`` is counted.
+
+    Args:
+        cluster: Cluster to get totals for
+        start: Start of the period (all time if None)
+
+    Returns:
+        Dictionary with the summed rollup fields
+    """
+    rollups = ClusterRevenueRollup.objects.filter(cluster=cluster)
+    if start is None:
+        return rollups.filter(granularity=RollupGranularity.DAY).aggregate(
+            **_rollup_aggregates()
+        )
+
+    first_full_hour = _hour_start(start)
+    if first_full_hour < start:
+        first_full_hour += timedelta(hours=1)
+    first_full_day = _day_start(start) + timedelta(days=1)
+
+    partial_hour = Transaction.objects.filter(
+        cluster=cluster,
+        status=TransactionStatus.COMPLETED,
+        created_at__gte=start,
+        created_at__lt=first_full_hour,
+    ).aggregate(**_transaction_aggregates())
+    partial_day = rollups.filter(
+        granularity=RollupGranularity.HOUR,
+        period_start__gte=first_full_hour,
+        period_start__lt=first_full_day,
+    ).aggregate(**_rollup_aggregates())
+    full_days = rollups.filter(
+        granularity=RollupGranularity.DAY,
+        period_start__gte=first_full_day,
+    ).aggregate(**_rollup_aggregates())
+
+    return {
+        field: partial_hour[field] + partial_day[field] + full_days[field]
+        for field in ROLLUP_FIELDS
+    }
+
+
+@transaction.atomic
+def backfill(cluster=None, since=None) -> dict[str, int]:
+    """
+    Rebuild rollups from completed transactions.
+
+    Existing rollups in the period are replaced. Hourly rollups are computed with one
+    grouped query over transactions and daily rollups with one over the hourly rows.
+
+    Args:
+        cluster: Cluster to rebuild (all clusters if None)
+        since: Rebuild from the start of this day onwards (all time if None)
+
+    Returns:
+        Number of hourly and daily rollups written
+    """
+    transactions = Transaction.objects.filter(status=TransactionStatus.COMPLETED)
+    rollups = ClusterRevenueRollup.objects.all()
+    if cluster is not None:
+        transactions = transactions.filter(cluster=cluster)
+        rollups = rollups.filter(cluster=cluster)
+    if since is not None:
+        since = _day_start(since)
+        transactions = transactions.filter(created_at__gte=since)
+        rollups = rollups.filter(period_start__gte=since)
+
+    rollups.delete()
+
+    hourly = (
+        transactions.annotate(period=TruncHour("created_at"))
+        .values("cluster_id", "period")
+        .annotate(**_transaction_aggregates())
+        .order_by()
+    )
+    hours = _bulk_store(RollupGranularity.HOUR, hourly)
+
+    daily = (
+        rollups.filter(granularity=RollupGranularity.HOUR)
+        .annotate(period=TruncDay("period_start"))
+        .values("cluster_id", "period")
+        .annotate(**{f"total_{field}": Sum(field) for field in ROLLUP_FIELDS})
+        .order_by()
+    )
+    days = _bulk_store(RollupGranularity.DAY, daily, prefix="total_")
+
+    logger.info(f"Backfilled {hours} hourly and {days} daily revenue rollups")
+    return {"hours": hours, "days": days}
+
+
+def _bulk_store(granularity: str, rows, prefix: str = "") -> int:
+    count = 0
+    batch = []
+    for row in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        batch.append(
+            ClusterRevenueRollup(
+                cluster_id=row["cluster_id"],
+                granularity=granularity,
+                period_start=row["period"],
+                **{field: row[f"{prefix}{field}"] for field in ROLLUP_FIELDS},
+            )
+        )
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ClusterRevenueRollup.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        ClusterRevenueRollup.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def queue_refresh(txn: Transaction) -> None:
+    """Refresh the rollups for a completed transaction once it is committed."""
+    from core.common.tasks.payment import refresh_cluster_revenue_rollup
+
+    cluster_id = str(txn.cluster_id)
+    occurred_at = (txn.created_at or timezone.now()).isoformat()
+    transaction.on_commit(
+        lambda: refresh_cluster_revenue_rollup.delay(cluster_id, occurred_at)
+    )
@@ -0,0 +1,247 @@
+"""
+Shared HTTP client for third-party provider APIs.
+
+Each provider gets one long-lived client holding a requests Session with a
+keep-alive connection pool, split connect/read timeouts, retries with jittered
+backoff for idempotent calls and a circuit breaker that fails fast while the
+provider is down.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core.common.includes.third_party_services.interfaces.payments import PaymentProviderError
+
+logger = logging.getLogger("clustr")
+
+DEFAULT_HTTP_SETTINGS = {
+    "connect_timeout": 3.05,
+    "read_timeout": 20,
+    "max_retries": 2,
+    "backoff": 0.5,
+    "max_backoff": 5,
+    "pool_maxsize": 10,
+    "breaker_failure_threshold": 5,
+    "breaker_reset_timeout": 30,
+}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_clients: dict[str, "ProviderHTTPClient"] = {}
+_clients_lock = threading.Lock()
+
+
+class ProviderUnavailableError(PaymentProviderError):
+    """Raised without calling the provider while its circuit breaker is open."""
+    pass
+
+
+def get_http_settings() -> dict[str, Any]:
+    """Get provider HTTP settings, overridable through the PROVIDER_HTTP setting."""
+    return {**DEFAULT_HTTP_SETTINGS, **getattr(settings, "PROVIDER_HTTP", {})}
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After failure_threshold consecutive failures the breaker opens and calls fail
+    fast for reset_timeout seconds. Then one trial call is let through: success
+    closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def before_call(self) -> None:
+        """Raise if calls are currently blocked."""
+        with self._lock:
+            state = self.state
+            if state == self.OPEN:
+                raise ProviderUnavailableError(
+                    f"{self.name} is unavailable, circuit breaker is open"
+                )
+            if state == self.HALF_OPEN:
+                # Let this call through as the trial and block others meanwhile
+                self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"Circuit breaker for {self.name} opened after "
+                        f"{self.failures} consecutive failures"
+                    )
+                self.opened_at = time.monotonic()
+
+
+class ProviderHTTPClient:
+    """Pooled, keep-alive HTTP client for one provider API."""
+
+    def __init__(self, name: str, base_url: str, headers: Optional[dict] = None, **options):
+        config = {**get_http_settings(), **options}
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (config["connect_timeout"], config["read_timeout"])
+        self.max_retries = config["max_retries"]
+        self.backoff = config["backoff"]
+        self.max_backoff = config["max_backoff"]
+        self.breaker = CircuitBreaker(
+            name, config["breaker_failure_threshold"], config["breaker_reset_timeout"]
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=config["pool_maxsize"], max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter, so retries from many workers do not arrive together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        json: Optional[dict] = None,
+        idempotent: Optional[bool] = None,
+    ) -> dict[str, Any]:
+        """
+        Call the provider API and return the decoded JSON response.
+
+        Args:
+            method: HTTP method
+            endpoint: Path relative to the base URL
+            params: Query string parameters
+            json: JSON request body
+            idempotent: Whether the call may be retried after it reached the
+                provider (defaults to True for GET and other idempotent methods)
+
+        Raises:
+            ProviderUnavailableError: The circuit breaker is open
+            PaymentProviderError: The request failed after all retries
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        url = f"{self.base_url}{endpoint}"
+
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json, timeout=self.timeout
+                )
+            except requests.exceptions.RequestException as e:
+                self.breaker.record_failure()
+                error = str(e)
+                # A connect timeout means the request was never sent, so it is
+                # safe to retry even for non-idempotent calls
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+            else:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                    error, retryable = f"HTTP {response.status_code}", idempotent
+                else:
+                    self.breaker.record_success()
+                    if response.status_code not in RETRY_STATUS_CODES or not idempotent:
+                        return self._decode(response)
+                    error, retryable = f"HTTP {response.status_code}", True
+
+            if not retryable or attempt >= self.max_retries:
+                logger.error(f"{self.name} API request {method} {endpoint} failed: {error}")
+                raise PaymentProviderError(f"API request failed: {error}")
+
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            logger.warning(
+                f"{self.name} API request {method} {endpoint} failed ({error}), "
+                f"retry {attempt} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+    def _decode(self, response) -> dict[str, Any]:
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"{self.name} API request failed: {e}")
+            raise PaymentProviderError(f"API request failed: {e}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def get_client(name: str, base_url: str, headers: Optional[dict] = None) -> ProviderHTTPClient:
+    """
+    Get the shared HTTP client for a provider, creating it on first use.
+
+    Clients are shared per process, so all calls to a provider reuse the same
+    connection pool and circuit breaker.
+    """
+    client = _clients.get(name)
+    if client is None or client.base_url != base_url.rstrip("/"):
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None or client.base_url != base_url.rstrip("/"):
+                client = ProviderHTTPClient(name, base_url, headers)
+                _clients[name] = client
+    return client
+
+
+def get_breaker(name: str) -> Optional[CircuitBreaker]:
+    """Get the circuit breaker of a provider, if a client exists for it."""
+    client = _clients.get(name)
+    return client.breaker if client else None
+
+
+def reset_clients() -> None:
+    """Close and forget all shared clients, e.g. after settings change in tests."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,33 +1,50 @@
 import logging
+import threading
 from core.common.models import (
     PaymentProvider,
 )
 from core.common.includes.third_party_services.implementations.payments.paystack import PaystackProvider
 from core.common.includes.third_party_services.implementations.payments.flutterwave import FlutterwaveProvider
-from core.common.includes.third_party_services.interfaces import PaymentProviderInterface
+from core.common.includes.third_party_services import http
+from core.common.includes.third_party_services.interfaces.payments import (
+    PaymentProviderError,
+    PaymentProviderInterface,
+)
 
 
 logger = logging.getLogger("clustr")
 
 class PaymentProviderFactory:
-    """Factory for creating payment provider instances."""
+    """Factory for payment provider instances, cached per process."""
     
     _providers = {
         PaymentProvider.PAYSTACK: PaystackProvider,
         PaymentProvider.FLUTTERWAVE: FlutterwaveProvider,
     }
+
+    _instances = {}
+    _lock = threading.Lock()
     
     @classmethod
     def get_provider(cls, provider_type: PaymentProvider) -> PaymentProviderInterface:
-        """Get a payment provider instance."""
+        """Get the shared payment provider instance."""
         if provider_type not in cls._providers:
             raise PaymentProviderError(f"Unsupported payment provider: {provider_type}")
-        
-        try:
-            return cls._providers[provider_type]()
-        except Exception as e:
-            logger.error(f"Failed to initialize payment provider {provider_type}: {e}")
-            raise PaymentProviderError(f"Failed to initialize payment provider: {str(e)}")
+
+        provider = cls._instances.get(provider_type)
+        if provider is not None:
+            return provider
+
+        with cls._lock:
+            provider = cls._instances.get(provider_type)
+            if provider is None:
+                try:
+                    provider = cls._providers[provider_type]()
+                except Exception as e:
+                    logger.error(f"Failed to initialize payment provider {provider_type}: {e}")
+                    raise PaymentProviderError(f"Failed to initialize payment provider: {str(e)}")
+                cls._instances[provider_type] = provider
+        return provider
     
     @classmethod
     def get_available_providers(cls) -> list:
@@ -41,3 +58,9 @@ class PaymentProviderFactory:
                 continue
         return available
 
+    @classmethod
+    def reset(cls):
+        """Forget cached providers and their HTTP clients, e.g. after settings change."""
+        with cls._lock:
+            cls._instances.clear()
+        http.reset_clients()
@@ -1,9 +1,11 @@
+import hashlib
+import hmac
 from typing import Any, Optional
 import logging
 from decimal import Decimal
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-import requests
+from core.common.includes.third_party_services import http
 from core.common.includes.third_party_services.interfaces.payments import PaymentProviderInterface, PaymentProviderError
 
 logger = logging.getLogger("clustr")
@@ -14,31 +16,25 @@ class FlutterwaveProvider(PaymentProviderInterface):
     def __init__(self):
         self.secret_key = getattr(settings, 'FLUTTERWAVE_SECRET_KEY', '')
         self.public_key = getattr(settings, 'FLUTTERWAVE_PUBLIC_KEY', '')
-        self.base_url = "https://api.flutterwave.com/v3"
+        self.base_url = getattr(settings, 'FLUTTERWAVE_BASE_URL', "https://api.flutterwave.com/v3")
         
         if not self.secret_key:
             raise PaymentProviderError("Flutterwave secret key not configured")
+
+        self.client = http.get_client(
+            "flutterwave",
+            self.base_url,
+            headers={
+                'Authorization': f'Bearer {self.secret_key}',
+                'Content-Type': 'application/json',
+            },
+        )
     
     def _make_request(self, method: str, endpoint: str, data: Optional[dict] = None) -> dict[str, Any]:
-        """Make HTTP request to Flutterwave API."""
-        url = f"{self.base_url}{endpoint}"
-        headers = {
-            'Authorization': f'Bearer {self.secret_key}',
-            'Content-Type': 'application/json',
-        }
-        
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=data, timeout=30)
-            else:
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            response.raise_for_status()
-            return response.json()
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Flutterwave API request failed: {e}")
-            raise PaymentProviderError(f"API request failed: {str(e)}")
+        """Make HTTP request to Flutterwave API through the shared pooled client."""
+        if method.upper() == 'GET':
+            return self.client.request(method, endpoint, params=data)
+        return self.client.request(method, endpoint, json=data)
     
     def initialize_payment(self, amount: Decimal, currency: str, email: str, 
                          callback_url: str, metadata: Optional[dict] = None) -> dict[str, Any]:
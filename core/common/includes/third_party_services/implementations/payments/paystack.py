@@ -1,8 +1,10 @@
+import hashlib
+import hmac
 from typing import Dict, Any, Optional
 from decimal import Decimal
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-import requests
+from core.common.includes.third_party_services import http
 from core.common.includes.third_party_services.interfaces.payments import PaymentProviderInterface, PaymentProviderError
 
 class PaystackProvider(PaymentProviderInterface):
@@ -11,31 +13,25 @@ class PaystackProvider(PaymentProviderInterface):
     def __init__(self):
         self.secret_key = getattr(settings, 'PAYSTACK_SECRET_KEY', '')
         self.public_key = getattr(settings, 'PAYSTACK_PUBLIC_KEY', '')
-        self.base_url = "https://api.paystack.co"
+        self.base_url = getattr(settings, 'PAYSTACK_BASE_URL', "https://api.paystack.co")
         
         if not self.secret_key:
             raise PaymentProviderError("Paystack secret key not configured")
+
+        self.client = http.get_client(
+            "paystack",
+            self.base_url,
+            headers={
+                'Authorization': f'Bearer {self.secret_key}',
+                'Content-Type': 'application/json',
+            },
+        )
     
     def _make_request(self, method: str, endpoint: str, data: Optional[dict] = None) -> dict[str, Any]:
-        """Make HTTP request to Paystack API."""
-        url = f"{self.base_url}{endpoint}"
-        headers = {
-            'Authorization': f'Bearer {self.secret_key}',
-            'Content-Type': 'application/json',
-        }
-        
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=data, timeout=30)
-            else:
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            response.raise_for_status()
-            return response.json()
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Paystack API request failed: {e}")
-            raise PaymentProviderError(f"API request failed: {str(e)}")
+        """Make HTTP request to Paystack API through the shared pooled client."""
+        if method.upper() == 'GET':
+            return self.client.request(method, endpoint, params=data)
+        return self.client.request(method, endpoint, json=data)
     
     def initialize_payment(self, amount: Decimal, currency: str, email: str, 
                          callback_url: str, metadata: Optional[dict] = None) -> dict[str, Any]:
@@ -2,9 +2,12 @@
 Utility service functions for bill payments.
 """
 
+import hashlib
 import logging
 from decimal import Decimal
 from typing import Dict, List, Any
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.db import transaction
 
@@ -17,15 +20,49 @@ from core.common.models import (
     UtilityProvider,
     Bill,
     BillCategory,
-    BillStatus,
 )
 from core.common.models.payments.payment_error import (
     PaymentErrorType,
     PaymentErrorSeverity,
 )
+from core.common.includes.third_party_services import PaymentProviderFactory
 
 logger = logging.getLogger("clustr")
 
+# Service types offered in the utility provider catalogue
+UTILITY_SERVICE_TYPES = ["electricity", "water", "internet", "cable_tv"]
+
+CATALOGUE_PROVIDERS = [PaymentProvider.PAYSTACK, PaymentProvider.FLUTTERWAVE]
+
+DEFAULT_UTILITY_CACHE_SETTINGS = {
+    # Outlives the beat refresh interval so readers never hit a cold catalogue
+    "catalogue_ttl": 24 * 60 * 60,
+    "customer_ttl": 5 * 60,
+    # Shorter, so a meter registered moments ago is not rejected for long
+    "invalid_customer_ttl": 60,
+}
+
+
+def _get_cache_settings() -> Dict[str, int]:
+    return {
+        **DEFAULT_UTILITY_CACHE_SETTINGS,
+        **getattr(settings, "UTILITY_CACHE", {}),
+    }
+
+
+def _get_bills_client(provider: str):
+    """
+    Get the shared HTTP client of a payment provider.
+
+    Utility purchases go through the same pooled client as the provider's payment
+    calls, so their failures count towards the provider's circuit breaker.
+    """
+    return PaymentProviderFactory.get_provider(provider).client
+
+
+def _get_purchase_metadata(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in kwargs.items() if key != "reference"}
+
 
 # Paystack utility functions
 def validate_paystack_customer(customer_id: str, provider_code: str) -> Dict[str, Any]:
@@ -95,29 +132,34 @@ def purchase_paystack_utility(
         Dict containing transaction result
     """
     try:
-        # TODO: Implement actual Paystack API call
-        # Mock response now includes a token for electricity purchases
         reference = kwargs.get("reference", "")
-        response_data = {
+        response = _get_bills_client(PaymentProvider.PAYSTACK).request(
+            "POST",
+            "/bills/pay",
+            json={
+                "customer": customer_id,
+                "amount": int(amount * 100),  # Convert to kobo
+                "provider": provider_code,
+                "reference": reference,
+                "metadata": _get_purchase_metadata(kwargs),
+            },
+        )
+        if not response.get("status"):
+            return {"success": False, "error": response.get("message", "Unknown error")}
+
+        data = response.get("data") or {}
+        return {
             "success": True,
-            "transaction_id": f"PSK_{timezone.now().strftime('%Y%m%d%H%M%S')}",
-            "reference": reference,
+            "transaction_id": data.get("id"),
+            "reference": data.get("reference", reference),
             "amount": str(amount),
             "customer_id": customer_id,
             "provider_code": provider_code,
-            "status": "success",
-            "metadata": kwargs,  # Store sent params
+            "status": data.get("status"),
+            "token": data.get("token"),
+            "units": data.get("units"),
+            "metadata": kwargs,
         }
-
-        # Example of handling different utility types based on provider code or kwargs
-        if "electric" in provider_code or kwargs.get("service_type") == "electricity":
-            response_data["token"] = "0123-4567-8901-2345-6789"
-            response_data["units"] = f"{amount / Decimal('50.0')}"  # Mock calculation
-
-        if "data" in provider_code or kwargs.get("service_type") == "internet":
-            response_data["bundle"] = kwargs.get("bundle_code", "Default Bundle")
-
-        return response_data
     except Exception as e:
         logger.error(f"Paystack utility purchase failed: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -221,27 +263,35 @@ def purchase_flutterwave_utility(
         Dict containing transaction result
     """
     try:
-        # TODO: Implement actual Flutterwave API call
         reference = kwargs.get("reference", "")
-        response_data = {
+        response = _get_bills_client(PaymentProvider.FLUTTERWAVE).request(
+            "POST",
+            "/bills",
+            json={
+                "country": "NG",
+                "customer": customer_id,
+                "amount": str(amount),
+                "recurrence": "ONCE",
+                "type": provider_code,
+                "reference": reference,
+                "meta": _get_purchase_metadata(kwargs),
+            },
+        )
+        if response.get("status") != "success":
+            return {"success": False, "error": response.get("message", "Unknown error")}
+
+        data = response.get("data") or {}
+        return {
             "success": True,
-            "transaction_id": f"FLW_{timezone.now().strftime('%Y%m%d%H%M%S')}",
-            "reference": reference,
+            "transaction_id": data.get("flw_ref"),
+            "reference": data.get("tx_ref", reference),
             "amount": str(amount),
             "customer_id": customer_id,
             "provider_code": provider_code,
-            "status": "success",
+            "status": response["status"],
+            "token": data.get("recharge_token"),
             "metadata": kwargs,
         }
-
-        if "electric" in provider_code or kwargs.get("service_type") == "electricity":
-            response_data["token"] = "9876-5432-1098-7654-3210"
-            response_data["units"] = f"{amount / Decimal('52.5')}"
-
-        if "data" in provider_code or kwargs.get("service_type") == "internet":
-            response_data["bundle"] = kwargs.get("bundle_code", "Default Data Plan")
-
-        return response_data
     except Exception as e:
         logger.error(f"Flutterwave utility purchase failed: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -281,6 +331,9 @@ def validate_customer(
     """
     Validate customer ID with utility provider.
 
+    Results are cached briefly per (provider, provider_code, customer_id), and
+    rejected customers are cached for a shorter time.
+
     Args:
         provider: Payment provider (paystack/flutterwave)
         customer_id: Customer ID or meter number
@@ -289,6 +342,14 @@ def validate_customer(
     Returns:
         Dict containing validation result and customer info
     """
+    return _get_cached_customer_result(
+        "validation", provider, customer_id, provider_code, _validate_customer_with_provider
+    )
+
+
+def _validate_customer_with_provider(
+    provider: str, customer_id: str, provider_code: str
+) -> Dict[str, Any]:
     if provider == PaymentProvider.PAYSTACK:
         return validate_paystack_customer(customer_id, provider_code)
     elif provider == PaymentProvider.FLUTTERWAVE:
@@ -303,6 +364,8 @@ def get_customer_info(
     """
     Get customer information from utility provider.
 
+    Results are cached like validate_customer results.
+
     Args:
         provider: Payment provider (paystack/flutterwave)
         customer_id: Customer ID or meter number
@@ -311,6 +374,14 @@ def get_customer_info(
     Returns:
         Dict containing customer information
     """
+    return _get_cached_customer_result(
+        "info", provider, customer_id, provider_code, _get_customer_info_from_provider
+    )
+
+
+def _get_customer_info_from_provider(
+    provider: str, customer_id: str, provider_code: str
+) -> Dict[str, Any]:
     if provider == PaymentProvider.PAYSTACK:
         return get_paystack_customer_info(customer_id, provider_code)
     elif provider == PaymentProvider.FLUTTERWAVE:
@@ -319,6 +390,50 @@ def get_customer_info(
         raise ValueError(f"Unsupported utility provider: {provider}")
 
 
+def _get_customer_cache_key(
+    kind: str, provider: str, customer_id: str, provider_code: str
+) -> str:
+    digest = hashlib.sha256(
+        f"{provider}:{provider_code}:{customer_id.strip()}".encode("utf-8")
+    ).hexdigest()
+    return f"utilities:customer:{kind}:{digest}"
+
+
+def _get_cached_customer_result(
+    kind: str, provider: str, customer_id: str, provider_code: str, fetch
+) -> Dict[str, Any]:
+    """
+    Get a customer lookup result from the cache, calling the provider on a miss.
+
+    Provider errors (results carrying an "error" key) are not cached, so an outage
+    does not turn into rejected customers.
+    """
+    key = _get_customer_cache_key(kind, provider, customer_id, provider_code)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    result = fetch(provider, customer_id, provider_code)
+    config = _get_cache_settings()
+    if result.get("success"):
+        cache.set(key, result, config["customer_ttl"])
+    elif "error" not in result:
+        cache.set(key, result, config["invalid_customer_ttl"])
+    return result
+
+
+def invalidate_customer_cache(
+    provider: str, customer_id: str, provider_code: str
+) -> None:
+    """Forget cached validation and info results for a customer."""
+    cache.delete_many(
+        [
+            _get_customer_cache_key(kind, provider, customer_id, provider_code)
+            for kind in ("validation", "info")
+        ]
+    )
+
+
 def purchase_utility(
     provider: str, customer_id: str, amount: Decimal, provider_code: str, **kwargs
 ) -> Dict[str, Any]:
@@ -349,6 +464,9 @@ def get_utility_providers(provider: str, service_type: str) -> List[Dict[str, An
     """
     Get available utility providers for a service type.
 
+    Served from the catalogue cache kept warm by the
+    refresh_utility_provider_catalogue beat task.
+
     Args:
         provider: Payment provider (paystack/flutterwave)
         service_type: Type of utility service
@@ -356,6 +474,21 @@ def get_utility_providers(provider: str, service_type: str) -> List[Dict[str, An
     Returns:
         List of available providers
     """
+    if provider not in CATALOGUE_PROVIDERS:
+        raise ValueError(f"Unsupported utility provider: {provider}")
+
+    providers = cache.get(_get_catalogue_cache_key(provider, service_type))
+    if providers is None:
+        providers = _fetch_utility_providers(provider, service_type)
+        cache.set(
+            _get_catalogue_cache_key(provider, service_type),
+            providers,
+            _get_cache_settings()["catalogue_ttl"],
+        )
+    return providers
+
+
+def _fetch_utility_providers(provider: str, service_type: str) -> List[Dict[str, Any]]:
     if provider == PaymentProvider.PAYSTACK:
         return get_paystack_utility_providers(service_type)
     elif provider == PaymentProvider.FLUTTERWAVE:
@@ -364,6 +497,39 @@ def get_utility_providers(provider: str, service_type: str) -> List[Dict[str, An
         raise ValueError(f"Unsupported utility provider: {provider}")
 
 
+def _get_catalogue_cache_key(provider: str, service_type: str) -> str:
+    return f"utilities:catalogue:{provider}:{service_type}"
+
+
+def refresh_provider_catalogue() -> Dict[str, int]:
+    """
+    Fetch the utility provider catalogue from every payment provider and cache it.
+
+    A provider that fails keeps its previously cached catalogue.
+
+    Returns:
+        Number of catalogue entries cached per payment provider
+    """
+    ttl = _get_cache_settings()["catalogue_ttl"]
+    counts = {}
+    for provider in CATALOGUE_PROVIDERS:
+        catalogue = {}
+        try:
+            for service_type in UTILITY_SERVICE_TYPES:
+                catalogue[_get_catalogue_cache_key(provider, service_type)] = (
+                    _fetch_utility_providers(provider, service_type)
+                )
+        except Exception as e:
+            logger.error(f"Utility provider catalogue refresh failed for {provider}: {e}")
+            continue
+
+        cache.set_many(catalogue, ttl)
+        counts[str(provider)] = sum(len(providers) for providers in catalogue.values())
+
+    logger.info(f"Utility provider catalogue refreshed: {counts}")
+    return counts
+
+
 # Payment processing functions
 def setup_recurring_utility_payment(
     user_id: str,
@@ -521,7 +687,7 @@ def process_utility_payment(
 
         # Prepare metadata for the transaction, including additional parameters
         transaction_metadata = {
-            "utility_provider_id": utility_provider.id,
+            "utility_provider_id": str(utility_provider.id),
             "customer_id": customer_id,
             "provider_code": utility_provider.provider_code,
             **kwargs,
@@ -575,7 +741,7 @@ def process_utility_payment(
                     created_by_user=True,
                     amount=amount,
                     currency=wallet.currency,
-                    status=BillStatus.PAID,
+                    paid_amount=amount,
                     utility_provider=utility_provider,
                     customer_id=customer_id,
                     due_date=timezone.now(),
@@ -613,6 +779,7 @@ def process_utility_payment(
                     "success": False,
                     "error": "Utility payment failed",
                     "details": result.get("error"),
+                    "transaction_id": transaction.transaction_id,
                 }
 
         except Exception as e:
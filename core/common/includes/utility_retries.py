@@ -0,0 +1,166 @@
+"""
+Utility payment retry scheduling for ClustR application.
+
+Failed utility payments are retried with exponential backoff. Each retryable
+PaymentError carries its next attempt time, workers claim due errors with
+SKIP LOCKED and providers whose circuit breaker is open are left alone until
+it closes.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.common.includes import utilities
+from core.common.includes.third_party_services import http
+from core.common.models import (
+    PaymentError,
+    PaymentProvider,
+    TransactionStatus,
+    TransactionType,
+    UtilityProvider,
+)
+
+logger = logging.getLogger("clustr")
+
+RETRY_BATCH_SIZE = 20
+
+# Claimed errors are pushed this far ahead, so a crashed worker's batch is
+# picked up again once the lease runs out
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def get_due_retries(now=None):
+    """Get a queryset of utility payment errors due for a retry."""
+    return PaymentError.objects.filter(
+        next_retry_at__lte=now or timezone.now(),
+        is_resolved=False,
+        can_retry=True,
+        retry_count__lt=F("max_retries"),
+        transaction__type=TransactionType.BILL_PAYMENT,
+        transaction__status=TransactionStatus.FAILED,
+        transaction__metadata__utility_provider_id__isnull=False,
+    )
+
+
+def get_unavailable_providers() -> list[str]:
+    """Get the payment providers whose circuit breaker is currently open."""
+    unavailable = []
+    for provider in PaymentProvider.values:
+        breaker = http.get_breaker(provider)
+        if breaker is not None and breaker.is_open:
+            unavailable.append(provider)
+    return unavailable
+
+
+def claim_due_retries(now, batch_size: int = RETRY_BATCH_SIZE) -> list[PaymentError]:
+    """
+    Claim a batch of due retries for this worker.
+
+    Errors of providers with an open circuit breaker are skipped and stay due.
+    """
+    unavailable = get_unavailable_providers()
+    with transaction.atomic():
+        errors = list(
+            get_due_retries(now)
+            .exclude(transaction__provider__in=unavailable)
+            .select_related("transaction", "transaction__wallet")
+            .order_by("next_retry_at")
+            .select_for_update(skip_locked=True, of=("self",))[:batch_size]
+        )
+        PaymentError.objects.filter(id__in=[error.id for error in errors]).update(
+            next_retry_at=timezone.now() + CLAIM_LEASE
+        )
+    return errors
+
+
+def retry_payment(error: PaymentError) -> str:
+    """
+    Retry the utility payment of a claimed error.
+
+    The retry creates a new transaction. When it fails, the new transaction's own
+    error is not retried separately and the next attempt is scheduled on this one.
+
+    Returns:
+        "succeeded", "failed" or "abandoned"
+    """
+    error.increment_retry_count()
+    failed_transaction = error.transaction
+    metadata = failed_transaction.metadata or {}
+
+    try:
+        utility_provider = UtilityProvider.objects.get(id=metadata["utility_provider_id"])
+    except UtilityProvider.DoesNotExist:
+        logger.error(f"Utility provider {metadata['utility_provider_id']} not found for retry")
+        error.can_retry = False
+        error.next_retry_at = None
+        error.save(update_fields=["can_retry", "next_retry_at"])
+        return "abandoned"
+
+    result = utilities.process_utility_payment(
+        user_id=failed_transaction.wallet.user_id,
+        utility_provider=utility_provider,
+        customer_id=metadata.get("customer_id"),
+        amount=failed_transaction.amount,
+        wallet=failed_transaction.wallet,
+        description=f"Retry: {failed_transaction.description}",
+    )
+
+    if result.get("success"):
+        error.mark_as_resolved("automatic_retry")
+        logger.info(f"Utility payment retry {error.id} successful")
+        return "succeeded"
+
+    if result.get("transaction_id"):
+        PaymentError.objects.filter(
+            transaction__transaction_id=result["transaction_id"]
+        ).update(can_retry=False, next_retry_at=None)
+    error.schedule_next_retry()
+    logger.warning(
+        f"Utility payment retry {error.id} failed: "
+        f"{result.get('details') or result.get('error')}"
+    )
+    return "failed"
+
+
+def drain_due_retries(
+    batch_size: int = RETRY_BATCH_SIZE, max_batches: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Retry due utility payments in claimed batches until none are left.
+
+    Several workers can drain concurrently; each retry reschedules its error into
+    the future, so an error is attempted at most once per run.
+
+    Returns:
+        Counts of claimed, succeeded, failed and abandoned retries and batches run
+    """
+    run_started_at = timezone.now()
+    results = {"claimed": 0, "succeeded": 0, "failed": 0, "abandoned": 0, "batches": 0}
+
+    while max_batches is None or results["batches"] < max_batches:
+        errors = claim_due_retries(run_started_at, batch_size)
+        if not errors:
+            break
+
+        results["claimed"] += len(errors)
+        for error in errors:
+            try:
+                outcome = retry_payment(error)
+            except Exception as e:
+                logger.error(f"Error retrying utility payment {error.id}: {e}")
+                error.schedule_next_retry()
+                outcome = "failed"
+            results[outcome] += 1
+        results["batches"] += 1
+
+    if results["claimed"]:
+        logger.info(
+            f"Utility payment retries: {results['succeeded']} succeeded, "
+            f"{results['failed']} failed, {results['abandoned']} abandoned"
+        )
+    return results
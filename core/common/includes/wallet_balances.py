@@ -0,0 +1,149 @@
+"""
+Wallet balance read model for ClustR application.
+
+Every wallet save (debit, credit, freezing and releasing amounts) writes the
+wallet's balance read model to the cache once committed, so the balance
+endpoint can answer without reading the wallet, and optionally pushes it to
+the owner's WebSocket connections. The read model is built from the wallet row
+read again after the commit, not from the saved instance, which a transaction
+committed in the meantime may have made stale.
+"""
+
+import hashlib
+import logging
+from decimal import Decimal
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.common.models import Wallet, WalletStatus
+
+logger = logging.getLogger("clustr")
+
+# Bounds how long a missed update can leave a stale balance in the cache
+READ_MODEL_TTL = 60 * 60
+
+READ_MODEL_FIELDS = [
+    "balance",
+    "available_balance",
+    "currency",
+    "status",
+    "is_pin_set",
+    "last_transaction_at",
+]
+
+
+def _get_cache_key(cluster_id, user_id) -> str:
+    return f"wallets:balance:{cluster_id}:{user_id}"
+
+
+def get_group_name(user_id) -> str:
+    """Channel layer group of a user's wallet WebSocket connections."""
+    return f"wallet_{user_id}"
+
+
+def build_read_model(wallet: Wallet) -> dict[str, Any]:
+    """
+    Build the balance read model of a wallet.
+
+    The version is a hash of the balance fields, so it is the same however
+    often the read model is rebuilt from an unchanged wallet.
+    """
+    read_model = {field: getattr(wallet, field) for field in READ_MODEL_FIELDS}
+    read_model["version"] = hashlib.md5(
+        "|".join(str(read_model[field]) for field in READ_MODEL_FIELDS).encode("utf-8")
+    ).hexdigest()
+    return read_model
+
+
+def store(wallet: Wallet) -> dict[str, Any]:
+    """Write the balance read model of a wallet to the cache."""
+    read_model = build_read_model(wallet)
+    cache.set(_get_cache_key(wallet.cluster_id, wallet.user_id), read_model, READ_MODEL_TTL)
+    return read_model
+
+
+def get_cached(cluster_id, user_id) -> Optional[dict[str, Any]]:
+    """Get the cached balance read model of a user's wallet, if any."""
+    return cache.get(_get_cache_key(cluster_id, user_id))
+
+
+def invalidate(cluster_id, user_id) -> None:
+    cache.delete(_get_cache_key(cluster_id, user_id))
+
+
+def queue_update(wallet: Wallet) -> None:
+    """Store and push the wallet's read model once the current transaction commits."""
+
+    def update():
+        committed = Wallet.objects.filter(pk=wallet.pk).first()
+        if committed is None:
+            invalidate(wallet.cluster_id, wallet.user_id)
+            return
+        read_model = store(committed)
+        if getattr(settings, "WALLET_BALANCE_PUSH", False):
+            push(committed, read_model)
+
+    transaction.on_commit(update)
+
+
+def push(wallet: Wallet, read_model: dict[str, Any]) -> None:
+    """Send a balance update to the wallet owner's WebSocket connections."""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            get_group_name(wallet.user_id),
+            {
+                "type": "wallet_balance_broadcast",
+                "cluster_id": str(wallet.cluster_id),
+                "balance": str(read_model["balance"]),
+                "available_balance": str(read_model["available_balance"]),
+                "currency": read_model["currency"],
+                "status": read_model["status"],
+                "last_transaction_at": (
+                    read_model["last_transaction_at"].isoformat()
+                    if read_model["last_transaction_at"]
+                    else None
+                ),
+                "version": read_model["version"],
+            },
+        )
+    except Exception as e:
+        logger.warning(f"Could not push balance update for wallet {wallet.id}: {e}")
+
+
+def get_balance(cluster, user_id) -> dict[str, Any]:
+    """
+    Get the balance read model of a user's wallet, creating the wallet if needed.
+
+    Served from the cache when present; otherwise the wallet is read and the
+    read model cached.
+    """
+    read_model = get_cached(cluster.id, user_id)
+    if read_model is not None:
+        return read_model
+
+    wallet, _ = Wallet.objects.get_or_create(
+        cluster=cluster,
+        user_id=user_id,
+        defaults={
+            "balance": Decimal("0.00"),
+            "available_balance": Decimal("0.00"),
+            "currency": "NGN",
+            "status": WalletStatus.ACTIVE,
+            "created_by": user_id,
+            "last_modified_by": user_id,
+        },
+    )
+    read_model = build_read_model(wallet)
+    # Never replace a read model written by a concurrent balance change
+    cache.add(_get_cache_key(cluster.id, user_id), read_model, READ_MODEL_TTL)
+    return read_model
@@ -0,0 +1,201 @@
+"""
+Payment webhook inbox utilities for ClustR application.
+
+Webhooks are acknowledged as soon as their signature is checked and the raw event
+is stored. A Celery consumer then drains the inbox in batches, calling the
+provider to verify each payment outside any database transaction.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.common.includes import idempotency, payments
+from core.common.models import (
+    PaymentProvider,
+    Transaction,
+    TransactionStatus,
+    WebhookEvent,
+    WebhookEventStatus,
+)
+
+logger = logging.getLogger("clustr")
+
+INBOX_BATCH_SIZE = 100
+
+# Failed events are retried until they reach this many attempts
+MAX_ATTEMPTS = 5
+
+# Events claimed longer ago than this are assumed to belong to a dead worker
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class InvalidWebhook(Exception):
+    """Raised for webhooks with an invalid payload or signature."""
+    pass
+
+
+def ingest(provider: PaymentProvider, payload: str, signature: str) -> Tuple[WebhookEvent, bool]:
+    """
+    Verify a webhook signature and store the raw event in the inbox.
+
+    Args:
+        provider: Payment provider that sent the webhook
+        payload: Raw webhook payload
+        signature: Webhook signature
+
+    Returns:
+        The stored event and whether it is new (False for a duplicate delivery)
+
+    Raises:
+        InvalidWebhook: The payload is not JSON or the signature does not match
+    """
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        raise InvalidWebhook("Invalid JSON payload")
+    if not isinstance(data, dict):
+        raise InvalidWebhook("Invalid JSON payload")
+
+    if not payments.verify_signature(provider, payload, signature):
+        raise InvalidWebhook(f"Invalid webhook signature from {provider}")
+
+    event_id = idempotency.get_webhook_event_key(payload)
+    if event_id is None:
+        event_id = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    event_type, reference = payments.get_webhook_reference(provider, data)
+
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider,
+                event_id=event_id[:255],
+                event_type=(event_type or "")[:100],
+                reference=reference,
+                payload=data,
+            )
+    except IntegrityError:
+        event = WebhookEvent.objects.get(provider=provider, event_id=event_id[:255])
+        logger.info(f"Duplicate {provider} webhook {event_id} ignored")
+        return event, False
+
+    transaction.on_commit(_queue_drain)
+    return event, True
+
+
+def _queue_drain() -> None:
+    from core.common.tasks.payment import process_webhook_events
+
+    process_webhook_events.delay()
+
+
+def claim_events(
+    batch_size: int = INBOX_BATCH_SIZE, started_at: Optional[datetime] = None
+) -> list[WebhookEvent]:
+    """
+    Claim a batch of inbox events for processing.
+
+    Pending events, failed events with attempts left and events stuck with a dead
+    worker are claimed with SKIP LOCKED, so concurrent consumers get disjoint
+    batches. Failed events last claimed after started_at are left for the next run.
+    """
+    now = timezone.now()
+    started_at = started_at or now
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.filter(
+                Q(status=WebhookEventStatus.PENDING)
+                | Q(
+                    status=WebhookEventStatus.FAILED,
+                    attempts__lt=MAX_ATTEMPTS,
+                    claimed_at__lt=started_at,
+                )
+                | Q(status=WebhookEventStatus.PROCESSING, claimed_at__lt=now - CLAIM_TIMEOUT)
+            )
+            .order_by("created_at")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        WebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+            status=WebhookEventStatus.PROCESSING,
+            attempts=F("attempts") + 1,
+            claimed_at=now,
+        )
+    return events
+
+
+def _process_event(event: WebhookEvent, txn: Optional[Transaction]) -> Tuple[str, Optional[str]]:
+    if not event.reference:
+        return WebhookEventStatus.IGNORED, f"Ignoring webhook event: {event.event_type}"
+    if txn is None:
+        return WebhookEventStatus.IGNORED, f"Transaction not found: {event.reference}"
+    if txn.status == TransactionStatus.COMPLETED:
+        return WebhookEventStatus.PROCESSED, None
+
+    # Provider call happens here, outside any database transaction
+    try:
+        result = payments.verify_with_provider(txn, event.provider)
+    except Exception as e:
+        return WebhookEventStatus.FAILED, str(e)
+
+    payments.apply_verification(txn, result)
+    return WebhookEventStatus.PROCESSED, None
+
+
+def drain(batch_size: int = INBOX_BATCH_SIZE, max_batches: Optional[int] = None) -> dict[str, Any]:
+    """
+    Process inbox events in batches until none are left.
+
+    Transactions for a batch are loaded with one query and event statuses are
+    written back with one bulk update per batch.
+
+    Args:
+        batch_size: Number of events claimed per batch
+        max_batches: Stop after this many batches (no limit if None)
+
+    Returns:
+        Counts of events per outcome and the number of batches run
+    """
+    results = {
+        "batches": 0,
+        WebhookEventStatus.PROCESSED: 0,
+        WebhookEventStatus.IGNORED: 0,
+        WebhookEventStatus.FAILED: 0,
+    }
+
+    started_at = timezone.now()
+    while max_batches is None or results["batches"] < max_batches:
+        events = claim_events(batch_size, started_at)
+        if not events:
+            break
+
+        transactions = payments.get_transactions_by_reference(
+            event.reference for event in events
+        )
+        now = timezone.now()
+        for event in events:
+            try:
+                status, error = _process_event(event, transactions.get(event.reference))
+            except Exception as e:
+                logger.error(f"Error processing webhook event {event.id}: {e}")
+                status, error = WebhookEventStatus.FAILED, str(e)
+
+            event.status = status
+            event.last_error = error
+            event.processed_at = now if status != WebhookEventStatus.FAILED else None
+            results[status] += 1
+
+        WebhookEvent.objects.bulk_update(events, ["status", "last_error", "processed_at"])
+        results["batches"] += 1
+
+    logger.info(
+        f"Webhook inbox drained: {results[WebhookEventStatus.PROCESSED]} processed, "
+        f"{results[WebhookEventStatus.IGNORED]} ignored, "
+        f"{results[WebhookEventStatus.FAILED]} failed"
+    )
+    return {str(key): value for key, value in results.items()}
@@ -0,0 +1,45 @@
+"""
+Management command to rebuild cluster revenue rollups from transactions.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.common.includes import revenue_rollups
+from core.common.models import Cluster
+
+
+class Command(BaseCommand):
+    help = 'Rebuild hourly and daily cluster revenue rollups from completed transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cluster',
+            type=str,
+            help='ID of the cluster to rebuild (default: all clusters)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days (default: all time)'
+        )
+
+    def handle(self, *args, **options):
+        cluster = None
+        if options['cluster']:
+            cluster = Cluster.objects.filter(id=options['cluster']).first()
+            if cluster is None:
+                raise CommandError(f"Cluster {options['cluster']} not found")
+
+        since = None
+        if options['days']:
+            since = timezone.now() - timezone.timedelta(days=options['days'])
+
+        self.stdout.write('Rebuilding revenue rollups...')
+        results = revenue_rollups.backfill(cluster=cluster, since=since)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Revenue rollups rebuilt: {results['hours']} hourly, "
+                f"{results['days']} daily"
+            )
+        )
@@ -0,0 +1,155 @@
+"""
+Management command to benchmark the validation of imported rows.
+"""
+
+import random
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from core.data_exchange.includes import column_validators, imported_attribute_validators
+
+# Attribute, cell validator, column validator, extra validator arguments
+ATTRIBUTES = [
+    (
+        'name',
+        imported_attribute_validators.validate_generic_name,
+        column_validators.validate_generic_name_column,
+        {'max_length': 150, 'min_length': 1},
+    ),
+    (
+        'email_address',
+        imported_attribute_validators.validate_email_address,
+        column_validators.validate_email_address_column,
+        {},
+    ),
+    (
+        'phone_number',
+        imported_attribute_validators.validate_phone_number,
+        column_validators.validate_phone_number_column,
+        {'default_dialing_code': '+234'},
+    ),
+    (
+        'amount',
+        imported_attribute_validators.validate_decimal_field,
+        column_validators.validate_decimal_column,
+        {},
+    ),
+    (
+        'move_in_date',
+        imported_attribute_validators.parse_date_from_string,
+        column_validators.parse_date_column,
+        {},
+    ),
+]
+
+INVALID_VALUES = {
+    'name': '',
+    'email_address': 'not-an-email',
+    'phone_number': '12-ab',
+    'amount': '12.345',
+    'move_in_date': '2022/04/25',
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cell by cell against column validation of imported resident rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=20_000,
+            help='Number of rows to generate (default: 20000)'
+        )
+        parser.add_argument(
+            '--invalid-ratio',
+            type=float,
+            default=0.01,
+            help='Share of generated values that are invalid (default: 0.01)'
+        )
+        parser.add_argument(
+            '--min-speedup',
+            type=float,
+            help='Fail if column validation is not at least this many times faster'
+        )
+
+    def handle(self, *args, **options):
+        dataframe = self._generate(options['rows'], options['invalid_ratio'])
+
+        self.stdout.write(f'Validating {len(dataframe)} rows cell by cell...')
+        started = time.perf_counter()
+        cell_errors = self._validate_cells(dataframe)
+        cell_elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'Validating {len(dataframe)} rows by column...')
+        started = time.perf_counter()
+        column_errors = self._validate_columns(dataframe)
+        column_elapsed = time.perf_counter() - started
+
+        if self._sorted(cell_errors) != self._sorted(column_errors):
+            raise CommandError('Column validation produced different row errors')
+
+        speedup = cell_elapsed / column_elapsed
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {len(cell_errors)} row errors. '
+                f'Cell: {cell_elapsed / len(dataframe) * 1_000_000:.1f} µs/row, '
+                f'column: {column_elapsed / len(dataframe) * 1_000_000:.1f} µs/row '
+                f'({speedup:.1f}x faster)'
+            )
+        )
+        if options['min_speedup'] and speedup < options['min_speedup']:
+            raise CommandError(
+                f'Column validation is {speedup:.1f}x faster, '
+                f'expected at least {options["min_speedup"]}x'
+            )
+
+    def _generate(self, count, invalid_ratio):
+        rng = random.Random(0)
+        rows = []
+        for number in range(count):
+            row = {
+                'name': f'Resident {number}',
+                'email_address': f'resident{number}@example.com',
+                'phone_number': f'080{rng.randrange(10_000_000, 99_999_999)}',
+                'amount': f'{rng.randrange(100, 1_000_000)}.{rng.randrange(0, 99):02d}',
+                'move_in_date': f'{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}-2022',
+            }
+            for attribute, invalid_value in INVALID_VALUES.items():
+                if rng.random() < invalid_ratio:
+                    row[attribute] = invalid_value
+            rows.append(row)
+        return pd.DataFrame(rows, index=pd.RangeIndex(2, count + 2))
+
+    def _validate_cells(self, dataframe):
+        errors = []
+        for row_number, row in dataframe.iterrows():
+            for attribute, cell_validator, _, kwargs in ATTRIBUTES:
+                cell_errors, _ = cell_validator(
+                    field_name=attribute,
+                    value=row[attribute],
+                    row_number=row_number,
+                    error_title=row[attribute],
+                    **kwargs
+                )
+                errors.extend(cell_errors)
+        return errors
+
+    def _validate_columns(self, dataframe):
+        errors = []
+        for attribute, _, column_validator, kwargs in ATTRIBUTES:
+            column_errors, _ = column_validator(
+                field_name=attribute,
+                values=dataframe[attribute],
+                error_titles=dataframe[attribute],
+                **kwargs
+            )
+            errors.extend(column_errors)
+        return errors
+
+    def _sorted(self, errors):
+        return sorted(
+            (error.row_number, error.description, error.title) for error in errors
+        )
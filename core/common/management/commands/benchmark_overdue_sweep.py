@@ -0,0 +1,79 @@
+"""
+Management command to benchmark the overdue bill sweep.
+"""
+
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.common.includes import bills
+from core.common.models import Bill, BillCategory, BillType, Cluster
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the overdue bill sweep against generated past-due bills'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bills',
+            type=int,
+            default=100_000,
+            help='Number of past-due bills to generate (default: 100000)'
+        )
+        parser.add_argument(
+            '--cluster',
+            type=str,
+            help='ID of the cluster to generate bills in (default: first cluster)'
+        )
+
+    def handle(self, *args, **options):
+        cluster = (
+            Cluster.objects.filter(id=options['cluster']).first()
+            if options['cluster']
+            else Cluster.objects.first()
+        )
+        if cluster is None:
+            raise CommandError('No cluster found to generate bills in')
+
+        count = options['bills']
+        due_date = timezone.now() - timedelta(days=1)
+
+        # Everything runs in one transaction that is rolled back at the end, so the
+        # generated bills never persist and no notifications are queued.
+        with transaction.atomic():
+            self.stdout.write(f'Generating {count} past-due bills...')
+            Bill.objects.bulk_create(
+                (
+                    Bill(
+                        cluster=cluster,
+                        bill_number=f'BENCH-{uuid.uuid4().hex[:12].upper()}',
+                        title='Overdue sweep benchmark',
+                        type=BillType.SERVICE_CHARGE,
+                        category=BillCategory.CLUSTER_MANAGED,
+                        amount=Decimal('1000.00'),
+                        due_date=due_date,
+                    )
+                    for _ in range(count)
+                ),
+                batch_size=5000,
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                marked = bills.check_and_update_overdue(cluster)
+                elapsed = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Marked {marked} bills overdue in {elapsed * 1000:.0f} ms '
+                f'using {len(queries)} queries'
+            )
+        )
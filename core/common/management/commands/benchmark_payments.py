@@ -0,0 +1,540 @@
+"""
+Management command to benchmark the payment hot path under concurrent load.
+"""
+
+import importlib.util
+import json
+import queue
+import random
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import AccountUser
+from core.common.includes import payment_dashboard, recurring_payments, wallet_balances
+from core.common.includes.third_party_services import PaymentProviderFactory
+from core.common.models import (
+    Bill,
+    BillCategory,
+    BillType,
+    Cluster,
+    PaymentProvider,
+    RecurringPayment,
+    RecurringPaymentFrequency,
+    RecurringPaymentStatus,
+    Wallet,
+    WalletStatus,
+)
+from core.common.tests.stub_server import StubProviderServer
+from management.views_payment import PaymentManagementViewSet
+from members.views_payment import BillViewSet, WalletViewSet
+
+CLUSTER_NAME = 'Payments Benchmark'
+BILL_TITLE = 'Payments benchmark bill'
+RECURRING_PAYMENT_TITLE = 'Payments benchmark subscription'
+CALLBACK_URL = 'https://benchmark.clustr.local/payments/callback'
+
+STARTING_BALANCE = Decimal('1000000.00')
+
+OPERATIONS = ['pay_bill', 'pay_bill_direct', 'deposit', 'dashboard', 'process_due_payments']
+
+LOCK_SAMPLE_INTERVAL = 0.01
+
+
+def _load_mock_data_script():
+    """Import scripts/populate_mock_data.py, which is not part of a package."""
+    path = Path(settings.BASE_DIR) / 'scripts' / 'populate_mock_data.py'
+    spec = importlib.util.spec_from_file_location('populate_mock_data', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _percentile(timings, percent):
+    return timings[max(int(len(timings) * percent / 100) - 1, 0)]
+
+
+class LockWaitSampler(threading.Thread):
+    """Samples the number of sessions of this database waiting on a lock."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.samples = []
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.wait(LOCK_SAMPLE_INTERVAL):
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    self.samples.append(cursor.fetchone()[0])
+        finally:
+            connection.close()
+
+    def summary(self):
+        waiting = [sample for sample in self.samples if sample]
+        return {
+            'samples': len(self.samples),
+            'samples_with_waits': len(waiting),
+            'max_waiting_sessions': max(self.samples, default=0),
+            'estimated_wait_seconds': round(sum(waiting) * LOCK_SAMPLE_INTERVAL, 3),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark pay_bill, pay_bill_direct, deposit, dashboard and process_due_payments '
+        'concurrently against a seeded cluster and store the results as JSON. Run it '
+        'against a local PostgreSQL database only: it writes payments to the benchmark '
+        'cluster and needs the configured Celery broker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--residents',
+            type=int,
+            default=2000,
+            help='Residents to seed in the benchmark cluster (default: 2000)'
+        )
+        parser.add_argument(
+            '--bills-per-resident',
+            type=int,
+            default=3,
+            help='Bills to seed per new resident (default: 3)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests per endpoint (default: 500)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Concurrent workers (default: 8)'
+        )
+        parser.add_argument(
+            '--operations',
+            nargs='+',
+            choices=OPERATIONS,
+            default=OPERATIONS,
+            help='Operations to run (default: all)'
+        )
+        parser.add_argument(
+            '--provider-latency',
+            type=float,
+            default=0.05,
+            help='Stub payment provider latency per request in seconds (default: 0.05)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Results file (default: benchmarks/payments_<timestamp>.json)'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Earlier results file to compare against; regressions fail the command'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Allowed p95 latency and query count increase over the baseline (default: 0.2)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The payment benchmark needs a PostgreSQL database')
+
+        cluster, admin = self._get_cluster()
+        self._seed(cluster, admin, options['residents'], options['bills_per_resident'])
+        jobs = self._build_jobs(cluster, admin, options['operations'], options['requests'])
+
+        self.stdout.write(
+            f'Running {len(jobs)} operations with {options["concurrency"]} workers...'
+        )
+        with StubProviderServer(latency=options['provider_latency']) as server, override_settings(
+            PAYSTACK_BASE_URL=server.base_url,
+            PAYSTACK_SECRET_KEY=getattr(settings, 'PAYSTACK_SECRET_KEY', '') or 'sk_benchmark',
+        ):
+            PaymentProviderFactory.reset()
+            try:
+                results = self._run(jobs, options['concurrency'])
+            finally:
+                PaymentProviderFactory.reset()
+
+        results['config'] = {
+            'residents': Wallet.objects.filter(cluster=cluster).exclude(user_id=admin.id).count(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'provider_latency': options['provider_latency'],
+        }
+        results['commit'] = self._get_commit()
+        self._write(results, options['output'])
+
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+        # Timings of operations that failed measure their error path, not the payment path
+        failing = [
+            f'{operation}: {stats["errors"]} errors, first: {stats["first_error"]}'
+            for operation, stats in results['operations'].items()
+            if stats['errors']
+        ]
+        if failing:
+            raise CommandError('Payment benchmark operations failed:\n' + '\n'.join(failing))
+
+    def _get_cluster(self):
+        cluster = Cluster.objects.filter(name=CLUSTER_NAME).first()
+        if cluster is None:
+            cluster = Cluster.objects.create(
+                type=Cluster.Types.ESTATE,
+                name=CLUSTER_NAME,
+                address='1 Benchmark Close',
+                city='Lagos',
+                state='Lagos',
+                country='Nigeria',
+                primary_contact_name='Benchmark Admin',
+                primary_contact_email='benchmark@clustr.local',
+                primary_contact_phone='+2348000000000',
+            )
+
+        admin = AccountUser.objects.filter(email_address='admin@paymentsbenchmark.com').first()
+        if admin is None:
+            with override_settings(
+                PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+            ):
+                admin = AccountUser.objects.create_admin(
+                    'admin@paymentsbenchmark.com', 'password123', name='Benchmark Admin'
+                )
+            admin.clusters.add(cluster)
+            admin.primary_cluster = cluster
+            admin.save()
+        return cluster, admin
+
+    def _seed(self, cluster, admin, residents, bills_per_resident):
+        """Top the benchmark cluster up to the requested number of residents."""
+        missing = residents - Wallet.objects.filter(cluster=cluster).exclude(user_id=admin.id).count()
+        if missing <= 0:
+            return
+
+        self.stdout.write(f'Seeding {missing} residents...')
+        mock_data = _load_mock_data_script()
+        # Mock residents all share one password, strong hashing only slows seeding down
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            users = mock_data.create_additional_users(cluster, admin, count=missing + 1)
+        wallets = [
+            wallet
+            for wallet in mock_data.create_wallets(cluster, users)
+            if wallet.user_id != admin.id
+        ]
+        mock_data.create_transactions(cluster, wallets, count=len(wallets) * 3)
+
+        now = timezone.now()
+        seeded_bills = Bill.objects.bulk_create(
+            (
+                Bill(
+                    cluster=cluster,
+                    user_id=wallet.user_id,
+                    bill_number=f'BENCH-{uuid.uuid4().hex[:12].upper()}',
+                    title=BILL_TITLE,
+                    type=BillType.SERVICE_CHARGE,
+                    category=BillCategory.USER_MANAGED,
+                    amount=Decimal('5000.00'),
+                    due_date=now + timedelta(days=30),
+                    allow_payment_after_due=True,
+                    created_by=str(admin.id),
+                    last_modified_by=str(admin.id),
+                )
+                for wallet in wallets
+                for _ in range(bills_per_resident)
+            ),
+            batch_size=5000,
+        )
+        Bill.acknowledged_by.through.objects.bulk_create(
+            (
+                Bill.acknowledged_by.through(bill_id=bill.id, accountuser_id=bill.user_id)
+                for bill in seeded_bills
+            ),
+            batch_size=5000,
+        )
+        RecurringPayment.objects.bulk_create(
+            (
+                RecurringPayment(
+                    cluster=cluster,
+                    user_id=wallet.user_id,
+                    wallet=wallet,
+                    title=RECURRING_PAYMENT_TITLE,
+                    amount=Decimal('1000.00'),
+                    currency=wallet.currency,
+                    frequency=RecurringPaymentFrequency.MONTHLY,
+                    status=RecurringPaymentStatus.ACTIVE,
+                    start_date=now,
+                    next_payment_date=now,
+                    created_by=str(wallet.user_id),
+                    last_modified_by=str(wallet.user_id),
+                )
+                for wallet in wallets
+            ),
+            batch_size=5000,
+        )
+
+    def _reset(self, cluster):
+        """Put balances, benchmark bills and subscriptions back so runs are comparable."""
+        now = timezone.now()
+        wallets = Wallet.objects.filter(cluster=cluster)
+        wallets.update(
+            balance=STARTING_BALANCE,
+            available_balance=STARTING_BALANCE,
+            status=WalletStatus.ACTIVE,
+        )
+        for user_id in wallets.values_list('user_id', flat=True):
+            wallet_balances.invalidate(cluster.id, user_id)
+        Bill.objects.filter(cluster=cluster, title=BILL_TITLE).update(
+            paid_amount=Decimal('0.00'), paid_at=None, last_modified_at=now
+        )
+        RecurringPayment.objects.filter(cluster=cluster, title=RECURRING_PAYMENT_TITLE).update(
+            status=RecurringPaymentStatus.ACTIVE,
+            next_payment_date=now - timedelta(minutes=1),
+            failed_attempts=0,
+        )
+        payment_dashboard.bump_version(cluster.id)
+        cache.delete(f'payments:dashboard:{cluster.id}:refreshing')
+
+    def _build_jobs(self, cluster, admin, operations, count):
+        """Build a shuffled list of (operation, callable) pairs."""
+        self._reset(cluster)
+        factory = APIRequestFactory()
+        views = {
+            'pay_bill': BillViewSet.as_view(
+                {'post': 'pay_bill'}, permission_classes=[IsAuthenticated]
+            ),
+            'pay_bill_direct': BillViewSet.as_view(
+                {'post': 'pay_bill_direct'}, permission_classes=[IsAuthenticated]
+            ),
+            'deposit': WalletViewSet.as_view(
+                {'post': 'deposit'}, permission_classes=[IsAuthenticated]
+            ),
+            'dashboard': PaymentManagementViewSet.as_view(
+                {'get': 'dashboard'}, permission_classes=[IsAuthenticated]
+            ),
+        }
+
+        bills = list(
+            Bill.objects.filter(cluster=cluster, title=BILL_TITLE)
+            .order_by('?')
+            .values_list('id', 'user_id')[:count * 2]
+        )
+        if not bills:
+            raise CommandError('The benchmark cluster has no bills, seed more residents')
+        users = AccountUser.objects.in_bulk({user_id for _, user_id in bills})
+
+        def call(operation, user, method, data=None, **kwargs):
+            def run():
+                request = getattr(factory, method)(f'/benchmark/{operation}/', data, format='json')
+                request.cluster_context = cluster
+                force_authenticate(request, user=user)
+                response = views[operation](request, **kwargs)
+                if response.status_code >= 400:
+                    return f'HTTP {response.status_code}: {response.data.get("message")}'
+                return None
+            return run
+
+        def process_due_payments():
+            failed = recurring_payments.process_due_payments(cluster)['failed']
+            return f'{failed} recurring payments failed' if failed else None
+
+        jobs = []
+        # Bills are split so every pay_bill job pays a bill nobody else pays
+        pay_bills, direct_bills = bills[::2], bills[1::2]
+        if 'pay_bill' in operations:
+            jobs += [
+                ('pay_bill', call('pay_bill', users[user_id], 'post', {'bill_id': str(bill_id)}, pk=bill_id))
+                for bill_id, user_id in pay_bills[:count]
+            ]
+        if 'pay_bill_direct' in operations:
+            jobs += [
+                (
+                    'pay_bill_direct',
+                    call(
+                        'pay_bill_direct',
+                        users[user_id],
+                        'post',
+                        {
+                            'bill_id': str(bill_id),
+                            'provider': PaymentProvider.PAYSTACK,
+                            'callback_url': CALLBACK_URL,
+                        },
+                    ),
+                )
+                for bill_id, user_id in (direct_bills or pay_bills)[:count]
+            ]
+        if 'deposit' in operations:
+            residents = list(users.values())
+            jobs += [
+                (
+                    'deposit',
+                    call(
+                        'deposit',
+                        random.choice(residents),
+                        'post',
+                        {
+                            'amount': '5000.00',
+                            'provider': PaymentProvider.PAYSTACK,
+                            'callback_url': CALLBACK_URL,
+                        },
+                    ),
+                )
+                for _ in range(count)
+            ]
+        if 'dashboard' in operations:
+            jobs += [('dashboard', call('dashboard', admin, 'get')) for _ in range(count)]
+
+        random.shuffle(jobs)
+        if 'process_due_payments' in operations:
+            # One drain of every due subscription, running alongside the requests
+            jobs.insert(0, ('process_due_payments', process_due_payments))
+        return jobs
+
+    def _run(self, jobs, concurrency):
+        pending = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        measurements = []
+        measurements_lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        operation, job = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        try:
+                            error = job()
+                        except Exception as e:
+                            error = f'{type(e).__name__}: {e}'
+                        elapsed = time.perf_counter() - started
+                    with measurements_lock:
+                        measurements.append((operation, elapsed * 1000, len(queries), error))
+            finally:
+                connection.close()
+
+        sampler = LockWaitSampler()
+        sampler.start()
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        sampler.stopped.set()
+        sampler.join()
+
+        operations = {}
+        for operation in OPERATIONS:
+            runs = [m for m in measurements if m[0] == operation]
+            if not runs:
+                continue
+            timings = sorted(m[1] for m in runs)
+            query_counts = [m[2] for m in runs]
+            operations[operation] = {
+                'count': len(runs),
+                'errors': sum(1 for m in runs if m[3]),
+                # Failing endpoints are still timed, the first error says why they failed
+                'first_error': next((m[3] for m in runs if m[3]), None),
+                'throughput_per_s': round(len(runs) / elapsed, 2),
+                'mean_ms': round(statistics.mean(timings), 2),
+                'p50_ms': round(_percentile(timings, 50), 2),
+                'p95_ms': round(_percentile(timings, 95), 2),
+                'p99_ms': round(_percentile(timings, 99), 2),
+                'queries_mean': round(statistics.mean(query_counts), 2),
+                'queries_max': max(query_counts),
+            }
+            style = self.style.WARNING if operations[operation]['errors'] else self.style.SUCCESS
+            self.stdout.write(
+                style(
+                    f'{"✗" if operations[operation]["errors"] else "✓"} {operation}: {len(runs)} runs, p50 {operations[operation]["p50_ms"]:.1f} ms, '
+                    f'p95 {operations[operation]["p95_ms"]:.1f} ms, '
+                    f'{operations[operation]["queries_mean"]:.1f} queries, '
+                    f'{operations[operation]["errors"]} errors'
+                )
+            )
+
+        lock_waits = sampler.summary()
+        self.stdout.write(
+            f'{len(measurements) / elapsed:.1f} operations/s overall, '
+            f'~{lock_waits["estimated_wait_seconds"]:.2f} s spent waiting on locks'
+        )
+        return {
+            'benchmark': 'payments',
+            'run_at': timezone.now().isoformat(),
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_per_s': round(len(measurements) / elapsed, 2),
+            'operations': operations,
+            'lock_waits': lock_waits,
+        }
+
+    def _get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _write(self, results, output):
+        if output:
+            path = Path(output)
+        else:
+            path = (
+                Path(settings.BASE_DIR)
+                / 'benchmarks'
+                / f'payments_{timezone.now():%Y%m%d_%H%M%S}.json'
+            )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2))
+        self.stdout.write(f'Results written to {path}')
+
+    def _compare(self, results, baseline_path, tolerance):
+        baseline = json.loads(Path(baseline_path).read_text())
+        regressions = []
+        for operation, current in results['operations'].items():
+            previous = baseline.get('operations', {}).get(operation)
+            if previous is None:
+                continue
+            for metric in ['p95_ms', 'queries_mean']:
+                if current[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append(
+                        f'{operation} {metric}: {previous[metric]} -> {current[metric]}'
+                    )
+
+        if regressions:
+            raise CommandError('Payment benchmark regressed:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'✓ No regressions against {baseline_path}'))
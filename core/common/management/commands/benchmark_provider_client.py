@@ -0,0 +1,62 @@
+"""
+Management command to benchmark the pooled provider HTTP client.
+"""
+
+import statistics
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core.common.includes.third_party_services.http import ProviderHTTPClient
+from core.common.tests.stub_server import StubProviderServer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-call connections with the pooled provider client against a local stub API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of requests per client (default: 200)'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.005,
+            help='Stub server latency per request in seconds (default: 0.005)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        endpoint = '/transaction/verify/stub-reference'
+
+        with StubProviderServer(latency=options['latency']) as server:
+            def unpooled():
+                requests.get(f'{server.base_url}{endpoint}', timeout=30).json()
+
+            client = ProviderHTTPClient('benchmark', server.base_url)
+
+            for name, call in [
+                ('unpooled', unpooled),
+                ('pooled', lambda: client.request('GET', endpoint)),
+            ]:
+                connections_before = server.connection_count
+                timings = []
+                for _ in range(count):
+                    started = time.perf_counter()
+                    call()
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'✓ {name}: avg {statistics.mean(timings):.2f} ms, '
+                        f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, '
+                        f'{server.connection_count - connections_before} connections'
+                    )
+                )
+
+            client.close()
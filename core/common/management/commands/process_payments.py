@@ -38,10 +38,12 @@ class Command(BaseCommand):
         try:
             if task == 'recurring_payments' or task == 'all':
                 self.stdout.write('Processing recurring payments...')
-                for cluster in Cluster.objects.all():
-                    recurring_payments.process_due_payments(cluster)
+                results = recurring_payments.drain_due_payments()
                 self.stdout.write(
-                    self.style.SUCCESS('✓ Recurring payments processed')
+                    self.style.SUCCESS(
+                        f"✓ Recurring payments processed: {results['processed']} succeeded, "
+                        f"{results['failed']} failed"
+                    )
                 )
             
             if task == 'recurring_reminders' or task == 'all':
@@ -54,10 +56,9 @@ class Command(BaseCommand):
             
             if task == 'overdue_bills' or task == 'all':
                 self.stdout.write('Checking overdue bills...')
-                for cluster in Cluster.objects.all():
-                    bills.check_and_update_overdue(cluster)
+                marked = bills.check_and_update_overdue()
                 self.stdout.write(
-                    self.style.SUCCESS('✓ Overdue bills checked')
+                    self.style.SUCCESS(f'✓ Overdue bills checked: {marked} marked overdue')
                 )
             
             if task == 'bill_reminders' or task == 'all':
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0010_staff_alter_shift_assigned_staff_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recurringpayment",
+            index=models.Index(
+                fields=["status", "next_payment_date"],
+                name="common_recu_status_0582b4_idx",
+            ),
+        ),
+    ]
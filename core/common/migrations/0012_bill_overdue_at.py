@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0011_recurringpayment_status_next_payment_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="overdue_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Date and time when the overdue sweep marked this bill as overdue",
+                null=True,
+                verbose_name="overdue at",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                condition=models.Q(("overdue_at__isnull", True)),
+                fields=["due_date"],
+                name="bill_overdue_sweep_idx",
+            ),
+        ),
+    ]
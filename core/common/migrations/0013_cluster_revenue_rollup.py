@@ -0,0 +1,187 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:09
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0012_bill_overdue_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClusterRevenueRollup",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="creation date"
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.UUIDField(
+                        help_text="the Id of the ClustR account user who added this object.",
+                        null=True,
+                        verbose_name="created by",
+                    ),
+                ),
+                (
+                    "last_modified_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="last modified date"
+                    ),
+                ),
+                (
+                    "last_modified_by",
+                    models.UUIDField(
+                        help_text="the Id of the ClustR account user who last modified this object.",
+                        null=True,
+                        verbose_name="last modified by",
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="UUID primary key",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")],
+                        help_text="Length of the rollup period",
+                        max_length=10,
+                        verbose_name="granularity",
+                    ),
+                ),
+                (
+                    "period_start",
+                    models.DateTimeField(
+                        help_text="Start of the hour or day this rollup covers",
+                        verbose_name="period start",
+                    ),
+                ),
+                (
+                    "deposit_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total deposits into the cluster wallet",
+                        max_digits=15,
+                        verbose_name="deposit amount",
+                    ),
+                ),
+                (
+                    "deposit_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of deposits into the cluster wallet",
+                        verbose_name="deposit count",
+                    ),
+                ),
+                (
+                    "transfer_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total transfers out of the cluster wallet",
+                        max_digits=15,
+                        verbose_name="transfer amount",
+                    ),
+                ),
+                (
+                    "transfer_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of transfers out of the cluster wallet",
+                        verbose_name="transfer count",
+                    ),
+                ),
+                (
+                    "bill_payment_revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Bill payments credited to the cluster wallet",
+                        max_digits=15,
+                        verbose_name="bill payment revenue",
+                    ),
+                ),
+                (
+                    "bill_payment_revenue_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of bill payment credits to the cluster wallet",
+                        verbose_name="bill payment revenue count",
+                    ),
+                ),
+                (
+                    "bill_payment_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total bill payments made by cluster members",
+                        max_digits=15,
+                        verbose_name="bill payment amount",
+                    ),
+                ),
+                (
+                    "bill_payment_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of bill payments made by cluster members",
+                        verbose_name="bill payment count",
+                    ),
+                ),
+                (
+                    "wallet_transaction_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of completed cluster wallet transactions",
+                        verbose_name="wallet transaction count",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Cluster Revenue Rollup",
+                "verbose_name_plural": "Cluster Revenue Rollups",
+                "ordering": ["-period_start"],
+                "default_permissions": [],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["cluster", "status", "created_at"],
+                name="common_tran_cluster_1c075f_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="clusterrevenuerollup",
+            name="cluster",
+            field=models.ForeignKey(
+                help_text="The cluster this object belongs to",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                related_query_name="%(class)s",
+                to="common.cluster",
+                verbose_name="cluster",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="clusterrevenuerollup",
+            constraint=models.UniqueConstraint(
+                fields=("cluster", "granularity", "period_start"),
+                name="unique_cluster_revenue_rollup_period",
+            ),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:14
+
+import django.core.serializers.json
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0013_cluster_revenue_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="UUID primary key",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        help_text="Endpoint or webhook the key belongs to",
+                        max_length=100,
+                        verbose_name="scope",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        help_text="Client idempotency key or provider event identifier",
+                        max_length=255,
+                        verbose_name="key",
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        help_text="Hash of the request the key was first used with",
+                        max_length=64,
+                        verbose_name="fingerprint",
+                    ),
+                ),
+                (
+                    "response_status",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        help_text="HTTP status of the stored response (null while processing)",
+                        null=True,
+                        verbose_name="response status",
+                    ),
+                ),
+                (
+                    "response_body",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="Stored response returned to retried requests",
+                        null=True,
+                        verbose_name="response body",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the response was stored",
+                        null=True,
+                        verbose_name="completed at",
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        help_text="Date and time after which the key can be purged",
+                        verbose_name="expires at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Idempotency Key",
+                "verbose_name_plural": "Idempotency Keys",
+                "default_permissions": [],
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at"], name="common_idem_expires_74f585_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "key"), name="unique_idempotency_scope_key"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:20
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0014_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="UUID primary key",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.CharField(
+                        choices=[
+                            ("paystack", "Paystack"),
+                            ("flutterwave", "Flutterwave"),
+                            ("bank_transfer", "Bank Transfer"),
+                            ("cash", "Cash"),
+                        ],
+                        help_text="Payment provider that sent the webhook",
+                        max_length=20,
+                        verbose_name="provider",
+                    ),
+                ),
+                (
+                    "event_id",
+                    models.CharField(
+                        help_text="Provider event identifier, unique per provider",
+                        max_length=255,
+                        verbose_name="event ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(
+                        blank=True,
+                        help_text="Provider event name, e.g. charge.success",
+                        max_length=100,
+                        verbose_name="event type",
+                    ),
+                ),
+                (
+                    "reference",
+                    models.CharField(
+                        blank=True,
+                        help_text="Transaction reference carried by the event",
+                        max_length=100,
+                        null=True,
+                        verbose_name="reference",
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        help_text="Raw webhook payload", verbose_name="payload"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("processed", "Processed"),
+                            ("ignored", "Ignored"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        help_text="Processing status",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0,
+                        help_text="Number of processing attempts",
+                        verbose_name="attempts",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True,
+                        help_text="Error from the last failed processing attempt",
+                        null=True,
+                        verbose_name="last error",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="received at"),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when a worker last claimed the event",
+                        null=True,
+                        verbose_name="claimed at",
+                    ),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when processing finished",
+                        null=True,
+                        verbose_name="processed at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Webhook Event",
+                "verbose_name_plural": "Webhook Events",
+                "ordering": ["created_at"],
+                "default_permissions": [],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="common_webh_status_2a416b_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("provider", "event_id"),
+                        name="unique_webhook_provider_event",
+                    )
+                ],
+            },
+        ),
+    ]
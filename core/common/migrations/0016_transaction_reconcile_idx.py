@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0015_webhook_event"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["pending", "processing"]),
+                    ("provider__isnull", False),
+                ),
+                fields=["created_at"],
+                name="transaction_reconcile_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+def schedule_pending_retries(apps, schema_editor):
+    """Make errors that were still waiting for a retry due immediately."""
+    PaymentError = apps.get_model("common", "PaymentError")
+    PaymentError.objects.filter(
+        is_resolved=False,
+        can_retry=True,
+        retry_count__lt=models.F("max_retries"),
+    ).update(next_retry_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0016_transaction_reconcile_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymenterror",
+            name="next_retry_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Date and time of the next automatic retry attempt",
+                null=True,
+                verbose_name="next retry at",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paymenterror",
+            index=models.Index(
+                condition=models.Q(("next_retry_at__isnull", False)),
+                fields=["next_retry_at"],
+                name="payment_error_retry_due_idx",
+            ),
+        ),
+        migrations.RunPython(schedule_pending_retries, migrations.RunPython.noop),
+    ]
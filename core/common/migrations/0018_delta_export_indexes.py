@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 22:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0017_payment_error_next_retry_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["cluster", "last_modified_at", "id"],
+                name="common_bill_cluster_802a54_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["cluster", "last_modified_at", "id"],
+                name="common_tran_cluster_05877f_idx",
+            ),
+        ),
+    ]
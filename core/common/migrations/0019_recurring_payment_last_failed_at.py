@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 23:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0018_delta_export_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recurringpayment",
+            name="last_failed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Date and time of the last failed payment attempt",
+                null=True,
+                verbose_name="last failed at",
+            ),
+        ),
+    ]
@@ -92,6 +92,11 @@ from core.common.models.payments import (
     RecurringPaymentFrequency,
     PaymentError,
     UtilityProvider,
+    ClusterRevenueRollup,
+    RollupGranularity,
+    IdempotencyKey,
+    WebhookEvent,
+    WebhookEventStatus,
 )
 from core.common.models.chat import (
     Chat,
@@ -188,6 +193,11 @@ __all__ = [
     "RecurringPaymentStatus",
     "RecurringPaymentFrequency",
     "UtilityProvider",
+    "ClusterRevenueRollup",
+    "RollupGranularity",
+    "IdempotencyKey",
+    "WebhookEvent",
+    "WebhookEventStatus",
     "BillCategory",
     "PaymentError",
     "Chat",
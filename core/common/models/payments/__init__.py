@@ -32,6 +32,15 @@ from core.common.models.payments.recurring_payment import (
 )
 
 from core.common.models.payments.utility_provider import UtilityProvider
+from core.common.models.payments.idempotency_key import IdempotencyKey
+from core.common.models.payments.webhook_event import (
+    WebhookEventStatus,
+    WebhookEvent,
+)
+from core.common.models.payments.revenue_rollup import (
+    RollupGranularity,
+    ClusterRevenueRollup,
+)
 
 __all__ = [
     "Bill",
@@ -53,4 +62,9 @@ __all__ = [
     "WalletStatus",
     "BillCategory",
     "UtilityProvider",
+    "ClusterRevenueRollup",
+    "RollupGranularity",
+    "IdempotencyKey",
+    "WebhookEvent",
+    "WebhookEventStatus",
 ]
\ No newline at end of file
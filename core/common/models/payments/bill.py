@@ -223,6 +223,13 @@ class Bill(AbstractClusterModel):
         help_text=_("Date and time when bill was paid"),
     )
 
+    overdue_at = models.DateTimeField(
+        verbose_name=_("overdue at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the overdue sweep marked this bill as overdue"),
+    )
+
     payment_transaction = models.ForeignKey('Transaction',
         on_delete=models.SET_NULL,
         null=True,
@@ -250,6 +257,14 @@ class Bill(AbstractClusterModel):
             models.Index(fields=["type"]),
             models.Index(fields=["due_date", "allow_payment_after_due"]),
             models.Index(fields=["paid_at"]),
+            # Delta exports of the rows changed since a watermark
+            models.Index(fields=["cluster", "last_modified_at", "id"]),
+            # Unswept bills only, keeps the overdue sweep off already-marked rows
+            models.Index(
+                fields=["due_date"],
+                condition=models.Q(overdue_at__isnull=True),
+                name="bill_overdue_sweep_idx",
+            ),
         ]
         ordering = ["-created_at"]
 
@@ -261,6 +276,11 @@ class Bill(AbstractClusterModel):
         """Override save to generate bill number if not provided."""
         if not self.bill_number:
             self.bill_number = f"BILL-{uuid.uuid4().hex[:8].upper()}"
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "last_modified_at" not in update_fields:
+            # Delta exports select changed rows by last_modified_at, which auto_now
+            # only sets when it is one of the saved fields
+            kwargs["update_fields"] = [*update_fields, "last_modified_at"]
         super().save(*args, **kwargs)
 
     def is_cluster_wide(self):
@@ -276,15 +296,23 @@ class Bill(AbstractClusterModel):
             # User-specific bills can only be acknowledged by the target user
             return str(user.id) == str(self.user_id)
 
-    def can_be_paid_by(self, user):
-        """Check if a user can pay this bill."""
+    def can_be_paid_by(self, user, acknowledged=None):
+        """
+        Check if a user can pay this bill.
+
+        Args:
+            user: User paying the bill
+            acknowledged: Whether the user acknowledged the bill, when already known
+        """
         # First, check if the user is the intended recipient (or in the cluster)
         if not self.can_be_acknowledged_by(user):
             return False
 
         # For user-managed bills, they must be acknowledged first
         if self.category == BillCategory.USER_MANAGED:
-            if not self.acknowledged_by.filter(id=user.id).exists():
+            if acknowledged is None:
+                acknowledged = self.acknowledged_by.filter(id=user.id).exists()
+            if not acknowledged:
                 return False
 
         # Check due date restrictions
@@ -574,10 +602,8 @@ class Bill(AbstractClusterModel):
         by querying successful transactions linked to their wallet.
         """
         from .transaction import TransactionStatus  # Local import
-        # This assumes the Transaction model has a ForeignKey to a Wallet model,
-        # which in turn has a ForeignKey to the User model.
         aggregation = self.transactions.filter(
-            wallet__user=user,
+            wallet__user_id=user.id,
             status=TransactionStatus.COMPLETED
         ).aggregate(total=models.Sum('amount'))
         return aggregation['total'] or Decimal('0.00')
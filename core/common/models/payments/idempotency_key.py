@@ -0,0 +1,87 @@
+"""
+Idempotency key models for ClustR application.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.common.models.base import UUIDPrimaryKey
+
+
+class IdempotencyKey(UUIDPrimaryKey):
+    """
+    Record of a request processed under an idempotency key and the response it
+    produced, so retried requests can be answered without reprocessing.
+    """
+
+    scope = models.CharField(
+        verbose_name=_("scope"),
+        max_length=100,
+        help_text=_("Endpoint or webhook the key belongs to"),
+    )
+
+    key = models.CharField(
+        verbose_name=_("key"),
+        max_length=255,
+        help_text=_("Client idempotency key or provider event identifier"),
+    )
+
+    fingerprint = models.CharField(
+        verbose_name=_("fingerprint"),
+        max_length=64,
+        help_text=_("Hash of the request the key was first used with"),
+    )
+
+    response_status = models.PositiveSmallIntegerField(
+        verbose_name=_("response status"),
+        null=True,
+        blank=True,
+        help_text=_("HTTP status of the stored response (null while processing)"),
+    )
+
+    response_body = models.JSONField(
+        verbose_name=_("response body"),
+        encoder=DjangoJSONEncoder,
+        null=True,
+        blank=True,
+        help_text=_("Stored response returned to retried requests"),
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name=_("created at"),
+        auto_now_add=True,
+    )
+
+    completed_at = models.DateTimeField(
+        verbose_name=_("completed at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the response was stored"),
+    )
+
+    expires_at = models.DateTimeField(
+        verbose_name=_("expires at"),
+        help_text=_("Date and time after which the key can be purged"),
+    )
+
+    class Meta:
+        default_permissions = []
+        verbose_name = _("Idempotency Key")
+        verbose_name_plural = _("Idempotency Keys")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"],
+                name="unique_idempotency_scope_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+    @property
+    def is_completed(self):
+        return self.response_status is not None
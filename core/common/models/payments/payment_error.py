@@ -3,6 +3,7 @@ Payment Error models for ClustR application.
 """
 
 import logging
+from datetime import timedelta
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -123,6 +124,13 @@ class PaymentError(AbstractClusterModel):
         help_text=_("Whether this error has been resolved"),
     )
 
+    next_retry_at = models.DateTimeField(
+        verbose_name=_("next retry at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time of the next automatic retry attempt"),
+    )
+
     resolved_at = models.DateTimeField(
         verbose_name=_("resolved at"),
         null=True,
@@ -167,12 +175,26 @@ class PaymentError(AbstractClusterModel):
             models.Index(fields=["severity"]),
             models.Index(fields=["is_resolved"]),
             models.Index(fields=["can_retry", "retry_count"]),
+            # Scheduled retries only, keeps the due-for-retry query off settled errors
+            models.Index(
+                fields=["next_retry_at"],
+                condition=models.Q(next_retry_at__isnull=False),
+                name="payment_error_retry_due_idx",
+            ),
         ]
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"Payment Error: {self.error_type} - {self.transaction.transaction_id}"
 
+    def save(self, *args, **kwargs):
+        """Override save to schedule the first retry of new retryable errors."""
+        if self._state.adding and self.next_retry_at is None and self.can_be_retried():
+            self.next_retry_at = timezone.now() + timedelta(
+                minutes=self.get_next_retry_delay()
+            )
+        super().save(*args, **kwargs)
+
     def can_be_retried(self):
         """Check if this error can be retried."""
         return (
@@ -186,13 +208,26 @@ class PaymentError(AbstractClusterModel):
         self.retry_count += 1
         self.save(update_fields=["retry_count"])
 
+    def schedule_next_retry(self, now=None):
+        """Schedule the next retry with backoff, or stop retrying when exhausted."""
+        if self.can_be_retried():
+            self.next_retry_at = (now or timezone.now()) + timedelta(
+                minutes=self.get_next_retry_delay()
+            )
+        else:
+            self.next_retry_at = None
+        self.save(update_fields=["next_retry_at"])
+
     def mark_as_resolved(self, resolution_method=None):
         """Mark the error as resolved."""
         self.is_resolved = True
         self.resolved_at = timezone.now()
+        self.next_retry_at = None
         if resolution_method:
             self.resolution_method = resolution_method
-        self.save(update_fields=["is_resolved", "resolved_at", "resolution_method"])
+        self.save(
+            update_fields=["is_resolved", "resolved_at", "next_retry_at", "resolution_method"]
+        )
 
     def get_next_retry_delay(self):
         """Get the delay before next retry attempt in minutes."""
@@ -138,6 +138,13 @@ class RecurringPayment(AbstractClusterModel):
         help_text=_("Number of consecutive failed payment attempts"),
     )
 
+    last_failed_at = models.DateTimeField(
+        verbose_name=_("last failed at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time of the last failed payment attempt"),
+    )
+
     max_failed_attempts = models.PositiveIntegerField(
         verbose_name=_("max failed attempts"),
         default=3,
@@ -195,6 +202,7 @@ class RecurringPayment(AbstractClusterModel):
             models.Index(fields=["user_id", "cluster"]),
             models.Index(fields=["status"]),
             models.Index(fields=["next_payment_date"]),
+            models.Index(fields=["status", "next_payment_date"]),
             models.Index(fields=["frequency"]),
         ]
         ordering = ["-created_at"]
@@ -237,16 +245,13 @@ class RecurringPayment(AbstractClusterModel):
 
     def process_cluster_payment(self):
         """Process regular cluster-based recurring payment."""
-        if not self.wallet.has_sufficient_balance(self.amount):
-            self.failed_attempts += 1
-            if self.failed_attempts >= self.max_failed_attempts:
-                self.status = RecurringPaymentStatus.PAUSED
-            self.save(update_fields=["failed_attempts", "status"])
+        from .transaction import Transaction, TransactionStatus, TransactionType
 
-            # Handle recurring payment failure with error handling
-            from core.common.includes.payment_error_utils import PaymentErrorHandler
+        if not self.wallet.has_sufficient_balance(self.amount):
+            # Records the failed attempt, pauses after max attempts and notifies the user
+            from core.common.includes import payment_error
 
-            PaymentErrorHandler.handle_recurring_payment_failure(
+            payment_error.handle_recurring_payment_failure(
                 self, "Insufficient wallet balance"
             )
 
@@ -267,9 +272,10 @@ class RecurringPayment(AbstractClusterModel):
         )
 
         # Update wallet balance
-        self.wallet.update_balance(self.amount, TransactionType.PAYMENT)
+        self.wallet.debit(self.amount, f"Recurring payment: {self.title}")
 
-        self.bill.credit_cluster_wallet(self.amount, transaction)
+        if self.bill:
+            self.bill.credit_cluster_wallet(self.amount, transaction)
 
         # Update recurring payment
         self.last_payment_date = timezone.now()
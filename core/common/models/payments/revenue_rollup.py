@@ -0,0 +1,113 @@
+"""
+Cluster revenue rollup models for ClustR application.
+"""
+
+from decimal import Decimal
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.common.models.base import AbstractClusterModel
+
+
+class RollupGranularity(models.TextChoices):
+    """Rollup period choices"""
+
+    HOUR = "hour", _("Hour")
+    DAY = "day", _("Day")
+
+
+class ClusterRevenueRollup(AbstractClusterModel):
+    """
+    Precomputed revenue and wallet totals for one cluster over one hour or day.
+    Only completed transactions are counted.
+    """
+
+    granularity = models.CharField(
+        verbose_name=_("granularity"),
+        max_length=10,
+        choices=RollupGranularity.choices,
+        help_text=_("Length of the rollup period"),
+    )
+
+    period_start = models.DateTimeField(
+        verbose_name=_("period start"),
+        help_text=_("Start of the hour or day this rollup covers"),
+    )
+
+    deposit_amount = models.DecimalField(
+        verbose_name=_("deposit amount"),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text=_("Total deposits into the cluster wallet"),
+    )
+
+    deposit_count = models.PositiveIntegerField(
+        verbose_name=_("deposit count"),
+        default=0,
+        help_text=_("Number of deposits into the cluster wallet"),
+    )
+
+    transfer_amount = models.DecimalField(
+        verbose_name=_("transfer amount"),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text=_("Total transfers out of the cluster wallet"),
+    )
+
+    transfer_count = models.PositiveIntegerField(
+        verbose_name=_("transfer count"),
+        default=0,
+        help_text=_("Number of transfers out of the cluster wallet"),
+    )
+
+    bill_payment_revenue = models.DecimalField(
+        verbose_name=_("bill payment revenue"),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text=_("Bill payments credited to the cluster wallet"),
+    )
+
+    bill_payment_revenue_count = models.PositiveIntegerField(
+        verbose_name=_("bill payment revenue count"),
+        default=0,
+        help_text=_("Number of bill payment credits to the cluster wallet"),
+    )
+
+    bill_payment_amount = models.DecimalField(
+        verbose_name=_("bill payment amount"),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text=_("Total bill payments made by cluster members"),
+    )
+
+    bill_payment_count = models.PositiveIntegerField(
+        verbose_name=_("bill payment count"),
+        default=0,
+        help_text=_("Number of bill payments made by cluster members"),
+    )
+
+    wallet_transaction_count = models.PositiveIntegerField(
+        verbose_name=_("wallet transaction count"),
+        default=0,
+        help_text=_("Number of completed cluster wallet transactions"),
+    )
+
+    class Meta:
+        default_permissions = []
+        verbose_name = _("Cluster Revenue Rollup")
+        verbose_name_plural = _("Cluster Revenue Rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cluster", "granularity", "period_start"],
+                name="unique_cluster_revenue_rollup_period",
+            ),
+        ]
+        ordering = ["-period_start"]
+
+    def __str__(self):
+        return f"{self.cluster_id} {self.granularity} {self.period_start:%Y-%m-%d %H:%M}"
@@ -180,6 +180,17 @@ class Transaction(AbstractClusterModel):
             models.Index(fields=["type", "status"]),
             models.Index(fields=["wallet", "type", "status"]),
             models.Index(fields=["created_at", "type"]),
+            # Per-cluster hourly revenue rollup refresh
+            models.Index(fields=["cluster", "status", "created_at"]),
+            # Delta exports of the rows changed since a watermark
+            models.Index(fields=["cluster", "last_modified_at", "id"]),
+            # Pending provider transactions only, keeps reconciliation off settled rows
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status__in=["pending", "processing"])
+                & models.Q(provider__isnull=False),
+                name="transaction_reconcile_idx",
+            ),
         ]
         ordering = ["-created_at"]
 
@@ -189,9 +200,19 @@ class Transaction(AbstractClusterModel):
     def save(self, *args, **kwargs):
         """Override save to generate transaction ID if not provided."""
         if not self.transaction_id:
-            self.transaction_id = f"TXN-{uuid.uuid4().hex[:12].upper()}"
+            self.transaction_id = self.generate_transaction_id()
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "last_modified_at" not in update_fields:
+            # Delta exports select changed rows by last_modified_at, which auto_now
+            # only sets when it is one of the saved fields
+            kwargs["update_fields"] = [*update_fields, "last_modified_at"]
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def generate_transaction_id():
+        """Generate a transaction ID, for transactions created without save()."""
+        return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+
     def mark_as_completed(self, extra=""):
         """
         Mark transaction as completed and update wallet balance.
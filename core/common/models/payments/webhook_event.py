@@ -0,0 +1,116 @@
+"""
+Webhook inbox models for ClustR application.
+"""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.common.models.base import UUIDPrimaryKey
+from core.common.models.payments.transaction import PaymentProvider
+
+
+class WebhookEventStatus(models.TextChoices):
+    """Webhook event status choices"""
+
+    PENDING = "pending", _("Pending")
+    PROCESSING = "processing", _("Processing")
+    PROCESSED = "processed", _("Processed")
+    IGNORED = "ignored", _("Ignored")
+    FAILED = "failed", _("Failed")
+
+
+class WebhookEvent(UUIDPrimaryKey):
+    """
+    Raw payment provider webhook stored on receipt and processed asynchronously.
+    """
+
+    provider = models.CharField(
+        verbose_name=_("provider"),
+        max_length=20,
+        choices=PaymentProvider.choices,
+        help_text=_("Payment provider that sent the webhook"),
+    )
+
+    event_id = models.CharField(
+        verbose_name=_("event ID"),
+        max_length=255,
+        help_text=_("Provider event identifier, unique per provider"),
+    )
+
+    event_type = models.CharField(
+        verbose_name=_("event type"),
+        max_length=100,
+        blank=True,
+        help_text=_("Provider event name, e.g. charge.success"),
+    )
+
+    reference = models.CharField(
+        verbose_name=_("reference"),
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text=_("Transaction reference carried by the event"),
+    )
+
+    payload = models.JSONField(
+        verbose_name=_("payload"),
+        help_text=_("Raw webhook payload"),
+    )
+
+    status = models.CharField(
+        verbose_name=_("status"),
+        max_length=20,
+        choices=WebhookEventStatus.choices,
+        default=WebhookEventStatus.PENDING,
+        help_text=_("Processing status"),
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_("attempts"),
+        default=0,
+        help_text=_("Number of processing attempts"),
+    )
+
+    last_error = models.TextField(
+        verbose_name=_("last error"),
+        blank=True,
+        null=True,
+        help_text=_("Error from the last failed processing attempt"),
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name=_("received at"),
+        auto_now_add=True,
+    )
+
+    claimed_at = models.DateTimeField(
+        verbose_name=_("claimed at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when a worker last claimed the event"),
+    )
+
+    processed_at = models.DateTimeField(
+        verbose_name=_("processed at"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when processing finished"),
+    )
+
+    class Meta:
+        default_permissions = []
+        verbose_name = _("Webhook Event")
+        verbose_name_plural = _("Webhook Events")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "event_id"],
+                name="unique_webhook_provider_event",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} ({self.status})"
@@ -4,8 +4,9 @@ WebSocket URL routing for ClustR real-time features.
 
 from django.urls import re_path
 
-from core.common.consumers import ChatConsumer
+from core.common.consumers import ChatConsumer, WalletConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/chat/(?P<chat_id>[0-9a-f-]+)/$', ChatConsumer.as_asgi()),
+    re_path(r'ws/wallet/$', WalletConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.common.includes import payment_dashboard, revenue_rollups, wallet_balances
+from core.common.models import Bill, RecurringPayment, Transaction, TransactionStatus, Wallet
+
+
+@receiver(post_save, sender=Transaction)
+def refresh_revenue_rollup(instance: Transaction, update_fields=None, **kwargs):
+    if instance.status != TransactionStatus.COMPLETED:
+        return
+    if update_fields is not None and "status" not in update_fields:
+        return
+    revenue_rollups.queue_refresh(instance)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Bill)
+@receiver(post_save, sender=Wallet)
+@receiver(post_save, sender=RecurringPayment)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Bill)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_delete, sender=RecurringPayment)
+def invalidate_payment_dashboard(instance, **kwargs):
+    payment_dashboard.queue_invalidation(instance.cluster_id)
+
+
+@receiver(post_save, sender=Wallet)
+def update_wallet_balance(instance: Wallet, **kwargs):
+    wallet_balances.queue_update(instance)
+
+
+@receiver(post_delete, sender=Wallet)
+def remove_wallet_balance(instance: Wallet, **kwargs):
+    wallet_balances.invalidate(instance.cluster_id, instance.user_id)
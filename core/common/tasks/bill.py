@@ -1,9 +1,12 @@
 
 import logging
+from datetime import timedelta
 from celery import shared_task
+from django.utils import timezone
 
-from core.common.models import Cluster
+from core.common.models import Bill, Cluster
 from core.common.includes import bills
+from core.common.tasks import fan_out
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +27,34 @@ def check_overdue_bills_for_cluster(cluster_id):
         logger.error(f"Error checking overdue bills for cluster {cluster_id}: {str(e)}")
 
 
+@shared_task(name="send_overdue_bill_notifications")
+def send_overdue_bill_notifications(bill_ids):
+    """
+    Sends overdue notifications for a batch of bills marked by the overdue sweep.
+    """
+    sent = bills.send_overdue_notifications(bill_ids)
+    logger.info(f"Sent {sent} overdue bill notifications")
+    return sent
+
+
+@shared_task(name="check_overdue_bills_for_clusters")
+def check_overdue_bills_for_clusters(cluster_ids):
+    """
+    Checks for overdue bills for a batch of clusters.
+    """
+    return fan_out.run_for_clusters(check_overdue_bills_for_cluster, cluster_ids)
+
+
 @shared_task(name="spawn_check_overdue_bills")
 def spawn_check_overdue_bills():
     """
-    Spawns a task to check overdue bills for each cluster.
+    Spawns batched tasks to check overdue bills for clusters with newly overdue bills.
     """
-    for cluster in Cluster.objects.all().iterator():
-        check_overdue_bills_for_cluster.delay(cluster.id)
+    return fan_out.fan_out(
+        "spawn_check_overdue_bills",
+        check_overdue_bills_for_clusters,
+        bills.get_newly_overdue(),
+    )
 
 
 @shared_task(name="send_bill_reminders_for_cluster")
@@ -49,10 +73,23 @@ def send_bill_reminders_for_cluster(cluster_id):
         logger.error(f"Error sending bill reminders for cluster {cluster_id}: {str(e)}")
 
 
+@shared_task(name="send_bill_reminders_for_clusters")
+def send_bill_reminders_for_clusters(cluster_ids):
+    """
+    Sends bill reminders for a batch of clusters.
+    """
+    return fan_out.run_for_clusters(send_bill_reminders_for_cluster, cluster_ids)
+
+
 @shared_task(name="spawn_send_bill_reminders")
 def spawn_send_bill_reminders():
     """
-    Spawns a task to send bill reminders for each cluster.
+    Spawns batched tasks to send bill reminders for clusters with bills due soon.
     """
-    for cluster in Cluster.objects.all().iterator():
-        send_bill_reminders_for_cluster.delay(cluster.id)
\ No newline at end of file
+    now = timezone.now()
+    bills_due_soon = Bill.objects.filter(
+        due_date__gte=now, due_date__lte=now + timedelta(days=3), paid_at__isnull=True
+    )
+    return fan_out.fan_out(
+        "spawn_send_bill_reminders", send_bill_reminders_for_clusters, bills_due_soon
+    )
\ No newline at end of file
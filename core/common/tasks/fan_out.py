@@ -0,0 +1,100 @@
+"""
+Work-aware fan-out helpers for the spawn_* beat tasks.
+
+Instead of enqueueing one task per cluster, spawners run one aggregate query to find
+the clusters that actually have due rows and enqueue those clusters in groups.
+"""
+
+import logging
+from typing import Any, Callable, Iterable, Union
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLUSTERS_PER_TASK = 50
+
+
+def get_clusters_per_task(spawner_name: str) -> int:
+    """
+    Get the number of clusters grouped into one task for a spawner.
+
+    Sizes can be tuned per spawner through the FAN_OUT_CLUSTERS_PER_TASK setting,
+    e.g. {"default": 50, "spawn_check_overdue_bills": 200}.
+    """
+    sizes = getattr(settings, "FAN_OUT_CLUSTERS_PER_TASK", {})
+    return sizes.get(spawner_name, sizes.get("default", DEFAULT_CLUSTERS_PER_TASK))
+
+
+def clusters_with_work(work: Union[QuerySet, Iterable[QuerySet]]) -> list[str]:
+    """
+    Get the IDs of the clusters that have at least one due row.
+
+    Args:
+        work: Queryset of due rows, or several querysets whose clusters are combined
+            with UNION so the lookup is still a single query
+
+    Returns:
+        List of cluster IDs as strings
+    """
+    querysets = [work] if isinstance(work, QuerySet) else list(work)
+    cluster_ids = [
+        queryset.order_by().values_list("cluster_id", flat=True).distinct()
+        for queryset in querysets
+    ]
+    combined = cluster_ids[0].union(*cluster_ids[1:])
+    return [str(cluster_id) for cluster_id in combined]
+
+
+def fan_out(
+    spawner_name: str,
+    batch_task,
+    work: Union[QuerySet, Iterable[QuerySet]],
+    clusters_per_task: int = None,
+) -> dict[str, Any]:
+    """
+    Enqueue a batch task for the clusters that have due work.
+
+    Args:
+        spawner_name: Name of the spawning task, used for batch size settings and logs
+        batch_task: Celery task accepting a list of cluster IDs
+        work: Queryset(s) selecting the due rows the batch task will process
+        clusters_per_task: Override the configured number of clusters per task
+
+    Returns:
+        Summary with the number of clusters that have work and tasks enqueued
+    """
+    clusters_per_task = clusters_per_task or get_clusters_per_task(spawner_name)
+    cluster_ids = clusters_with_work(work)
+
+    tasks_enqueued = 0
+    for start in range(0, len(cluster_ids), clusters_per_task):
+        batch_task.delay(cluster_ids[start : start + clusters_per_task])
+        tasks_enqueued += 1
+
+    summary = {
+        "spawner": spawner_name,
+        "clusters_with_work": len(cluster_ids),
+        "clusters_per_task": clusters_per_task,
+        "tasks_enqueued": tasks_enqueued,
+    }
+    logger.info(
+        f"{spawner_name}: {len(cluster_ids)} clusters with work, "
+        f"{tasks_enqueued} tasks enqueued"
+    )
+    return summary
+
+
+def run_for_clusters(cluster_task: Callable, cluster_ids: Iterable[str]) -> dict[str, int]:
+    """
+    Run a per-cluster task inline for every cluster of a batch.
+
+    The per-cluster tasks handle and log their own errors, so one failing cluster
+    does not stop the rest of the batch.
+    """
+    count = 0
+    for cluster_id in cluster_ids:
+        cluster_task(cluster_id)
+        count += 1
+    return {"clusters": count}
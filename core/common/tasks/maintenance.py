@@ -1,9 +1,17 @@
 
 import logging
+from datetime import timedelta
 from celery import shared_task
+from django.utils import timezone
 
-from core.common.models import Cluster
+from core.common.models import (
+    Cluster,
+    MaintenanceLog,
+    MaintenanceSchedule,
+    MaintenanceStatus,
+)
 from core.common.includes import maintenance
+from core.common.tasks import fan_out
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +36,31 @@ def process_maintenance_schedules_for_cluster(cluster_id):
         logger.error(f"Error processing maintenance schedules for cluster {cluster_id}: {str(e)}")
 
 
+@shared_task(name="process_maintenance_schedules_for_clusters")
+def process_maintenance_schedules_for_clusters(cluster_ids):
+    """
+    Processes due maintenance schedules for a batch of clusters.
+    """
+    return fan_out.run_for_clusters(process_maintenance_schedules_for_cluster, cluster_ids)
+
+
 @shared_task(name="spawn_process_maintenance_schedules")
 def spawn_process_maintenance_schedules():
     """
-    Spawns a task to process maintenance schedules for each cluster.
+    Spawns batched tasks for clusters with due schedules or maintenance due soon.
     """
-    for cluster in Cluster.objects.all().iterator():
-        process_maintenance_schedules_for_cluster.delay(cluster.id)
+    now = timezone.now()
+    due_schedules = MaintenanceSchedule.objects.filter(
+        is_active=True, next_due_date__lte=now
+    )
+    maintenance_due_soon = MaintenanceLog.objects.filter(
+        status=MaintenanceStatus.SCHEDULED,
+        scheduled_date__gte=now,
+        scheduled_date__lte=now + timedelta(hours=24),
+        performed_by__isnull=False,
+    )
+    return fan_out.fan_out(
+        "spawn_process_maintenance_schedules",
+        process_maintenance_schedules_for_clusters,
+        [due_schedules, maintenance_due_soon],
+    )
@@ -1,40 +1,64 @@
 import logging
+import uuid
+from datetime import datetime, timedelta
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 
-from core.common.models import Cluster
-from core.common.includes import recurring_payments
+from core.common.models import Cluster, RecurringPayment, RecurringPaymentStatus
+from core.common.includes import (
+    idempotency,
+    payment_dashboard,
+    reconciliation,
+    recurring_payments,
+    revenue_rollups,
+    utilities,
+    utility_retries,
+    webhooks,
+)
+from core.common.tasks import fan_out
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name="process_recurring_payments_for_cluster")
-def process_recurring_payments_for_cluster(cluster_id):
+@shared_task(
+    name="drain_due_recurring_payments",
+    acks_late=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def drain_due_recurring_payments(run_id, run_started_at):
     """
-    Processes due recurring payments for a specific cluster.
+    Drains due recurring payments across all clusters.
+    Several instances run concurrently from the same run start time; a retried
+    instance resumes from the checkpoint of its run_id.
     """
-    try:
-        cluster = Cluster.objects.get(id=cluster_id)
-        results = recurring_payments.process_due_payments(cluster)
-        if results["processed"] > 0 or results["failed"] > 0:
-            logger.info(
-                f"Cluster {cluster.name}: Processed {results['processed']}, Failed {results['failed']}, Paused {results['paused']}"
-            )
-    except Cluster.DoesNotExist:
-        logger.error(f"Cluster with id {cluster_id} not found.")
-    except Exception as e:
-        logger.error(
-            f"Error processing recurring payments for cluster {cluster_id}: {str(e)}"
-        )
+    return recurring_payments.drain_due_payments(
+        run_id=run_id, run_started_at=datetime.fromisoformat(run_started_at)
+    )
 
 
 @shared_task(name="spawn_process_recurring_payments")
 def spawn_process_recurring_payments():
     """
-    Spawns a task to process recurring payments for each cluster.
+    Spawns concurrent workers that drain due recurring payments for all clusters.
+    No worker is started when nothing is due.
     """
-    for cluster in Cluster.objects.all().iterator(chunk_size=1000):
-        process_recurring_payments_for_cluster.delay(cluster.id)
+    run_started_at = timezone.now()
+    due_payments = RecurringPayment.objects.filter(
+        status=RecurringPaymentStatus.ACTIVE, next_payment_date__lte=run_started_at
+    )
+    if not fan_out.clusters_with_work(due_payments):
+        return {"spawner": "spawn_process_recurring_payments", "tasks_enqueued": 0}
+
+    worker_count = getattr(settings, "RECURRING_PAYMENT_WORKERS", 4)
+    spawn_id = uuid.uuid4().hex
+    for worker in range(worker_count):
+        drain_due_recurring_payments.delay(
+            f"{spawn_id}-{worker}", run_started_at.isoformat()
+        )
+    return {"spawner": "spawn_process_recurring_payments", "tasks_enqueued": worker_count}
 
 
 @shared_task(name="send_recurring_payment_reminders_for_cluster")
@@ -59,113 +83,117 @@ def send_recurring_payment_reminders_for_cluster(cluster_id):
         )
 
 
+@shared_task(name="send_recurring_payment_reminders_for_clusters")
+def send_recurring_payment_reminders_for_clusters(cluster_ids):
+    """
+    Sends recurring payment reminders for a batch of clusters.
+    """
+    return fan_out.run_for_clusters(
+        send_recurring_payment_reminders_for_cluster, cluster_ids
+    )
+
+
 @shared_task(name="spawn_send_recurring_payment_reminders")
 def spawn_send_recurring_payment_reminders():
     """
-    Spawns a task to send recurring payment reminders for each cluster.
+    Spawns batched tasks to send reminders for clusters with payments due within a day.
     """
-    for cluster in Cluster.objects.all().iterator():
-        send_recurring_payment_reminders_for_cluster.delay(cluster.id)
+    now = timezone.now()
+    upcoming_payments = RecurringPayment.objects.filter(
+        status=RecurringPaymentStatus.ACTIVE,
+        next_payment_date__gte=now,
+        next_payment_date__lte=now + timedelta(days=1),
+    )
+    return fan_out.fan_out(
+        "spawn_send_recurring_payment_reminders",
+        send_recurring_payment_reminders_for_clusters,
+        upcoming_payments,
+    )
 
 
 @shared_task(
     ignore_result=True,
     name="retry_failed_utility_payments",
+    acks_late=True,
     autoretry_for=(Exception,),
     retry_backoff=True,
     max_retries=3,
 )
 def retry_failed_utility_payments():
     """
-    Celery task to retry failed utility payments that can be retried.
-    """
-    from core.common.models import PaymentError, TransactionStatus
-    from django.db import transaction
-
-    logger.info("Starting retry of failed utility payments")
-
-    retryable_errors = PaymentError.objects.filter(
-        is_resolved=False,
-        can_retry=True,
-        retry_count__lt=3,  # Max 3 retries
-        transaction__type="bill_payment",
-        transaction__status=TransactionStatus.FAILED,
-        transaction__metadata__utility_provider_id__isnull=False,
-    ).select_related("transaction", "transaction__wallet")
-
-    total_retries = retryable_errors.count()
-    successful_retries = 0
-    failed_retries = 0
-
-    logger.info(f"Found {total_retries} retryable utility payment errors")
-
-    for error in retryable_errors:
-        try:
-            with transaction.atomic():
-                from datetime import timedelta
-
-                retry_delay = error.get_next_retry_delay()
-                if error.created_at + timedelta(minutes=retry_delay) > timezone.now():
-                    continue
-
-                logger.info(f"Retrying utility payment error {error.id}")
-
-                # Increment retry count
-                error.increment_retry_count()
-
-                # Attempt to recreate and process the payment
-                transaction_data = error.transaction
-                utility_provider_id = transaction_data.metadata.get(
-                    "utility_provider_id"
-                )
-                customer_id = transaction_data.metadata.get("customer_id")
-
-                if utility_provider_id and customer_id:
-                    from core.common.models import UtilityProvider
-                    from core.common.includes import payments
-
-                    try:
-                        utility_provider = UtilityProvider.objects.get(
-                            id=utility_provider_id
-                        )
-
-                        from core.common.includes import utilities
-                        result = utilities.process_utility_payment(
-                            user_id=transaction_data.wallet.user_id,
-                            utility_provider=utility_provider,
-                            customer_id=customer_id,
-                            amount=transaction_data.amount,
-                            wallet=transaction_data.wallet,
-                            description=f"Retry: {transaction_data.description}",
-                        )
-
-                        if result.get("success"):
-                            error.mark_as_resolved("automatic_retry")
-                            successful_retries += 1
-                            logger.info(f"Utility payment retry {error.id} successful")
-                        else:
-                            failed_retries += 1
-                            logger.warning(
-                                f"Utility payment retry {error.id} failed: {result.get('error')}"
-                            )
-
-                    except UtilityProvider.DoesNotExist:
-                        logger.error(
-                            f"Utility provider {utility_provider_id} not found for retry"
-                        )
-                        failed_retries += 1
-
-        except Exception as e:
-            failed_retries += 1
-            logger.error(f"Error retrying utility payment {error.id}: {str(e)}")
-
-    logger.info(
-        f"Utility payment retry completed. "
-        f"Successful: {successful_retries}, Failed: {failed_retries}"
+    Retries failed utility payments that are due, with exponential backoff.
+    Several instances run concurrently and claim disjoint batches.
+    """
+    return utility_retries.drain_due_retries()
+
+
+@shared_task(name="spawn_retry_failed_utility_payments")
+def spawn_retry_failed_utility_payments():
+    """
+    Spawns concurrent workers that retry due utility payments.
+    No worker is started when nothing is due.
+    """
+    if not utility_retries.get_due_retries().exists():
+        return {"spawner": "spawn_retry_failed_utility_payments", "tasks_enqueued": 0}
+
+    worker_count = getattr(settings, "UTILITY_RETRY_WORKERS", 4)
+    for _ in range(worker_count):
+        retry_failed_utility_payments.delay()
+    return {"spawner": "spawn_retry_failed_utility_payments", "tasks_enqueued": worker_count}
+
+
+@shared_task(name="refresh_utility_provider_catalogue")
+def refresh_utility_provider_catalogue():
+    """
+    Refreshes the cached utility provider catalogue of every payment provider.
+    """
+    return utilities.refresh_provider_catalogue()
+
+
+@shared_task(name="refresh_cluster_revenue_rollup")
+def refresh_cluster_revenue_rollup(cluster_id, occurred_at):
+    """
+    Recomputes the hourly and daily revenue rollups around a completed transaction.
+    """
+    revenue_rollups.refresh_rollup(cluster_id, datetime.fromisoformat(occurred_at))
+    payment_dashboard.bump_version(cluster_id)
+
+
+@shared_task(name="purge_expired_idempotency_keys")
+def purge_expired_idempotency_keys():
+    """
+    Deletes idempotency keys past their retention period.
+    """
+    return idempotency.purge_expired()
+
+
+@shared_task(name="process_webhook_events")
+def process_webhook_events():
+    """
+    Drains the payment webhook inbox. Concurrent runs claim disjoint batches.
+    """
+    return webhooks.drain(
+        batch_size=getattr(settings, "WEBHOOK_INBOX_BATCH_SIZE", webhooks.INBOX_BATCH_SIZE)
     )
 
-    return {
-        "total_retries": total_retries,
-        "successful_retries": successful_retries,
-        "failed_retries": failed_retries,
-    }
\ No newline at end of file
+
+@shared_task(name="reconcile_pending_transactions")
+def reconcile_pending_transactions():
+    """
+    Verifies stale pending provider transactions that never received a webhook.
+    """
+    return reconciliation.reconcile()
+
+
+@shared_task(name="refresh_payment_dashboard")
+def refresh_payment_dashboard(cluster_id):
+    """
+    Rebuilds the cached payment dashboard snapshot of a cluster.
+    """
+    try:
+        cluster = Cluster.objects.get(id=cluster_id)
+        payment_dashboard.refresh_snapshot(cluster)
+    except Cluster.DoesNotExist:
+        logger.warning(f"Cluster {cluster_id} not found for payment dashboard refresh")
+    finally:
+        payment_dashboard.release_refresh_lock(cluster_id)
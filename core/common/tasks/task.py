@@ -1,8 +1,11 @@
 import logging
+from datetime import timedelta
 from celery import shared_task
+from django.utils import timezone
 
-from core.common.models import Cluster
+from core.common.models import Cluster, Task, TaskStatus
 from core.common.includes import tasks
+from core.common.tasks import fan_out
 from core.notifications import notifications
 from core.notifications.events import NotificationEvents
 
@@ -40,10 +43,23 @@ def check_task_deadlines_for_cluster(cluster_id):
         )
 
 
+@shared_task(name="check_task_deadlines_for_clusters")
+def check_task_deadlines_for_clusters(cluster_ids):
+    """
+    Checks task deadlines for a batch of clusters.
+    """
+    return fan_out.run_for_clusters(check_task_deadlines_for_cluster, cluster_ids)
+
+
 @shared_task(name="spawn_check_task_deadlines")
 def spawn_check_task_deadlines():
     """
-    Spawns a task to check deadlines for each cluster.
+    Spawns batched tasks for clusters with overdue or soon-due open tasks.
     """
-    for cluster in Cluster.objects.all().iterator():
-        check_task_deadlines_for_cluster.delay(cluster.id)
+    open_tasks_due = Task.objects.filter(
+        due_date__lte=timezone.now() + timedelta(hours=24),
+        status__in=[TaskStatus.PENDING, TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS],
+    )
+    return fan_out.fan_out(
+        "spawn_check_task_deadlines", check_task_deadlines_for_clusters, open_tasks_due
+    )
@@ -0,0 +1,166 @@
+"""
+Local stub server imitating the Paystack and Flutterwave APIs.
+
+Used by tests and the provider and payment benchmarks to exercise the pooled HTTP
+client without calling the real providers. The server speaks HTTP/1.1 keep-alive,
+can add artificial latency and fail a number of requests on demand, and counts the
+connections it accepts so connection reuse can be checked.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+DEFAULT_ROUTES = {
+    # Paystack
+    ("POST", "/transaction/initialize"): {
+        "status": True,
+        "data": {
+            "reference": "stub-reference",
+            "authorization_url": "https://checkout.example/stub",
+            "access_code": "stub-access-code",
+        },
+    },
+    ("GET", "/transaction/verify/"): {
+        "status": True,
+        "data": {
+            "status": "success",
+            "amount": 100000,
+            "currency": "NGN",
+            "reference": "stub-reference",
+            "fees": 1500,
+        },
+    },
+    ("GET", "/bank"): {"status": True, "data": []},
+    ("POST", "/bills/pay"): {
+        "status": True,
+        "data": {"id": 2001, "reference": "stub-reference", "status": "success"},
+    },
+    # Flutterwave
+    ("POST", "/payments"): {
+        "status": "success",
+        "data": {"link": "https://checkout.example/stub"},
+    },
+    ("POST", "/bills"): {
+        "status": "success",
+        "data": {"flw_ref": "stub-flw-reference", "tx_ref": "stub-reference"},
+    },
+    ("GET", "/transactions/"): {
+        "status": "success",
+        "data": {
+            "status": "successful",
+            "amount": 1000,
+            "currency": "NGN",
+            "tx_ref": "stub-reference",
+        },
+    },
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        with server.lock:
+            server.request_count += 1
+            failing = server.fail_next > 0
+            if failing:
+                server.fail_next -= 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        path = urlparse(self.path).path
+        if failing:
+            status, body = server.fail_status, {"status": False, "message": "Stub failure"}
+        else:
+            body = next(
+                (
+                    response
+                    for (method, prefix), response in server.routes.items()
+                    if method == self.command and path.startswith(prefix)
+                ),
+                None,
+            )
+            status = 200 if body is not None else 404
+            body = body if body is not None else {"status": False, "message": "Not found"}
+
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class StubProviderServer:
+    """
+    Threaded stub provider API running on a free local port.
+
+    Use as a context manager; base_url is set once the server is running.
+
+    Args:
+        routes: {(method, path prefix): JSON body} overriding the default routes
+        latency: Seconds to wait before answering each request
+    """
+
+    def __init__(self, routes: Optional[dict] = None, latency: float = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.httpd.latency = latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.connection_count = 0
+        self.httpd.request_count = 0
+        self.httpd.fail_next = 0
+        self.httpd.fail_status = 503
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def connection_count(self) -> int:
+        return self.httpd.connection_count
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def fail(self, count: int, status: int = 503) -> None:
+        """Answer the next count requests with an error status."""
+        with self.httpd.lock:
+            self.httpd.fail_next = count
+            self.httpd.fail_status = status
+
+    def start(self) -> "StubProviderServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubProviderServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,122 @@
+"""
+Tests for paying bills from a wallet.
+"""
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core.common.includes import bills, cluster_wallet
+from core.common.models import BillCategory, Transaction, TransactionType, Wallet
+from members.tests.test_payment_utils import create_bill, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+@patch("core.common.includes.bills.send_payment_confirmation")
+class BillPaymentExecutorTests(TestCase):
+    """Tests for the consolidated bill payment executor."""
+
+    # Savepoint, locking read, one insert for debit and credit, bill update,
+    # payer wallet update, cluster wallet update, savepoint release
+    USER_BILL_QUERIES = 7
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster, balance=Decimal("10000.00"))
+        self.cluster_wallet = Wallet.objects.create(
+            cluster=self.cluster,
+            user_id=self.cluster.id,
+            created_by=self.cluster.id,
+            last_modified_by=self.cluster.id,
+        )
+        self.bill = create_bill(
+            cluster=self.cluster,
+            user=self.user,
+            category=BillCategory.USER_MANAGED,
+            amount=Decimal("3000.00"),
+        )
+        self.bill.acknowledged_by.add(self.user)
+
+    def test_user_bill_payment_query_count(self, send_confirmation):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(self.USER_BILL_QUERIES):
+                payment = bills.process_payment(
+                    bill=self.bill, wallet=self.wallet, amount=None, user=self.user
+                )
+
+        # The confirmation waits for the commit
+        send_confirmation.assert_not_called()
+        for callback in callbacks:
+            callback()
+        send_confirmation.assert_called_once_with(self.bill, payment)
+
+    def test_user_bill_payment_moves_money(self, send_confirmation):
+        payment = bills.process_payment(
+            bill=self.bill, wallet=self.wallet, amount=Decimal("1000.00"), user=self.user
+        )
+
+        self.wallet.refresh_from_db()
+        self.cluster_wallet.refresh_from_db()
+        self.bill.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("9000.00"))
+        self.assertEqual(self.wallet.available_balance, Decimal("9000.00"))
+        self.assertEqual(self.cluster_wallet.balance, Decimal("1000.00"))
+        self.assertEqual(self.bill.paid_amount, Decimal("1000.00"))
+        self.assertIsNone(self.bill.paid_at)
+        self.assertEqual(self.bill.payment_transaction_id, payment.id)
+
+        credit = Transaction.objects.get(wallet=self.cluster_wallet)
+        self.assertEqual(credit.type, TransactionType.DEPOSIT)
+        self.assertEqual(credit.metadata["original_transaction_id"], str(payment.id))
+        self.assertEqual(payment.metadata["cluster_credit_transaction_id"], credit.transaction_id)
+
+    def test_overpayment_is_rejected(self, send_confirmation):
+        bills.process_payment(bill=self.bill, wallet=self.wallet, amount=None, user=self.user)
+        self.bill.refresh_from_db()
+
+        with self.assertRaises(ValueError):
+            bills.process_payment(
+                bill=self.bill, wallet=self.wallet, amount=Decimal("1.00"), user=self.user
+            )
+        self.assertIsNotNone(self.bill.paid_at)
+
+    def test_stale_bill_cannot_be_overpaid(self, send_confirmation):
+        stale_bill = type(self.bill).objects.get(pk=self.bill.pk)
+        bills.process_payment(bill=self.bill, wallet=self.wallet, amount=None, user=self.user)
+
+        with self.assertRaises(ValueError):
+            bills.process_payment(bill=stale_bill, wallet=self.wallet, amount=None, user=self.user)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("7000.00"))
+
+    def test_idempotency_key_returns_earlier_payment(self, send_confirmation):
+        first = bills.process_payment(
+            bill=self.bill, wallet=self.wallet, amount=None, user=self.user, idempotency_key="pay-1"
+        )
+        self.bill.refresh_from_db()
+
+        second = bills.process_payment(
+            bill=self.bill, wallet=self.wallet, amount=None, user=self.user, idempotency_key="pay-1"
+        )
+
+        self.assertEqual(second.pk, first.pk)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("7000.00"))
+
+    def test_unacknowledged_bill_is_rejected(self, send_confirmation):
+        self.bill.acknowledged_by.clear()
+
+        with self.assertRaises(ValueError):
+            bills.process_payment(bill=self.bill, wallet=self.wallet, amount=None, user=self.user)
+
+    def test_failed_cluster_credit_is_rolled_back(self, send_confirmation):
+        with patch.object(Wallet, "credit", side_effect=RuntimeError("credit failed")):
+            with self.assertRaises(RuntimeError):
+                cluster_wallet.credit_cluster_from_bill_payment(
+                    self.cluster, Decimal("1000.00"), self.bill
+                )
+
+        self.assertFalse(Transaction.objects.filter(wallet=self.cluster_wallet).exists())
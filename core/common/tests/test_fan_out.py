@@ -0,0 +1,89 @@
+"""
+Tests for the work-aware spawn_* fan-out.
+"""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.common.models import Bill
+from core.common.tasks import fan_out
+from core.common.tasks.bill import spawn_check_overdue_bills
+from members.tests.test_payment_utils import create_bill
+from members.tests.utils import create_cluster
+
+
+class FanOutTests(TestCase):
+    """Tests for finding clusters with work and grouping them into tasks."""
+
+    def setUp(self):
+        self.clusters = []
+        for i in range(5):
+            cluster, self.admin = create_cluster(name=f"Estate {i}")
+            self.clusters.append(cluster)
+        past = timezone.now() - timedelta(days=1)
+        for cluster in self.clusters[:3]:
+            self._create_bill(cluster, past)
+            self._create_bill(cluster, past, title="Second bill")
+
+    def _create_bill(self, cluster, due_date, title="Test Bill"):
+        return create_bill(
+            cluster=cluster,
+            due_date=due_date,
+            title=title,
+            created_by=str(self.admin.id),
+        )
+
+    def test_clusters_with_work_is_one_query(self):
+        with self.assertNumQueries(1):
+            cluster_ids = fan_out.clusters_with_work(
+                Bill.objects.filter(due_date__lt=timezone.now())
+            )
+
+        self.assertCountEqual(cluster_ids, [str(c.id) for c in self.clusters[:3]])
+
+    def test_clusters_with_work_combines_querysets(self):
+        future = timezone.now() + timedelta(days=1)
+        self._create_bill(self.clusters[4], future)
+
+        with self.assertNumQueries(1):
+            cluster_ids = fan_out.clusters_with_work(
+                [
+                    Bill.objects.filter(due_date__lt=timezone.now()),
+                    Bill.objects.filter(due_date__gt=timezone.now()),
+                ]
+            )
+
+        self.assertEqual(len(cluster_ids), 4)
+
+    def test_fan_out_groups_clusters_into_batches(self):
+        batch_task = MagicMock()
+
+        summary = fan_out.fan_out(
+            "spawn_test",
+            batch_task,
+            Bill.objects.filter(due_date__lt=timezone.now()),
+            clusters_per_task=2,
+        )
+
+        self.assertEqual(summary["clusters_with_work"], 3)
+        self.assertEqual(summary["tasks_enqueued"], 2)
+        enqueued = [call.args[0] for call in batch_task.delay.call_args_list]
+        self.assertEqual([len(batch) for batch in enqueued], [2, 1])
+
+    @override_settings(FAN_OUT_CLUSTERS_PER_TASK={"default": 10, "spawn_test": 1})
+    def test_clusters_per_task_setting(self):
+        self.assertEqual(fan_out.get_clusters_per_task("spawn_test"), 1)
+        self.assertEqual(fan_out.get_clusters_per_task("spawn_other"), 10)
+
+    def test_spawner_skips_clusters_without_work(self):
+        with patch(
+            "core.common.tasks.bill.check_overdue_bills_for_clusters.delay"
+        ) as delay:
+            summary = spawn_check_overdue_bills()
+
+        self.assertEqual(summary["clusters_with_work"], 3)
+        enqueued = {cid for call in delay.call_args_list for cid in call.args[0]}
+        self.assertEqual(enqueued, {str(c.id) for c in self.clusters[:3]})
@@ -0,0 +1,214 @@
+"""
+Tests for the idempotency key store and the idempotent decorator.
+"""
+
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.common.decorators import idempotent
+from core.common.exceptions import ResourceConflictException, UnprocessedEntityException
+from core.common.includes import idempotency
+from core.common.models import BillCategory, IdempotencyKey, Transaction, TransactionType
+from core.common.views.payment_webhooks import paystack_webhook
+from members.tests.test_payment_utils import create_bill, create_wallet
+from members.tests.utils import authenticate_user, create_cluster
+
+
+class IdempotencyStoreTests(TestCase):
+    """Tests for claiming keys and storing responses."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_completed_key_is_served_from_cache(self):
+        record = idempotency.begin("test", "key-1", "abc")
+        idempotency.complete(record, 201, {"data": {"id": 1}})
+
+        with self.assertNumQueries(0):
+            replay = idempotency.begin("test", "key-1", "abc")
+
+        self.assertTrue(replay.is_completed)
+        self.assertEqual(replay.response_body, {"data": {"id": 1}})
+
+    def test_completed_key_is_served_from_table_on_cache_miss(self):
+        record = idempotency.begin("test", "key-1", "abc")
+        idempotency.complete(record, 200, {"data": "ok"})
+        cache.clear()
+
+        replay = idempotency.begin("test", "key-1", "abc")
+
+        self.assertEqual(replay.response_status, 200)
+
+    def test_key_reused_with_different_request_is_rejected(self):
+        record = idempotency.begin("test", "key-1", "abc")
+        idempotency.complete(record, 200, {})
+
+        with self.assertRaises(UnprocessedEntityException):
+            idempotency.begin("test", "key-1", "def")
+
+    def test_key_in_progress_is_a_conflict(self):
+        idempotency.begin("test", "key-1", "abc")
+
+        with self.assertRaises(ResourceConflictException):
+            idempotency.begin("test", "key-1", "abc")
+
+    def test_released_key_can_be_retried(self):
+        record = idempotency.begin("test", "key-1", "abc")
+        idempotency.release(record)
+
+        retry = idempotency.begin("test", "key-1", "abc")
+
+        self.assertFalse(retry.is_completed)
+
+    def test_webhook_event_key(self):
+        payload = json.dumps({"event": "charge.success", "data": {"id": 42}})
+
+        self.assertEqual(idempotency.get_webhook_event_key(payload), "charge.success:42")
+        self.assertIsNone(idempotency.get_webhook_event_key("not json"))
+
+
+class IdempotentDecoratorTests(TestCase):
+    """Tests for replaying stored responses from decorated views."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.handler = MagicMock(return_value={"paid": True})
+
+        @api_view(["POST"])
+        @permission_classes([AllowAny])
+        @idempotent("test.pay")
+        def pay(request):
+            return Response(self.handler(), status=status.HTTP_201_CREATED)
+
+        self.view = pay
+
+    def _post(self, key="key-1", data=None):
+        return self.view(
+            self.factory.post(
+                "/pay/", data or {"amount": "100"}, format="json", HTTP_IDEMPOTENCY_KEY=key
+            )
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self._post()
+        second = self._post()
+
+        self.assertEqual(self.handler.call_count, 1)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+
+    def test_different_body_with_same_key_is_rejected(self):
+        self._post()
+        response = self._post(data={"amount": "200"})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(self.handler.call_count, 1)
+
+    def test_failed_request_releases_key(self):
+        self.handler.side_effect = [ValueError("boom"), {"paid": True}]
+
+        with self.assertRaises(ValueError):
+            self._post()
+        response = self._post()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_request_without_key_is_not_recorded(self):
+        self.view(self.factory.post("/pay/", {"amount": "100"}, format="json"))
+        self.view(self.factory.post("/pay/", {"amount": "100"}, format="json"))
+
+        self.assertEqual(self.handler.call_count, 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class WebhookReplayTests(TestCase):
+    """Tests for ignoring duplicate provider webhook deliveries."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.payload = json.dumps(
+            {"event": "charge.success", "data": {"id": 1001, "reference": "TXN-1"}}
+        )
+
+    @patch("core.common.views.payment_webhooks.webhooks.ingest")
+    def test_duplicate_delivery_is_processed_once(self, ingest):
+        ingest.return_value = (MagicMock(event_id="charge.success:1001"), True)
+
+        responses = [
+            paystack_webhook(
+                self.factory.post(
+                    "/webhooks/paystack/",
+                    self.payload,
+                    content_type="application/json",
+                    HTTP_X_PAYSTACK_SIGNATURE="signature",
+                )
+            )
+            for _ in range(3)
+        ]
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+        self.assertEqual(ingest.call_count, 1)
+        self.assertEqual(responses[2]["Idempotent-Replayed"], "true")
+
+
+class BillPaymentIdempotencyTests(APITestCase):
+    """Tests for retried bill payments through the members API."""
+
+    def setUp(self):
+        cache.clear()
+        self.cluster, self.user = create_cluster()
+        self.wallet = create_wallet(
+            user=self.user, cluster=self.cluster, balance=Decimal("10000.00")
+        )
+        self.bill = create_bill(
+            cluster=self.cluster, user=self.user, category=BillCategory.USER_MANAGED
+        )
+        self.bill.acknowledged_by.add(self.user)
+        self.url = reverse("members:bills-pay_bill", kwargs={"pk": self.bill.id})
+        authenticate_user(self.client, self.user)
+
+    def _pay(self, amount, key="pay-bill-1"):
+        return self.client.post(
+            self.url,
+            {"bill_id": str(self.bill.id), "amount": amount},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def _payments(self):
+        return Transaction.objects.filter(
+            wallet=self.wallet, type=TransactionType.BILL_PAYMENT
+        )
+
+    def test_retried_payment_is_replayed(self):
+        first = self._pay("1000.00")
+        retry = self._pay("1000.00")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(self._payments().count(), 1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("9000.00"))
+
+    def test_key_reused_for_another_payment_is_rejected(self):
+        self._pay("1000.00")
+        response = self._pay("2000.00")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(self._payments().count(), 1)
@@ -0,0 +1,114 @@
+"""
+Tests for the set-based overdue bill sweep.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.common.includes import bills
+from core.common.models import Bill, BillCategory, TransactionStatus, TransactionType
+from members.tests.test_payment_utils import create_bill, create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+class OverdueBillSweepTests(TestCase):
+    """Tests for marking overdue bills in bulk and notifying in batches."""
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.past = timezone.now() - timedelta(days=2)
+
+    def _create_bill(self, due_date=None, **kwargs):
+        return create_bill(
+            cluster=self.cluster,
+            due_date=due_date or self.past,
+            created_by=str(self.admin.id),
+            **kwargs,
+        )
+
+    def _pay(self, bill, status=TransactionStatus.COMPLETED):
+        create_transaction(
+            wallet=create_wallet(user=self.user, cluster=self.cluster),
+            transaction_type=TransactionType.BILL_PAYMENT,
+            amount=bill.amount,
+            status=status,
+            bill=bill,
+        )
+
+    def test_marks_unpaid_past_due_bills(self):
+        overdue = [self._create_bill(title=f"Levy {i}") for i in range(3)]
+        pending = self._create_bill(title="Pending")
+        self._pay(pending, status=TransactionStatus.PENDING)
+        overdue.append(pending)
+        paid = self._create_bill(title="Paid")
+        self._pay(paid)
+        user_paid = self._create_bill(
+            title="Meter", user=self.user, category=BillCategory.USER_MANAGED
+        )
+        Bill.objects.filter(id=user_paid.id).update(paid_amount=user_paid.amount)
+        future = self._create_bill(due_date=timezone.now() + timedelta(days=1))
+
+        with patch.object(bills, "_queue_overdue_notifications"):
+            with self.captureOnCommitCallbacks(execute=True):
+                count = bills.check_and_update_overdue(self.cluster)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(
+            set(Bill.objects.filter(overdue_at__isnull=False).values_list("id", flat=True)),
+            {bill.id for bill in overdue},
+        )
+        for bill in (paid, user_paid, future):
+            bill.refresh_from_db()
+            self.assertIsNone(bill.overdue_at)
+
+    def test_sweep_is_constant_queries_and_idempotent(self):
+        for i in range(20):
+            self._create_bill(title=f"Levy {i}")
+
+        with patch.object(bills, "_queue_overdue_notifications") as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertNumQueries(4):
+                    count = bills.check_and_update_overdue()
+
+            self.assertEqual(count, 20)
+            self.assertEqual(len(queue.call_args.args[0]), 20)
+
+            # Bills already marked are not swept or notified again
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertEqual(bills.check_and_update_overdue(), 0)
+            self.assertEqual(callbacks, [])
+
+    def test_notifications_are_chunked(self):
+        for i in range(5):
+            self._create_bill(title=f"Levy {i}")
+
+        with patch.object(bills, "OVERDUE_NOTIFICATION_BATCH_SIZE", 2), patch(
+            "core.common.tasks.bill.send_overdue_bill_notifications.delay"
+        ) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                bills.check_and_update_overdue(self.cluster)
+
+        self.assertEqual([len(call.args[0]) for call in delay.call_args_list], [2, 2, 1])
+
+    @patch("core.common.includes.bills.notifications.send")
+    def test_send_overdue_notifications_batches_recipient_lookups(self, send):
+        cluster_bills = [self._create_bill(title=f"Levy {i}") for i in range(3)]
+        user_bills = [
+            self._create_bill(
+                title=f"Meter {i}", user=self.user, category=BillCategory.USER_MANAGED
+            )
+            for i in range(3)
+        ]
+        bill_ids = [str(bill.id) for bill in cluster_bills + user_bills]
+
+        # Bills, owners and cluster members: one query each
+        with self.assertNumQueries(3):
+            sent = bills.send_overdue_notifications(bill_ids)
+
+        self.assertEqual(sent, 6)
+        for call in send.call_args_list:
+            self.assertTrue(call.kwargs["recipients"])
@@ -0,0 +1,83 @@
+"""
+Tests for the cached payment dashboard.
+"""
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.common.includes import payment_dashboard
+from core.common.models import TransactionType
+from management.views_payment import PaymentManagementViewSet
+from members.tests.test_payment_utils import create_bill, create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+@patch("core.common.tasks.payment.refresh_payment_dashboard.delay")
+class PaymentDashboardCacheTests(TestCase):
+    """Tests for dashboard snapshots, their invalidation and the ETag response."""
+
+    def setUp(self):
+        cache.clear()
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster)
+        create_bill(cluster=self.cluster, user=self.user, created_by=str(self.admin.id))
+
+    def _get(self, **headers):
+        request = APIRequestFactory().get("/dashboard/", **headers)
+        request.cluster_context = self.cluster
+        force_authenticate(request, user=self.admin)
+        view = PaymentManagementViewSet.as_view({"get": "dashboard"}, permission_classes=[])
+        return view(request)
+
+    def test_repeated_load_reads_the_snapshot(self, delay):
+        data, etag = payment_dashboard.get_dashboard(self.cluster)
+
+        with self.assertNumQueries(0):
+            cached_data, cached_etag = payment_dashboard.get_dashboard(self.cluster)
+
+        self.assertEqual(cached_data, data)
+        self.assertEqual(cached_etag, etag)
+        self.assertEqual(data["statistics"]["total_bills"], 1)
+        delay.assert_not_called()
+
+    def test_change_serves_stale_snapshot_and_queues_one_refresh(self, delay):
+        payment_dashboard.get_dashboard(self.cluster)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_transaction(
+                wallet=self.wallet,
+                transaction_type=TransactionType.DEPOSIT,
+                amount=Decimal("100.00"),
+            )
+        data, _ = payment_dashboard.get_dashboard(self.cluster)
+        payment_dashboard.get_dashboard(self.cluster)
+
+        self.assertEqual(data["statistics"]["total_transactions"], 0)
+        delay.assert_called_once_with(str(self.cluster.id))
+
+        payment_dashboard.refresh_snapshot(self.cluster)
+        data, _ = payment_dashboard.get_dashboard(self.cluster)
+        self.assertEqual(data["statistics"]["total_transactions"], 1)
+
+    def test_old_snapshot_is_refreshed(self, delay):
+        payment_dashboard.get_dashboard(self.cluster)
+
+        with override_settings(PAYMENT_DASHBOARD_FRESH_SECONDS=-1):
+            payment_dashboard.get_dashboard(self.cluster)
+
+        delay.assert_called_once_with(str(self.cluster.id))
+
+    def test_matching_etag_returns_not_modified(self, delay):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["statistics"]["total_bills"], 1)
+
+        response = self._get(HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(response.data)
@@ -0,0 +1,170 @@
+"""
+Tests for streaming transaction and bill exports.
+"""
+
+import csv
+import io
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.common.includes import payment_exports
+from core.common.models import Bill, BillCategory, Transaction, TransactionType
+from core.data_exchange.includes.delta_export import WATERMARK_HEADER, Watermark
+from management.views_payment import PaymentManagementViewSet
+from members.tests.test_payment_utils import create_bill, create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+class PaymentExportTests(TestCase):
+    """Tests for the CSV and XLSX export responses."""
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster)
+        for amount in ("100.00", "250.50", "999.99"):
+            create_transaction(
+                wallet=self.wallet,
+                transaction_type=TransactionType.DEPOSIT,
+                amount=Decimal(amount),
+                description='Deposit, with "quotes"',
+            )
+        create_bill(cluster=self.cluster, user=self.user, created_by=str(self.admin.id))
+
+    def _read_csv(self, response):
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_transactions_csv_is_streamed(self):
+        response = payment_exports.export_transactions(
+            Transaction.objects.filter(cluster=self.cluster)
+        )
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = self._read_csv(response)
+        self.assertEqual(
+            rows[0], [header for header, _ in payment_exports.TRANSACTION_EXPORT_COLUMNS]
+        )
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(row[4] for row in rows[1:]), ["100.00", "250.50", "999.99"])
+        self.assertEqual(rows[1][7], 'Deposit, with "quotes"')
+        self.assertEqual(rows[1][8], str(self.user.id))
+
+    def test_header_is_sent_before_rows_are_read(self):
+        response = payment_exports.export_transactions(Transaction.objects.all())
+
+        with self.assertNumQueries(0):
+            first_chunk = next(iter(response.streaming_content))
+
+        self.assertTrue(first_chunk.decode("utf-8-sig").startswith("Transaction ID,"))
+
+    def test_csv_reads_rows_in_one_projected_query(self):
+        response = payment_exports.export_bills(Bill.objects.filter(cluster=self.cluster))
+
+        with self.assertNumQueries(1):
+            rows = self._read_csv(response)
+
+        self.assertEqual(len(rows), 2)
+
+    def test_bills_xlsx(self):
+        response = payment_exports.export_bills(
+            Bill.objects.filter(cluster=self.cluster), payment_exports.XLSX
+        )
+
+        self.assertEqual(response["Content-Type"], payment_exports.XLSX_CONTENT_TYPE)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual(
+            list(rows[0]), [header for header, _ in payment_exports.BILL_EXPORT_COLUMNS]
+        )
+        self.assertEqual(len(rows), 2)
+
+    @override_settings(DATA_EXPORT_WATERMARK_LAG=0)
+    def test_delta_export_returns_changed_rows(self):
+        queryset = Transaction.objects.filter(cluster=self.cluster)
+        response = payment_exports.export_transactions(queryset, delta=True)
+        self.assertEqual(len(self._read_csv(response)), 4)
+        since = Watermark.from_token(response[WATERMARK_HEADER])
+
+        changed = queryset.order_by("created_at").first()
+        changed.description = "Refunded"
+        changed.save(update_fields=["description"])
+        response = payment_exports.export_transactions(queryset, delta=True, since=since)
+
+        rows = self._read_csv(response)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], changed.transaction_id)
+        self.assertEqual(
+            Watermark.from_token(response[WATERMARK_HEADER]).id, str(changed.id)
+        )
+
+
+class PaymentExportViewTests(TestCase):
+    """Tests for the export actions of the payment management views."""
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.other_user = create_user(email="neighbour@test.com", cluster=self.cluster)
+        for user in (self.user, self.other_user):
+            create_transaction(
+                wallet=create_wallet(user=user, cluster=self.cluster),
+                transaction_type=TransactionType.DEPOSIT,
+                amount=Decimal("100.00"),
+            )
+            create_bill(
+                cluster=self.cluster,
+                user=user,
+                category=BillCategory.USER_MANAGED,
+                created_by=str(self.admin.id),
+            )
+
+    def _export(self, records, **params):
+        request = APIRequestFactory().get(f"/payments/export/{records}/", params)
+        request.cluster_context = self.cluster
+        force_authenticate(request, user=self.admin)
+        view = PaymentManagementViewSet.as_view({"get": f"export_{records}"})
+        return view(request)
+
+    def _read_csv(self, response):
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(io.StringIO(content)))[1:]
+
+    def test_export_transactions(self):
+        response = self._export("transactions", user_id=str(self.user.id), to="2999-12-31")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = self._read_csv(response)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][8], str(self.user.id))
+
+        response = self._export("transactions", **{"from": "2999-01-01"})
+        self.assertEqual(self._read_csv(response), [])
+
+    def test_export_bills(self):
+        response = self._export(
+            "bills", user_id=str(self.user.id), file_format=payment_exports.XLSX
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(list(workbook.active.values)), 2)
+
+    def test_export_with_invalid_filters_is_rejected(self):
+        for records, params in (
+            ("transactions", {"from": "yesterday"}),
+            ("transactions", {"to": "2024-02-30"}),
+            ("transactions", {"user_id": "1"}),
+            ("bills", {"user_id": "not-a-uuid"}),
+            ("bills", {"file_format": "pdf"}),
+        ):
+            with self.subTest(records=records, params=params):
+                response = self._export(records, **params)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,148 @@
+"""
+Tests for reconciling stale pending transactions against payment providers.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core.common.includes import reconciliation
+from core.common.includes.third_party_services.http import ProviderUnavailableError
+from core.common.models import (
+    PaymentProvider,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from members.tests.test_payment_utils import create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+PROVIDER_RESULTS = {
+    "paid": {"success": True, "status": "success", "amount": Decimal("1000.00")},
+    "declined": {"success": False, "status": "failed", "gateway_response": "Declined"},
+    "waiting": {"success": False, "status": "abandoned"},
+}
+
+
+def verify_with_provider(txn, provider):
+    outcome = txn.description
+    if outcome == "unavailable":
+        raise ProviderUnavailableError("paystack circuit is open")
+    return PROVIDER_RESULTS[outcome]
+
+
+@patch(
+    "core.common.includes.reconciliation.payments.verify_with_provider",
+    side_effect=verify_with_provider,
+)
+class PaymentReconciliationTests(TestCase):
+    """Tests for selecting, verifying and settling stale pending transactions."""
+
+    def setUp(self):
+        cache.clear()
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster, balance=Decimal("0"))
+        self.now = timezone.now()
+
+    def _pending(self, outcome, age=timedelta(hours=1), provider=PaymentProvider.PAYSTACK):
+        txn = create_transaction(
+            wallet=self.wallet,
+            transaction_type=TransactionType.DEPOSIT,
+            amount=Decimal("1000.00"),
+            status=TransactionStatus.PENDING,
+            description=outcome,
+        )
+        Transaction.objects.filter(pk=txn.pk).update(
+            provider=provider, created_at=self.now - age
+        )
+        return txn
+
+    def _status(self, txn):
+        txn.refresh_from_db()
+        return txn.status
+
+    def test_results_are_applied(self, verify):
+        paid = self._pending("paid")
+        declined = self._pending("declined")
+        waiting = self._pending("waiting")
+        expired = self._pending("waiting", age=timedelta(days=3))
+        recent = self._pending("paid", age=timedelta(minutes=1))
+
+        metrics = reconciliation.reconcile(now=self.now)
+
+        self.assertEqual(metrics["selected"], 4)
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["failed"], 1)
+        self.assertEqual(metrics["expired"], 1)
+        self.assertEqual(metrics["still_pending"], 1)
+        self.assertEqual(self._status(paid), TransactionStatus.COMPLETED)
+        self.assertEqual(self._status(declined), TransactionStatus.FAILED)
+        self.assertEqual(declined.failure_reason, "Declined")
+        self.assertEqual(self._status(waiting), TransactionStatus.PENDING)
+        self.assertEqual(self._status(expired), TransactionStatus.FAILED)
+        self.assertEqual(self._status(recent), TransactionStatus.PENDING)
+        self.assertEqual(reconciliation.get_last_run_metrics()["completed"], 1)
+
+    def test_unavailable_provider_leaves_transactions_pending(self, verify):
+        old = self._pending("unavailable", age=timedelta(days=3))
+
+        metrics = reconciliation.reconcile(now=self.now)
+
+        self.assertEqual(metrics["errors"], 1)
+        self.assertEqual(self._status(old), TransactionStatus.PENDING)
+
+    @patch("core.common.includes.reconciliation.http.get_breaker")
+    def test_provider_with_open_breaker_is_skipped(self, get_breaker, verify):
+        get_breaker.side_effect = lambda name: MagicMock(
+            is_open=name == PaymentProvider.FLUTTERWAVE
+        )
+        self._pending("paid")
+        skipped = self._pending("paid", provider=PaymentProvider.FLUTTERWAVE)
+
+        metrics = reconciliation.reconcile(now=self.now)
+
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["skipped"], 1)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(self._status(skipped), TransactionStatus.PENDING)
+
+    def _frozen_withdrawal(self):
+        self.wallet.unfreeze_amount(Decimal("1000.00"))
+        self.wallet.freeze_amount(Decimal("1000.00"))
+        return create_transaction(
+            wallet=self.wallet,
+            transaction_type=TransactionType.WITHDRAWAL,
+            amount=Decimal("1000.00"),
+            status=TransactionStatus.PENDING,
+        )
+
+    def test_failed_withdrawal_releases_frozen_amount(self, verify):
+        withdrawal = self._frozen_withdrawal()
+
+        reconciliation._fail_transactions({withdrawal: "Expired"}, self.now)
+
+        self.assertEqual(self._status(withdrawal), TransactionStatus.FAILED)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.available_balance, Decimal("1000.00"))
+
+    def test_withdrawal_settled_during_reconciliation_is_not_failed(self, verify):
+        withdrawal = self._frozen_withdrawal()
+        # A webhook completes the withdrawal after reconciliation read it
+        Transaction.objects.filter(pk=withdrawal.pk).update(status=TransactionStatus.COMPLETED)
+
+        reconciliation._fail_transactions({withdrawal: "Expired"}, self.now)
+
+        self.assertEqual(self._status(withdrawal), TransactionStatus.COMPLETED)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.available_balance, Decimal("0.00"))
+
+    def test_overlapping_runs_are_skipped(self, verify):
+        cache.add(reconciliation.LOCK_CACHE_KEY, True)
+
+        self.assertEqual(reconciliation.reconcile(now=self.now), {"skipped": True})
+        verify.assert_not_called()
@@ -0,0 +1,110 @@
+"""
+Tests for the pooled provider HTTP client, run against the local stub server.
+"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.common.includes.third_party_services import PaymentProviderFactory
+from core.common.includes.third_party_services.http import (
+    ProviderHTTPClient,
+    ProviderUnavailableError,
+)
+from core.common.includes.third_party_services.interfaces.payments import PaymentProviderError
+from core.common.models import PaymentProvider
+from core.common.tests.stub_server import StubProviderServer
+
+
+@patch("core.common.includes.third_party_services.http.time.sleep")
+class ProviderHTTPClientTests(SimpleTestCase):
+    """Tests for connection reuse, retries and the circuit breaker."""
+
+    def setUp(self):
+        self.server = StubProviderServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = ProviderHTTPClient(
+            "stub", self.server.base_url, breaker_failure_threshold=3
+        )
+        self.addCleanup(self.client.close)
+
+    def test_requests_reuse_one_connection(self, sleep):
+        for _ in range(5):
+            self.client.request("GET", "/transaction/verify/ref")
+
+        self.assertEqual(self.server.request_count, 5)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_idempotent_calls_are_retried(self, sleep):
+        self.server.fail(2)
+
+        response = self.client.request("GET", "/transaction/verify/ref")
+
+        self.assertTrue(response["status"])
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_non_idempotent_calls_are_not_retried(self, sleep):
+        self.server.fail(1)
+
+        with self.assertRaises(PaymentProviderError):
+            self.client.request("POST", "/transaction/initialize", json={})
+
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_client_errors_are_not_retried(self, sleep):
+        with self.assertRaises(PaymentProviderError):
+            self.client.request("GET", "/unknown")
+
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.client.breaker.failures, 0)
+
+    def test_breaker_opens_after_consecutive_failures(self, sleep):
+        self.server.fail(10)
+
+        with self.assertRaises(PaymentProviderError):
+            self.client.request("GET", "/bank")
+        self.assertTrue(self.client.breaker.is_open)
+
+        with self.assertRaises(ProviderUnavailableError):
+            self.client.request("GET", "/bank")
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_breaker_closes_after_successful_trial(self, sleep):
+        self.server.fail(3)
+        with self.assertRaises(PaymentProviderError):
+            self.client.request("GET", "/bank")
+
+        self.client.breaker.opened_at -= self.client.breaker.reset_timeout
+        self.client.request("GET", "/bank")
+
+        self.assertEqual(self.client.breaker.state, self.client.breaker.CLOSED)
+
+
+class PaymentProviderFactoryTests(SimpleTestCase):
+    """Tests for cached provider instances using the shared client."""
+
+    def setUp(self):
+        self.server = StubProviderServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            PAYSTACK_SECRET_KEY="sk_test", PAYSTACK_BASE_URL=self.server.base_url
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        PaymentProviderFactory.reset()
+        self.addCleanup(PaymentProviderFactory.reset)
+
+    def test_provider_is_a_cached_singleton(self):
+        provider = PaymentProviderFactory.get_provider(PaymentProvider.PAYSTACK)
+
+        self.assertIs(PaymentProviderFactory.get_provider(PaymentProvider.PAYSTACK), provider)
+
+    def test_provider_calls_go_through_the_pooled_client(self):
+        provider = PaymentProviderFactory.get_provider(PaymentProvider.PAYSTACK)
+
+        for _ in range(3):
+            result = provider.verify_payment("stub-reference")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.server.connection_count, 1)
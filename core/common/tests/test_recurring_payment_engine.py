@@ -0,0 +1,188 @@
+"""
+Tests for the batched recurring payment engine.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from threading import Thread
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.common.includes import recurring_payments
+from core.common.models import RecurringPaymentStatus, Transaction, TransactionType
+from members.tests.test_payment_utils import create_recurring_payment, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+class RecurringPaymentEngineTests(TestCase):
+    """Tests for draining due recurring payments in locked batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="payer@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(
+            user=self.user, cluster=self.cluster, balance=Decimal("5000.00")
+        )
+        self.yesterday = timezone.now() - timedelta(days=1)
+
+    def test_processes_due_payments_across_batches(self):
+        for i in range(5):
+            create_recurring_payment(
+                wallet=self.wallet,
+                title=f"Dues {i}",
+                amount=Decimal("100.00"),
+                start_date=self.yesterday,
+            )
+
+        results = recurring_payments.drain_due_payments(batch_size=2)
+
+        self.assertEqual(results["processed"], 5)
+        self.assertEqual(results["failed"], 0)
+        self.assertEqual(results["batches"], 3)
+        self.assertGreaterEqual(results["max_latency_ms"], results["avg_latency_ms"])
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("4500.00"))
+        self.assertEqual(
+            Transaction.objects.filter(
+                wallet=self.wallet, type=TransactionType.PAYMENT
+            ).count(),
+            5,
+        )
+
+    def test_payments_sharing_a_wallet_see_each_others_debits(self):
+        for i in range(3):
+            create_recurring_payment(
+                wallet=self.wallet,
+                title=f"Rent {i}",
+                amount=Decimal("2000.00"),
+                start_date=self.yesterday,
+            )
+
+        results = recurring_payments.drain_due_payments()
+
+        self.assertEqual(results["processed"], 2)
+        self.assertEqual(results["failed"], 1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("1000.00"))
+
+    def test_payment_is_charged_once_per_run(self):
+        payment = create_recurring_payment(
+            wallet=self.wallet,
+            amount=Decimal("100.00"),
+            start_date=timezone.now() - timedelta(days=10),
+            frequency="daily",
+        )
+
+        results = recurring_payments.drain_due_payments()
+
+        self.assertEqual(results["processed"], 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.total_payments, 1)
+
+    def test_payment_failed_in_a_run_is_not_retried_by_another_worker(self):
+        payment = create_recurring_payment(
+            wallet=self.wallet, amount=Decimal("9000.00"), start_date=self.yesterday
+        )
+        run_started_at = timezone.now()
+
+        first = recurring_payments.drain_due_payments(
+            run_id="worker-0", run_started_at=run_started_at
+        )
+        second = recurring_payments.drain_due_payments(
+            run_id="worker-1", run_started_at=run_started_at
+        )
+        next_run = recurring_payments.drain_due_payments(run_id="next-run")
+
+        self.assertEqual(first["failed"], 1)
+        self.assertEqual(second["processed"] + second["failed"], 0)
+        self.assertEqual(next_run["failed"], 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.failed_attempts, 2)
+        self.assertGreaterEqual(payment.last_failed_at, run_started_at)
+
+    def test_future_and_inactive_payments_are_not_claimed(self):
+        create_recurring_payment(
+            wallet=self.wallet, start_date=timezone.now() + timedelta(days=1)
+        )
+        create_recurring_payment(
+            wallet=self.wallet,
+            start_date=self.yesterday,
+            status=RecurringPaymentStatus.PAUSED,
+        )
+
+        results = recurring_payments.drain_due_payments()
+
+        self.assertEqual(results["processed"] + results["failed"], 0)
+
+    def test_run_resumes_from_checkpoint(self):
+        for i in range(4):
+            create_recurring_payment(
+                wallet=self.wallet,
+                title=f"Levy {i}",
+                amount=Decimal("100.00"),
+                start_date=self.yesterday,
+            )
+
+        first = recurring_payments.drain_due_payments(
+            run_id="resumable", batch_size=2, max_batches=1
+        )
+        self.assertEqual(first["processed"], 2)
+        checkpoint = recurring_payments.get_run_checkpoint("resumable")
+        self.assertIsNotNone(checkpoint["cursor"])
+
+        resumed = recurring_payments.drain_due_payments(run_id="resumable", batch_size=2)
+
+        self.assertEqual(resumed["processed"], 4)
+        self.assertEqual(resumed["batches"], 2)
+
+    def test_cluster_filter(self):
+        other_cluster, _ = create_cluster(name="Other Estate")
+        other_user = create_user(
+            email="other@test.com",
+            phone_number="+2348000000002",
+            cluster=other_cluster,
+        )
+        other_wallet = create_wallet(user=other_user, cluster=other_cluster)
+        create_recurring_payment(wallet=self.wallet, start_date=self.yesterday)
+        create_recurring_payment(wallet=other_wallet, start_date=self.yesterday)
+
+        results = recurring_payments.process_due_payments(self.cluster)
+
+        self.assertEqual(results, {"processed": 1, "failed": 0, "paused": 0})
+
+
+class RecurringPaymentClaimLockingTests(TransactionTestCase):
+    """Tests that concurrent claims skip rows locked by another worker."""
+
+    def test_locked_payments_are_skipped(self):
+        cluster, _ = create_cluster()
+        user = create_user(email="locker@test.com", cluster=cluster)
+        wallet = create_wallet(user=user, cluster=cluster)
+        payment = create_recurring_payment(
+            wallet=wallet, start_date=timezone.now() - timedelta(days=1)
+        )
+        now = timezone.now()
+
+        with transaction.atomic():
+            claimed = recurring_payments.claim_due_payments(now)
+            self.assertEqual([p.id for p in claimed], [payment.id])
+
+            # A second worker on its own connection must skip the locked row
+            seen = []
+
+            def claim_from_other_connection():
+                try:
+                    with transaction.atomic():
+                        seen.extend(recurring_payments.claim_due_payments(now))
+                finally:
+                    connections.close_all()
+
+            worker = Thread(target=claim_from_other_connection)
+            worker.start()
+            worker.join()
+
+            self.assertEqual(seen, [])
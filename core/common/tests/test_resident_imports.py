@@ -0,0 +1,160 @@
+"""
+Tests for bulk persistence of imported residents.
+"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from accounts.models import AccountUser, PreviousPasswords
+from accounts.serializers import ResidentImportExportSerializer
+from core.common.includes import resident_imports
+from members.tests.utils import create_cluster, create_user
+
+
+@patch("core.common.includes.notifications.send")
+class ResidentImportPersistenceTests(TestCase):
+    """Tests for upserting imported residents and linking them to the cluster."""
+
+    # Upsert, ID lookup, cluster membership insert, password history insert
+    UPSERT_QUERIES = 4
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.existing = create_user(email="existing@test.com", name="Old Name", cluster=self.cluster)
+
+    def _build_residents(self, count):
+        residents = [
+            AccountUser(
+                email_address=f"resident{number}@test.com",
+                name=f"Resident {number}",
+                phone_number="+2348000000002",
+                primary_cluster_id=self.cluster.id,
+            )
+            for number in range(count)
+        ]
+        for resident in residents:
+            resident.prepare_for_import()
+        return residents
+
+    def test_upsert_uses_same_statements_for_any_number_of_residents(self, send):
+        for count in (5, 50):
+            residents = self._build_residents(count)
+            with self.assertNumQueries(self.UPSERT_QUERIES + 2):  # Savepoint and its release
+                imported = resident_imports.persist_residents(
+                    self.cluster.id, residents, update_fields=["name"]
+                )
+            self.assertEqual(len(imported), count)
+
+        self.assertEqual(AccountUser.objects.filter(clusters=self.cluster).count(), 52)
+        self.assertEqual(
+            PreviousPasswords.objects.filter(user__email_address__startswith="resident").count(),
+            50,
+        )
+
+    def test_existing_resident_is_updated(self, send):
+        resident = AccountUser(
+            email_address=self.existing.email_address,
+            name="New Name",
+            phone_number="+2348000000009",
+        )
+
+        imported = resident_imports.persist_residents(
+            self.cluster.id, [resident], update_fields=["name", "phone_number"]
+        )
+
+        self.existing.refresh_from_db()
+        self.assertEqual(imported[0].pk, self.existing.pk)
+        self.assertEqual(self.existing.name, "New Name")
+        self.assertEqual(self.existing.phone_number, "+2348000000009")
+        self.assertTrue(self.existing.has_usable_password())
+
+    def test_existing_resident_is_skipped_without_update_fields(self, send):
+        residents = self._build_residents(1) + [
+            AccountUser(email_address=self.existing.email_address, name="New Name")
+        ]
+
+        imported = resident_imports.persist_residents(self.cluster.id, residents)
+
+        self.assertEqual([resident.email_address for resident in imported], ["resident0@test.com"])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, "Old Name")
+
+    def test_welcome_notifications_are_sent_in_batches_on_commit(self, send):
+        residents = resident_imports.persist_residents(self.cluster.id, self._build_residents(5))
+
+        with patch.object(resident_imports, "NOTIFICATION_BATCH_SIZE", 2):
+            with self.captureOnCommitCallbacks() as callbacks:
+                resident_imports.queue_welcome_notifications(self.cluster.id, residents)
+            send.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(
+            [len(call.kwargs["recipients"]) for call in send.call_args_list], [2, 2, 1]
+        )
+
+    def test_resident_import_serializer(self, send):
+        other_cluster, other_admin = create_cluster(name="Other Estate")
+        AccountUser.objects.filter(pk=self.existing.pk).update(owner=self.admin)
+        create_user(email="taken@test.com", cluster=other_cluster)
+        rows = [
+            {"name": "New Resident", "email_address": "new@test.com", "phone_number": "08012345678"},
+            {"name": "Renamed", "email_address": "existing@test.com", "phone_number": "08012345679"},
+            {"name": "Taken", "email_address": "taken@test.com", "phone_number": "08012345670"},
+        ]
+        serializer = ResidentImportExportSerializer(
+            data={"data": rows},
+            import_data={"has_headers": True, "should_upsert": True, "default_dialing_code": "+234"},
+            context={
+                "cluster_id": self.cluster.id,
+                "owner_id": self.admin.id,
+                "cluster_staff_id": self.admin.id,
+            },
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            result = serializer.save()
+
+        self.assertEqual(len(result.object_ids), 2)
+        self.assertEqual([error.row_number for error in result.errors], [4])
+        self.assertEqual(result.total_skipped, 1)
+        new_resident = AccountUser.objects.get(email_address="new@test.com")
+        self.assertEqual(new_resident.primary_cluster, self.cluster)
+        self.assertFalse(new_resident.has_usable_password())
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, "Renamed")
+        self.assertEqual(send.call_args.kwargs["recipients"], [new_resident])
+
+    def test_resident_import_serializer_imports_validated_rows(self, send):
+        import_data = {"has_headers": True, "should_upsert": True, "default_dialing_code": "+234"}
+        context = {
+            "cluster_id": self.cluster.id,
+            "owner_id": self.admin.id,
+            "cluster_staff_id": self.admin.id,
+        }
+        rows = [
+            {"name": "New Resident", "email_address": "New@Test.com", "phone_number": "08012345678"},
+        ]
+        dry_run = ResidentImportExportSerializer(
+            data={"data": rows}, import_data=import_data, context=context
+        )
+        self.assertTrue(dry_run.is_valid(), dry_run.errors)
+
+        serializer = ResidentImportExportSerializer(
+            data={"data": []},
+            import_data=import_data,
+            validated_rows=dry_run.get_validated_rows(),
+            context=context,
+        )
+        with patch.object(serializer, "_validate_columns") as validate_columns:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            result = serializer.save()
+
+        validate_columns.assert_not_called()
+        self.assertEqual(len(result.object_ids), 1)
+        resident = AccountUser.objects.get(pk=result.object_ids[0])
+        self.assertEqual(resident.email_address, "New@test.com")
+        self.assertEqual(resident.primary_cluster, self.cluster)
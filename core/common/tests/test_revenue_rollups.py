@@ -0,0 +1,161 @@
+"""
+Tests for the precomputed cluster revenue rollups.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.common.includes import cluster_wallet, revenue_rollups
+from core.common.models import (
+    ClusterRevenueRollup,
+    RollupGranularity,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from members.tests.test_payment_utils import create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+def refresh_rollup(cluster_id, occurred_at):
+    revenue_rollups.refresh_rollup(cluster_id, datetime.fromisoformat(occurred_at))
+
+
+@patch(
+    "core.common.tasks.payment.refresh_cluster_revenue_rollup.delay",
+    side_effect=refresh_rollup,
+)
+class ClusterRevenueRollupTests(TestCase):
+    """Tests for maintaining and reading cluster revenue rollups."""
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster)
+        self.cluster_wallet = create_wallet(user=self.cluster, cluster=self.cluster)
+
+    def _create_transaction(self, wallet, transaction_type, amount, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_transaction(
+                wallet=wallet,
+                transaction_type=transaction_type,
+                amount=Decimal(amount),
+                **kwargs,
+            )
+
+    def _rollup(self, granularity):
+        return ClusterRevenueRollup.objects.get(
+            cluster=self.cluster, granularity=granularity
+        )
+
+    def test_completed_transactions_refresh_rollups(self, refresh):
+        self._create_transaction(self.cluster_wallet, TransactionType.DEPOSIT, "500.00")
+        self._create_transaction(self.cluster_wallet, TransactionType.TRANSFER, "200.00")
+        self._create_transaction(self.wallet, TransactionType.BILL_PAYMENT, "300.00")
+        self._create_transaction(self.wallet, TransactionType.DEPOSIT, "900.00")
+
+        for granularity in (RollupGranularity.HOUR, RollupGranularity.DAY):
+            rollup = self._rollup(granularity)
+            self.assertEqual(rollup.deposit_amount, Decimal("500.00"))
+            self.assertEqual(rollup.transfer_amount, Decimal("200.00"))
+            self.assertEqual(rollup.bill_payment_amount, Decimal("300.00"))
+            self.assertEqual(rollup.bill_payment_count, 1)
+            self.assertEqual(rollup.wallet_transaction_count, 2)
+
+    def test_pending_transactions_are_counted_on_completion(self, refresh):
+        txn = self._create_transaction(
+            self.wallet,
+            TransactionType.BILL_PAYMENT,
+            "300.00",
+            status=TransactionStatus.PENDING,
+        )
+        self.assertFalse(ClusterRevenueRollup.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            txn.mark_as_completed()
+
+        self.assertEqual(
+            self._rollup(RollupGranularity.DAY).bill_payment_amount, Decimal("300.00")
+        )
+
+    def test_backfill_rebuilds_rollups(self, refresh):
+        for days_ago in (0, 2, 40):
+            txn = create_transaction(
+                wallet=self.wallet,
+                transaction_type=TransactionType.BILL_PAYMENT,
+                amount=Decimal("100.00"),
+            )
+            Transaction.objects.filter(id=txn.id).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+
+        results = revenue_rollups.backfill(cluster=self.cluster)
+
+        self.assertEqual(results, {"hours": 3, "days": 3})
+        totals = revenue_rollups.get_totals(
+            self.cluster, start=timezone.now() - timedelta(days=30)
+        )
+        self.assertEqual(totals["bill_payment_amount"], Decimal("200.00"))
+        self.assertEqual(totals["bill_payment_count"], 2)
+
+    def test_totals_exclude_minutes_before_start(self, refresh):
+        hour = revenue_rollups._hour_start(timezone.now() - timedelta(days=2))
+        for minutes in (10, 40):
+            txn = create_transaction(
+                wallet=self.wallet,
+                transaction_type=TransactionType.BILL_PAYMENT,
+                amount=Decimal("100.00"),
+            )
+            Transaction.objects.filter(id=txn.id).update(
+                created_at=hour + timedelta(minutes=minutes)
+            )
+        revenue_rollups.backfill(cluster=self.cluster)
+
+        totals = revenue_rollups.get_totals(
+            self.cluster, start=hour + timedelta(minutes=30)
+        )
+
+        self.assertEqual(totals["bill_payment_amount"], Decimal("100.00"))
+        self.assertEqual(totals["bill_payment_count"], 1)
+
+    def test_revenue_summary_reads_rollups(self, refresh):
+        for _ in range(5):
+            self._create_transaction(self.wallet, TransactionType.BILL_PAYMENT, "100.00")
+
+        # Partial first hour, partial first day, full days and wallet balance
+        with self.assertNumQueries(4):
+            summary = cluster_wallet.get_revenue_summary(self.cluster, days=30)
+
+        self.assertEqual(summary["total_revenue"], Decimal("500.00"))
+        self.assertEqual(summary["bill_payment_count"], 5)
+
+    def test_wallet_analytics_reads_rollups(self, refresh):
+        self._create_transaction(
+            self.cluster_wallet, TransactionType.DEPOSIT, "400.00"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                cluster=self.cluster,
+                wallet=self.cluster_wallet,
+                type=TransactionType.DEPOSIT,
+                amount=Decimal("250.00"),
+                description="Bill payment",
+                status=TransactionStatus.COMPLETED,
+                metadata={"source": "bill_payment"},
+            )
+        self._create_transaction(
+            self.cluster_wallet, TransactionType.TRANSFER, "150.00"
+        )
+
+        analytics = cluster_wallet.get_wallet_analytics(self.cluster)
+
+        self.assertEqual(analytics["total_deposits"], Decimal("650.00"))
+        self.assertEqual(analytics["total_withdrawals"], Decimal("150.00"))
+        self.assertEqual(analytics["net_balance"], Decimal("500.00"))
+        self.assertEqual(analytics["bill_payment_revenue"], Decimal("250.00"))
+        self.assertEqual(analytics["bill_payment_count"], 1)
+        self.assertEqual(analytics["total_transactions"], 3)
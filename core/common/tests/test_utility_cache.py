@@ -0,0 +1,103 @@
+"""
+Tests for the cached utility provider catalogue and customer lookups.
+"""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.common.includes import utilities
+from core.common.models import PaymentProvider
+
+
+class UtilityProviderCatalogueTests(SimpleTestCase):
+    """Tests for serving the provider catalogue from the cache."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refresh_warms_the_catalogue(self):
+        counts = utilities.refresh_provider_catalogue()
+
+        self.assertEqual(set(counts), {PaymentProvider.PAYSTACK, PaymentProvider.FLUTTERWAVE})
+        with patch.object(utilities, "get_paystack_utility_providers") as fetch:
+            providers = utilities.get_utility_providers(PaymentProvider.PAYSTACK, "electricity")
+
+        fetch.assert_not_called()
+        self.assertIn({"name": "Ikeja Electric", "code": "ikeja-electric"}, providers)
+
+    def test_cold_catalogue_is_fetched_once(self):
+        with patch.object(
+            utilities, "get_flutterwave_utility_providers", return_value=[]
+        ) as fetch:
+            utilities.get_utility_providers(PaymentProvider.FLUTTERWAVE, "water")
+            utilities.get_utility_providers(PaymentProvider.FLUTTERWAVE, "water")
+
+        fetch.assert_called_once_with("water")
+
+    def test_failed_refresh_keeps_the_previous_catalogue(self):
+        utilities.refresh_provider_catalogue()
+
+        with patch.object(
+            utilities, "get_paystack_utility_providers", side_effect=Exception("timeout")
+        ):
+            counts = utilities.refresh_provider_catalogue()
+
+        self.assertNotIn(PaymentProvider.PAYSTACK, counts)
+        self.assertTrue(utilities.get_utility_providers(PaymentProvider.PAYSTACK, "water"))
+
+
+class UtilityCustomerCacheTests(SimpleTestCase):
+    """Tests for caching customer validation results."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _validate(self, customer_id="45012345678"):
+        return utilities.validate_customer(
+            PaymentProvider.PAYSTACK, customer_id, "ikeja-electric"
+        )
+
+    def test_valid_customer_is_cached(self):
+        with patch.object(
+            utilities, "validate_paystack_customer", return_value={"success": True}
+        ) as validate:
+            self._validate()
+            self._validate()
+            self._validate(customer_id="45099999999")
+
+        self.assertEqual(validate.call_count, 2)
+
+    @patch.object(utilities, "validate_paystack_customer")
+    def test_invalid_customer_is_cached_briefly(self, validate):
+        validate.return_value = {"success": False, "message": "Invalid meter number"}
+
+        with patch.object(utilities.cache, "set", wraps=utilities.cache.set) as cache_set:
+            self._validate()
+        self._validate()
+
+        validate.assert_called_once()
+        self.assertEqual(
+            cache_set.call_args.args[2],
+            utilities.DEFAULT_UTILITY_CACHE_SETTINGS["invalid_customer_ttl"],
+        )
+
+    @patch.object(utilities, "validate_paystack_customer")
+    def test_provider_errors_are_not_cached(self, validate):
+        validate.return_value = {"success": False, "error": "Connection reset"}
+
+        self._validate()
+        self._validate()
+
+        self.assertEqual(validate.call_count, 2)
+
+    @patch.object(utilities, "validate_paystack_customer", return_value={"success": True})
+    def test_invalidation_forgets_the_customer(self, validate):
+        self._validate()
+        utilities.invalidate_customer_cache(
+            PaymentProvider.PAYSTACK, "45012345678", "ikeja-electric"
+        )
+        self._validate()
+
+        self.assertEqual(validate.call_count, 2)
@@ -0,0 +1,164 @@
+"""
+Tests for scheduled retries of failed utility payments.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.common.includes import utility_retries
+from core.common.includes.third_party_services import PaymentProviderFactory, http
+from core.common.includes.utilities import purchase_utility
+from core.common.models import (
+    BillType,
+    PaymentError,
+    PaymentProvider,
+    TransactionStatus,
+    TransactionType,
+    UtilityProvider,
+)
+from core.common.models.payments.payment_error import (
+    PaymentErrorSeverity,
+    PaymentErrorType,
+)
+from core.common.tests.stub_server import StubProviderServer
+from members.tests.test_payment_utils import create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+
+@patch("core.common.includes.utilities.purchase_utility")
+class UtilityPaymentRetryTests(TestCase):
+    """Tests for claiming due retries and scheduling the next attempt."""
+
+    def setUp(self):
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster, balance=Decimal("5000.00"))
+        self.utility_provider = UtilityProvider.objects.create(
+            cluster=self.cluster,
+            name="Ikeja Electric",
+            provider_type=BillType.ELECTRICITY_UTILITY,
+            api_provider=PaymentProvider.PAYSTACK,
+            provider_code="ikeja-electric",
+            created_by=str(self.admin.id),
+            last_modified_by=str(self.admin.id),
+        )
+
+    def _failed_payment(self, provider=PaymentProvider.PAYSTACK):
+        txn = create_transaction(
+            wallet=self.wallet,
+            transaction_type=TransactionType.BILL_PAYMENT,
+            amount=Decimal("1000.00"),
+            status=TransactionStatus.FAILED,
+        )
+        txn.provider = provider
+        txn.metadata = {
+            "utility_provider_id": str(self.utility_provider.id),
+            "customer_id": "45012345678",
+        }
+        txn.save(update_fields=["provider", "metadata"])
+        error = PaymentError.objects.create(
+            cluster=self.cluster,
+            transaction=txn,
+            error_type=PaymentErrorType.UTILITY_PROVIDER_ERROR,
+            severity=PaymentErrorSeverity.HIGH,
+            provider_error_message="Service unavailable",
+            user_friendly_message="Utility payment failed. Please try again.",
+            created_by=str(self.user.id),
+            last_modified_by=str(self.user.id),
+        )
+        # Make the first retry due now
+        PaymentError.objects.filter(pk=error.pk).update(next_retry_at=timezone.now())
+        return error
+
+    def test_new_error_schedules_first_retry(self, purchase):
+        before = timezone.now()
+        error = self._failed_payment()
+        error.next_retry_at = None
+        error.pk = None
+        error._state.adding = True
+        error.save()
+
+        self.assertGreaterEqual(error.next_retry_at, before + timedelta(minutes=1))
+
+    def test_due_retry_succeeds(self, purchase):
+        purchase.return_value = {"success": True, "transaction_id": "PSK_1"}
+        error = self._failed_payment()
+
+        results = utility_retries.drain_due_retries()
+
+        self.assertEqual(results["succeeded"], 1)
+        error.refresh_from_db()
+        self.assertTrue(error.is_resolved)
+        self.assertIsNone(error.next_retry_at)
+        self.assertEqual(error.retry_count, 1)
+
+    def test_failed_retry_is_rescheduled_with_backoff(self, purchase):
+        purchase.return_value = {"success": False, "error": "Service unavailable"}
+        error = self._failed_payment()
+
+        results = utility_retries.drain_due_retries()
+
+        self.assertEqual(results, {**results, "claimed": 1, "failed": 1})
+        error.refresh_from_db()
+        self.assertEqual(error.retry_count, 1)
+        self.assertGreater(error.next_retry_at, timezone.now() + timedelta(minutes=1))
+        # The retry's own error does not start a second retry chain
+        self.assertFalse(
+            utility_retries.get_due_retries(timezone.now() + timedelta(days=1))
+            .exclude(pk=error.pk)
+            .exists()
+        )
+
+    def test_exhausted_error_is_no_longer_scheduled(self, purchase):
+        purchase.return_value = {"success": False, "error": "Service unavailable"}
+        error = self._failed_payment()
+        PaymentError.objects.filter(pk=error.pk).update(retry_count=2)
+
+        utility_retries.drain_due_retries()
+
+        error.refresh_from_db()
+        self.assertEqual(error.retry_count, 3)
+        self.assertIsNone(error.next_retry_at)
+
+    @patch("core.common.includes.utility_retries.http.get_breaker")
+    def test_provider_with_open_breaker_is_skipped(self, get_breaker, purchase):
+        get_breaker.side_effect = lambda name: MagicMock(is_open=name == PaymentProvider.PAYSTACK)
+        error = self._failed_payment()
+
+        results = utility_retries.drain_due_retries()
+
+        self.assertEqual(results["claimed"], 0)
+        purchase.assert_not_called()
+        self.assertTrue(utility_retries.get_due_retries().filter(pk=error.pk).exists())
+
+    @override_settings(PROVIDER_HTTP={"breaker_failure_threshold": 1})
+    def test_failed_purchase_opens_the_provider_breaker(self, purchase):
+        purchase.side_effect = purchase_utility
+        server = StubProviderServer().start()
+        self.addCleanup(server.stop)
+        for reset in (PaymentProviderFactory.reset, http.reset_clients):
+            reset()
+            self.addCleanup(reset)
+        error = self._failed_payment()
+
+        server.fail(1)
+        with override_settings(PAYSTACK_SECRET_KEY="sk_test", PAYSTACK_BASE_URL=server.base_url):
+            self.assertEqual(utility_retries.drain_due_retries()["failed"], 1)
+            PaymentError.objects.filter(pk=error.pk).update(next_retry_at=timezone.now())
+            self.assertEqual(utility_retries.drain_due_retries()["claimed"], 0)
+
+        self.assertEqual(server.request_count, 1)
+        self.assertTrue(http.get_breaker(PaymentProvider.PAYSTACK).is_open)
+
+    def test_retry_not_yet_due_is_left_alone(self, purchase):
+        error = self._failed_payment()
+        PaymentError.objects.filter(pk=error.pk).update(
+            next_retry_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.assertEqual(utility_retries.drain_due_retries()["claimed"], 0)
+        purchase.assert_not_called()
@@ -0,0 +1,107 @@
+"""
+Tests for the cached wallet balance read model.
+"""
+
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.common.includes import wallet_balances
+from core.common.models import Wallet
+from members.tests.test_payment_utils import create_wallet
+from members.tests.utils import create_cluster, create_user
+from members.views_payment import WalletViewSet
+
+
+class WalletBalanceReadModelTests(TestCase):
+    """Tests for keeping the read model current and serving the balance endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet = create_wallet(
+                user=self.user, cluster=self.cluster, balance=Decimal("500.00")
+            )
+
+    def _get(self, **headers):
+        request = APIRequestFactory().get("/balance/", **headers)
+        request.cluster_context = self.cluster
+        force_authenticate(request, user=self.user)
+        view = WalletViewSet.as_view({"get": "balance"}, permission_classes=[])
+        return view(request)
+
+    def test_credit_updates_read_model_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.credit(Decimal("250.00"))
+
+        read_model = wallet_balances.get_cached(self.cluster.id, self.user.id)
+        self.assertEqual(read_model["balance"], Decimal("750.00"))
+        self.assertEqual(read_model["available_balance"], Decimal("750.00"))
+
+    def test_read_model_is_built_from_the_committed_wallet(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.wallet.credit(Decimal("250.00"))
+        # A debit committed before the credit's callback runs
+        Wallet.objects.filter(pk=self.wallet.pk).update(
+            balance=F("balance") - 100, available_balance=F("available_balance") - 100
+        )
+        for callback in callbacks:
+            callback()
+
+        read_model = wallet_balances.get_cached(self.cluster.id, self.user.id)
+        self.assertEqual(read_model["balance"], Decimal("650.00"))
+
+    def test_balance_is_served_from_the_read_model(self):
+        with self.assertNumQueries(0):
+            response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["balance"], "500.00")
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self._get()["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.debit(Decimal("100.00"))
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["balance"], "400.00")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_missing_read_model_is_rebuilt_with_the_same_version(self):
+        etag = self._get()["ETag"]
+        cache.clear()
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(
+        WALLET_BALANCE_PUSH=True,
+        CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    )
+    def test_balance_change_is_pushed(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(
+            wallet_balances.get_group_name(self.user.id), channel_name
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.credit(Decimal("50.00"))
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message["type"], "wallet_balance_broadcast")
+        self.assertEqual(message["balance"], "550.00")
+        self.assertEqual(message["cluster_id"], str(self.cluster.id))
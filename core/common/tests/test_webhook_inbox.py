@@ -0,0 +1,175 @@
+"""
+Tests for the payment webhook inbox.
+"""
+
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.common.includes import payments, webhooks
+from core.common.includes.third_party_services.http import ProviderUnavailableError
+from core.common.models import (
+    PaymentProvider,
+    TransactionStatus,
+    TransactionType,
+    WebhookEvent,
+    WebhookEventStatus,
+)
+from core.common.views.payment_webhooks import paystack_webhook
+from members.tests.test_payment_utils import create_transaction, create_wallet
+from members.tests.utils import create_cluster, create_user
+
+SECRET_KEY = "sk_test_webhooks"
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET_KEY)
+class WebhookInboxTests(TestCase):
+    """Tests for storing webhooks on receipt and draining them later."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.cluster, self.admin = create_cluster()
+        self.user = create_user(email="resident@test.com", cluster=self.cluster)
+        self.wallet = create_wallet(user=self.user, cluster=self.cluster, balance=Decimal("0"))
+        self.txn = create_transaction(
+            wallet=self.wallet,
+            transaction_type=TransactionType.DEPOSIT,
+            amount=Decimal("1000.00"),
+            status=TransactionStatus.PENDING,
+        )
+        self.payload = json.dumps(
+            {
+                "event": "charge.success",
+                "data": {"id": 1001, "reference": self.txn.transaction_id},
+            }
+        )
+
+    def _signature(self, payload=None):
+        return hmac.new(
+            SECRET_KEY.encode("utf-8"),
+            (payload or self.payload).encode("utf-8"),
+            hashlib.sha512,
+        ).hexdigest()
+
+    def _post(self, payload=None, signature=None):
+        payload = payload or self.payload
+        if signature is None:
+            signature = self._signature(payload)
+        return paystack_webhook(
+            self.factory.post(
+                "/webhooks/paystack/",
+                payload,
+                content_type="application/json",
+                HTTP_X_PAYSTACK_SIGNATURE=signature,
+            )
+        )
+
+    @patch("core.common.includes.webhooks._queue_drain")
+    def test_webhook_is_stored_and_acknowledged(self, queue_drain):
+        with patch("core.common.includes.webhooks.payments.verify_with_provider") as verify:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._post()
+
+        self.assertEqual(response.status_code, 200)
+        verify.assert_not_called()
+        queue_drain.assert_called_once()
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEventStatus.PENDING)
+        self.assertEqual(event.reference, self.txn.transaction_id)
+
+    def test_duplicate_delivery_is_stored_once(self):
+        webhooks.ingest(PaymentProvider.PAYSTACK, self.payload, self._signature())
+        event, created = webhooks.ingest(
+            PaymentProvider.PAYSTACK, self.payload, self._signature()
+        )
+
+        self.assertFalse(created)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_invalid_signature_is_rejected(self):
+        response = self._post(signature="invalid")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    @patch("core.common.includes.webhooks.payments.verify_with_provider")
+    def test_drain_completes_transaction_outside_atomic_block(self, verify):
+        outer_depth = len(connection.atomic_blocks)
+        depths = []
+        verify.side_effect = lambda txn, provider: (
+            depths.append(len(connection.atomic_blocks)) or {"success": True}
+        )
+        webhooks.ingest(PaymentProvider.PAYSTACK, self.payload, self._signature())
+
+        results = webhooks.drain()
+
+        self.assertEqual(results["processed"], 1)
+        self.assertEqual(depths, [outer_depth])
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, TransactionStatus.COMPLETED)
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEventStatus.PROCESSED)
+        self.assertEqual(event.attempts, 1)
+
+    @patch("core.common.includes.webhooks.payments.verify_with_provider")
+    def test_failed_event_is_retried(self, verify):
+        verify.side_effect = ProviderUnavailableError("paystack circuit is open")
+        webhooks.ingest(PaymentProvider.PAYSTACK, self.payload, self._signature())
+
+        self.assertEqual(webhooks.drain()["failed"], 1)
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEventStatus.FAILED)
+        self.assertIn("circuit is open", event.last_error)
+
+        verify.side_effect = None
+        verify.return_value = {"success": True}
+        self.assertEqual(webhooks.drain()["processed"], 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, WebhookEventStatus.PROCESSED)
+        self.assertEqual(event.attempts, 2)
+
+    def test_event_for_unknown_transaction_is_ignored(self):
+        payload = json.dumps(
+            {"event": "charge.success", "data": {"id": 1002, "reference": "TXN-UNKNOWN"}}
+        )
+        webhooks.ingest(PaymentProvider.PAYSTACK, payload, self._signature(payload))
+
+        self.assertEqual(webhooks.drain()["ignored"], 1)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEventStatus.IGNORED)
+
+    def _use_provider_reference(self):
+        # Initializing a payment stores the reference generated by the provider
+        self.txn.reference = "T685312452364820"
+        self.txn.save(update_fields=["reference"])
+        return json.dumps(
+            {"event": "charge.success", "data": {"id": 1003, "reference": self.txn.reference}}
+        )
+
+    @patch("core.common.includes.webhooks.payments.verify_with_provider")
+    def test_drain_finds_transaction_by_provider_reference(self, verify):
+        verify.return_value = {"success": True}
+        payload = self._use_provider_reference()
+        webhooks.ingest(PaymentProvider.PAYSTACK, payload, self._signature(payload))
+
+        self.assertEqual(webhooks.drain()["processed"], 1)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, TransactionStatus.COMPLETED)
+
+    @patch("core.common.includes.payments.verify_with_provider")
+    def test_process_webhook_finds_transaction_by_provider_reference(self, verify):
+        verify.return_value = {"success": True}
+        payload = self._use_provider_reference()
+
+        txn = payments.process_webhook(
+            PaymentProvider.PAYSTACK, payload, self._signature(payload)
+        )
+
+        self.assertEqual(txn, self.txn)
+        verify.assert_called_once()
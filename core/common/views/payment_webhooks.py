@@ -13,78 +13,67 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from core.common.decorators import idempotent
 from core.common.models import PaymentProvider
-from core.common.includes import payments
+from core.common.includes import idempotency, payments, webhooks
 
 logger = logging.getLogger('clustr')
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def paystack_webhook(request):
+def _webhook_event_key(request):
+    """Use the provider event ID as the idempotency key for webhook deliveries."""
+    return idempotency.get_webhook_event_key(request.body.decode('utf-8'))
+
+
+def _ingest_webhook(request, provider, signature_header):
     """
-    Handle Paystack webhook notifications.
+    Store a webhook in the inbox and acknowledge it without processing.
     """
     try:
-        # Get the raw payload and signature
         payload = request.body.decode('utf-8')
-        signature = request.headers.get('X-Paystack-Signature', '')
-        
+        signature = request.headers.get(signature_header, '')
+
         if not signature:
-            logger.warning("Paystack webhook received without signature")
+            logger.warning(f"{provider} webhook received without signature")
             return HttpResponse(status=400)
-        
-        # Process webhook
-        transaction = payments.process_webhook(
-            provider=PaymentProvider.PAYSTACK,
-            payload=payload,
-            signature=signature
-        )
-        
-        if transaction:
-            logger.info(f"Paystack webhook processed successfully for transaction {transaction.transaction_id}")
-            return HttpResponse(status=200)
-        else:
-            logger.warning("Paystack webhook processing failed or ignored")
+
+        try:
+            event, created = webhooks.ingest(
+                provider=provider,
+                payload=payload,
+                signature=signature
+            )
+        except webhooks.InvalidWebhook as e:
+            logger.warning(f"{provider} webhook rejected: {e}")
             return HttpResponse(status=400)
-    
+
+        if created:
+            logger.info(f"{provider} webhook {event.event_id} queued for processing")
+        return HttpResponse(status=200)
+
     except Exception as e:
-        logger.error(f"Error processing Paystack webhook: {e}")
+        logger.error(f"Error receiving {provider} webhook: {e}")
         return HttpResponse(status=500)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent("webhooks.paystack", key_func=_webhook_event_key)
+def paystack_webhook(request):
+    """
+    Handle Paystack webhook notifications.
+    """
+    return _ingest_webhook(request, PaymentProvider.PAYSTACK, 'X-Paystack-Signature')
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@idempotent("webhooks.flutterwave", key_func=_webhook_event_key)
 def flutterwave_webhook(request):
     """
     Handle Flutterwave webhook notifications.
     """
-    try:
-        # Get the raw payload and signature
-        payload = request.body.decode('utf-8')
-        signature = request.headers.get('verif-hash', '')
-        
-        if not signature:
-            logger.warning("Flutterwave webhook received without signature")
-            return HttpResponse(status=400)
-        
-        # Process webhook
-        transaction = payments.process_webhook(
-            provider=PaymentProvider.FLUTTERWAVE,
-            payload=payload,
-            signature=signature
-        )
-        
-        if transaction:
-            logger.info(f"Flutterwave webhook processed successfully for transaction {transaction.transaction_id}")
-            return HttpResponse(status=200)
-        else:
-            logger.warning("Flutterwave webhook processing failed or ignored")
-            return HttpResponse(status=400)
-    
-    except Exception as e:
-        logger.error(f"Error processing Flutterwave webhook: {e}")
-        return HttpResponse(status=500)
+    return _ingest_webhook(request, PaymentProvider.FLUTTERWAVE, 'verif-hash')
 
 
 @api_view(['POST'])
@@ -0,0 +1,278 @@
+"""
+Column-oriented counterparts of the validators in imported_attribute_validators.
+
+Each validator checks a whole column of imported values at once with pandas string and numeric operations. Values
+that pass the vectorised checks are accepted as they are; the rest are handed to the cell validator of the same
+attribute, so the RowError objects produced are exactly those of a row by row validation.
+
+Columns are pandas Series indexed by the row numbers used in the errors. Validators return the errors, ordered by
+row, and a Series of the validated values with None for the rejected rows.
+"""
+
+from decimal import Decimal
+from typing import Callable
+
+import pandas as pd
+from django.core.validators import EmailValidator
+from django.utils.timezone import make_aware
+
+from core.data_exchange.exceptions import RowError
+from core.data_exchange.includes import imported_attribute_validators as cell_validators
+
+ColumnReturnType = tuple[list[RowError], pd.Series]
+
+_PHONE_NUMBER_PATTERN = r"^\+[1-9]\d{1,14}$"
+_DECIMAL_PATTERN = r"^-?(\d+)(?:\.(\d+))?$"
+_INTEGER_PATTERN = r"^-?\d+$"
+_DATE_FORMATS = ["%m-%d-%Y", "%B %d, %Y"]
+_DATETIME_FORMATS = ["%m-%d-%Y %H:%M", "%B %d, %Y at %I:%M %p"]
+
+
+def _validate_rejected_cells(
+    cell_validator: Callable,
+    field_name: str,
+    values: pd.Series,
+    error_titles: pd.Series,
+    accepted: pd.Series,
+    accepted_values: pd.Series,
+    **kwargs,
+) -> ColumnReturnType:
+    """
+    Builds the validated column from the accepted values and runs the cell validator on every rejected value
+    """
+    result = accepted_values.astype(object).where(accepted, None)
+    errors = []
+    for row_number in values.index[~accepted]:
+        cell_errors, value = cell_validator(
+            field_name=field_name,
+            value=values[row_number],
+            row_number=row_number,
+            error_title=error_titles[row_number],
+            **kwargs,
+        )
+        errors.extend(cell_errors)
+        result[row_number] = value
+    return errors, result
+
+
+def _strip(values: pd.Series) -> pd.Series:
+    return values.astype(str).str.strip()
+
+
+def validate_generic_name_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    kwargs.setdefault("max_length", 100)
+    stripped = _strip(values)
+    lengths = stripped.str.len()
+    accepted = (lengths > 0) & (lengths <= kwargs["max_length"])
+    if kwargs.get("min_length") is not None:
+        accepted &= lengths >= kwargs["min_length"]
+    return _validate_rejected_cells(
+        cell_validators.validate_generic_name,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        stripped,
+        **kwargs,
+    )
+
+
+def validate_email_address_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    kwargs.setdefault("max_length", 100)
+    stripped = _strip(values)
+    user_part, at_sign, domain_part = (
+        stripped.str.rpartition("@")[column] for column in range(3)
+    )
+    # Django's email validator checks the user and domain parts with these expressions before trying the slower
+    # checks (IP address literals and internationalised domains), which are left to the cell validator
+    user_regex = EmailValidator.user_regex
+    domain_regex = EmailValidator.domain_regex
+    accepted = (
+        (at_sign == "@")
+        & (stripped.str.len() <= kwargs["max_length"])
+        & user_part.str.match(user_regex.pattern, flags=user_regex.flags)
+        & (
+            domain_part.str.match(domain_regex.pattern, flags=domain_regex.flags)
+            | domain_part.isin(EmailValidator.domain_allowlist)
+        )
+    )
+    return _validate_rejected_cells(
+        cell_validators.validate_email_address,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        stripped,
+        **kwargs,
+    )
+
+
+def validate_phone_number_column(
+    field_name: str,
+    values: pd.Series,
+    error_titles: pd.Series,
+    default_dialing_code: str,
+    **kwargs,
+) -> ColumnReturnType:
+    kwargs.setdefault("max_length", 16)
+    kwargs.setdefault("min_length", 3)
+    values = values.astype(str)
+    has_dialing_code = values.str.startswith("+")
+    if default_dialing_code:
+        values_with_dialing_code = values.where(
+            has_dialing_code | (values == ""), default_dialing_code + values
+        )
+    else:
+        values_with_dialing_code = values
+
+    # Removes any non-digit characters in the phone number except for the first '+' character.
+    normalized = "+" + values_with_dialing_code.str.replace(r"\D", "", regex=True)
+    lengths = normalized.str.len()
+    accepted = (
+        (has_dialing_code | bool(default_dialing_code))
+        & normalized.str.match(_PHONE_NUMBER_PATTERN)
+        & (lengths >= kwargs["min_length"])
+        & (lengths <= kwargs["max_length"])
+    )
+    return _validate_rejected_cells(
+        cell_validators.validate_phone_number,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        normalized,
+        default_dialing_code=default_dialing_code,
+        **kwargs,
+    )
+
+
+def validate_decimal_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    kwargs.setdefault("max_digits", 11)
+    kwargs.setdefault("decimal_places", 2)
+    kwargs.setdefault("min_value", Decimal("0"))
+    max_digits = kwargs["max_digits"]
+    decimal_places = kwargs["decimal_places"]
+    max_value = kwargs.get("max_value")
+
+    stripped = _strip(values)
+    parts = stripped.str.extract(_DECIMAL_PATTERN)
+    # Counting at least one whole digit is stricter than DRF for values below one, which is fine as the
+    # cell validator decides on anything rejected here
+    whole_digits = parts[0].str.lstrip("0").str.len().clip(lower=1)
+    fraction_digits = parts[1].fillna("").str.len()
+    numbers = pd.to_numeric(stripped.where(parts[0].notna()), errors="coerce")
+    accepted = (
+        numbers.notna()
+        & (fraction_digits <= decimal_places)
+        & (whole_digits <= max_digits - decimal_places)
+        & (numbers >= float(kwargs["min_value"]))
+    )
+    if max_value is not None:
+        accepted &= numbers <= float(max_value)
+
+    exponent = Decimal(1).scaleb(-decimal_places)
+    accepted_values = pd.Series(
+        [Decimal(value).quantize(exponent) for value in stripped[accepted]],
+        index=stripped.index[accepted],
+        dtype=object,
+    ).reindex(stripped.index)
+    return _validate_rejected_cells(
+        cell_validators.validate_decimal_field,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        accepted_values,
+        **kwargs,
+    )
+
+
+def parse_integer_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    kwargs.setdefault("min_value", 0)
+    max_value = kwargs.get("max_value")
+    stripped = _strip(values)
+    numbers = pd.to_numeric(
+        stripped.where(stripped.str.match(_INTEGER_PATTERN)), errors="coerce"
+    )
+    accepted = numbers.notna() & (numbers >= kwargs["min_value"])
+    if max_value is not None:
+        accepted &= numbers <= max_value
+    return _validate_rejected_cells(
+        cell_validators.parse_integer,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        stripped.where(accepted, "0").map(int),
+        **kwargs,
+    )
+
+
+def _parse_datetimes(values: pd.Series, formats: list[str]) -> pd.Series:
+    parsed = pd.Series(pd.NaT, index=values.index)
+    for format_ in formats:
+        missing = parsed.isna()
+        parsed[missing] = pd.to_datetime(
+            values[missing], format=format_, errors="coerce"
+        )
+    return parsed
+
+
+def parse_date_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    parsed = _parse_datetimes(values.astype(str), _DATE_FORMATS)
+    return _validate_rejected_cells(
+        cell_validators.parse_date_from_string,
+        field_name,
+        values,
+        error_titles,
+        parsed.notna(),
+        parsed.dt.date,
+        **kwargs,
+    )
+
+
+def parse_datetime_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    parsed = _parse_datetimes(values.astype(str), _DATETIME_FORMATS)
+    accepted = parsed.notna()
+    accepted_values = pd.Series(
+        [make_aware(value.to_pydatetime()) for value in parsed[accepted]],
+        index=parsed.index[accepted],
+        dtype=object,
+    ).reindex(parsed.index)
+    return _validate_rejected_cells(
+        cell_validators.parse_datetime_from_string,
+        field_name,
+        values,
+        error_titles,
+        accepted,
+        accepted_values,
+        **kwargs,
+    )
+
+
+def parse_boolean_column(
+    field_name: str, values: pd.Series, error_titles: pd.Series, **kwargs
+) -> ColumnReturnType:
+    upper = values.astype(str).str.upper()
+    return _validate_rejected_cells(
+        cell_validators.parse_boolean,
+        field_name,
+        values,
+        error_titles,
+        upper.isin(["TRUE", "FALSE"]),
+        upper == "TRUE",
+        **kwargs,
+    )
+
@@ -0,0 +1,154 @@
+"""
+Declarative description of the records to export.
+
+Export tasks receive an ExportQuerySpec as a JSON object instead of a pickled queryset, and rebuild the queryset from
+it. Only the parts of a queryset that can be described with JSON are kept: keyword filters, the ordering, the
+primary keys to export and the related objects to fetch with it. The spec also holds the extra fields exported by the
+serializer, and the watermarks that bound a delta export.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model, QuerySet
+from django.utils.translation import gettext as _
+
+from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.delta_export import Watermark, filter_changed
+
+
+def _flatten_select_related(related: dict, prefix: str = "") -> list[str]:
+    lookups = []
+    for name, nested in related.items():
+        lookup = f"{prefix}{name}"
+        if nested:
+            lookups.extend(_flatten_select_related(nested, f"{lookup}__"))
+        else:
+            lookups.append(lookup)
+    return lookups
+
+
+@dataclass(frozen=True)
+class ExportQuerySpec:
+    """
+    Attributes
+    content_type_id:
+        The id of the content type of the exported model
+    filters:
+        Keyword lookups applied to the model's default manager, e.g. {"owner_id": "..."}. Values must be JSON
+        serializable
+    ordering:
+        The ordering of the exported records. Defaults to the model's ordering
+    ids:
+        Optional primary keys, or values of pk_filter_look_up, of the records to export
+    pk_filter_look_up:
+        The look up used to filter the records by ids
+    select_related:
+        Related objects fetched with select_related
+    prefetch_related:
+        Related objects fetched with prefetch_related
+    extra_fields:
+        Extra fields exported in addition to the serializer's base fields
+    watermark_field:
+        The modification time field of a delta export. Delta exports are ordered by it and the primary key instead
+        of ordering
+    since:
+        Watermark token of a delta export. Only records changed after it are exported
+    until:
+        Watermark token of a delta export. Only records changed up to and including it are exported
+    """
+
+    content_type_id: int
+    filters: dict[str, Any] = field(default_factory=dict)
+    ordering: list[str] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+    pk_filter_look_up: Optional[str] = "pk__in"
+    select_related: list[str] = field(default_factory=list)
+    prefetch_related: list[str] = field(default_factory=list)
+    extra_fields: list[str] = field(default_factory=list)
+    watermark_field: Optional[str] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    @classmethod
+    def from_queryset(
+        cls,
+        queryset: QuerySet,
+        filters: Optional[dict[str, Any]] = None,
+        ids: Optional[list] = None,
+        pk_filter_look_up: Optional[str] = "pk__in",
+        extra_fields: Optional[list[str]] = None,
+        watermark_field: Optional[str] = None,
+        since: Optional[Watermark] = None,
+        until: Optional[Watermark] = None,
+    ) -> "ExportQuerySpec":
+        """
+        Describes a queryset. The filters of a queryset cannot be read back from it, so filtered querysets must be
+        passed with the filters that select them from the model's default manager
+        :raises:
+            DataExportException: If the queryset is filtered and filters are not given, or if it is ordered or
+            prefetches related objects with expressions
+        """
+        query = queryset.query
+        if query.has_filters() and filters is None:
+            raise DataExportException(
+                _("The filters of a filtered queryset are required to export it")
+            )
+        if not all(isinstance(order, str) for order in query.order_by):
+            raise DataExportException(_("Only field names can order exports"))
+        prefetch_related = []
+        for lookup in queryset._prefetch_related_lookups:
+            if not isinstance(lookup, str):
+                raise DataExportException(
+                    _("Only string lookups can be prefetched in exports")
+                )
+            prefetch_related.append(lookup)
+        select_related = (
+            _flatten_select_related(query.select_related)
+            if isinstance(query.select_related, dict)
+            else []
+        )
+        return cls(
+            content_type_id=ContentType.objects.get_for_model(queryset.model).id,
+            filters=filters or {},
+            ordering=list(query.order_by),
+            ids=[str(id_) for id_ in ids or []],
+            pk_filter_look_up=pk_filter_look_up,
+            select_related=select_related,
+            prefetch_related=prefetch_related,
+            extra_fields=list(extra_fields or []),
+            watermark_field=watermark_field,
+            since=since.to_token() if since else None,
+            until=until.to_token() if until else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ExportQuerySpec":
+        return cls(**data)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def model_class(self) -> Type[Model]:
+        return ContentType.objects.get_for_id(self.content_type_id).model_class()
+
+    def build_queryset(self) -> QuerySet:
+        queryset = self.model_class._default_manager.filter(**self.filters)
+        if self.pk_filter_look_up and self.ids:
+            queryset = queryset.filter(**{self.pk_filter_look_up: self.ids})
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.watermark_field:
+            return filter_changed(
+                queryset,
+                since=Watermark.from_token(self.since) if self.since else None,
+                until=Watermark.from_token(self.until) if self.until else None,
+                field=self.watermark_field,
+            )
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset
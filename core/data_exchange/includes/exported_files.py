@@ -0,0 +1,83 @@
+"""
+Storage and delivery of exported files.
+
+Exported files are saved to the default file storage, which is S3 in production, and looked up by their key. Downloads
+are redirected to a short-lived presigned URL if DATA_EXPORT_PRESIGNED_URLS is set and the storage can sign URLs, and
+are otherwise streamed from the storage, so the file is never held in memory by the web process.
+"""
+
+from pathlib import Path
+from typing import IO, Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.http import FileResponse, HttpResponseRedirect
+from django.http.response import HttpResponseBase
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound
+
+# Seconds a presigned download URL stays valid
+DEFAULT_DOWNLOAD_URL_EXPIRY = 300
+
+
+def get_file_key(owner_id: UUID, file_name: str) -> str:
+    return f"exports/{owner_id}/{file_name}"
+
+
+def save_exported_file(file: IO[bytes], file_key: str) -> str:
+    """
+    Saves an exported file to the file storage and returns the key it was stored under, which may differ from
+    file_key if the key is taken. S3 storage uploads large files in parts
+    """
+    file.seek(0)
+    return default_storage.save(file_key, File(file, name=Path(file_key).name))
+
+
+def delete_exported_file(file_key: str):
+    default_storage.delete(file_key)
+
+
+def can_presign_urls(storage: Storage) -> bool:
+    """
+    Checks if a storage returns signed download URLs. Only S3 storage with query string authentication signs them,
+    and it returns unsigned URLs, which private files cannot be downloaded from, for a custom domain without a
+    CloudFront signer
+    """
+    if not getattr(storage, "querystring_auth", False):
+        return False
+    return not getattr(storage, "custom_domain", None) or bool(
+        getattr(storage, "cloudfront_signer", None)
+    )
+
+
+def get_exported_file_response(
+    file_key: str, mime_type: Optional[str] = None
+) -> HttpResponseBase:
+    """
+    Returns a response that downloads an exported file
+    :raises:
+        NotFound: If the file is streamed from the storage, and it does not exist
+    """
+    file_name = Path(file_key).name
+    if getattr(settings, "DATA_EXPORT_PRESIGNED_URLS", False) and can_presign_urls(
+        default_storage
+    ):
+        url = default_storage.url(
+            file_key,
+            parameters={
+                "ResponseContentDisposition": f'attachment; filename="{file_name}"'
+            },
+            expire=getattr(
+                settings, "DATA_EXPORT_URL_EXPIRY", DEFAULT_DOWNLOAD_URL_EXPIRY
+            ),
+        )
+        return HttpResponseRedirect(url)
+    try:
+        file = default_storage.open(file_key, "rb")
+    except FileNotFoundError:
+        raise NotFound(detail=_("File not found"))
+    return FileResponse(
+        file, as_attachment=True, filename=file_name, content_type=mime_type
+    )
@@ -1,24 +1,27 @@
-from datetime import timedelta
-from io import BytesIO
-from typing import Optional, Type
+from typing import Any, Optional, Type
 from uuid import UUID
 
-from celery.exceptions import TimeoutError as CeleryTimeoutError
-from celery.result import AsyncResult
 from django.db.models import QuerySet
-from django.http.response import HttpResponseBase, FileResponse
+from django.http.response import HttpResponseBase
 from django.utils.functional import cached_property
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from core.data_exchange import tasks
+from core.data_exchange.includes.delta_export import (
+    WATERMARK_HEADER,
+    Watermark,
+    filter_changed,
+    get_watermark,
+)
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.record_exporter import RecordExporter
 from core.data_exchange.includes.types import (
     FileFormats,
-    ExportOutput,
     StorageLocations,
 )
-from core.data_exchange.includes.utils import decode_output_result
+from core.data_exchange.includes.utils import estimate_count, get_class_path
 from core.data_exchange.models import ExportTask
 from core.data_exchange.serializers import (
     ExportTaskSerializer,
@@ -29,18 +32,20 @@ from core.data_exchange.serializers import (
 # The maximum number of record size that can be exported in a synchronous request
 MAX_SYNC_RECORD_SIZE = 1000
 
-# Block for at most 60 seconds in synchronous exports
-REQUEST_BLOCK_TIMEOUT = timedelta(minutes=1).total_seconds()
-
 
 class GenericModelExporter:
     """
-    Exports list-serializable data as XLSX or CSV file. The export will be executed synchronously if the number
-    of records to export is below the threshold - MAX_SYNC_RECORD_SIZE. That means the request will be blocked.
-    However, if the blocking time exceeds the threshold - REQUEST_BLOCK_TIMEOUT, a response is returned with a
-    task id that the client can use to check the status of the export or download the result when it is ready.
-    Export task itself supports notification when results are available, so an email notification will be sent
-    to the client when the results are ready for download. See class: core.data_exchange.models.ExportTask
+    Exports list-serializable data as XLSX or CSV file. The export will be executed synchronously, in the request's
+    process, if the number of records to export is below the threshold - MAX_SYNC_RECORD_SIZE. CSV rows
+    are then streamed to the client as they are serialized. Larger exports are performed by an export task, and a
+    response is returned with a task id that the client can use to check the status of the export or download the
+    result when it is ready. Export task itself supports notification when results are available, so an email
+    notification will be sent to the client when the results are ready for download.
+    See class: core.data_exchange.models.ExportTask
+
+    With a watermark_field, exports are delta exports: only the records changed since the `since` watermark of the
+    request are exported, and the watermark to pass to the next export is returned in the X-Next-Watermark header.
+    See module: core.data_exchange.includes.delta_export
 
     **Note, this class does not validate the ownership or access permission of the request user and the data to export.
     The clients of the class is responsible for passing in appropriate queryset that has been checked for access
@@ -55,6 +60,8 @@ class GenericModelExporter:
         options_serializer_class: Type[BaseExportOptionsSerializer],
         pk_filter_look_up="pk__in",
         force_async=False,
+        filters: Optional[dict[str, Any]] = None,
+        watermark_field: Optional[str] = None,
     ):
         """
         Parameters
@@ -69,6 +76,11 @@ class GenericModelExporter:
           export preferences such as the file format, exact object ids to export and the fields to export
         :param pk_filter_look_up: Django's look_up expression to use to further filter the queryset
         :param force_async: Force the export to be performed asynchronously without any blocking
+        :param filters: Keyword lookups that select base_queryset from the model's default manager. Required if
+          base_queryset is filtered, since the export task rebuilds the queryset from them. Values must be JSON
+          serializable
+        :param watermark_field: The modification time field of delta exports, e.g. "last_modified_at". The model
+          should be indexed on it and its primary key, after any field base_queryset is filtered by
         """
         self.request = request
         self.base_queryset = base_queryset
@@ -76,13 +88,15 @@ class GenericModelExporter:
         self.options_serializer_class = options_serializer_class
         self.pk_filter_look_up = pk_filter_look_up
         self.force_async = force_async
+        self.filters = filters
+        self.watermark_field = watermark_field
         self._data: Optional[dict] = None
         self._export_queryset: Optional[QuerySet] = None
         self._task: Optional[ExportTask] = None
 
     @property
     def _owner_id(self) -> UUID:
-        return self.request.user.owner_id
+        return self.request.user.get_owner().id
 
     def get_response(self) -> HttpResponseBase:
         serializer = self.options_serializer_class(
@@ -91,11 +105,40 @@ class GenericModelExporter:
         serializer.is_valid(raise_exception=True)
         self._data = serializer.data
         self._export_queryset = self._get_export_queryset(ids=self._data["ids"])
-        self._task = self._create_export_task(
-            self._export_queryset, self._data["notify_on_success"]
+        since = until = None
+        if self.watermark_field:
+            since = (
+                Watermark.from_token(self._data["since"])
+                if self._data.get("since")
+                else None
+            )
+            until = get_watermark(self._export_queryset, self.watermark_field) or since
+            self._export_queryset = filter_changed(
+                self._export_queryset, since, until, self.watermark_field
+            )
+        export_spec = ExportQuerySpec.from_queryset(
+            self.base_queryset,
+            filters=self.filters,
+            ids=self._data["ids"],
+            pk_filter_look_up=self.pk_filter_look_up,
+            extra_fields=self._data.get("extra_fields"),
+            watermark_field=self.watermark_field,
+            since=since,
+            until=until,
         )
-        async_result = self._schedule_export_task()
-        return self._get_export_response(async_result)
+        if not self._is_async:
+            response = self._get_export_response(export_spec)
+        else:
+            self._task = self._create_export_task(
+                self._export_queryset, self._data["notify_on_success"]
+            )
+            self._schedule_export_task(export_spec)
+            response = Response(
+                ExportTaskSerializer(self._task).data, status=status.HTTP_202_ACCEPTED
+            )
+        if until:
+            response[WATERMARK_HEADER] = until.to_token()
+        return response
 
     def _get_export_queryset(self, ids: Optional[list]):
         if self.pk_filter_look_up is None or not ids:
@@ -115,57 +158,46 @@ class GenericModelExporter:
 
     @cached_property
     def _is_async(self) -> bool:
-        """Checks if an export task should be performed asynchronously"""
+        """
+        Checks if an export task should be performed asynchronously. The number of records is estimated by the
+        query planner, which is much cheaper than counting them. Estimates can be far too low, for instance for a
+        table that grew since it was last analyzed, so a small estimate is confirmed by counting at most
+        MAX_SYNC_RECORD_SIZE + 1 records before the export is performed in process
+        """
         if self.force_async:
             return True
         if self._task and self._task.notify_on_success:
             return True
-        count = self._export_queryset.count()
-        return not count <= MAX_SYNC_RECORD_SIZE
+        if self._data and self._data["notify_on_success"]:
+            return True
+        if estimate_count(self._export_queryset) > MAX_SYNC_RECORD_SIZE:
+            return True
+        return (
+            self._export_queryset[: MAX_SYNC_RECORD_SIZE + 1].count()
+            > MAX_SYNC_RECORD_SIZE
+        )
 
-    def _schedule_export_task(self):
-        async_result = tasks.export_records.apply_async(
+    def _schedule_export_task(self, export_spec: ExportQuerySpec):
+        tasks.export_records.apply_async(
             kwargs={
-                "model_class": self.base_queryset.model,
-                "queryset_dict": self._export_queryset.__dict__,
-                "serializer_class": self.export_serializer_class,
-                "serializer_extra_fields": self._data["extra_fields"],
-                "task": self._task,
-                "output_format": FileFormats(self._data["format"]),
-                "storage_location": StorageLocations.MEMORY_FILE,
+                "export_spec": export_spec.to_dict(),
+                "serializer_class": get_class_path(self.export_serializer_class),
+                "task_id": self._task.id,
+                "output_format": FileFormats(self._data["format"]).value,
+                "storage_location": StorageLocations.EXTERNAL.value,
                 "owner_id": self._owner_id,
             },
-            serializer="pickle",
-            ignore_result=self._is_async,
+            serializer="json",
         )
-        return async_result
 
-    def _get_export_response(self, async_result: AsyncResult) -> HttpResponseBase:
-        """
-        For async exports, wait to get results. If the result takes more than 10 seconds (REQUEST_BLOCK_TIMEOUT)
-        to generate, return task object with id to check the status and retrieve results later.
-        """
-        if self._is_async:
-            return Response(
-                ExportTaskSerializer(self._task).data, status=status.HTTP_202_ACCEPTED
-            )
-        while not async_result.ready():
-            try:
-                # Blocks the thread until result is ready or timeout is reached.
-                async_result.wait(timeout=REQUEST_BLOCK_TIMEOUT)
-                result = ExportOutput(*async_result.get())
-                file = decode_output_result(result.file)
-                response = FileResponse(
-                    streaming_content=BytesIO(file),
-                    as_attachment=True,
-                    filename=result.file_name,
-                )
-                response["Content-Type"] = result.mime_type
-                return response
-            except CeleryTimeoutError:
-                # Going asynchronous... The client can check the task status and get results later using the export
-                # task id. An email may also be sent when the data is ready.
-                return Response(
-                    ExportTaskSerializer(self._task).data,
-                    status=status.HTTP_202_ACCEPTED,
-                )
+    def _get_export_response(self, export_spec: ExportQuerySpec) -> HttpResponseBase:
+        """Exports in the request's process, without a round trip through an export task"""
+        exporter = RecordExporter(
+            export_spec=export_spec,
+            serializer_class=self.export_serializer_class,
+            output_format=FileFormats(self._data["format"]),
+            storage_location=StorageLocations.MEMORY_FILE,
+            owner_id=self._owner_id,
+            always_on_external=False,
+        )
+        return exporter.get_response()
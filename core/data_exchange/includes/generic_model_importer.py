@@ -1,10 +1,16 @@
+import csv
 import mimetypes
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Any, Type, cast, Optional
+from typing import Any, Iterator, Type, cast, Optional
 
 from django.apps import apps
-from django.http.response import FileResponse, HttpResponseBase
+from django.core.files.storage import default_storage
+from django.http.response import (
+    FileResponse,
+    HttpResponseBase,
+    StreamingHttpResponse,
+)
 from drf_yasg import openapi
 from rest_framework import status
 from rest_framework.request import Request
@@ -12,9 +18,12 @@ from rest_framework.response import Response
 
 from core.common.exceptions import UnprocessedEntityException
 from core.data_exchange import tasks
-from core.data_exchange.exceptions import DataImportException
+from core.data_exchange.exceptions import DataImportException, RowError
+from core.data_exchange.includes import import_cache
+from core.data_exchange.includes.record_exporter import CSV_FLUSH_SIZE
 from core.data_exchange.includes.record_importer import RecordImporter
 from core.data_exchange.includes.types import FileFormats
+from core.data_exchange.includes.utils import get_class_path
 from core.data_exchange.models import ImportTask
 from core.data_exchange.serializers import (
     BaseImportedDataSerializer,
@@ -32,11 +41,21 @@ export_template_file_format = openapi.Parameter(
     enum=[member.value for member in DataExchangeFileFormatSerializer.allowed_formats],
 )
 
+# Response header that holds the number of errors found by an import dry run
+ERROR_COUNT_HEADER = "X-Import-Errors"
+
+ERROR_REPORT_COLUMNS = ["row_number", "title", "description"]
+
 
 class GenericModelImporter:
     """
     Provides a high level abstraction over the core RecordImport class and adds functionality for asynchronous
     and synchronous data import. Also, helps to streamline the client code in the views.
+
+    Requests with dry_run are only parsed and validated, and the errors found are streamed back as a CSV report.
+    The rows validated by a dry run are cached, so a synchronous import of the same file, which is typically the
+    next request, imports them without reading and validating the file again.
+    See module: core.data_exchange.includes.import_cache
     """
 
     def __init__(
@@ -46,6 +65,8 @@ class GenericModelImporter:
         import_data_serializer_class: Type[BaseImportedDataSerializer],
         is_async: bool,
         serializer_context: Optional[dict] = None,
+        chunked: bool = False,
+        max_sync_file_size: Optional[int] = None,
     ):
         """
         Parameters
@@ -56,6 +77,9 @@ class GenericModelImporter:
           data
         :param is_async: Flag to determine if the import should be done synchronously or asynchronously
         :param serializer_context: Optional context data that will be passed to the serializers
+        :param chunked: Flag to import asynchronous imports in resumable chunks
+        :param max_sync_file_size: Size in bytes above which files of synchronous imports are imported
+          asynchronously instead
         """
         self.request = request
         self.import_serializer_class = import_serializer_class
@@ -66,6 +90,8 @@ class GenericModelImporter:
             "cluster_staff_id": self.request.user.id,
         }
         self.is_async = is_async
+        self.chunked = chunked
+        self.max_sync_file_size = max_sync_file_size
         self._import_data: dict[str, Any] = {}
 
     def get_response(self) -> HttpResponseBase:
@@ -77,17 +103,23 @@ class GenericModelImporter:
         return self._get_import_response()
 
     def _get_import_response(self) -> HttpResponseBase:
-        if self.is_async:
+        if self._import_data.get("dry_run"):
+            return self._get_dry_run_response()
+
+        if self._is_async:
             return self._import_asynchronously()
 
         # Going synchronous...
+        cache_key = self._get_cache_key()
         try:
             importer = RecordImporter(
                 import_data=self._import_data,
                 import_serializer_class=self.import_serializer_class,
                 serializer_context=self.serializer_context,
+                validated_rows=import_cache.get_validated_rows(cache_key),
             )
             result = importer.import_()
+            import_cache.delete_validated_rows(cache_key)
             if result.data:
                 return Response(result.data, status=status.HTTP_200_OK)
             if result.errors:
@@ -99,24 +131,82 @@ class GenericModelImporter:
         except DataImportException as error:
             raise UnprocessedEntityException(detail=str(error))
 
+    @property
+    def _is_async(self) -> bool:
+        if self.is_async:
+            return True
+        return (
+            self.max_sync_file_size is not None
+            and self._import_data["file"].size > self.max_sync_file_size
+        )
+
+    def _get_dry_run_response(self) -> StreamingHttpResponse:
+        """
+        Validates the file without importing it, and caches the validated rows if the import serializer supports
+        it. Dry runs are always synchronous
+        """
+        # The file is closed once it is read
+        cache_key = self._get_cache_key()
+        try:
+            importer = RecordImporter(
+                import_data=self._import_data,
+                import_serializer_class=self.import_serializer_class,
+                serializer_context=self.serializer_context,
+            )
+            result = importer.validate()
+        except DataImportException as error:
+            raise UnprocessedEntityException(detail=str(error))
+
+        if importer.validated_rows is not None:
+            import_cache.cache_validated_rows(cache_key, importer.validated_rows)
+        response = StreamingHttpResponse(
+            _iter_error_report(result.errors),
+            content_type="text/csv",
+            status=(
+                status.HTTP_400_BAD_REQUEST if result.errors else status.HTTP_200_OK
+            ),
+        )
+        response["Content-Disposition"] = 'attachment; filename="import_errors.csv"'
+        response[ERROR_COUNT_HEADER] = len(result.errors)
+        return response
+
+    def _get_cache_key(self) -> str:
+        return import_cache.get_cache_key(
+            import_cache.get_file_hash(self._import_data["file"]),
+            self.import_serializer_class,
+            self._import_data,
+            self.serializer_context,
+        )
+
     def _import_asynchronously(self) -> Response:
         task = self._create_import_task()
-        tasks.import_records.apply_async(
+        import_task = (
+            tasks.import_records_in_chunks if self.chunked else tasks.import_records
+        )
+        import_task.apply_async(
             kwargs={
-                "import_data": self._import_data,
-                "import_serializer_class": self.import_serializer_class,
+                "import_data": self._import_data
+                | {"file": self._store_import_file(task)},
+                "import_serializer_class": get_class_path(self.import_serializer_class),
                 "serializer_context": self.serializer_context,
-                "task": task,
+                "task_id": task.id,
             },
-            serializer="pickle",
-            ignore_result=self.is_async,
+            serializer="json",
         )
         return Response(
             ImportTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED
         )
 
+    def _store_import_file(self, task: ImportTask) -> str:
+        """
+        Saves the imported file in the default storage, so the import task receives its name rather than its
+        content and a resumed import can read it again
+        """
+        file = self._import_data["file"]
+        return default_storage.save(f"imports/{task.id}/{Path(file.name).name}", file)
+
     def _create_import_task(self) -> ImportTask:
-        AccountUser = apps.get_model("users", "AccountUser")
+        AccountUser = apps.get_model("accounts", "AccountUser")
         return ImportTask.create_in_progress_task(
             content_type=self.import_serializer_class.get_content_type(),
             owner_id=self.request.user.get_owner().id,
@@ -151,3 +241,18 @@ class GenericModelImporter:
             )
             response["Content-Type"] = mimetype
             return response
+
+
+def _iter_error_report(errors: list[RowError]) -> Iterator[bytes]:
+    """Encodes row errors as CSV about CSV_FLUSH_SIZE characters at a time"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ERROR_REPORT_COLUMNS)
+    for error in errors:
+        writer.writerow([error.row_number, error.title or "", error.description])
+        if buffer.tell() >= CSV_FLUSH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,73 @@
+"""
+Cache of the rows validated by import dry runs.
+
+A dry run caches the rows validated by the import serializer under a key made of the hash of the file's content and
+the hash of the import options and serializer context. An import of the same file with the same options then uses
+the cached rows instead of reading and validating the file again. The uploaded file is hashed again on import, so
+cached rows are only used for the exact file they were validated from.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+
+from core.data_exchange.includes.utils import get_class_path
+
+# Seconds validated rows stay cached after a dry run
+DEFAULT_DRY_RUN_TTL = 60 * 60
+
+# Import options that do not change how the file is parsed and validated
+UNCACHED_IMPORT_OPTIONS = ("file", "dry_run")
+
+
+def get_file_hash(file: File) -> str:
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def get_cache_key(
+    file_hash: str,
+    import_serializer_class: Type,
+    import_data: dict[str, Any],
+    serializer_context: dict[str, Any],
+) -> str:
+    """
+    Returns the cache key of the rows validated from a file. The serializer context is part of the key, so rows
+    validated for a user or cluster are never imported for another
+    """
+    options = {
+        name: value
+        for name, value in import_data.items()
+        if name not in UNCACHED_IMPORT_OPTIONS
+    }
+    options_hash = hashlib.sha256(
+        json.dumps(
+            [get_class_path(import_serializer_class), options, serializer_context],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+    return f"data_exchange:import:{file_hash}:{options_hash}"
+
+
+def cache_validated_rows(cache_key: str, validated_rows: Any):
+    cache.set(
+        cache_key,
+        validated_rows,
+        getattr(settings, "DATA_IMPORT_DRY_RUN_TTL", DEFAULT_DRY_RUN_TTL),
+    )
+
+
+def get_validated_rows(cache_key: str) -> Optional[Any]:
+    return cache.get(cache_key)
+
+
+def delete_validated_rows(cache_key: str):
+    cache.delete(cache_key)
@@ -1,58 +1,90 @@
+import csv
+import json
 import mimetypes
+import shutil
 import string
-from io import BytesIO
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from itertools import islice
 from pathlib import Path
-from typing import Type, Optional
+from typing import IO, Any, Callable, Iterator, Type, Optional
 from uuid import UUID
 
-import pandas as pd
 from django.conf import settings
-from django.db.models import Model, QuerySet
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
 from django.utils import timezone
 from django.utils.crypto import get_random_string
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
+from rest_framework import serializers
 from rest_framework.serializers import Serializer
 
 from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.exported_files import (
+    get_file_key,
+    save_exported_file,
+)
 from core.data_exchange.includes.types import (
     FileFormats,
     StorageLocations,
     ExportOutput,
 )
-from core.data_exchange.includes.utils import encode_output_buffer
+from core.data_exchange.includes.utils import encode_output_file
 
 TEMP_DIR = settings.TEMP_DIR
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+DEFAULT_EXPORT_CHUNK_SIZE = 2_000
+
+# The exported file spills from memory to disk beyond this size
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+# CSV rows are written to the exported file or response about this many characters at a time
+CSV_FLUSH_SIZE = 64 * 1024
+
+FILE_SUFFIXES = {
+    FileFormats.CSV: ".csv",
+    FileFormats.XLSX: ".xlsx",
+    FileFormats.PARQUET: ".parquet",
+    FileFormats.FEATHER: ".feather",
+}
+mimetypes.add_type("application/vnd.apache.parquet", ".parquet")
+mimetypes.add_type("application/vnd.apache.arrow.file", ".feather")
+
 
 class RecordExporter:
     """
     Generic data exporter for exporting model queryset results using a serializer with support for CSV and XLSX files.
     Output can be stored locally or to an external service.
+
+    The queryset is read with a server-side cursor and serialized a batch of rows at a time. Rows are written as they
+    are serialized to a spooled temporary file, so memory use stays flat however many records are exported.
     """
 
     def __init__(
         self,
-        model_class: Type[Model],
-        queryset_dict: dict,
+        export_spec: ExportQuerySpec,
         serializer_class: Type[Serializer],
-        serializer_extra_fields: Optional[list[str]] = None,
         output_format: FileFormats = FileFormats.CSV,
         storage_location: StorageLocations = StorageLocations.EXTERNAL,
         owner_id: UUID = None,
         always_on_external=True,
+        chunk_size: Optional[int] = None,
     ):
         """
         Parameters
-        :param model_class: The Django model class that will be exported
-        :param queryset_dict: The original queryset dictionary derived from Queryset.__dict__, which is used to
-          rebuild the original queryset with cached select_related and prefetch_related attributes
+        :param export_spec: The description of the exported records, from which the queryset is rebuilt, and of
+          the extra field names that will be included in the export in addition to the base field names for the
+          exported model
         :param serializer_class: A Serializer subclass that will receive the queryset for serialization as
           a list (with parameter many=True). The serializer is responsible to transforming the queryset to a list
           of data that will then be written to the output CSV or XLSX file
-        :param serializer_extra_fields: Optional list of extra field names that will be included in the export in
-          addition to the base field names for the exported model
         :param output_format: The format of the exported field.
           Enum - core.data_exchange.includes.types.FileFormats
         :param storage_location: The target location of the exported result file.
@@ -60,6 +92,8 @@ class RecordExporter:
         :param owner_id: The account's owner id
         :param always_on_external: Force all exports to be store on external in addition to any other target storage
           location specified
+        :param chunk_size: The number of records read from the database and serialized at a time. Defaults to the
+          DATA_EXPORT_CHUNK_SIZE setting
         """
         if (
             always_on_external or storage_location == StorageLocations.EXTERNAL
@@ -67,16 +101,19 @@ class RecordExporter:
             raise DataExportException(
                 _("owner_id is required to store files on external")
             )
-        self.model_class = model_class
-        self.queryset_dict = queryset_dict
+        self.export_spec = export_spec
+        self.model_class = export_spec.model_class
         self.serializer_class = serializer_class
-        self.serializer_extra_fields: list[str] = serializer_extra_fields
         self.output_format = output_format
         self.storage_location = storage_location
         self.owner_id = owner_id
         self.always_on_external = always_on_external
-        self._output_rows: list[dict] = []
-        self._buffer: BytesIO = BytesIO()
+        self.chunk_size = chunk_size or getattr(
+            settings, "DATA_EXPORT_CHUNK_SIZE", DEFAULT_EXPORT_CHUNK_SIZE
+        )
+        self._file: IO[bytes] = tempfile.SpooledTemporaryFile(
+            max_size=EXPORT_SPOOL_SIZE
+        )
         self._now = timezone.now()
         allowed_chars = string.ascii_lowercase + string.digits
         self._random_file_name_jitter = get_random_string(
@@ -91,7 +128,7 @@ class RecordExporter:
         """
         model_class_name = self.model_class.__name__.title()
         date_time = self._now.strftime("%Y-%m-%d_%H-%M-%S")  # E.g. 2020-05-10_23-04-45
-        suffix = ".csv" if self.output_format == FileFormats.CSV else ".xlsx"
+        suffix = FILE_SUFFIXES[self.output_format]
         return f"{model_class_name}_{date_time}_{self._random_file_name_jitter}{suffix}"
 
     @property
@@ -99,67 +136,276 @@ class RecordExporter:
         return mimetypes.guess_type(self._file_name)[0]
 
     def export(self) -> ExportOutput:
-        self._write_rows()
-        self._write_spreadsheet_to_buffer()
-        external_file_id = None
-        common = {
-            "file_name": self._file_name,
-            "mime_type": self._file_mimetype,
-        }
-        if self.always_on_external:
-            external_file_id = self._save_to_external_service()
-        if self.storage_location == StorageLocations.MEMORY_FILE:
-            return ExportOutput(
-                file=encode_output_buffer(self._buffer),
-                external_file_id=external_file_id,
-                **common,
+        """
+        Writes the exported file and returns a reference to it. Memory files are returned Base64 encoded and
+        should only be used for small exports.
+        """
+        try:
+            self._write_file()
+            external_file_key = None
+            common = {
+                "file_name": self._file_name,
+                "mime_type": self._file_mimetype,
+            }
+            if self.always_on_external:
+                external_file_key = self._save_to_external_service()
+            if self.storage_location == StorageLocations.MEMORY_FILE:
+                return ExportOutput(
+                    file=self._encode_file(),
+                    external_file_key=external_file_key,
+                    **common,
+                )
+            if self.storage_location == StorageLocations.DISK_FILE:
+                return ExportOutput(
+                    file=self._save_to_local_disk(),
+                    external_file_key=external_file_key,
+                    **common,
+                )
+            if self.storage_location == StorageLocations.EXTERNAL:
+                external_file_key = (
+                    external_file_key or self._save_to_external_service()
+                )
+                return ExportOutput(
+                    file=external_file_key,
+                    external_file_key=external_file_key,
+                    **common,
+                )
+        finally:
+            self._file.close()
+
+    def get_response(self) -> HttpResponseBase:
+        """
+        Exports in the requesting process. CSV rows are streamed to the client as they are serialized, and XLSX files
+        are sent once the workbook is complete.
+        """
+        if self.output_format == FileFormats.CSV:
+            self._file.close()
+            response = StreamingHttpResponse(
+                self._iter_csv(self._iter_rows()), content_type=self._file_mimetype
             )
-        if self.storage_location == StorageLocations.DISK_FILE:
-            return ExportOutput(
-                file=self._save_to_local_disk(),
-                external_file_id=external_file_id,
-                **common,
+            response["Content-Disposition"] = (
+                f'attachment; filename="{self._file_name}"'
             )
-        if self.storage_location == StorageLocations.EXTERNAL:
-            external_file_id = self._save_to_external_service()
-            return ExportOutput(
-                file=external_file_id, external_file_id=external_file_id, **common
+            return response
+        self._write_file()
+        self._file.seek(0)
+        # The response closes the file once it is sent
+        return FileResponse(
+            self._file,
+            as_attachment=True,
+            filename=self._file_name,
+            content_type=self._file_mimetype,
+        )
+
+    def _write_file(self):
+        rows = self._iter_rows()
+        if self.output_format == FileFormats.CSV:
+            self._write_csv(rows)
+        elif self.output_format == FileFormats.XLSX:
+            self._write_xlsx(rows)
+        elif self.output_format in (FileFormats.PARQUET, FileFormats.FEATHER):
+            self._write_arrow(self._iter_batches())
+
+    def _iter_batches(self) -> Iterator[list[dict]]:
+        """Reads the queryset with a server-side cursor and serializes it a batch at a time"""
+        records = self._rebuild_queryset().iterator(chunk_size=self.chunk_size)
+        while batch := list(islice(records, self.chunk_size)):
+            serializer = self.serializer_class(
+                batch,
+                many=True,
+                extra_fields=self.export_spec.extra_fields,
+                context={"owner_id": self.owner_id},
             )
+            yield serializer.data
 
-    def _write_rows(self):
-        queryset = self._rebuild_queryset()
-        serializer = self.serializer_class(
-            queryset,
-            many=True,
-            extra_fields=self.serializer_extra_fields,
-            context={"owner_id": self.owner_id},
-        )
-        self._output_rows.extend(serializer.data)
+    def _iter_rows(self) -> Iterator[dict]:
+        for rows in self._iter_batches():
+            yield from rows
 
     def _rebuild_queryset(self) -> QuerySet:
-        queryset = self.model_class.objects.all()
-        queryset.__dict__ = self.queryset_dict
-        return queryset
+        return self.export_spec.build_queryset()
 
-    def _write_spreadsheet_to_buffer(self):
-        data_frame = pd.DataFrame.from_records(data=self._output_rows)
-        if self.output_format == FileFormats.CSV:
-            data_frame.to_csv(
-                path_or_buf=self._buffer, index=False, float_format="%.2f"
+    @staticmethod
+    def _get_columns(row: dict) -> list[str]:
+        # The columns are those of the first row. Missing values of later rows are left blank
+        return list(row.keys())
+
+    def _iter_csv(self, rows: Iterator[dict]) -> Iterator[bytes]:
+        """Encodes rows as CSV about CSV_FLUSH_SIZE characters at a time"""
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        columns = None
+        for row in rows:
+            if columns is None:
+                columns = self._get_columns(row)
+                writer.writerow(columns)
+            writer.writerow([_format_csv_value(row.get(column)) for column in columns])
+            if buffer.tell() >= CSV_FLUSH_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    def _write_csv(self, rows: Iterator[dict]):
+        for chunk in self._iter_csv(rows):
+            self._file.write(chunk)
+
+    def _write_xlsx(self, rows: Iterator[dict]):
+        from openpyxl import Workbook
+
+        # Write-only workbooks keep rows on disk until the workbook is saved
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title="Sheet1")
+        columns = None
+        for row in rows:
+            if columns is None:
+                columns = self._get_columns(row)
+                worksheet.append(columns)
+            worksheet.append(
+                [_format_xlsx_value(row.get(column)) for column in columns]
             )
-        elif self.output_format == FileFormats.XLSX:
-            data_frame.to_excel(
-                excel_writer=self._buffer,
-                sheet_name="Sheet1",
-                index=False,
-                float_format="%.2f",
+        workbook.save(self._file)
+
+    def _write_arrow(self, batches: Iterator[list[dict]]):
+        """
+        Writes Parquet or Arrow IPC (Feather) files, a row group or record batch per batch of rows. Columns of
+        serializer fields with a known type are typed, and other columns are exported as text, since a type inferred
+        from one batch may not fit the values of the next
+
+        :raises:
+            DataExportException: If values cannot be converted to the type of their column
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        column_types = _get_arrow_column_types(
+            self.serializer_class(
+                extra_fields=self.export_spec.extra_fields,
+                context={"owner_id": self.owner_id},
             )
+        )
+        untyped = (pa.string(), _format_arrow_value)
+        schema = None
+        writer = None
+        for rows in batches:
+            if schema is None:
+                columns = self._get_columns(rows[0])
+                schema = pa.schema(
+                    [
+                        (column, column_types.get(column, untyped)[0])
+                        for column in columns
+                    ]
+                )
+                if self.output_format == FileFormats.PARQUET:
+                    writer = pq.ParquetWriter(self._file, schema)
+                else:
+                    writer = pa.ipc.new_file(self._file, schema)
+            try:
+                data = {}
+                for column in columns:
+                    convert = column_types.get(column, untyped)[1]
+                    data[column] = [
+                        None if row.get(column) is None else convert(row.get(column))
+                        for row in rows
+                    ]
+                table = pa.Table.from_pydict(data, schema=schema)
+            except (pa.ArrowException, ArithmeticError, TypeError, ValueError) as e:
+                raise DataExportException(
+                    _("Could not export the records as %(format)s: %(error)s")
+                    % {"format": self.output_format, "error": e}
+                ) from e
+            writer.write_table(table)
+
+        if writer is None:
+            # Nothing was exported, but the file must still be a valid Parquet or Arrow file
+            schema = pa.schema([])
+            if self.output_format == FileFormats.PARQUET:
+                writer = pq.ParquetWriter(self._file, schema)
+            else:
+                writer = pa.ipc.new_file(self._file, schema)
+        writer.close()
+
+    def _encode_file(self) -> str:
+        self._file.seek(0)
+        return encode_output_file(self._file)
 
     def _save_to_local_disk(self) -> Path:
         # This is located in the celery process's file system, not the application's file system.
         path = TEMP_DIR / self._file_name
+        self._file.seek(0)
         with path.open("ab") as writer:
-            writer.write(self._buffer.getvalue())
+            shutil.copyfileobj(self._file, writer)
         return path
 
-    def _save_to_external_service(self) -> Optional[UUID]: ...
+    def _save_to_external_service(self) -> str:
+        """Saves the file to the file storage and returns its key"""
+        return save_exported_file(
+            self._file, get_file_key(self.owner_id, self._file_name)
+        )
+
+
+def _format_csv_value(value: Any) -> Any:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return value
+
+
+def _format_xlsx_value(value: Any) -> Any:
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel has no time zones
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+def _format_arrow_value(value: Any) -> str:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _get_arrow_column_types(serializer: Serializer) -> dict[str, tuple[Any, Callable]]:
+    """
+    Maps the names of serializer fields with a known Arrow type to the type and a function that converts the field's
+    representation to a value of the type
+    """
+    import pyarrow as pa
+
+    timezone_name = timezone.get_current_timezone_name()
+    column_types = {}
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.DecimalField):
+            # Arrow decimals have a fixed precision. Keep two places for fields with none, like exported amounts
+            decimal_places = 2 if field.decimal_places is None else field.decimal_places
+            precision = field.max_digits or 38
+            column_types[name] = (
+                pa.decimal128(precision, decimal_places),
+                lambda value: Decimal(str(value)),
+            )
+        elif isinstance(field, serializers.DateTimeField):
+            column_types[name] = (
+                pa.timestamp("us", tz=timezone_name),
+                lambda value: (
+                    value if isinstance(value, datetime) else parse_datetime(value)
+                ),
+            )
+        elif isinstance(field, serializers.DateField):
+            column_types[name] = (
+                pa.date32(),
+                lambda value: value if isinstance(value, date) else parse_date(value),
+            )
+        elif isinstance(
+            field, (serializers.UUIDField, serializers.PrimaryKeyRelatedField)
+        ):
+            column_types[name] = (pa.string(), str)
+        elif isinstance(field, serializers.BooleanField):
+            column_types[name] = (pa.bool_(), bool)
+        elif isinstance(field, serializers.IntegerField):
+            column_types[name] = (pa.int64(), int)
+        elif isinstance(field, serializers.FloatField):
+            column_types[name] = (pa.float64(), float)
+    return column_types
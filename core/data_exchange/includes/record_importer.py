@@ -1,17 +1,24 @@
 import mimetypes
-from typing import Any, Mapping, Optional, Type
+from typing import Any, Iterator, Mapping, Optional, Type
 
+import openpyxl
 import pandas as pd
+from django.conf import settings
 from django.core.files import File
+from django.db import transaction
 from django.utils.translation import gettext as _
 
 from core.data_exchange.exceptions import (
     UnknownFileFormatException,
     DataImportException,
+    RowError,
 )
 from core.data_exchange.includes.types import FileFormats, ImportResult
+from core.data_exchange.models import ImportTask
 from core.data_exchange.serializers import DynamicFieldsSerializer
 
+DEFAULT_IMPORT_CHUNK_SIZE = 5_000
+
 
 class RecordImporter:
     """
@@ -24,6 +31,8 @@ class RecordImporter:
         import_data: dict[str, Any],
         import_serializer_class: Type[DynamicFieldsSerializer],
         serializer_context: Optional[dict] = None,
+        chunk_size: Optional[int] = None,
+        validated_rows: Optional[Any] = None,
     ):
         """
         Parameters
@@ -32,6 +41,10 @@ class RecordImporter:
         :param import_serializer_class: A serializer class where the imported data will be loaded, if the file
           contains an invalid rows
         :param serializer_context: Any extra context data that should be passed to the serializer
+        :param chunk_size: The number of rows in each chunk of a chunked import. Defaults to the
+          DATA_IMPORT_CHUNK_SIZE setting
+        :param validated_rows: Rows validated by a dry run of the same file. If given, import_ does not read the
+          file and the serializer imports these rows
         """
         self.import_data = import_data
         self.import_serializer_class = import_serializer_class
@@ -40,6 +53,10 @@ class RecordImporter:
         self._file: File = self.import_data["file"]
         self._has_headers: bool = self.import_data["has_headers"]
         self._column_mapping: dict[str, Any] = self.import_data["column_mapping"]
+        self.chunk_size = chunk_size or getattr(
+            settings, "DATA_IMPORT_CHUNK_SIZE", DEFAULT_IMPORT_CHUNK_SIZE
+        )
+        self.validated_rows = validated_rows
 
     def import_(self) -> ImportResult:
         """
@@ -50,47 +67,200 @@ class RecordImporter:
             using the file name
             DataImportException: If no data is found in the imported file
         """
-        data = self._dataframe_to_dict()
-        if not data:
+        # Rows validated by a dry run are imported without reading the file
+        data = [] if self.validated_rows is not None else self._read_data()
+        serializer = self._get_serializer(data)
+
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        # Django's temporary file is implemented using Python's tempfile.NamedTemporaryFile class. So, before we
+        # return, we need to close the file, so it's deleted from the file system immediately.
+        self._file.close()
+
+        return result
+
+    def validate(self) -> ImportResult:
+        """
+        Reads the file and validates its rows with the import serializer like import_, without saving them.
+        Validation runs in a transaction that is rolled back, so nothing it writes is kept. If the rows are valid,
+        the rows returned by the serializer's get_validated_rows are kept in validated_rows.
+
+        The returned result holds the errors found but not the imported data.
+        :raises:
+            UnknownFileFormatException: If the file's type is not specified, and it cannot be determined
+            using the file name
+            DataImportException: If no data is found in the imported file
+        """
+        data = self._read_data()
+        serializer = self._get_serializer(data)
+        with transaction.atomic():
+            is_valid = serializer.is_valid()
+            transaction.set_rollback(True)
+        self._file.close()
+
+        errors = (
+            serializer.get_row_errors()
+            if is_valid
+            else self._get_row_errors(serializer, row_offset=0)
+        )
+        self.validated_rows = serializer.get_validated_rows() if is_valid else None
+        return ImportResult(
+            errors=errors,
+            data=[],
+            object_ids=[],
+            total_skipped=len({error.row_number for error in errors}),
+        )
+
+    def import_in_chunks(self, task: ImportTask) -> ImportResult:
+        """
+        Reads the file in chunks of 'chunk_size' rows and has a new instance of the import serializer class
+        validate and save each chunk. Each chunk is saved in the same transaction that records it on the task, so
+        only one chunk of rows is held in memory and an import interrupted by a worker restart resumes after the
+        last committed chunk. Rows of a chunk that fails validation are skipped and their errors recorded.
+
+        The returned result holds the errors and object ids of every chunk but not the imported data.
+        :raises:
+            UnknownFileFormatException: If the file's type is not specified, and it cannot be determined
+            using the file name
+            DataImportException: If no data is found in the imported file or the task is deleted
+        """
+        task.refresh_from_db()
+        total_chunks = 0
+        for chunk_number, dataframe in enumerate(self._iter_dataframes()):
+            total_chunks += 1
+            if chunk_number < task.committed_chunks:
+                continue
+
+            data = self._rename_columns(dataframe).to_dict(orient="records")
+            with transaction.atomic():
+                result = self._import_chunk(data, row_offset=chunk_number * self.chunk_size)
+                task.record_chunk(result, total_rows=len(data))
+        self._file.close()
+
+        if not total_chunks:
             raise DataImportException(
                 "The imported file does not contain any valid data"
             )
+        return ImportResult(
+            errors=[RowError(**error) for error in task.errors],
+            data=[],
+            object_ids=task.imported_object_ids,
+            total_skipped=task.total_skipped,
+        )
 
+    def _import_chunk(self, data: list[Mapping[str, Any]], row_offset: int) -> ImportResult:
         serializer = self.import_serializer_class(
             data={"data": data},
             import_data=self.import_data,
+            context=self.serializer_context | {"row_offset": row_offset},
+        )
+        if serializer.is_valid():
+            return serializer.save()
+
+        errors = self._get_row_errors(serializer, row_offset)
+        return ImportResult(errors=errors, data=[], object_ids=[], total_skipped=len(data))
+
+    def _get_serializer(self, data: list[Mapping[str, Any]]) -> DynamicFieldsSerializer:
+        return self.import_serializer_class(
+            data={"data": data},
+            import_data=self.import_data,
+            validated_rows=self.validated_rows,
             context=self.serializer_context or {},
         )
 
-        serializer.is_valid(raise_exception=True)
-        result = serializer.save()
-        # Django's temporary file is implemented using Python's tempfile.NamedTemporaryFile class. So, before we
-        # return, we need to close the file, so it's deleted from the file system immediately.
-        self._file.close()
+    def _get_row_errors(self, serializer: DynamicFieldsSerializer, row_offset: int) -> list[RowError]:
+        """Returns the row errors of a serializer that failed validation"""
+        return serializer.get_row_errors() or [
+            RowError(
+                row_number=row_offset + (2 if self._has_headers else 1),
+                description=str(serializer.errors),
+            )
+        ]
 
-        return result
+    def _read_data(self) -> list[Mapping[str, Any]]:
+        data = self._dataframe_to_dict()
+        if not data:
+            raise DataImportException(
+                "The imported file does not contain any valid data"
+            )
+        return data
 
     def _dataframe_to_dict(self) -> list[Mapping[str, Any]]:
-        dataframe = self._file_to_dataframe()
+        return self._rename_columns(self._file_to_dataframe()).to_dict(orient="records")
+
+    def _rename_columns(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         if self._has_headers:
-            dataframe.rename(columns=self._column_mapping, inplace=True)
-        else:
-            # Pandas require that column header indexes be ints. Here, we need to cast the string keys to ints
-            # e.g. { "1" : "firstname" } -> { 1: "firstname" }
-            columns = {
-                int(column): self._column_mapping[column]
-                for column in self._column_mapping
-            }
-            dataframe.rename(columns=columns, inplace=True)
-
-        return dataframe.to_dict(orient="records")
+            return dataframe.rename(columns=self._column_mapping)
 
-    def _file_to_dataframe(self) -> pd.DataFrame:
+        # Pandas require that column header indexes be ints. Here, we need to cast the string keys to ints
+        # e.g. { "1" : "firstname" } -> { 1: "firstname" }
+        columns = {
+            int(column): self._column_mapping[column]
+            for column in self._column_mapping
+        }
+        return dataframe.rename(columns=columns)
+
+    def _get_columns(self) -> list:
         if self._has_headers:
-            columns = list(self._column_mapping.keys())
-        else:
-            columns = list(map(int, list(self._column_mapping.keys())))
+            return list(self._column_mapping.keys())
+        return list(map(int, list(self._column_mapping.keys())))
 
+    def _iter_dataframes(self) -> Iterator[pd.DataFrame]:
+        """
+        Yields the file's rows as dataframes of at most 'chunk_size' rows
+        """
+        columns = self._get_columns()
+        file_format = self._get_file_format()
+        try:
+            if file_format == FileFormats.CSV:
+                chunks = pd.read_csv(
+                    self._file,
+                    usecols=columns,
+                    header="infer" if self._has_headers else None,
+                    dtype=str,
+                    chunksize=self.chunk_size,
+                )
+                for dataframe in chunks:
+                    yield dataframe.fillna(value="")
+            elif file_format == FileFormats.XLSX:
+                yield from self._iter_excel_dataframes(columns)
+            else:
+                # Legacy workbooks can only be read whole, so they are split after reading
+                dataframe = self._file_to_dataframe()
+                for start in range(0, len(dataframe), self.chunk_size):
+                    yield dataframe.iloc[start : start + self.chunk_size]
+        except ValueError as error:
+            raise DataImportException(error)
+
+    def _iter_excel_dataframes(self, columns: list) -> Iterator[pd.DataFrame]:
+        workbook = openpyxl.load_workbook(self._file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            if self._has_headers:
+                headers = ["" if value is None else str(value) for value in next(rows, ())]
+                missing = [column for column in columns if column not in headers]
+                if missing:
+                    raise ValueError(f"Columns not found in the file - {', '.join(missing)}")
+                indexes = [headers.index(column) for column in columns]
+            else:
+                indexes = columns
+
+            chunk = []
+            for row in rows:
+                values = [row[index] if index < len(row) else None for index in indexes]
+                if all(value is None for value in values):
+                    continue
+                chunk.append(["" if value is None else str(value) for value in values])
+                if len(chunk) == self.chunk_size:
+                    yield pd.DataFrame(chunk, columns=columns, dtype=str)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=columns, dtype=str)
+        finally:
+            workbook.close()
+
+    def _file_to_dataframe(self) -> pd.DataFrame:
+        columns = self._get_columns()
         file_format = self._get_file_format()
         try:
             if file_format == FileFormats.CSV:
@@ -2,7 +2,6 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import Callable, NamedTuple, Optional, TypedDict, TypeVar
-from uuid import UUID
 
 from django.db import models
 
@@ -15,6 +14,17 @@ class FileFormats(models.TextChoices):
     CSV = "CSV"
     XLSX = "XLSX"
     XLS = "XLS"  # Not supported for export
+    PARQUET = "PARQUET"  # Not supported for import
+    FEATHER = "FEATHER"  # Arrow IPC file. Not supported for import
+
+
+IMPORT_FILE_FORMATS = [FileFormats.CSV, FileFormats.XLSX, FileFormats.XLS]
+EXPORT_FILE_FORMATS = [
+    FileFormats.CSV,
+    FileFormats.XLSX,
+    FileFormats.PARQUET,
+    FileFormats.FEATHER,
+]
 
 
 class StorageLocations(str, Enum):
@@ -32,9 +42,9 @@ class StorageLocations(str, Enum):
 
 
 # Return type for the exported file.
-# BytesIO - Returned for in memory file storage
+# str - Base64 encoded file returned for in memory file storage
 # Path - Returned for in disk file
-# UUID - File id returned for file stored in BigDrive
+# str - File key returned for file stored in the file storage
 ExportedFile = TypeVar("ExportedFile", Path, str)
 
 
@@ -42,7 +52,7 @@ class ExportOutput(NamedTuple):
     file: ExportedFile
     file_name: str
     mime_type: str
-    external_file_id: UUID
+    external_file_key: Optional[str]
 
 
 @dataclass(frozen=True, order=False)
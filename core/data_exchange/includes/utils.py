@@ -1,5 +1,10 @@
 import base64
+import json
 from io import BytesIO
+from typing import IO
+
+from django.db import connections
+from django.db.models import QuerySet
 
 
 def encode_output_buffer(buffer: BytesIO) -> str:
@@ -7,7 +12,28 @@ def encode_output_buffer(buffer: BytesIO) -> str:
     return base64.b64encode(buffer.getvalue()).decode()
 
 
+def encode_output_file(file: IO[bytes]) -> str:
+    """Encodes the rest of a file to Base64 string"""
+    return base64.b64encode(file.read()).decode()
+
+
 def decode_output_result(base64_string: str) -> bytes:
     """Decodes Base64 string to bytes"""
     base64_bytes = base64_string.encode("ascii")
     return base64.b64decode(base64_bytes)
+
+
+def get_class_path(cls: type) -> str:
+    """Returns the dotted path of a class, which tasks import with django.utils.module_loading.import_string"""
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Returns the number of rows the query planner expects a queryset to return. PostgreSQL bases the estimate on the
+    table statistics (pg_class.reltuples), so it may be off for recently changed tables. Other databases count
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.count()
+    plan = json.loads(queryset.explain(format="json"))
+    return plan[0]["Plan"]["Plan Rows"]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_exchange", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importtask",
+            name="committed_chunks",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of chunks of a chunked import that have been committed. A resumed import continues from the next chunk",
+                verbose_name="committed chunks",
+            ),
+        ),
+        migrations.AddField(
+            model_name="importtask",
+            name="processed_rows",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of rows of a chunked import processed so far",
+                verbose_name="processed rows",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_exchange", "0002_importtask_chunk_progress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exporttask",
+            name="file_key",
+            field=models.CharField(
+                blank=True,
+                help_text="the key of the exported file in the file storage.",
+                max_length=255,
+                verbose_name="file key",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exporttask",
+            name="external_file_id",
+            field=models.UUIDField(
+                blank=True,
+                help_text="the external file id (AWS/Cloudinary) if the file is stored in external.",
+                null=True,
+                verbose_name="external file id",
+            ),
+        ),
+    ]
@@ -14,9 +14,11 @@ from django.utils.translation import gettext_lazy as _
 
 from core.common.email_sender import TransactionalEmail
 from core.common.models import ObjectHistoryTracker, UUIDPrimaryKey
+from core.data_exchange.exceptions import DataImportException
 
 if TYPE_CHECKING:
     from accounts.models import AccountUser
+    from core.data_exchange.includes.types import ImportResult
 
 logger = logging.getLogger(__name__)
 
@@ -109,11 +111,19 @@ class ExportTask(BaseTask):
     external_file_id = models.UUIDField(
         verbose_name=_("external file id"),
         null=True,
+        blank=True,
         # editable=False,
         help_text=_(
             "the external file id (AWS/Cloudinary) if the file is stored in external."
         ),
     )
+    file_key = models.CharField(
+        verbose_name=_("file key"),
+        max_length=255,
+        blank=True,
+        # editable=False,
+        help_text=_("the key of the exported file in the file storage."),
+    )
 
     sql_query = models.TextField(
         verbose_name=_("sql query"),
@@ -128,7 +138,10 @@ class ExportTask(BaseTask):
         verbose_name_plural = _("export tasks")
 
     def delete(self, using=None, keep_parents=False):
-        # NOTE: remove file from Third-party platform since we'll use either use AWS or Cloudinary
+        from core.data_exchange.includes.exported_files import delete_exported_file
+
+        if self.file_key:
+            delete_exported_file(self.file_key)
         super().delete(using=None, keep_parents=False)
 
     def get_absolute_url(self):
@@ -147,15 +160,16 @@ class ExportTask(BaseTask):
         content_type = ContentType.objects.get_for_model(queryset.model)
         return cls.objects.create(
             owner_id=owner_id,
-            created_by=created_by,
+            created_by_id=created_by,
+            last_modified_by=created_by,
             status=cls.TaskStatuses.IN_PROGRESS,
             content_type=content_type,
             sql_query=str(queryset.query),
             notify_on_success=notify_on_success,
         )
 
-    def mark_as_successful(self, external_file_id: Optional[UUID] = None):
-        self.external_file_id = external_file_id
+    def mark_as_successful(self, file_key: str = ""):
+        self.file_key = file_key
         self.status = BaseTask.TaskStatuses.SUCCESS
         self.completed_at = timezone.now()
         try:
@@ -171,7 +185,7 @@ class ExportTask(BaseTask):
         try:
             # Uses have option to delete tasks. The task may have been deleted before this API
             # is called asynchronously
-            self.save(update_fields=["status", "last_modified_at"])
+            self.save(update_fields=["status"])
         except ObjectDoesNotExist:
             pass
 
@@ -197,6 +211,19 @@ class ImportTask(BaseTask):
         default=0,
         help_text=_("The total number of rows that were fully skipped due to errors"),
     )
+    committed_chunks = models.PositiveIntegerField(
+        verbose_name=_("committed chunks"),
+        default=0,
+        help_text=_(
+            "The number of chunks of a chunked import that have been committed. A resumed import "
+            "continues from the next chunk"
+        ),
+    )
+    processed_rows = models.PositiveIntegerField(
+        verbose_name=_("processed rows"),
+        default=0,
+        help_text=_("The number of rows of a chunked import processed so far"),
+    )
 
     class Meta(BaseTask.Meta):
         verbose_name = _("import task")
@@ -218,6 +245,7 @@ class ImportTask(BaseTask):
         return cls.objects.create(
             owner_id=owner_id,
             created_by=created_by,
+            last_modified_by=created_by.id,
             status=cls.TaskStatuses.IN_PROGRESS,
             content_type=content_type,
             notify_on_success=notify_on_success,
@@ -236,12 +264,34 @@ class ImportTask(BaseTask):
         except ObjectDoesNotExist:
             pass
 
+    def record_chunk(self, result: "ImportResult", total_rows: int):
+        """
+        Records the result of a chunk of a chunked import. This should be called in the transaction
+        that saves the chunk, so the chunk and the task's progress are committed together.
+        :raises:
+            DataImportException: If the task was deleted while the import was in progress
+        """
+        self.committed_chunks += 1
+        self.processed_rows += total_rows
+        self.imported_object_ids = self.imported_object_ids + result.object_ids
+        self.errors = self.errors + result.serialized_errors()
+        self.total_skipped += result.total_skipped
+        updated = type(self).objects.filter(pk=self.pk).update(
+            committed_chunks=self.committed_chunks,
+            processed_rows=self.processed_rows,
+            imported_object_ids=self.imported_object_ids,
+            errors=self.errors,
+            total_skipped=self.total_skipped,
+        )
+        if not updated:
+            raise DataImportException("The import task was deleted")
+
     def mark_as_failed(self, errors: list[dict]):
         self.status = BaseTask.TaskStatuses.FAIL
         self.errors = errors
         try:
             # Users have option to delete tasks. The task may have been deleted before this API
             # is called asynchronously
-            self.save(update_fields=["status", "errors", "last_modified_at"])
+            self.save(update_fields=["status", "errors"])
         except ObjectDoesNotExist:
             pass
@@ -1,12 +1,19 @@
 from pathlib import Path
-from typing import Collection, Optional, Type, cast
+from typing import Any, Collection, Optional, Type, cast
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.files import File
 from rest_framework import serializers
 from rest_framework.fields import Field
 
-from core.data_exchange.includes.types import MAX_IMPORT_FILE_SIZE, FileFormats
+from core.data_exchange.exceptions import DataExportException, RowError
+from core.data_exchange.includes.delta_export import Watermark
+from core.data_exchange.includes.types import (
+    EXPORT_FILE_FORMATS,
+    IMPORT_FILE_FORMATS,
+    MAX_IMPORT_FILE_SIZE,
+    FileFormats,
+)
 from core.data_exchange.models import ExportTask, ImportTask
 
 base_fields = [
@@ -27,7 +34,13 @@ class ExportTaskSerializer(serializers.ModelSerializer):
 class ImportTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = ImportTask
-        fields = base_fields + ["imported_object_ids", "errors", "total_skipped"]
+        fields = base_fields + [
+            "imported_object_ids",
+            "errors",
+            "total_skipped",
+            "committed_chunks",
+            "processed_rows",
+        ]
 
 
 class NotifyOnSuccessSerializer(serializers.Serializer):
@@ -47,9 +60,33 @@ class DataExchangeFileFormatSerializer(serializers.Serializer):
 class BaseExportOptionsSerializer(
     NotifyOnSuccessSerializer, DataExchangeFileFormatSerializer
 ):
+    allowed_formats = EXPORT_FILE_FORMATS
+
+    format = serializers.ChoiceField(
+        [(e.value, e.name) for e in allowed_formats],
+        default=FileFormats.CSV.value,
+        required=False,
+    )
     ids = serializers.ListField(
         child=serializers.UUIDField(), required=False, default=list
     )
+    since = serializers.CharField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text=(
+            "The watermark returned by the previous export, in delta exports. Only records changed since then "
+            "are exported"
+        ),
+    )
+
+    def validate_since(self, value: Optional[str]) -> Optional[str]:
+        if value:
+            try:
+                Watermark.from_token(value)
+            except DataExportException as e:
+                raise serializers.ValidationError(str(e))
+        return value
 
 
 class BaseImportedDataSerializer(serializers.Serializer):
@@ -72,7 +109,7 @@ class BaseImportedDataSerializer(serializers.Serializer):
         ),
     )
     format = serializers.ChoiceField(
-        choices=FileFormats.choices,
+        choices=[(e.value, e.label) for e in IMPORT_FILE_FORMATS],
         required=False,
         help_text=(
             "Optional format of the file. If not provided, the format will be guessed. This will only work "
@@ -90,6 +127,13 @@ class BaseImportedDataSerializer(serializers.Serializer):
         default=True,
         help_text="Should we use the imported data to update data that already exist in your account?",
     )
+    dry_run = serializers.BooleanField(
+        default=False,
+        help_text=(
+            "Parse and validate the file without importing it. The errors found are returned as a CSV report, "
+            "and importing the same file afterwards skips parsing and validating it again"
+        ),
+    )
 
     def validate_file(self, value: File) -> Optional[File]:
         if value.size > MAX_IMPORT_FILE_SIZE:
@@ -135,7 +179,7 @@ class BaseImportedDataSerializer(serializers.Serializer):
                 }
             )
 
-        allowed_suffixes = [suffix.name.lower() for suffix in list(FileFormats)]
+        allowed_suffixes = [suffix.name.lower() for suffix in IMPORT_FILE_FORMATS]
         if suffix and suffix.lower() not in allowed_suffixes:
             raise serializers.ValidationError(
                 {
@@ -169,18 +213,37 @@ class DynamicFieldsSerializer(serializers.Serializer):
         import_data - Serialized data from an instance
           of core.data_exchange.serializers.BaseImportedDataSerializer that holds preferences
           and options for data import
+        validated_rows - Rows returned by get_validated_rows after a dry run of the same file. Serializers that
+          support them use them instead of validating the imported data, which is then empty
         """
         extra_fields = kwargs.pop("extra_fields", ())
         import_data = kwargs.pop("import_data", {})
+        validated_rows = kwargs.pop("validated_rows", None)
         super().__init__(*args, **kwargs)
         self.extra_fields = extra_fields
         self.import_data = import_data
+        self.validated_rows = validated_rows
 
     @classmethod
     def get_content_type(cls) -> ContentType:
         """*Only useful for imports. Return the content type object being imported"""
         raise NotImplementedError
 
+    def get_row_errors(self) -> list[RowError]:
+        """
+        *Only useful for imports. Return the row errors found while validating the imported data. Chunked imports
+        record these errors for a chunk that fails validation
+        """
+        return []
+
+    def get_validated_rows(self) -> Optional[Any]:
+        """
+        *Only useful for imports. Return the rows validated by is_valid, to be cached by an import dry run and
+        passed back as validated_rows to the import of the same file. The value must be picklable. Returns None if
+        the serializer cannot import validated rows, so imports after a dry run validate the file again
+        """
+        return None
+
 
 class BaseExportSerializer(DynamicFieldsSerializer):
     extra_fields = []
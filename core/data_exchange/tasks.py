@@ -1,21 +1,20 @@
 import logging
 from datetime import timedelta
-from typing import Type, Optional, Any
+from typing import Optional, Any
 from uuid import UUID
 
 from celery import shared_task
-from django.db.models import Model
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
 
 from core.data_exchange.exceptions import (
     DataExportException,
     DataImportException,
 )
-
-
-from core.data_exchange.includes.types import ExportOutput, ImportResult
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.types import ExportOutput
 from core.data_exchange.includes.types import StorageLocations, FileFormats
 from core.data_exchange.models import ExportTask, ImportTask
-from core.data_exchange.serializers import DynamicFieldsSerializer
 
 logger = logging.getLogger(__name__)
 EXPORT_TASK_TIME_LIMIT = timedelta(minutes=5).total_seconds()
@@ -28,40 +27,44 @@ IMPORT_TASK_TIME_LIMIT = timedelta(minutes=10).total_seconds()
     autoretry_for=(Exception,),
     retry_backoff=True,
     max_retries=3,
-    serializer="pickle",
+    serializer="json",
     time_limit=EXPORT_TASK_TIME_LIMIT,
 )
 def export_records(
-    model_class: Type[Model],
-    queryset_dict: dict,  # Queryset query string
-    serializer_class: Type[DynamicFieldsSerializer],
-    serializer_extra_fields: Optional[list[str]],
-    task: ExportTask,
-    output_format: FileFormats,
-    storage_location: StorageLocations,
+    export_spec: dict[str, Any],
+    serializer_class: str,
+    task_id: UUID,
+    output_format: str,
+    storage_location: str,
     owner_id: UUID,
     always_on_external=True,
 ) -> Optional[ExportOutput]:
+    """
+    Exports the records described by a serialized core.data_exchange.includes.export_spec.ExportQuerySpec.
+    'serializer_class' is the dotted path of the export serializer class
+    """
     from core.data_exchange.includes.record_exporter import RecordExporter
 
+    task = ExportTask.objects.filter(pk=task_id).first()
+    if task is None:
+        # The task was deleted before the export started
+        return None
+
     try:
         exporter = RecordExporter(
-            model_class=model_class,
-            queryset_dict=queryset_dict,
-            serializer_class=serializer_class,
-            serializer_extra_fields=serializer_extra_fields,
-            output_format=output_format,
-            storage_location=storage_location,
+            export_spec=ExportQuerySpec.from_dict(export_spec),
+            serializer_class=import_string(serializer_class),
+            output_format=FileFormats(output_format),
+            storage_location=StorageLocations(storage_location),
             owner_id=owner_id,
             always_on_external=always_on_external,
         )
         exported_record = exporter.export()
-        task.mark_as_successful(exported_record.external_file_id)
+        task.mark_as_successful(exported_record.external_file_key)
         return exported_record
     except DataExportException as error:
         logger.error(
-            f"Failed for export external file for model class - {model_class.__name__} "
-            f"owner - {owner_id}",
+            f"Failed for export external file for task - {task_id} owner - {owner_id}",
             exc_info=error,
         )
         task.mark_as_failed()
@@ -73,21 +76,32 @@ def export_records(
     autoretry_for=(Exception,),
     retry_backoff=True,
     max_retries=3,
-    serializer="pickle",
+    serializer="json",
     time_limit=IMPORT_TASK_TIME_LIMIT,
 )
 def import_records(
     import_data: dict[str, Any],
-    import_serializer_class: Type[DynamicFieldsSerializer],
+    import_serializer_class: str,
     serializer_context: Optional[dict],
-    task: ImportTask,
-) -> Optional[ImportResult]:
+    task_id: UUID,
+) -> None:
+    """
+    Imports a file saved in the default storage. 'import_data["file"]' is the name of the stored file, which is
+    deleted once the import ends, and 'import_serializer_class' is the dotted path of the import serializer class
+    """
     from core.data_exchange.includes.record_importer import RecordImporter
 
+    task = ImportTask.objects.filter(pk=task_id).first()
+    if task is None:
+        # The task was deleted before the import started
+        default_storage.delete(import_data["file"])
+        return
+
     try:
         importer = RecordImporter(
-            import_data=import_data,
-            import_serializer_class=import_serializer_class,
+            import_data=import_data
+            | {"file": default_storage.open(import_data["file"])},
+            import_serializer_class=import_string(import_serializer_class),
             serializer_context=serializer_context,
         )
         import_result = importer.import_()
@@ -99,10 +113,81 @@ def import_records(
                 errors=import_result.serialized_errors(),
                 total_skipped=import_result.total_skipped,
             )
-        return import_result
     except DataImportException as error:
         logger.error(
-            f"An error occurred while attempting to import data with payload - {import_data}",
+            f"An error occurred while attempting to import data for task - {task_id}",
+            exc_info=error,
+        )
+        task.mark_as_failed(errors=[])
+    except FileNotFoundError as error:
+        # Retrying cannot bring back a file missing from the storage
+        logger.error(
+            f"The imported file of task - {task_id} is not in the file storage",
             exc_info=error,
         )
         task.mark_as_failed(errors=[])
+
+    default_storage.delete(import_data["file"])
+
+
+@shared_task(
+    ignore_result=True,
+    name="import_records_in_chunks",
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=3,
+    serializer="json",
+    # Redelivered after a worker restart, resuming after the last committed chunk
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def import_records_in_chunks(
+    import_data: dict[str, Any],
+    import_serializer_class: str,
+    serializer_context: Optional[dict],
+    task_id: UUID,
+) -> None:
+    """
+    Imports a file saved in the default storage in chunks. 'import_data["file"]' is the name of the stored file,
+    which is deleted once the import ends, and 'import_serializer_class' is the dotted path of the import
+    serializer class.
+    """
+    from core.data_exchange.includes.record_importer import RecordImporter
+
+    task = ImportTask.objects.filter(pk=task_id).first()
+    if task is None:
+        # The task was deleted before the import started
+        default_storage.delete(import_data["file"])
+        return
+
+    try:
+        importer = RecordImporter(
+            import_data=import_data
+            | {"file": default_storage.open(import_data["file"])},
+            import_serializer_class=import_string(import_serializer_class),
+            serializer_context=serializer_context,
+        )
+        import_result = importer.import_in_chunks(task)
+        if import_result.errors and not import_result.object_ids:
+            task.mark_as_failed(errors=import_result.serialized_errors())
+        else:
+            task.mark_as_successful(
+                imported_object_ids=import_result.object_ids,
+                errors=import_result.serialized_errors(),
+                total_skipped=import_result.total_skipped,
+            )
+    except DataImportException as error:
+        logger.error(
+            f"An error occurred while attempting to import data in chunks for task - {task_id}",
+            exc_info=error,
+        )
+        task.mark_as_failed(errors=task.errors)
+    except FileNotFoundError as error:
+        # Retrying cannot bring back a file missing from the storage
+        logger.error(
+            f"The imported file of task - {task_id} is not in the file storage",
+            exc_info=error,
+        )
+        task.mark_as_failed(errors=task.errors)
+
+    default_storage.delete(import_data["file"])
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from core.data_exchange.includes import column_validators
+from core.data_exchange.includes import imported_attribute_validators
+
+
+class ColumnValidatorsTestCases(SimpleTestCase):
+    def _assert_same_as_cell_validator(
+        self, column_validator, cell_validator, values: list[str], **kwargs
+    ):
+        column = pd.Series(values, index=range(2, len(values) + 2))
+        errors, result = column_validator(
+            field_name="field", values=column, error_titles=column, **kwargs
+        )
+
+        expected_errors = []
+        expected_result = []
+        for row_number, value in column.items():
+            cell_errors, cell_result = cell_validator(
+                field_name="field",
+                value=value,
+                row_number=row_number,
+                error_title=value,
+                **kwargs,
+            )
+            expected_errors.extend(cell_errors)
+            expected_result.append(cell_result)
+
+        self.assertListEqual(
+            [error.to_dict() for error in errors],
+            [error.to_dict() for error in expected_errors],
+        )
+        self.assertListEqual(list(result), expected_result)
+        self.assertListEqual(
+            [type(value) for value in result],
+            [type(value) for value in expected_result],
+        )
+
+    def test_validate_generic_name_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.validate_generic_name_column,
+            imported_attribute_validators.validate_generic_name,
+            ["John Doe", "  Jane  ", "", "   ", "a" * 151],
+            max_length=150,
+            min_length=1,
+        )
+
+    def test_validate_email_address_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.validate_email_address_column,
+            imported_attribute_validators.validate_email_address,
+            [
+                "jd@example.com",
+                " JD@EXAMPLE.COM ",
+                "invalid",
+                "jd@localhost",
+                "jd@[127.0.0.1]",
+                "jd@münchen.de",
+                "a" * 95 + "@example.com",
+                "",
+            ],
+        )
+
+    def test_validate_phone_number_column(self):
+        values = ["+2348012345678", "08012345678", "0801 234-5678", "", "+0123", "abc"]
+        self._assert_same_as_cell_validator(
+            column_validators.validate_phone_number_column,
+            imported_attribute_validators.validate_phone_number,
+            values,
+            default_dialing_code="+234",
+        )
+        self._assert_same_as_cell_validator(
+            column_validators.validate_phone_number_column,
+            imported_attribute_validators.validate_phone_number,
+            values,
+            default_dialing_code="",
+        )
+
+    def test_validate_decimal_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.validate_decimal_column,
+            imported_attribute_validators.validate_decimal_field,
+            ["1", "1.5", "0.05", "007.50", "-1", "", "abc", "1.234", "123456789012", "1e3", ".5"],
+            max_value=Decimal("100000"),
+        )
+
+    def test_parse_integer_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.parse_integer_column,
+            imported_attribute_validators.parse_integer,
+            ["1", "-1", "", "1.0", "abc", " 5 "],
+        )
+
+    def test_parse_date_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.parse_date_column,
+            imported_attribute_validators.parse_date_from_string,
+            ["04-25-2022", "4-5-2022", "April 25, 2022", " 04-25-2022", "2022-04-25", "02-30-2022"],
+        )
+
+    def test_parse_datetime_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.parse_datetime_column,
+            imported_attribute_validators.parse_datetime_from_string,
+            ["04-25-2022 22:23", "April 25, 2022 at 11:23 PM", "04-25-2022", ""],
+        )
+
+    def test_parse_boolean_column(self):
+        self._assert_same_as_cell_validator(
+            column_validators.parse_boolean_column,
+            imported_attribute_validators.parse_boolean,
+            ["TRUE", "false", "yes", ""],
+        )
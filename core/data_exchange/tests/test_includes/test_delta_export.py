@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from kombu.utils.json import dumps, loads
+
+from accounts.tests.utils import create_fake_request
+from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.delta_export import (
+    WATERMARK_HEADER,
+    Watermark,
+    filter_changed,
+    get_watermark,
+)
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.generic_model_exporter import GenericModelExporter
+from core.data_exchange.includes.types import FileFormats
+from core.data_exchange.models import ExportTask
+from core.data_exchange.serializers import BaseExportOptionsSerializer
+from core.data_exchange.tests.test_includes.test_record_exporter import (
+    MockExportSerializer,
+)
+from core.data_exchange.tests.utils import create_test_export_task
+from members.tests.utils import create_cluster
+
+
+class DeltaExportTestCases(TestCase):
+    def setUp(self):
+        _, self.admin = create_cluster()
+        content_type = ContentType.objects.get_for_model(ExportTask)
+        tasks = [
+            create_test_export_task(
+                owner_id=self.admin.id,
+                created_by=self.admin,
+                content_type=content_type,
+                last_modified_by=self.admin.id,
+            )[1]
+            for _ in range(3)
+        ]
+        # Two tasks created in the same instant are told apart by their ids
+        self.changed_at = timezone.now() - timedelta(days=1)
+        ExportTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            created_at=self.changed_at
+        )
+        ExportTask.objects.filter(pk=tasks[2].pk).update(
+            created_at=self.changed_at + timedelta(hours=1)
+        )
+        self.queryset = ExportTask.objects.filter(owner_id=self.admin.id)
+        self.tasks = list(filter_changed(self.queryset, field="created_at"))
+
+    def _get_exported_ids(self, since: str = None):
+        request = create_fake_request(self.admin)
+        request.data = {"format": FileFormats.CSV, "since": since}
+        response = GenericModelExporter(
+            request=request,
+            base_queryset=self.queryset,
+            export_serializer_class=MockExportSerializer,
+            options_serializer_class=BaseExportOptionsSerializer,
+            filters={"owner_id": self.admin.id},
+            watermark_field="created_at",
+        ).get_response()
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        return [line.split(",")[0] for line in lines[1:]], response[WATERMARK_HEADER]
+
+    def test_watermark_token(self):
+        watermark = get_watermark(self.queryset, "created_at")
+
+        self.assertEqual(Watermark.from_token(watermark.to_token()), watermark)
+        self.assertEqual(watermark.id, str(self.tasks[2].id))
+        for token in ("not a token", "WyJub3QgYSBkYXRlIiwgIjEiXQ=="):
+            with self.assertRaises(DataExportException):
+                Watermark.from_token(token)
+
+    def test_filter_changed_breaks_ties_by_id(self):
+        since = Watermark(modified_at=self.changed_at, id=str(self.tasks[0].id))
+
+        self.assertListEqual(
+            list(filter_changed(self.queryset, since, field="created_at")),
+            self.tasks[1:],
+        )
+        self.assertListEqual(
+            list(filter_changed(self.queryset, until=since, field="created_at")),
+            self.tasks[:1],
+        )
+
+    def test_export_spec_keeps_the_delta_range(self):
+        since = Watermark(modified_at=self.changed_at, id=str(self.tasks[0].id))
+        until = Watermark(modified_at=self.changed_at, id=str(self.tasks[1].id))
+        spec = ExportQuerySpec.from_queryset(
+            self.queryset,
+            filters={"owner_id": self.admin.id},
+            watermark_field="created_at",
+            since=since,
+            until=until,
+        )
+
+        rebuilt = ExportQuerySpec.from_dict(loads(dumps(spec.to_dict())))
+
+        self.assertListEqual(list(rebuilt.build_queryset()), [self.tasks[1]])
+
+    def test_watermark_leaves_out_recent_changes(self):
+        last = self.tasks[2]
+        ExportTask.objects.filter(pk=last.pk).update(created_at=timezone.now())
+
+        with override_settings(DATA_EXPORT_WATERMARK_LAG=60):
+            self.assertEqual(
+                get_watermark(self.queryset, "created_at").id, str(self.tasks[1].id)
+            )
+        with override_settings(DATA_EXPORT_WATERMARK_LAG=0):
+            self.assertEqual(
+                get_watermark(self.queryset, "created_at").id, str(last.id)
+            )
+
+    @override_settings(DATA_EXPORT_WATERMARK_LAG=0)
+    def test_delta_exports_only_return_new_records(self):
+        ids, watermark = self._get_exported_ids()
+        self.assertListEqual(ids, [str(task.id) for task in self.tasks])
+
+        _, task = create_test_export_task(
+            owner_id=self.admin.id,
+            created_by=self.admin,
+            content_type=ContentType.objects.get_for_model(ExportTask),
+            last_modified_by=self.admin.id,
+        )
+        ids, watermark = self._get_exported_ids(since=watermark)
+        self.assertListEqual(ids, [str(task.id)])
+
+        ids, next_watermark = self._get_exported_ids(since=watermark)
+        self.assertListEqual(ids, [])
+        self.assertEqual(next_watermark, watermark)
@@ -0,0 +1,64 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Prefetch
+from django.test import TestCase
+from kombu.utils.json import dumps, loads
+
+from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.models import ExportTask
+from core.data_exchange.tests.utils import create_test_export_task
+from members.tests.utils import create_cluster
+
+
+class ExportQuerySpecTestCases(TestCase):
+    def setUp(self):
+        _, self.admin = create_cluster()
+        _, other_admin = create_cluster(name="Other Estate")
+        content_type = ContentType.objects.get_for_model(ExportTask)
+        self.tasks = [
+            create_test_export_task(
+                owner_id=owner.id,
+                created_by=owner,
+                content_type=content_type,
+                last_modified_by=owner.id,
+            )[1]
+            for owner in (self.admin, self.admin, self.admin, other_admin)
+        ]
+
+    def test_rebuilds_queryset_from_json(self):
+        queryset = (
+            ExportTask.objects.filter(owner_id=self.admin.id)
+            .select_related("created_by", "content_type")
+            .prefetch_related("created_by__clusters")
+            .order_by("-created_at")
+        )
+        ids = [self.tasks[0].id, self.tasks[2].id, self.tasks[3].id]
+        spec = ExportQuerySpec.from_queryset(
+            queryset,
+            filters={"owner_id": self.admin.id},
+            ids=ids,
+            extra_fields=["sql_query"],
+        )
+
+        rebuilt = ExportQuerySpec.from_dict(loads(dumps(spec.to_dict())))
+
+        self.assertEqual(rebuilt, spec)
+        self.assertEqual(rebuilt.model_class, ExportTask)
+        self.assertListEqual(rebuilt.extra_fields, ["sql_query"])
+        expected = queryset.filter(pk__in=ids)
+        self.assertEqual(str(rebuilt.build_queryset().query), str(expected.query))
+        self.assertListEqual(
+            list(rebuilt.build_queryset()), [self.tasks[2], self.tasks[0]]
+        )
+
+    def test_filtered_queryset_requires_filters(self):
+        with self.assertRaises(DataExportException):
+            ExportQuerySpec.from_queryset(
+                ExportTask.objects.filter(owner_id=self.admin.id)
+            )
+
+    def test_prefetch_objects_are_not_supported(self):
+        with self.assertRaises(DataExportException):
+            ExportQuerySpec.from_queryset(
+                ExportTask.objects.prefetch_related(Prefetch("created_by__clusters"))
+            )
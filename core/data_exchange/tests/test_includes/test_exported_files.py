@@ -0,0 +1,134 @@
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponseRedirect
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import NotFound
+from storages.backends.s3 import S3Storage
+
+from core.data_exchange.includes import exported_files
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.record_exporter import RecordExporter
+from core.data_exchange.includes.types import FileFormats, StorageLocations
+from core.data_exchange.models import ExportTask
+from core.data_exchange.tests.test_includes.test_record_exporter import (
+    MockExportSerializer,
+)
+from core.data_exchange.tests.utils import create_test_export_task
+from members.tests.utils import create_cluster
+
+
+class ExportedFilesTestCases(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        _, self.admin = create_cluster()
+        _, self.task = create_test_export_task(
+            owner_id=self.admin.id,
+            created_by=self.admin,
+            content_type=ContentType.objects.get_for_model(ExportTask),
+            last_modified_by=self.admin.id,
+        )
+
+    def test_export_to_file_storage(self):
+        exporter = RecordExporter(
+            export_spec=ExportQuerySpec.from_queryset(ExportTask.objects.all()),
+            serializer_class=MockExportSerializer,
+            output_format=FileFormats.CSV,
+            storage_location=StorageLocations.EXTERNAL,
+            owner_id=self.admin.id,
+        )
+        export_output = exporter.export()
+
+        self.assertEqual(
+            export_output.file, f"exports/{self.admin.id}/{exporter._file_name}"
+        )
+        self.assertEqual(export_output.external_file_key, export_output.file)
+        with default_storage.open(export_output.file) as file:
+            self.assertEqual(
+                file.read().decode().splitlines()[1].split(","),
+                [str(self.task.id), self.task.status, "0.33"],
+            )
+
+    def test_get_exported_file_response_streams_file(self):
+        file_key = exported_files.save_exported_file(
+            BytesIO(b"id\n1\n"), "exports/owner/Exporttask.csv"
+        )
+
+        response = exported_files.get_exported_file_response(file_key, "text/csv")
+        # Closing the response would close the database connection as the request would be finished
+        self.addCleanup(response.file_to_stream.close)
+
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"id\n1\n")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="Exporttask.csv"'
+        )
+
+    def test_get_exported_file_response_without_file(self):
+        with self.assertRaises(NotFound):
+            exported_files.get_exported_file_response(f"exports/{uuid4()}.csv")
+
+    @override_settings(DATA_EXPORT_PRESIGNED_URLS=True, DATA_EXPORT_URL_EXPIRY=60)
+    def test_get_exported_file_response_redirects_to_presigned_url(self):
+        storage = S3Storage(
+            access_key="access-key",
+            secret_key="secret-key",
+            bucket_name="bucket",
+            region_name="us-east-1",
+        )
+        with mock.patch.object(exported_files, "default_storage", storage):
+            response = exported_files.get_exported_file_response(
+                "exports/owner/Exporttask.csv"
+            )
+
+        self.assertIsInstance(response, HttpResponseRedirect)
+        url = urlparse(response.url)
+        query = parse_qs(url.query)
+        self.assertEqual(url.path, "/exports/owner/Exporttask.csv")
+        self.assertIn("Signature", query)
+        self.assertAlmostEqual(int(query["Expires"][0]), time.time() + 60, delta=5)
+        self.assertEqual(
+            query["response-content-disposition"],
+            ['attachment; filename="Exporttask.csv"'],
+        )
+
+    @override_settings(DATA_EXPORT_PRESIGNED_URLS=True)
+    def test_get_exported_file_response_streams_file_without_signed_urls(self):
+        file_key = exported_files.save_exported_file(
+            BytesIO(b"id\n1\n"), "exports/owner/Exporttask.csv"
+        )
+
+        response = exported_files.get_exported_file_response(file_key)
+        self.addCleanup(response.file_to_stream.close)
+
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"id\n1\n")
+
+    def test_custom_domain_urls_are_not_signed(self):
+        storage = S3Storage(bucket_name="bucket", custom_domain="files.example.com")
+
+        self.assertTrue(exported_files.can_presign_urls(S3Storage()))
+        self.assertFalse(exported_files.can_presign_urls(storage))
+        self.assertFalse(exported_files.can_presign_urls(default_storage))
+
+    def test_deleting_task_deletes_file(self):
+        file_key = exported_files.save_exported_file(
+            BytesIO(b"id\n"), f"exports/{self.admin.id}/Exporttask.csv"
+        )
+        self.task.mark_as_successful(file_key)
+
+        self.task.delete()
+
+        self.assertFalse(default_storage.exists(file_key))
@@ -1,16 +1,29 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from kombu.utils.json import dumps
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 
 from accounts.tests.utils import TestUsers, create_fake_request
+from core.data_exchange.includes import generic_model_exporter
 from core.data_exchange.includes.generic_model_exporter import (
     GenericModelExporter,
 )
 from core.data_exchange.includes.types import FileFormats
+from core.data_exchange.includes.utils import estimate_count
 from core.data_exchange.models import ExportTask
+from core.data_exchange.serializers import BaseExportOptionsSerializer
+from core.data_exchange.tests.test_includes.test_record_exporter import (
+    MockExportSerializer,
+)
+from core.data_exchange.tests.utils import create_test_export_task
+from members.tests.utils import create_cluster
 
 
 class GenericModelExporterTestCases(TestUsers, TestCase):
@@ -59,3 +72,70 @@ class GenericModelExporterTestCases(TestUsers, TestCase):
             self.generic_model_exporter._create_export_task(self.queryset, True)
         )
         self.assertTrue(self.generic_model_exporter._is_async)
+
+
+class InProcessExportTestCases(TestCase):
+    def setUp(self):
+        _, self.admin = create_cluster()
+        content_type = ContentType.objects.get_for_model(ExportTask)
+        self.tasks = [
+            create_test_export_task(
+                owner_id=self.admin.id,
+                created_by=self.admin,
+                content_type=content_type,
+                last_modified_by=self.admin.id,
+            )[1]
+            for _ in range(3)
+        ]
+        self.request = create_fake_request(self.admin)
+        self.request.data = {"format": FileFormats.CSV}
+
+    def _get_exporter_instance(self) -> GenericModelExporter:
+        return GenericModelExporter(
+            request=self.request,
+            base_queryset=ExportTask.objects.filter(owner_id=self.admin.id),
+            export_serializer_class=MockExportSerializer,
+            options_serializer_class=BaseExportOptionsSerializer,
+            filters={"owner_id": self.admin.id},
+        )
+
+    @patch("core.data_exchange.tasks.export_records.apply_async")
+    def test_small_export_is_streamed_in_process(self, apply_async):
+        response = self._get_exporter_instance().get_response()
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,status,amount")
+        self.assertEqual(len(lines), 4)
+        apply_async.assert_not_called()
+        self.assertEqual(ExportTask.objects.count(), 3)
+
+    @patch("core.data_exchange.tasks.export_records.apply_async")
+    def test_large_export_is_scheduled(self, apply_async):
+        with patch.object(generic_model_exporter, "estimate_count", return_value=5000):
+            response = self._get_exporter_instance().get_response()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        task = ExportTask.objects.get(pk=response.data["id"])
+        kwargs = apply_async.call_args.kwargs["kwargs"]
+        self.assertEqual(kwargs["task_id"], task.id)
+        dumps(kwargs)  # The task payload is JSON serializable
+
+    @patch("core.data_exchange.tasks.export_records.apply_async")
+    def test_underestimated_export_is_scheduled(self, apply_async):
+        with (
+            patch.object(generic_model_exporter, "estimate_count", return_value=1),
+            patch.object(generic_model_exporter, "MAX_SYNC_RECORD_SIZE", 2),
+        ):
+            response = self._get_exporter_instance().get_response()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        apply_async.assert_called_once()
+
+    def test_estimate_count_uses_query_plan(self):
+        with CaptureQueriesContext(connection) as queries:
+            count = estimate_count(ExportTask.objects.filter(owner_id=self.admin.id))
+
+        self.assertIsInstance(count, int)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("EXPLAIN"))
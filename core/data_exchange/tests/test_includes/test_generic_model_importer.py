@@ -1,11 +1,16 @@
+import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 
 from accounts.tests.utils import TestUsers, create_fake_request
 from core.data_exchange.includes.generic_model_importer import (
+    ERROR_COUNT_HEADER,
     GenericModelImporter,
 )
 from core.data_exchange.includes.types import FileFormats
@@ -13,8 +18,10 @@ from core.data_exchange.models import ImportTask
 from core.data_exchange.serializers import BaseImportedDataSerializer
 from core.data_exchange.tests.test_includes import fixtures
 from core.data_exchange.tests.test_includes.test_record_importer import (
+    MockChunkImportSerializer,
     MockModelImportSerializer,
 )
+from members.tests.utils import create_cluster
 
 
 def create_test_file(file_path: Path, file_name: str) -> SimpleUploadedFile:
@@ -65,3 +72,125 @@ class GenericModelImporterTestCases(TestUsers, TestCase):
         self.assertListEqual(
             response.data, [{"data": [{"name": "John Doe", "email": "jd@example.com"}]}]
         )
+
+
+class MockValidatedRowsImportSerializer(MockChunkImportSerializer):
+    # Number of times imported rows were validated by any instance
+    validation_count = 0
+
+    def validate(self, attrs: dict) -> dict:
+        if self.validated_rows is not None:
+            return {"data": self.validated_rows}
+        MockValidatedRowsImportSerializer.validation_count += 1
+        return super().validate(attrs)
+
+    def get_validated_rows(self) -> list[dict]:
+        return self.validated_data["data"]
+
+
+class MockImportedDataSerializer(BaseImportedDataSerializer):
+    IMPORTABLE_ATTRIBUTES = ["name", "email"]
+
+
+class DryRunImportTestCases(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        _, self.admin = create_cluster()
+        MockValidatedRowsImportSerializer.saved_names = []
+        MockValidatedRowsImportSerializer.validation_count = 0
+
+    def _get_response(self, content: bytes, dry_run: bool):
+        request = create_fake_request(self.admin)
+        request.data = {
+            "column_mapping": {"customer name": "name", "email": "email"},
+            "has_headers": True,
+            "file": SimpleUploadedFile("customers.csv", content),
+            "dry_run": dry_run,
+        }
+        return GenericModelImporter(
+            request=request,
+            import_serializer_class=MockValidatedRowsImportSerializer,
+            import_data_serializer_class=MockImportedDataSerializer,
+            is_async=False,
+            serializer_context={"owner_id": self.admin.id},
+        ).get_response()
+
+    def _read_report(self, response) -> list[str]:
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_import_reuses_rows_validated_by_dry_run(self):
+        content = b"customer name,email\nJohn,john@example.com\nJane,jane@example.com\n"
+
+        response = self._get_response(content, dry_run=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response[ERROR_COUNT_HEADER], "0")
+        self.assertListEqual(
+            self._read_report(response), ["row_number,title,description"]
+        )
+        self.assertListEqual(MockValidatedRowsImportSerializer.saved_names, [])
+
+        response = self._get_response(content, dry_run=False)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            MockValidatedRowsImportSerializer.saved_names, ["John", "Jane"]
+        )
+        self.assertEqual(MockValidatedRowsImportSerializer.validation_count, 1)
+
+    @patch("core.data_exchange.tasks.import_records_in_chunks.apply_async")
+    def test_large_file_is_imported_in_chunks(self, apply_async):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        request = create_fake_request(self.admin)
+        request.data = {
+            "column_mapping": {"customer name": "name", "email": "email"},
+            "has_headers": True,
+            "file": SimpleUploadedFile(
+                "customers.csv", b"customer name,email\nJohn,john@example.com\n"
+            ),
+        }
+
+        with override_settings(MEDIA_ROOT=media_root.name):
+            response = GenericModelImporter(
+                request=request,
+                import_serializer_class=MockValidatedRowsImportSerializer,
+                import_data_serializer_class=MockImportedDataSerializer,
+                is_async=False,
+                serializer_context={"owner_id": self.admin.id},
+                chunked=True,
+                max_sync_file_size=16,
+            ).get_response()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        apply_async.assert_called_once()
+        self.assertListEqual(MockValidatedRowsImportSerializer.saved_names, [])
+
+    def test_import_of_changed_file_is_validated_again(self):
+        self._get_response(
+            b"customer name,email\nJohn,john@example.com\n", dry_run=True
+        )
+
+        self._get_response(
+            b"customer name,email\nJane,jane@example.com\n", dry_run=False
+        )
+
+        self.assertListEqual(MockValidatedRowsImportSerializer.saved_names, ["Jane"])
+        self.assertEqual(MockValidatedRowsImportSerializer.validation_count, 2)
+
+    def test_dry_run_streams_error_report(self):
+        content = b"customer name,email\ninvalid,john@example.com\n"
+
+        response = self._get_response(content, dry_run=True)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response[ERROR_COUNT_HEADER], "1")
+        report = self._read_report(response)
+        self.assertEqual(len(report), 2)
+        self.assertTrue(report[1].startswith("2,,"))
+        self.assertIn("invalid name", report[1])
+
+        # Invalid rows are not cached
+        with self.assertRaises(ValidationError):
+            self._get_response(content, dry_run=False)
+        self.assertEqual(MockValidatedRowsImportSerializer.validation_count, 2)
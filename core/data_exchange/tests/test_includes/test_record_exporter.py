@@ -1,14 +1,70 @@
+import csv
 import re
+from decimal import Decimal
+from io import BytesIO, StringIO
 from unittest import mock
 from uuid import uuid4
 
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
+from rest_framework import serializers
 
 from accounts.tests.utils import TestUsers
+from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.export_spec import ExportQuerySpec
 from core.data_exchange.includes.record_exporter import RecordExporter
+from core.data_exchange.includes.types import FileFormats, StorageLocations
+from core.data_exchange.includes.utils import decode_output_result
 from core.data_exchange.models import ExportTask
 from core.data_exchange.serializers import BaseExportSerializer
+from core.data_exchange.tests.utils import create_test_export_task
+from members.tests.utils import create_cluster
+
+
+class MockExportSerializer(serializers.Serializer):
+    # Sizes of the batches of records serialized by every instance
+    batch_sizes: list[int] = []
+
+    id = serializers.UUIDField()
+    status = serializers.CharField()
+    amount = serializers.SerializerMethodField()
+
+    def __init__(self, instance=None, *args, **kwargs):
+        kwargs.pop("extra_fields", None)
+        super().__init__(instance, *args, **kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        cls.batch_sizes.append(len(args[0]))
+        return super().many_init(*args, **kwargs)
+
+    def get_amount(self, task: ExportTask) -> float:
+        return 1 / 3
+
+
+class MockTypedExportSerializer(MockExportSerializer):
+    created_at = serializers.DateTimeField()
+    completed_at = serializers.DateTimeField()
+    notify_on_success = serializers.BooleanField()
+    # Test tasks are created with a decimal SQL query
+    price = serializers.DecimalField(
+        max_digits=11, decimal_places=2, source="sql_query"
+    )
+
+
+class MockUntypedExportSerializer(MockExportSerializer):
+    # Ids of the tasks whose note is text rather than a number
+    text_note_ids: set = set()
+
+    content_type = serializers.PrimaryKeyRelatedField(read_only=True)
+    note = serializers.SerializerMethodField()
+
+    def get_note(self, task: ExportTask):
+        return "text" if task.id in self.text_note_ids else 1
 
 
 class RecordExporterTestCases(TestUsers, TestCase):
@@ -23,8 +79,7 @@ class RecordExporterTestCases(TestUsers, TestCase):
 
         cls.queryset = ExportTask.objects.all()
         cls.record_exporter = RecordExporter(
-            model_class=ExportTask,
-            queryset_dict=cls.queryset.__dict__,
+            export_spec=ExportQuerySpec.from_queryset(cls.queryset),
             serializer_class=BaseExportSerializer,
             owner_id=cls.owner1["owner_id"],
             always_on_bigdrive=True,
@@ -70,3 +125,162 @@ class RecordExporterTestCases(TestUsers, TestCase):
 
     def test_file_mimetype(self):
         self.assertEqual(self.record_exporter._file_mimetype, "text/csv")
+
+
+class StreamingRecordExporterTestCases(TestCase):
+    def setUp(self):
+        _, admin = create_cluster()
+        content_type = ContentType.objects.get_for_model(ExportTask)
+        self.tasks = [
+            create_test_export_task(
+                owner_id=admin.id,
+                created_by=admin,
+                content_type=content_type,
+                last_modified_by=admin.id,
+                sql_query="12.5",
+            )[1]
+            for _ in range(5)
+        ]
+        self.owner_id = admin.id
+        MockExportSerializer.batch_sizes = []
+
+    def _get_exporter_instance(
+        self,
+        output_format: FileFormats,
+        storage_location: StorageLocations,
+        serializer_class=MockExportSerializer,
+    ) -> RecordExporter:
+        return RecordExporter(
+            export_spec=ExportQuerySpec.from_queryset(
+                ExportTask.objects.order_by("created_at")
+            ),
+            serializer_class=serializer_class,
+            output_format=output_format,
+            storage_location=storage_location,
+            owner_id=self.owner_id,
+            always_on_external=False,
+            chunk_size=2,
+        )
+
+    def test_export_csv_to_disk(self):
+        exporter = self._get_exporter_instance(
+            FileFormats.CSV, StorageLocations.DISK_FILE
+        )
+        export_output = exporter.export()
+        self.addCleanup(export_output.file.unlink)
+
+        self.assertEqual(export_output.file, settings.TEMP_DIR / exporter._file_name)
+        rows = list(csv.reader(StringIO(export_output.file.read_text())))
+        self.assertListEqual(rows[0], ["id", "status", "amount"])
+        self.assertListEqual(
+            rows[1:],
+            [[str(task.id), task.status, "0.33"] for task in self.tasks],
+        )
+        self.assertListEqual(MockExportSerializer.batch_sizes, [2, 2, 1])
+
+    def test_export_xlsx_to_memory(self):
+        exporter = self._get_exporter_instance(
+            FileFormats.XLSX, StorageLocations.MEMORY_FILE
+        )
+        export_output = exporter.export()
+
+        workbook = openpyxl.load_workbook(
+            BytesIO(decode_output_result(export_output.file))
+        )
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[0], ("id", "status", "amount"))
+        self.assertListEqual(
+            rows[1:], [(str(task.id), task.status, 0.33) for task in self.tasks]
+        )
+        self.assertListEqual(MockExportSerializer.batch_sizes, [2, 2, 1])
+
+    def test_export_with_no_records(self):
+        ExportTask.objects.all().delete()
+        exporter = self._get_exporter_instance(
+            FileFormats.CSV, StorageLocations.MEMORY_FILE
+        )
+        self.assertEqual(decode_output_result(exporter.export().file), b"")
+
+    def test_export_parquet(self):
+        exporter = self._get_exporter_instance(
+            FileFormats.PARQUET,
+            StorageLocations.MEMORY_FILE,
+            serializer_class=MockTypedExportSerializer,
+        )
+        export_output = exporter.export()
+
+        self.assertTrue(exporter._file_name.endswith(".parquet"))
+        self.assertEqual(export_output.mime_type, "application/vnd.apache.parquet")
+        parquet_file = pq.ParquetFile(BytesIO(decode_output_result(export_output.file)))
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(
+            table.schema,
+            pa.schema(
+                [
+                    ("id", pa.string()),
+                    ("status", pa.string()),
+                    ("amount", pa.string()),
+                    ("created_at", pa.timestamp("us", tz=settings.TIME_ZONE)),
+                    ("completed_at", pa.timestamp("us", tz=settings.TIME_ZONE)),
+                    ("notify_on_success", pa.bool_()),
+                    ("price", pa.decimal128(11, 2)),
+                ]
+            ),
+        )
+        rows = table.to_pylist()
+        self.assertEqual(rows[0]["id"], str(self.tasks[0].id))
+        self.assertEqual(rows[0]["created_at"], self.tasks[0].created_at)
+        self.assertIsNone(rows[0]["completed_at"])
+        self.assertEqual(rows[0]["price"], Decimal("12.50"))
+
+    def test_export_feather(self):
+        exporter = self._get_exporter_instance(
+            FileFormats.FEATHER, StorageLocations.MEMORY_FILE
+        )
+        export_output = exporter.export()
+
+        reader = pa.ipc.open_file(BytesIO(decode_output_result(export_output.file)))
+        self.assertEqual(reader.num_record_batches, 3)
+        self.assertListEqual(
+            reader.read_all().column("id").to_pylist(),
+            [str(task.id) for task in self.tasks],
+        )
+
+    def test_export_parquet_with_untyped_values_changing_between_batches(self):
+        MockUntypedExportSerializer.text_note_ids = {self.tasks[-1].id}
+        exporter = self._get_exporter_instance(
+            FileFormats.PARQUET,
+            StorageLocations.MEMORY_FILE,
+            serializer_class=MockUntypedExportSerializer,
+        )
+        export_output = exporter.export()
+
+        table = pq.read_table(BytesIO(decode_output_result(export_output.file)))
+        self.assertEqual(table.schema.field("content_type").type, pa.string())
+        self.assertEqual(table.schema.field("note").type, pa.string())
+        self.assertListEqual(
+            table.column("note").to_pylist(), ["1", "1", "1", "1", "text"]
+        )
+
+    def test_export_parquet_with_values_not_fitting_their_type(self):
+        exporter = self._get_exporter_instance(
+            FileFormats.PARQUET, StorageLocations.MEMORY_FILE
+        )
+
+        with mock.patch(
+            "core.data_exchange.includes.record_exporter._get_arrow_column_types",
+            return_value={"status": (pa.int64(), str)},
+        ):
+            with self.assertRaises(DataExportException):
+                exporter.export()
+
+    def test_export_parquet_with_no_records(self):
+        ExportTask.objects.all().delete()
+        exporter = self._get_exporter_instance(
+            FileFormats.PARQUET, StorageLocations.MEMORY_FILE
+        )
+        export_output = exporter.export()
+
+        table = pq.read_table(BytesIO(decode_output_result(export_output.file)))
+        self.assertEqual(table.num_rows, 0)
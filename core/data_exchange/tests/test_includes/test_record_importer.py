@@ -1,16 +1,21 @@
 from collections import OrderedDict
+from io import BytesIO
 from pathlib import Path
 from typing import Optional, Mapping, Any
 
+import openpyxl
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from rest_framework import serializers
 
 from core.data_exchange.includes.record_importer import RecordImporter
 from core.data_exchange.includes.types import FileFormats, ImportResult
 from core.data_exchange.models import ImportTask
 from core.data_exchange.serializers import DynamicFieldsSerializer
 from core.data_exchange.tests.test_includes import fixtures
+from core.data_exchange.tests.utils import create_test_import_task
+from members.tests.utils import create_cluster
 
 
 class MockModelImportSerializer(DynamicFieldsSerializer):
@@ -25,6 +30,28 @@ class MockModelImportSerializer(DynamicFieldsSerializer):
         )
 
 
+class MockChunkImportSerializer(DynamicFieldsSerializer):
+    # Names of the rows saved by every instance, and a name whose chunk fails to save
+    saved_names: list[str] = []
+    crash_on: Optional[str] = None
+
+    @classmethod
+    def get_content_type(cls) -> ContentType:
+        return ContentType.objects.get_for_model(ImportTask)
+
+    def validate(self, attrs: dict) -> dict:
+        if any(row["name"] == "invalid" for row in attrs["data"]):
+            raise serializers.ValidationError("invalid name")
+        return attrs
+
+    def save(self, **kwargs) -> ImportResult:
+        names = [row["name"] for row in self.validated_data["data"]]
+        if self.crash_on in names:
+            raise RuntimeError("worker lost")
+        self.saved_names.extend(names)
+        return ImportResult(errors=[], data=[], object_ids=names, total_skipped=0)
+
+
 class RecordImporterTestCases(SimpleTestCase):
     def _get_importer_instance(
         self,
@@ -164,3 +191,92 @@ class RecordImporterTestCases(SimpleTestCase):
             ],
             imports.data,
         )
+
+
+class ChunkedRecordImporterTestCases(TestCase):
+    def setUp(self):
+        _, admin = create_cluster()
+        _, self.task = create_test_import_task(
+            owner_id=admin.id,
+            created_by=admin,
+            content_type=MockChunkImportSerializer.get_content_type(),
+            last_modified_by=admin.id,
+        )
+        MockChunkImportSerializer.saved_names = []
+        MockChunkImportSerializer.crash_on = None
+
+    def _get_importer_instance(
+        self, file_data: bytes, file_name: str, chunk_size: int = 2
+    ) -> RecordImporter:
+        import_data = {
+            "column_mapping": {"customer name": "name", "email": "email"},
+            "format": None,
+            "has_headers": True,
+            "file": SimpleUploadedFile(file_name, file_data),
+        }
+        return RecordImporter(
+            import_data=import_data,
+            import_serializer_class=MockChunkImportSerializer,
+            chunk_size=chunk_size,
+        )
+
+    def _csv_file_data(self, names: list[str]) -> bytes:
+        lines = ["customer name,email"] + [f"{name},{name}@example.com" for name in names]
+        return "\n".join(lines).encode()
+
+    def test_imports_csv_file_in_chunks(self):
+        names = ["a", "b", "c", "d", "e"]
+        importer = self._get_importer_instance(self._csv_file_data(names), "file.csv")
+
+        result = importer.import_in_chunks(self.task)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.committed_chunks, 3)
+        self.assertEqual(self.task.processed_rows, 5)
+        self.assertListEqual(self.task.imported_object_ids, names)
+        self.assertListEqual(result.object_ids, names)
+        self.assertListEqual(MockChunkImportSerializer.saved_names, names)
+
+    def test_imports_excel_file_in_chunks(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["email", "customer name"])
+        for name in ["a", "b", "c"]:
+            workbook.active.append([f"{name}@example.com", name])
+        file = BytesIO()
+        workbook.save(file)
+        importer = self._get_importer_instance(file.getvalue(), "file.xlsx")
+
+        result = importer.import_in_chunks(self.task)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.committed_chunks, 2)
+        self.assertListEqual(result.object_ids, ["a", "b", "c"])
+
+    def test_resumes_after_last_committed_chunk(self):
+        file_data = self._csv_file_data(["a", "b", "c", "d", "e"])
+        MockChunkImportSerializer.crash_on = "d"
+
+        with self.assertRaises(RuntimeError):
+            self._get_importer_instance(file_data, "file.csv").import_in_chunks(self.task)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.committed_chunks, 1)
+
+        MockChunkImportSerializer.crash_on = None
+        result = self._get_importer_instance(file_data, "file.csv").import_in_chunks(self.task)
+
+        self.assertListEqual(result.object_ids, ["a", "b", "c", "d", "e"])
+        self.assertListEqual(
+            MockChunkImportSerializer.saved_names, ["a", "b", "c", "d", "e"]
+        )
+
+    def test_skips_invalid_chunk(self):
+        importer = self._get_importer_instance(
+            self._csv_file_data(["a", "b", "invalid", "d"]), "file.csv"
+        )
+
+        result = importer.import_in_chunks(self.task)
+
+        self.assertListEqual(result.object_ids, ["a", "b"])
+        self.assertEqual(result.total_skipped, 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].row_number, 4)
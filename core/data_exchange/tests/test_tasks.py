@@ -0,0 +1,124 @@
+import tempfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from kombu.utils.json import dumps, loads
+
+from core.data_exchange import tasks
+from core.data_exchange.includes.export_spec import ExportQuerySpec
+from core.data_exchange.includes.utils import get_class_path
+from core.data_exchange.models import BaseTask, ExportTask
+from core.data_exchange.tests.test_includes.test_record_exporter import (
+    MockExportSerializer,
+)
+from core.data_exchange.tests.test_includes.test_record_importer import (
+    MockChunkImportSerializer,
+)
+from core.data_exchange.tests.utils import (
+    create_test_export_task,
+    create_test_import_task,
+)
+from members.tests.utils import create_cluster
+
+
+class DataExchangeTasksTestCases(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        _, self.admin = create_cluster()
+        MockChunkImportSerializer.saved_names = []
+
+    def _apply(self, task, **kwargs):
+        # Arguments go through the JSON round trip of a task message
+        return task.apply(kwargs=loads(dumps(kwargs)))
+
+    def test_export_records(self):
+        _, task = create_test_export_task(
+            owner_id=self.admin.id,
+            created_by=self.admin,
+            content_type=ContentType.objects.get_for_model(ExportTask),
+            last_modified_by=self.admin.id,
+        )
+        export_spec = ExportQuerySpec.from_queryset(
+            ExportTask.objects.filter(owner_id=self.admin.id),
+            filters={"owner_id": self.admin.id},
+        )
+
+        result = self._apply(
+            tasks.export_records,
+            export_spec=export_spec.to_dict(),
+            serializer_class=get_class_path(MockExportSerializer),
+            task_id=task.id,
+            output_format="CSV",
+            storage_location="EXTERNAL",
+            owner_id=self.admin.id,
+        )
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, BaseTask.TaskStatuses.SUCCESS)
+        self.assertEqual(task.file_key, result.get().file)
+        with default_storage.open(task.file_key) as file:
+            self.assertIn(str(task.id), file.read().decode())
+
+    def test_import_records(self):
+        _, task = create_test_import_task(
+            owner_id=self.admin.id,
+            created_by=self.admin,
+            content_type=MockChunkImportSerializer.get_content_type(),
+            last_modified_by=self.admin.id,
+        )
+        file_name = default_storage.save(
+            f"imports/{task.id}/customers.csv",
+            ContentFile(b"customer name,email\nJohn,john@example.com\n"),
+        )
+
+        self._apply(
+            tasks.import_records,
+            import_data={
+                "column_mapping": {"customer name": "name", "email": "email"},
+                "format": None,
+                "has_headers": True,
+                "file": file_name,
+            },
+            import_serializer_class=get_class_path(MockChunkImportSerializer),
+            serializer_context={"owner_id": self.admin.id},
+            task_id=task.id,
+        )
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, BaseTask.TaskStatuses.SUCCESS)
+        self.assertListEqual(task.imported_object_ids, ["John"])
+        self.assertFalse(default_storage.exists(file_name))
+
+    def test_import_of_missing_file_fails_the_task(self):
+        for import_task in (tasks.import_records, tasks.import_records_in_chunks):
+            with self.subTest(import_task.name):
+                _, task = create_test_import_task(
+                    owner_id=self.admin.id,
+                    created_by=self.admin,
+                    content_type=MockChunkImportSerializer.get_content_type(),
+                    last_modified_by=self.admin.id,
+                )
+
+                result = self._apply(
+                    import_task,
+                    import_data={
+                        "column_mapping": {"customer name": "name"},
+                        "format": None,
+                        "has_headers": True,
+                        "file": f"imports/{task.id}/customers.csv",
+                    },
+                    import_serializer_class=get_class_path(MockChunkImportSerializer),
+                    serializer_context={"owner_id": self.admin.id},
+                    task_id=task.id,
+                )
+
+                self.assertTrue(result.successful())
+                task.refresh_from_db()
+                self.assertEqual(task.status, BaseTask.TaskStatuses.FAIL)
@@ -2,15 +2,14 @@ from typing import Collection, cast
 
 from django.apps import apps
 from django.db.models import QuerySet
-from django.http import HttpResponse, HttpResponseRedirect
-from django.utils.translation import gettext as _
+from django.http import HttpResponse
 from rest_framework import mixins
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from core.data_exchange.includes.exported_files import get_exported_file_response
 from core.data_exchange.models import ExportTask, ImportTask
 from core.data_exchange.permissions import (
     CanViewExportAndImportTask,
@@ -68,16 +67,10 @@ class ExportTaskViewSet(
         task data.
         """
         task: ExportTask = self.get_object()
-        if not task.external_file_id:
+        if not task.file_key:
             serializer = self.get_serializer(task)
             return Response(serializer.data)
-        # TODO: Implement a factory that returns a processor for third-party storage platforms like AWS/Cloudinary
-        #  based on the instance of the task to get the file url
-        #  also see: core.data_exchange.includes.record_exporter.RecordExporter._save_to_external_service
-        signed_url = ...  # TODO
-        if not signed_url:
-            raise NotFound(detail=_("File not found"))
-        return HttpResponseRedirect(signed_url)
+        return get_exported_file_response(task.file_key)
 
     @action(
         detail=True,
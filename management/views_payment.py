@@ -3,12 +3,14 @@ Payment management views for ClustR management app.
 """
 
 import logging
-from decimal import Decimal
-from django.db.models import Sum
+import uuid
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags, quote_etag
 
 from accounts.permissions import HasSpecificPermission, IsClusterStaffOrAdmin
 from core.common.permissions import PaymentsPermissions
@@ -30,10 +32,17 @@ from core.common.includes.third_party_services import (
 )
 from core.common.responses import success_response, error_response
 from core.common.error_codes import CommonAPIErrorCodes
+from core.data_exchange.exceptions import DataExportException
+from core.data_exchange.includes.delta_export import Watermark
 from core.common.includes.payment_error import retry_failed_payment
-from core.common.includes import bills, recurring_payments, cluster_wallet
+from core.common.includes import (
+    bills,
+    recurring_payments,
+    cluster_wallet,
+    payment_dashboard,
+    payment_exports,
+)
 from core.common.serializers.payment_serializers import (
-    PaymentDashboardSerializer,
     CreateBillSerializer,
     BulkBillsSerializer,
     BillListResponseSerializer,
@@ -56,6 +65,12 @@ from django.shortcuts import get_object_or_404
 logger = logging.getLogger("clustr")
 
 
+class InvalidFilterError(ValueError):
+    """
+    Raised when a filter query parameter cannot be parsed.
+    """
+
+
 class PaymentManagementViewSet(viewsets.ViewSet):
     """
     ViewSet for payment management operations (admin/staff only).
@@ -86,82 +101,19 @@ class PaymentManagementViewSet(viewsets.ViewSet):
         """
         try:
             cluster = request.cluster_context
+            data, etag = payment_dashboard.get_dashboard(cluster)
+            etag = quote_etag(etag)
 
-            # Get payment statistics
-            total_wallets = Wallet.objects.filter(cluster=cluster).count()
-            total_transactions = Transaction.objects.filter(cluster=cluster).count()
-            total_bills = Bill.objects.filter(cluster=cluster).count()
-            total_recurring_payments = RecurringPayment.objects.filter(
-                cluster=cluster
-            ).count()
-
-            # Get financial summary
-            completed_transactions = Transaction.objects.filter(
-                cluster=cluster, status=TransactionStatus.COMPLETED
-            )
-
-            total_transaction_volume = completed_transactions.aggregate(
-                total=Sum("amount")
-            )["total"] or Decimal("0.00")
-
-            pending_bills = Bill.objects.filter(
-                cluster=cluster,
-                paid_at__isnull=True,
-            )
-
-            total_pending_bills_amount = pending_bills.aggregate(
-                total=Sum("amount") - Sum("paid_amount")
-            )["total"] or Decimal("0.00")
-
-            # Get recent activity
-            recent_transactions = Transaction.objects.filter(cluster=cluster).order_by(
-                "-created_at"
-            )[:10]
-
-            recent_bills = Bill.objects.filter(cluster=cluster).order_by("-created_at")[
-                :10
-            ]
-
-            # Get cluster wallet information
-            cluster_wallet_info = cluster_wallet.get_wallet_balance(cluster)
-            cluster_revenue = cluster_wallet.get_revenue_summary(cluster, days=30)
-
-            dashboard_data = {
-                "statistics": {
-                    "total_wallets": total_wallets,
-                    "total_transactions": total_transactions,
-                    "total_bills": total_bills,
-                    "total_recurring_payments": total_recurring_payments,
-                    "total_transaction_volume": total_transaction_volume,
-                    "total_pending_bills_amount": total_pending_bills_amount,
-                },
-                "cluster_wallet": {
-                    "balance": cluster_wallet_info["balance"],
-                    "available_balance": cluster_wallet_info["available_balance"],
-                    "currency": cluster_wallet_info["currency"],
-                    "status": cluster_wallet_info["status"],
-                    "last_transaction_at": cluster_wallet_info["last_transaction_at"],
-                },
-                "cluster_revenue": {
-                    "period_days": cluster_revenue["period_days"],
-                    "total_revenue": cluster_revenue["total_revenue"],
-                    "bill_payment_count": cluster_revenue["bill_payment_count"],
-                    "current_balance": cluster_revenue["current_balance"],
-                    "transactions_count": cluster_revenue["transactions_count"],
-                },
-                "recent_transactions": TransactionSerializer(
-                    recent_transactions, many=True
-                ).data,
-                "recent_bills": BillSerializer(recent_bills, many=True).data,
-            }
-
-            serializer = PaymentDashboardSerializer(data=dashboard_data)
-            serializer.is_valid(raise_exception=True)
-
-            return success_response(
-                data=serializer.validated_data,
-                message="Payment dashboard data retrieved successfully",
-            )
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = success_response(
+                    data=data,
+                    message="Payment dashboard data retrieved successfully",
+                )
+            response["ETag"] = etag
+            response["Cache-Control"] = "private, no-cache"
+            return response
 
         except Exception as e:
             logger.error(f"Error retrieving payment dashboard: {e}")
@@ -311,43 +263,209 @@ class PaymentManagementViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-    @action(detail=False, methods=["get"])
-    def bills(self, request):
+    def _get_uuid_param(self, request, name):
         """
-        Get bills with filtering and pagination.
-        Supports filtering by user_id, bill_type, and cluster_wide status.
+        Get a UUID query parameter.
+        Raises InvalidFilterError if it is not a UUID.
         """
+        value = request.query_params.get(name)
+        if not value:
+            return None
         try:
-            cluster = request.cluster_context
+            return uuid.UUID(value)
+        except ValueError:
+            raise InvalidFilterError(f"{name} must be a valid UUID")
 
-            user_id = request.query_params.get("user_id")
-            bill_type = request.query_params.get("type")
-            is_cluster_wide = request.query_params.get("cluster_wide")
+    def _get_date_param(self, request, name):
+        """
+        Get a YYYY-MM-DD date query parameter.
+        Raises InvalidFilterError if it is not a valid date.
+        """
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise InvalidFilterError(f"{name} must be a valid date in YYYY-MM-DD format")
+        return date
+
+    def _filter_error(self, error):
+        return error_response(
+            error_code=CommonAPIErrorCodes.VALIDATION_ERROR,
+            message=str(error),
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
 
-            queryset = Bill.objects.filter(cluster=cluster)
+    def _get_bills_queryset(self, request):
+        """
+        Get the cluster's bills filtered by the user_id, type and cluster_wide query parameters.
+        Raises InvalidFilterError if user_id is not a UUID, null or none.
+        """
+        cluster = request.cluster_context
+
+        user_id = request.query_params.get("user_id")
+        bill_type = request.query_params.get("type")
+        is_cluster_wide = request.query_params.get("cluster_wide")
+
+        queryset = Bill.objects.filter(cluster=cluster)
+
+        # Filter by user_id (supports both specific user and cluster-wide)
+        if user_id:
+            if user_id.lower() == "null" or user_id.lower() == "none":
+                # Show only cluster-wide bills
+                queryset = queryset.filter(user_id__isnull=True)
+            else:
+                # Show bills for specific user
+                queryset = queryset.filter(user_id=self._get_uuid_param(request, "user_id"))
+
+        # Filter by cluster-wide status
+        if is_cluster_wide is not None:
+            if is_cluster_wide.lower() in ["true", "1", "yes"]:
+                queryset = queryset.filter(user_id__isnull=True)
+            elif is_cluster_wide.lower() in ["false", "0", "no"]:
+                queryset = queryset.filter(user_id__isnull=False)
+
+        if bill_type:
+            queryset = queryset.filter(type=bill_type)
+
+        return queryset
+
+    def _get_transactions_queryset(self, request):
+        """
+        Get the cluster's transactions filtered by the user_id, type, status, from and to
+        query parameters.
+        Raises InvalidFilterError if user_id is not a UUID or from or to is not a date.
+        """
+        cluster = request.cluster_context
 
-            # Filter by user_id (supports both specific user and cluster-wide)
-            if user_id:
-                if user_id.lower() == "null" or user_id.lower() == "none":
-                    # Show only cluster-wide bills
-                    queryset = queryset.filter(user_id__isnull=True)
-                else:
-                    # Show bills for specific user
-                    queryset = queryset.filter(user_id=user_id)
+        user_id = self._get_uuid_param(request, "user_id")
+        transaction_type = request.query_params.get("type")
+        status_filter = request.query_params.get("status")
+        date_from = self._get_date_param(request, "from")
+        date_to = self._get_date_param(request, "to")
 
-            # Filter by cluster-wide status
-            if is_cluster_wide is not None:
-                if is_cluster_wide.lower() in ["true", "1", "yes"]:
-                    queryset = queryset.filter(user_id__isnull=True)
-                elif is_cluster_wide.lower() in ["false", "0", "no"]:
-                    queryset = queryset.filter(user_id__isnull=False)
+        queryset = Transaction.objects.filter(cluster=cluster)
 
-            if bill_type:
-                queryset = queryset.filter(type=bill_type)
+        if user_id:
+            queryset = queryset.filter(wallet__user_id=user_id)
 
+        if transaction_type:
+            queryset = queryset.filter(type=transaction_type)
+
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+
+        if date_from:
+            queryset = queryset.filter(created_at__date__gte=date_from)
+
+        if date_to:
+            queryset = queryset.filter(created_at__date__lte=date_to)
+
+        return queryset
+
+    def _get_export_format(self, request):
+        file_format = request.query_params.get("file_format", payment_exports.CSV).lower()
+        if file_format not in payment_exports.EXPORT_FORMATS:
+            return None
+        return file_format
+
+    def _get_export_watermark(self, request):
+        """
+        Get the watermark of a delta export from the since query parameter.
+        An empty since starts a delta export from the first row.
+        Raises DataExportException if since is not a watermark.
+        """
+        since = request.query_params.get("since")
+        return Watermark.from_token(since) if since else None
+
+    def _export_watermark_error(self):
+        return error_response(
+            error_code=CommonAPIErrorCodes.VALIDATION_ERROR,
+            message="since must be the X-Next-Watermark of the previous export",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=["get"], url_path="export/transactions")
+    def export_transactions(self, request):
+        """
+        Download transactions as CSV (streamed) or XLSX.
+        Accepts the transactions filters and file_format=csv|xlsx.
+        With since (the X-Next-Watermark of the previous export, empty for
+        the first one), only the transactions changed since then are exported.
+        """
+        file_format = self._get_export_format(request)
+        if file_format is None:
+            return error_response(
+                error_code=CommonAPIErrorCodes.VALIDATION_ERROR,
+                message="file_format must be one of: csv, xlsx",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            since = self._get_export_watermark(request)
+        except DataExportException:
+            return self._export_watermark_error()
+
+        try:
+            queryset = self._get_transactions_queryset(request)
+        except InvalidFilterError as e:
+            return self._filter_error(e)
+
+        return payment_exports.export_transactions(
+            queryset,
+            file_format,
+            delta="since" in request.query_params,
+            since=since,
+        )
+
+    @action(detail=False, methods=["get"], url_path="export/bills")
+    def export_bills(self, request):
+        """
+        Download bills as CSV (streamed) or XLSX.
+        Accepts the bills filters and file_format=csv|xlsx.
+        With since (the X-Next-Watermark of the previous export, empty for
+        the first one), only the bills changed since then are exported.
+        """
+        file_format = self._get_export_format(request)
+        if file_format is None:
+            return error_response(
+                error_code=CommonAPIErrorCodes.VALIDATION_ERROR,
+                message="file_format must be one of: csv, xlsx",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            since = self._get_export_watermark(request)
+        except DataExportException:
+            return self._export_watermark_error()
+
+        try:
+            queryset = self._get_bills_queryset(request)
+        except InvalidFilterError as e:
+            return self._filter_error(e)
+
+        return payment_exports.export_bills(
+            queryset,
+            file_format,
+            delta="since" in request.query_params,
+            since=since,
+        )
+
+    @action(detail=False, methods=["get"])
+    def bills(self, request):
+        """
+        Get bills with filtering and pagination.
+        Supports filtering by user_id, bill_type, and cluster_wide status.
+        """
+        try:
             # Add prefetch for acknowledged_by to optimize queries
-            queryset = queryset.prefetch_related("acknowledged_by").order_by(
-                "-created_at"
+            queryset = (
+                self._get_bills_queryset(request)
+                .prefetch_related("acknowledged_by")
+                .order_by("-created_at")
             )
 
             paginator = PageNumberPagination()
@@ -385,6 +503,8 @@ class PaymentManagementViewSet(viewsets.ViewSet):
                 message="Bills retrieved successfully",
             )
 
+        except InvalidFilterError as e:
+            return self._filter_error(e)
         except Exception as e:
             logger.error(f"Error retrieving bills: {e}")
             return error_response(
@@ -422,24 +542,7 @@ class PaymentManagementViewSet(viewsets.ViewSet):
         Get transactions with filtering and pagination.
         """
         try:
-            cluster = request.cluster_context
-
-            user_id = request.query_params.get("user_id")
-            transaction_type = request.query_params.get("type")
-            status_filter = request.query_params.get("status")
-
-            queryset = Transaction.objects.filter(cluster=cluster)
-
-            if user_id:
-                queryset = queryset.filter(wallet__user_id=user_id)
-
-            if transaction_type:
-                queryset = queryset.filter(type=transaction_type)
-
-            if status_filter:
-                queryset = queryset.filter(status=status_filter)
-
-            queryset = queryset.order_by("-created_at")
+            queryset = self._get_transactions_queryset(request).order_by("-created_at")
 
             paginator = PageNumberPagination()
             paginator.page_size = 20
@@ -474,6 +577,8 @@ class PaymentManagementViewSet(viewsets.ViewSet):
                 message="Transactions retrieved successfully",
             )
 
+        except InvalidFilterError as e:
+            return self._filter_error(e)
         except Exception as e:
             logger.error(f"Error retrieving transactions: {e}")
             return error_response(
@@ -4,6 +4,7 @@ Resident management views for ClustR management app.
 
 import logging
 import csv
+from collections import defaultdict
 from io import StringIO
 from django.db import transaction
 from django.http import HttpResponse
@@ -17,6 +18,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from accounts.models import AccountUser
 from accounts.permissions import IsClusterStaffOrAdmin
 from core.common.decorators import audit_viewset
+from core.common.includes import resident_imports
 from core.common.responses import success_response, error_response
 from core.common.models import Bill
 from management.serializers_resident import (
@@ -263,57 +265,65 @@ class ResidentViewSet(viewsets.ModelViewSet):
             reader = csv.DictReader(io_string)
             
             cluster = request.cluster_context
-            created_count = 0
-            updated_count = 0
             errors = []
+            rows = {}
             
             for row_num, row in enumerate(reader, start=2):
-                try:
-                    email = row.get('Email', '').strip()
-                    if not email:
-                        errors.append(f"Row {row_num}: Email is required")
-                        continue
-                    
-                    name = row.get('Name', '').strip()
-                    if not name:
-                        errors.append(f"Row {row_num}: Name is required")
-                        continue
-                    
-                    phone = row.get('Phone', '').strip()
-                    unit_address = row.get('Unit Address', '').strip()
-                    
-                    resident, created = AccountUser.objects.get_or_create(
+                email = (row.get('Email') or '').strip()
+                if not email:
+                    errors.append(f"Row {row_num}: Email is required")
+                    continue
+                
+                name = (row.get('Name') or '').strip()
+                if not name:
+                    errors.append(f"Row {row_num}: Name is required")
+                    continue
+                
+                # A later row for the same email address replaces an earlier one
+                rows[email] = {
+                    'name': name,
+                    'phone': (row.get('Phone') or '').strip(),
+                    'unit_address': (row.get('Unit Address') or '').strip(),
+                }
+            
+            existing_residents = resident_imports.get_existing_residents(rows.keys())
+            
+            # Existing residents keep their phone number and unit address when the
+            # row leaves them blank, so rows are upserted in groups of updated fields
+            residents_by_update_fields = defaultdict(list)
+            for email, row in rows.items():
+                update_fields = ['name']
+                if row['phone']:
+                    update_fields.append('phone_number')
+                if row['unit_address']:
+                    update_fields.append('unit_address')
+                
+                residents_by_update_fields[tuple(update_fields)].append(
+                    AccountUser(
                         email_address=email,
-                        defaults={
-                            'name': name,
-                            'phone_number': phone or '+2340000000000',
-                            'unit_address': unit_address,
-                            'is_owner': True,
-                            'is_staff': False,
-                            'is_superuser': False,
-                        }
+                        name=row['name'],
+                        phone_number=row['phone'] or '+2340000000000',
+                        unit_address=row['unit_address'],
+                        is_owner=True,
+                        is_staff=False,
+                        is_superuser=False,
+                        primary_cluster=cluster,
                     )
-                    
-                    if created:
-                        resident.clusters.add(cluster)
-                        resident.primary_cluster = cluster
-                        resident.save()
-                        created_count += 1
-                    else:
-                        resident.name = name
-                        if phone:
-                            resident.phone_number = phone
-                        if unit_address:
-                            resident.unit_address = unit_address
-                        resident.save()
-                        
-                        if cluster not in resident.clusters.all():
-                            resident.clusters.add(cluster)
-                        
-                        updated_count += 1
-                
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
+                )
+            
+            created_residents = []
+            for update_fields, residents in residents_by_update_fields.items():
+                imported_residents = resident_imports.persist_residents(
+                    cluster.id, residents, update_fields=update_fields
+                )
+                created_residents.extend(
+                    resident for resident in imported_residents
+                    if resident.email_address not in existing_residents
+                )
+            resident_imports.queue_welcome_notifications(cluster.id, created_residents)
+            
+            created_count = len(created_residents)
+            updated_count = len(rows) - created_count
             
             return success_response(
                 data={
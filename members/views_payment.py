@@ -6,10 +6,12 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.utils.http import parse_etags, quote_etag
 from django.shortcuts import get_object_or_404
 
 from accounts.permissions import HasSpecificPermission
-from core.common.decorators import audit_viewset
+from core.common.decorators import audit_viewset, idempotent
 from core.common.models import (
     Bill,
     RecurringPayment,
@@ -43,7 +45,7 @@ from core.common.serializers.payment_serializers import (
     WalletBalanceResponseSerializer,
     WalletDepositSerializer,
 )
-from core.common.includes import bills, payments, recurring_payments
+from core.common.includes import bills, payments, recurring_payments, wallet_balances
 from members.filters import BillFilter, RecurringPaymentFilter, TransactionFilter
 
 logger = logging.getLogger("clustr")
@@ -83,34 +85,19 @@ class WalletViewSet(viewsets.ViewSet):
             cluster = request.cluster_context
             user_id = str(request.user.id)
 
-            # Get or create wallet
-            wallet, created = Wallet.objects.get_or_create(
-                cluster=cluster,
-                user_id=user_id,
-                defaults={
-                    "balance": Decimal("0.00"),
-                    "available_balance": Decimal("0.00"),
-                    "currency": "NGN",
-                    "status": WalletStatus.ACTIVE,
-                    "created_by": user_id,
-                    "last_modified_by": user_id,
-                },
-            )
+            read_model = wallet_balances.get_balance(cluster, user_id)
+            etag = quote_etag(read_model["version"])
 
-            serializer = WalletBalanceResponseSerializer(
-                {
-                    "balance": wallet.balance,
-                    "available_balance": wallet.available_balance,
-                    "currency": wallet.currency,
-                    "status": wallet.status,
-                    "is_pin_set": wallet.is_pin_set,
-                    "last_transaction_at": wallet.last_transaction_at,
-                }
-            )
-
-            return success_response(
-                data=serializer.data, message="Wallet balance retrieved successfully"
-            )
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                serializer = WalletBalanceResponseSerializer(read_model)
+                response = success_response(
+                    data=serializer.data, message="Wallet balance retrieved successfully"
+                )
+            response["ETag"] = etag
+            response["Cache-Control"] = "private, no-cache"
+            return response
 
         except Exception as e:
             logger.error(f"Error retrieving wallet balance: {e}")
@@ -120,6 +107,7 @@ class WalletViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["post"])
+    @idempotent("wallet.deposit")
     def deposit(self, request):
         """
         Initialize a wallet deposit.
@@ -154,14 +142,17 @@ class WalletViewSet(viewsets.ViewSet):
                 },
             )
 
-            transaction = payments.create_transaction(
+            transaction = Transaction.objects.create(
+                cluster=cluster,
                 wallet=wallet,
+                type=TransactionType.DEPOSIT,
                 amount=amount,
+                currency=wallet.currency,
+                description="Wallet deposit",
+                status=TransactionStatus.PENDING,
                 provider=provider,
-                user_email=request.user.email_address,
-                transaction_type=TransactionType.DEPOSIT,
-                transaction_status=TransactionStatus.PENDING,
-                callback_url=callback_url,
+                created_by=user_id,
+                last_modified_by=user_id,
             )
             payment_response = payments.initialize(
                 transaction=transaction,
@@ -454,7 +445,8 @@ class BillViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=["post"], url_path="pay-bill", url_name="pay_bill")
-    def pay_bill(self, request):
+    @idempotent("bills.pay_bill")
+    def pay_bill(self, request, pk=None):
         """
         Pay a bill using wallet balance.
         """
@@ -492,7 +484,7 @@ class BillViewSet(viewsets.ModelViewSet):
                     "amount": transaction.amount,
                     "bill_id": bill.id,
                     "bill_status": bill.status,
-                    "remaining_amount": bill.remaining_amount,
+                    "remaining_amount": bill.get_remaining_amount(),
                     "wallet_balance": wallet.balance,
                 }
             )
@@ -519,6 +511,7 @@ class BillViewSet(viewsets.ModelViewSet):
         url_path="pay-bill-direct",
         url_name="pay_bill_direct",
     )
+    @idempotent("bills.pay_bill_direct")
     def pay_bill_direct(self, request):
         """
         Pay a bill directly via payment provider (Paystack/Flutterwave).
@@ -528,13 +521,13 @@ class BillViewSet(viewsets.ModelViewSet):
         try:
             cluster = request.cluster_context
             user_id = str(request.user.id)
-            bill = self.get_object()
 
             serializer = DirectBillPaymentSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
             validated_data = serializer.validated_data
             bill_id = validated_data["bill_id"]
+            bill = get_object_or_404(Bill, id=bill_id, cluster=cluster)
             provider = validated_data["provider"]
             amount = validated_data.get("amount")
             callback_url = validated_data.get("callback_url")
@@ -574,9 +567,10 @@ class BillViewSet(viewsets.ModelViewSet):
                         status_code=status.HTTP_400_BAD_REQUEST,
                     )
 
+            remaining_amount = bill.get_remaining_amount()
             if amount is None:
-                amount = bill.remaining_amount
-            elif amount > bill.remaining_amount:
+                amount = remaining_amount
+            elif amount > remaining_amount:
                 return error_response(
                     message="Payment amount exceeds remaining bill amount",
                     status_code=status.HTTP_400_BAD_REQUEST,